@@ -1,3 +1,5 @@
+from contextlib import asynccontextmanager
+
 from dotenv import load_dotenv
 from fastapi import FastAPI, HTTPException, Request
 from opentelemetry.instrumentation.fastapi import FastAPIInstrumentor
@@ -26,13 +28,32 @@ class SpanEnrichingProcessor(SpanProcessor):
 
 # Function to create the FastAPI application
 def create_app():
-    app = FastAPI()
+    @asynccontextmanager
+    async def lifespan(app: FastAPI):
+        # Events persisted before a crash are replayed before the first request is served
+        await global_manager.startup()
+        yield
+        # Drain the requests being processed before the worker exits (e.g. gunicorn max_requests recycling)
+        await global_manager.shutdown()
+
+    app = FastAPI(lifespan=lifespan)
 
     # Load environment variables
     load_dotenv()
 
     global_manager = GlobalManager(app=app)
 
+    # Live counts of the running and pending background processing tasks
+    @app.get("/health/tasks")
+    async def health_tasks():
+        return global_manager.task_supervisor.stats()
+
+    # Replay statistics of the interaction queues, per channel and thread
+    @app.get("/health/queues")
+    async def health_queues():
+        interaction_queue_manager = getattr(global_manager, 'interaction_queue_manager', None)
+        return interaction_queue_manager.replay_metrics.snapshot() if interaction_queue_manager else {}
+
     # Instrument the FastAPI application
     FastAPIInstrumentor.instrument_app(app)
     logger = global_manager.logger
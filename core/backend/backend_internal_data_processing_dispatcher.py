@@ -140,9 +140,9 @@ class BackendInternalDataProcessingDispatcher(InternalDataProcessingBase):
         plugin: InternalDataProcessingBase = self.get_plugin(plugin_name)
         await plugin.remove_data_content(data_container=data_container, data_file=data_file)
 
-    async def list_container_files(self, container_name, plugin_name=None):
+    async def list_container_files(self, container_name, prefix=None, plugin_name=None):
         plugin: InternalDataProcessingBase = self.get_plugin(plugin_name)
-        return await plugin.list_container_files(container_name=container_name)
+        return await plugin.list_container_files(container_name=container_name, prefix=prefix)
 
     async def remove_data(self, container_name, datafile_name, data, plugin_name=None):
         plugin: InternalDataProcessingBase = self.get_plugin(plugin_name)
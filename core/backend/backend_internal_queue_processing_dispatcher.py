@@ -154,6 +154,14 @@ class BackendInternalQueueProcessingDispatcher(InternalQueueProcessingBase):
         self.logger.info(f"Retrieving all messages for channel '{channel_id}', thread '{thread_id}' through {plugin.plugin_name}.")  
         return await plugin.get_all_messages(data_container=data_container, channel_id=channel_id, thread_id=thread_id)  
   
+    async def get_container_messages(self, data_container: str, plugin_name: Optional[str] = None) -> List[str]:  
+        """  
+        Retrieves the contents of all messages of a container, whatever their channel and thread.  
+        """  
+        plugin = self.get_plugin(plugin_name)  
+        self.logger.info(f"Retrieving all messages of container '{data_container}' through {plugin.plugin_name}.")  
+        return await plugin.get_container_messages(data_container=data_container)  
+  
     async def cleanup_expired_messages(self, data_container: str, channel_id: str, thread_id: str, ttl_seconds: int, plugin_name: Optional[str] = None) -> None:  
         """  
         Cleans up expired messages for a given thread/channel in the queue based on TTL.  
@@ -172,14 +180,14 @@ class BackendInternalQueueProcessingDispatcher(InternalQueueProcessingBase):
         self.logger.info(f"Clearing all queues through {plugin.plugin_name}.")  
         await plugin.clear_all_queues()  
   
-    async def clean_all_queues(self, plugin_name: Optional[str] = None) -> None:  
+    async def clean_all_queues(self, plugin_name: Optional[str] = None) -> int:  
         """  
         Cleans up expired messages across all queues at startup based on TTL.  
         This ensures no expired messages remain in the system across all channels and threads.  
         """  
         plugin = self.get_plugin(plugin_name)  
         self.logger.info(f"Cleaning all expired messages from queues through {plugin.plugin_name}.")  
-        await plugin.clean_all_queues()  
+        return await plugin.clean_all_queues()  
   
     async def create_container(self, data_container, plugin_name: Optional[str] = None):  
         """  
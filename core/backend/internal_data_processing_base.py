@@ -1,4 +1,5 @@
 from abc import abstractmethod
+from typing import Optional
 
 from core.backend.internal_data_plugin_base import InternalDataPluginBase
 
@@ -161,9 +162,10 @@ class InternalDataProcessingBase(InternalDataPluginBase):
         raise NotImplementedError
 
     @abstractmethod
-    async def list_container_files(self, container_name):
+    async def list_container_files(self, container_name, prefix: Optional[str] = None):
         """
-        Asynchronously list the files in a specified container.
+        Asynchronously list the files in a specified container, only the ones whose name starts
+        with `prefix` when given.
         """
         raise NotImplementedError
 
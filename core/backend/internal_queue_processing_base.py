@@ -120,6 +120,14 @@ class InternalQueueProcessingBase(InternalDataPluginBase):
         """
         raise NotImplementedError
 
+    @abstractmethod
+    async def get_container_messages(self, data_container: str) -> List[str]:
+        """
+        Retrieves the contents of all messages of a container, whatever their channel and thread.
+        Used to recover the persisted events at startup.
+        """
+        raise NotImplementedError
+
     @abstractmethod
     async def cleanup_expired_messages(self, data_container: str, channel_id: str, thread_id: str,
                                        ttl_seconds: int) -> None:
@@ -130,10 +138,11 @@ class InternalQueueProcessingBase(InternalDataPluginBase):
         raise NotImplementedError
 
     @abstractmethod
-    async def clean_all_queues(self) -> None:
+    async def clean_all_queues(self) -> int:
         """
         Cleans up expired messages across all queues at startup based on TTL.
         This ensures no expired messages remain in the system across all channels and threads.
+        Returns the number of messages removed.
         """
         raise NotImplementedError
 
@@ -0,0 +1,89 @@
+import asyncio
+import heapq
+import time
+from collections import defaultdict
+from typing import Awaitable, Callable, Dict, List, Optional, Set, Tuple
+
+
+class QueueExpiryScheduler:
+    """
+    Expires the messages of a queue backend from an in-memory min-heap of deadlines, instead of
+    listing every container to check each message TTL.
+
+    Queue plugins schedule each message as they enqueue it, and once at startup for the messages
+    already stored (`clean_all_queues` scan). A background task, started with the plugin, wakes up
+    every `interval` seconds and hands the due messages, grouped by container, to `remove_batch` in
+    a single call per container.
+    Dequeued messages are discarded lazily: their heap entry is skipped when it comes due.
+    """
+
+    def __init__(self, logger, remove_batch: Callable[[str, List[str]], Awaitable[int]], interval: float):
+        self.logger = logger
+        self.remove_batch = remove_batch
+        self.interval = interval
+        self._heap: List[Tuple[float, str, str]] = []
+        self._scheduled: Set[Tuple[str, str]] = set()
+        self._task: Optional[asyncio.Task] = None
+        self.expired = 0
+
+    def __len__(self):
+        return len(self._scheduled)
+
+    @staticmethod
+    def deadline(message_id, ttl_seconds) -> Optional[float]:
+        """Expiry time of a message whose id is its creation timestamp, None when it has none."""
+        try:
+            return float(message_id) + ttl_seconds
+        except (TypeError, ValueError):
+            return None
+
+    def schedule(self, container: str, name: str, deadline: Optional[float]):
+        if deadline is None or (container, name) in self._scheduled:
+            return
+        self._scheduled.add((container, name))
+        heapq.heappush(self._heap, (deadline, container, name))
+
+    def discard(self, container: str, name: str):
+        self._scheduled.discard((container, name))
+
+    def pop_due(self, now: Optional[float] = None) -> Dict[str, List[str]]:
+        """Remove the entries due at `now` from the heap and return their names per container."""
+        now = time.time() if now is None else now
+        due: Dict[str, List[str]] = defaultdict(list)
+        while self._heap and self._heap[0][0] <= now:
+            _, container, name = heapq.heappop(self._heap)
+            if (container, name) in self._scheduled:
+                self._scheduled.discard((container, name))
+                due[container].append(name)
+        return due
+
+    async def expire_due(self, now: Optional[float] = None) -> int:
+        removed = 0
+        for container, names in self.pop_due(now).items():
+            try:
+                removed += await self.remove_batch(container, names)
+            except Exception as e:
+                self.logger.error(f"Failed to remove {len(names)} expired messages from queue '{container}': {e}")
+        self.expired += removed
+        if removed:
+            self.logger.info(f"Removed {removed} expired messages from the queues.")
+        return removed
+
+    def start(self):
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._run())
+
+    async def _run(self):
+        while True:
+            await asyncio.sleep(self.interval)
+            await self.expire_due()
+
+    async def stop(self):
+        if self._task is None:
+            return
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        self._task = None
@@ -0,0 +1,129 @@
+import asyncio
+import time
+from collections import OrderedDict
+
+from core.event_processing.queued_event_codec import PAYLOAD_FILE_PREFIX
+
+# Files of the processing container that are not processing markers
+PRESERVED_FILE_PREFIXES = (PAYLOAD_FILE_PREFIX, 'reactions-')
+MARKER_EXTENSION = '.txt'
+
+class InFlightRegistry:
+    """
+    Tracks the messages the bot has started processing, so that the same message notified twice
+    (platform retries, duplicated events) is only processed once.
+
+    Entries are kept in memory for BOT_CONFIG.IN_FLIGHT_TTL seconds, long enough to also discard late retries.
+    When several workers share the backend, IN_FLIGHT_BACKEND_MIRROR also writes a marker in the backend
+    processing container, holding its expiry time, and removes it once processing completes.
+    """
+
+    def __init__(self, global_manager):
+        from core.global_manager import GlobalManager
+        self.global_manager: GlobalManager = global_manager
+        self.logger = global_manager.logger
+        bot_config = global_manager.bot_config
+        self.ttl = bot_config.IN_FLIGHT_TTL
+        self.backend_mirror = bot_config.IN_FLIGHT_BACKEND_MIRROR
+        self.purge_on_startup = bot_config.IN_FLIGHT_PURGE_BACKEND_MARKERS_ON_STARTUP
+        # key -> monotonic expiry; every entry shares the same TTL so the oldest entries are always first
+        self._entries: "OrderedDict[str, float]" = OrderedDict()
+
+    def initialize(self):
+        if not self.purge_on_startup:
+            return
+        try:
+            loop = asyncio.get_event_loop()
+
+            if loop.is_running():
+                self.logger.info("Event loop is running. Scheduling asynchronous purge of processing markers.")
+                asyncio.create_task(self.purge_backend_markers())
+            else:
+                loop.run_until_complete(self.purge_backend_markers())
+        except Exception as e:
+            self.logger.error(f"Failed to purge processing markers: {str(e)}")
+
+    @property
+    def backend_dispatcher(self):
+        return self.global_manager.backend_internal_data_processing_dispatcher
+
+    @staticmethod
+    def make_key(channel_id, message_id) -> str:
+        return f"{str(channel_id).replace(':', '_')}-{message_id}"
+
+    def _prune(self, now: float):
+        while self._entries:
+            key, expires_at = next(iter(self._entries.items()))
+            if expires_at > now:
+                break
+            del self._entries[key]
+
+    async def is_in_flight(self, key: str) -> bool:
+        now = time.monotonic()
+        self._prune(now)
+        if key in self._entries:
+            return True
+        if not self.backend_mirror:
+            return False
+
+        try:
+            marker = await self.backend_dispatcher.read_data_content(self.backend_dispatcher.processing, f"{key}{MARKER_EXTENSION}")
+        except Exception as e:
+            self.logger.error(f"Failed to read processing marker {key}: {str(e)}")
+            return False
+        if marker is None:
+            return False
+        try:
+            # Markers left by a crashed worker expire like in-memory entries
+            if float(marker) < time.time():
+                self.logger.info(f"Ignoring expired processing marker {key}")
+                return False
+        except ValueError:
+            pass  # Marker written by a previous version, without expiry
+        return True
+
+    async def mark_in_flight(self, key: str) -> bool:
+        """Register a message as being processed. Returns False if it already was."""
+        now = time.monotonic()
+        self._prune(now)
+        if key in self._entries:
+            return False
+        self._entries[key] = now + self.ttl
+
+        if self.backend_mirror:
+            try:
+                await self.backend_dispatcher.write_data_content(
+                    self.backend_dispatcher.processing, f"{key}{MARKER_EXTENSION}", data=str(time.time() + self.ttl))
+            except Exception as e:
+                self.logger.error(f"Failed to write processing marker {key}: {str(e)}")
+        return True
+
+    async def mark_done(self, key: str):
+        """
+        Called once the message has been processed. The in-memory entry is kept until it expires so
+        late retries are still discarded, the backend marker is removed.
+        """
+        if not self.backend_mirror:
+            return
+        try:
+            await self.backend_dispatcher.remove_data_content(self.backend_dispatcher.processing, f"{key}{MARKER_EXTENSION}")
+        except Exception as e:
+            self.logger.error(f"Failed to remove processing marker {key}: {str(e)}")
+
+    async def purge_backend_markers(self):
+        """Remove every marker from the backend processing container, including the ones never cleaned up before."""
+        processing_container = self.backend_dispatcher.processing
+        try:
+            files = await self.backend_dispatcher.list_container_files(processing_container) or []
+            # Some backends list the names with their extension; keys can hold dots so only the marker's is stripped
+            files = [name[:-len(MARKER_EXTENSION)] if name.endswith(MARKER_EXTENSION) else name for name in files]
+            markers = [name for name in files if not name.startswith(PRESERVED_FILE_PREFIXES)]
+            if len(markers) == len(files):
+                await self.backend_dispatcher.clear_container(processing_container)
+            else:
+                # Queued event payloads and tracked reactions share the container and are kept
+                for marker in markers:
+                    await self.backend_dispatcher.remove_data_content(processing_container, f"{marker}{MARKER_EXTENSION}")
+            self.logger.info(f"Purged {len(markers)} processing markers from the backend.")
+        except Exception as e:
+            self.logger.error(f"Failed to purge processing markers: {str(e)}")
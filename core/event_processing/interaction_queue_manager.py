@@ -1,12 +1,16 @@
 import asyncio
 import json
+import time
 import traceback
 import uuid
-from collections import defaultdict
+from collections import OrderedDict, defaultdict
+from typing import Callable, Dict, List, Tuple
 
 from core.backend.backend_internal_queue_processing_dispatcher import (
     BackendInternalQueueProcessingDispatcher,
 )
+from core.event_processing.queue_replay_metrics import QueueReplayMetrics
+from core.event_processing.queued_event_codec import QueuedEventCodec
 from core.user_interactions.incoming_notification_data_base import (
     IncomingNotificationDataBase,
 )
@@ -16,21 +20,7 @@ from core.user_interactions.user_interactions_dispatcher import (
 )
 from utils.config_manager.config_model import BotConfig
 
-
-def make_serializable(obj):
-    if isinstance(obj, (str, int, float, bool)) or obj is None:
-        return obj
-    elif isinstance(obj, dict):
-        return {k: make_serializable(v) for k, v in obj.items()}
-    elif isinstance(obj, list):
-        return [make_serializable(item) for item in obj]
-    elif isinstance(obj, IncomingNotificationDataBase):
-        return obj.to_dict()
-    elif hasattr(obj, '__dict__'):
-        return {k: make_serializable(v) for k, v in obj.__dict__.items()}
-    else:
-        # Ici, on peut choisir de retourner une représentation chaîne de l'objet
-        return str(obj)
+REACTION_EVENT_TYPES = ("add_reactions", "remove_reactions", "update_reactions_batch")
 
 
 class InteractionQueueManager:
@@ -51,6 +41,17 @@ class InteractionQueueManager:
 
         self.shutdown = False  # Indicateur pour arrêter les tâches
 
+        # event_type -> (user interactions dispatcher method name, method_params deserializer)
+        self.event_handlers: Dict[str, Tuple[str, Callable[[dict], dict]]] = {}
+        self._register_default_event_handlers()
+        self.replay_metrics = QueueReplayMetrics()
+        self.codec = QueuedEventCodec()
+
+        # (is_internal, queue_key) -> reaction event waiting at the end of the queue, later reaction
+        # events for the same message are folded into it instead of being queued and persisted
+        self.pending_reaction_events: Dict[Tuple[bool, tuple], dict] = {}
+        self.folded_reaction_events = 0
+
     def initialize(self):
         self.backend_dispatcher: BackendInternalQueueProcessingDispatcher = self.global_manager.backend_internal_queue_processing_dispatcher
         self.user_interaction_dispatcher: UserInteractionsDispatcher = self.global_manager.user_interactions_dispatcher
@@ -64,10 +65,15 @@ class InteractionQueueManager:
         self.wait_queue_container = self.backend_dispatcher.wait_queue
         self.wait_queue_ttl = self.backend_dispatcher.wait_queue_ttl
         self.bot_config: BotConfig = self.global_manager.bot_config
+        self.codec = QueuedEventCodec(
+            inline_max_bytes=self.bot_config.QUEUE_EVENT_INLINE_MAX_BYTES,
+            use_fast_json=self.bot_config.QUEUE_EVENT_FAST_JSON)
 
         self.logger.debug(f"Internal event container initialized: {self.internal_event_container}")
         self.logger.debug(f"External event container initialized: {self.external_event_container}")
 
+        self.logger.debug(f"Queued events encoded with {self.codec.json_backend}")
+
         self.logger.info("InteractionQueueManager initialized.")
         self.clear_expired_messages()
 
@@ -85,13 +91,89 @@ class InteractionQueueManager:
         except Exception as e:
             self.logger.error(f"Failed to clean expired messages from queues: {str(e)}")
 
+    async def recover_persisted_events(self) -> Dict[str, int]:
+        """
+        Replay the events left in the backend event containers by a previous run, e.g. after a crash.
+
+        Workers sharing the queue backend hold their own queued events in the same containers, and nothing
+        tells which process owns an event: only the events queued more than QUEUE_RECOVERY_MIN_EVENT_AGE
+        seconds ago are replayed, the others are left to their worker or to the next startup.
+
+        Both containers are scanned once and their events grouped by (channel_id, thread_id). Each group
+        is replayed in order through its queue, up to QUEUE_RECOVERY_MAX_CONCURRENT_GROUPS groups at a
+        time. Events failing again stay in the backend until their TTL expires, as do the events not
+        replayed yet when the recovery is cancelled (see QUEUE_RECOVERY_TIMEOUT).
+        """
+        started = time.perf_counter()
+        groups: Dict[Tuple[bool, tuple], List[dict]] = defaultdict(list)
+        failed = 0
+        skipped = 0
+        # Events queued before queued_at existed are always old enough
+        max_queued_at = time.time() - self.bot_config.QUEUE_RECOVERY_MIN_EVENT_AGE
+        for internal, container in ((True, self.internal_event_container), (False, self.external_event_container)):
+            try:
+                messages = await self.backend_dispatcher.get_container_messages(container)
+            except Exception as e:
+                self.logger.error(f"Failed to list the persisted events of container {container}: {e}")
+                continue
+            for message in messages:
+                try:
+                    event_data = await self.load_event(message)
+                    channel_id, thread_id, _ = self.extract_identifiers(
+                        event_data['event_type'], event_data['method_params'])
+                except Exception as e:
+                    failed += 1
+                    self.logger.error(f"Unreadable persisted event in container {container}: {e}")
+                    continue
+                if (event_data.get('queued_at') or 0) > max_queued_at:
+                    skipped += 1
+                    continue
+                groups[(internal, (channel_id, thread_id))].append(event_data)
+
+        semaphore = asyncio.Semaphore(max(1, self.bot_config.QUEUE_RECOVERY_MAX_CONCURRENT_GROUPS))
+
+        async def recover_group(internal: bool, queue_key, events: List[dict]) -> Tuple[int, int]:
+            # Events queued before queued_at existed keep the container order, by message id
+            events.sort(key=lambda event: (event.get('queued_at') or 0, str(event.get('message_id'))))
+            async with semaphore:
+                queue = self.internal_queues[queue_key] if internal else self.external_queues[queue_key]
+                for event_data in events:
+                    queue.put_nowait(event_data)
+                try:
+                    return await self.process_queue(queue_key, internal=internal)
+                except asyncio.CancelledError:
+                    # The events left are only dropped from memory, the next startup replays them from the backend
+                    while not queue.empty():
+                        queue.get_nowait()
+                        queue.task_done()
+                    raise
+
+        results = await asyncio.gather(
+            *(recover_group(internal, queue_key, events) for (internal, queue_key), events in groups.items()))
+        recovered = sum(replayed for replayed, _ in results)
+        failed += sum(failures for _, failures in results)
+
+        self.logger.info(
+            f"Recovered {recovered} persisted events from {len(groups)} queues in "
+            f"{time.perf_counter() - started:.2f}s, {failed} failed, {skipped} too recent were left in the backend.")
+        return {'recovered': recovered, 'failed': failed, 'queues': len(groups), 'skipped': skipped}
+
+    async def drain(self, timeout: float) -> bool:
+        """Wait up to timeout seconds for the queued events to be replayed, return whether all of them were."""
+        tasks = list(self.internal_processing_tasks.values()) + list(self.external_processing_tasks.values())
+        if not tasks:
+            return True
+        _, pending = await asyncio.wait(tasks, timeout=timeout)
+        if pending:
+            self.logger.warning(f"{len(pending)} event queues still being processed at shutdown, "
+                                f"their events stay in the backend queues")
+        return not pending
+
     def generate_unique_event_id(self):
         return str(uuid.uuid4())
 
-    async def add_to_queue(self, event_type: str, method_params: dict, **kwargs):
-        guid = self.generate_unique_event_id()
-
-        # Extraire les identifiants
+    def extract_identifiers(self, event_type: str, method_params: dict) -> Tuple[str, str, str]:
+        """Return the (channel_id, thread_id, message_id) an event is queued under."""
         channel_id = None
         thread_id = None
         message_id = None
@@ -153,7 +235,13 @@ class InteractionQueueManager:
 
         channel_id = channel_id or 'default_channel'
         thread_id = thread_id or 'default_thread'
-        message_id = message_id
+        return channel_id, thread_id, message_id
+
+    async def add_to_queue(self, event_type: str, method_params: dict, **kwargs):
+        guid = self.generate_unique_event_id()
+
+        # Extraire les identifiants
+        channel_id, thread_id, message_id = self.extract_identifiers(event_type, method_params)
 
         self.logger.debug(f"Final channel_id: {channel_id}, thread_id: {thread_id}, message_id: {message_id}")
 
@@ -165,35 +253,109 @@ class InteractionQueueManager:
             "method_params": method_params,
             "full_message_id": full_message_id,
             "message_id": message_id,
+            # Orders the events of a queue when they are recovered from the backend
+            "queued_at": time.time(),
             **kwargs
         }
 
-        self.logger.debug(f"Adding {event_type} with GUID {guid} to queue {channel_id}_{thread_id}")
-
-        await self.save_event_to_backend(event_data, channel_id, thread_id)
-
         queue_key = (channel_id, thread_id)
 
         is_internal = method_params.get('is_internal', False)
 
+        if event_type in REACTION_EVENT_TYPES and await self._fold_into_pending_reactions(
+                queue_key, is_internal, event_type, method_params, message_id):
+            return
+
+        self.logger.debug(f"Adding {event_type} with GUID {guid} to queue {channel_id}_{thread_id}")
+
+        await self.save_event_to_backend(event_data, channel_id, thread_id)
+
         # Démarrer la tâche de traitement si elle n'existe pas déjà
         if is_internal:
             if queue_key not in self.internal_processing_tasks:
                 self.internal_processing_tasks[queue_key] = asyncio.create_task(self.process_internal_queue(queue_key))
             await self.internal_queues[queue_key].put(event_data)
+            self.replay_metrics.record_depth(queue_key, self.internal_queues[queue_key].qsize())
             self.logger.debug(f"Added {event_type} to internal queue {queue_key} with params: {method_params}")
         else:
             if queue_key not in self.external_processing_tasks:
                 self.external_processing_tasks[queue_key] = asyncio.create_task(self.process_external_queue(queue_key))
             await self.external_queues[queue_key].put(event_data)
+            self.replay_metrics.record_depth(queue_key, self.external_queues[queue_key].qsize())
             self.logger.debug(f"Added {event_type} to external queue {queue_key} with params: {method_params}")
 
+        # Only consecutive reaction events are folded, so the order with the other events is kept
+        if event_type in REACTION_EVENT_TYPES:
+            self.pending_reaction_events[(is_internal, queue_key)] = event_data
+        else:
+            self.pending_reaction_events.pop((is_internal, queue_key), None)
+
+    @staticmethod
+    def _reaction_actions(event_type: str, method_params: dict) -> List[tuple]:
+        if event_type == "add_reactions":
+            return [('add', reaction) for reaction in method_params.get('reactions', [])]
+        if event_type == "remove_reactions":
+            return [('remove', reaction) for reaction in method_params.get('reactions', [])]
+        return [(action.get('action'), action.get('reaction', {}))
+                for action in method_params.get('reactions_actions', [])]
+
+    @staticmethod
+    def fold_reaction_actions(actions: List[tuple]) -> List[dict]:
+        """
+        Reduce ordered (operation, reaction) pairs to their net effect per message and reaction name.
+        The last operation wins, and a reaction added then removed before being dispatched is dropped.
+        """
+        # (message timestamp, reaction name) -> (operation, reaction, first operation folded)
+        net: "OrderedDict[tuple, tuple]" = OrderedDict()
+        for operation, reaction in actions:
+            key = (reaction.get('timestamp'), reaction.get('reaction_name'))
+            previous = net.pop(key, None)
+            first_operation = previous[2] if previous else operation
+            if operation == 'remove' and previous and previous[0] == 'add' and first_operation == 'add':
+                continue
+            net[key] = (operation, reaction, first_operation)
+        return [{'action': operation, 'reaction': reaction} for operation, reaction, _ in net.values()]
+
+    async def _fold_into_pending_reactions(self, queue_key, is_internal, event_type, method_params, message_id) -> bool:
+        pending = self.pending_reaction_events.get((is_internal, queue_key))
+        if pending is None or pending['message_id'] != message_id:
+            return False
+
+        channel_id, thread_id = queue_key
+        actions = self._reaction_actions(pending['event_type'], pending['method_params'])
+        actions += self._reaction_actions(event_type, method_params)
+        pending['event_type'] = "update_reactions_batch"
+        pending['method_params'] = {
+            'reactions_actions': self.fold_reaction_actions(actions),
+            'is_internal': is_internal,
+            'channel_id': channel_id,
+            'thread_id': thread_id,
+        }
+        self.folded_reaction_events += 1
+
+        if pending['method_params']['reactions_actions']:
+            # The queued event is rewritten in place, under the same GUID
+            pending['superseded'] = False
+            await self.save_event_to_backend(pending, channel_id, thread_id)
+        else:
+            pending['superseded'] = True
+            await self.mark_event_processed(pending, internal=is_internal)
+        self.logger.debug(f"Folded {event_type} into queued event {pending['guid']} of queue {queue_key}")
+        return True
+
     async def save_event_to_backend(self, event_data: dict, channel_id, thread_id):
         try:
             message_id = event_data['message_id']
             guid = event_data['guid']
-            serializable_event_data = make_serializable(event_data)
-            message_json = json.dumps(serializable_event_data)
+            message_json, payloads = self.codec.encode(event_data)
+            if payloads:
+                await self.save_event_payloads(payloads)
+            # A folded reaction event is saved again and may no longer need its previous payloads
+            stale_refs = [ref for ref in event_data.get('payload_refs') or [] if ref not in payloads]
+            if stale_refs:
+                await self.remove_event_payloads(stale_refs)
+            if payloads or stale_refs:
+                event_data['payload_refs'] = list(payloads)
 
             is_internal = event_data.get('method_params', {}).get('is_internal', False)
             container = self.internal_event_container if is_internal else self.external_event_container
@@ -215,7 +377,40 @@ class InteractionQueueManager:
         except Exception as e:
             self.logger.error(f"An unexpected error occurred: {e}")
 
+    async def save_event_payloads(self, payloads: dict):
+        """Store the payloads the codec kept out of the event, before the event referencing them."""
+        data_dispatcher = self.global_manager.backend_internal_data_processing_dispatcher
+        await asyncio.gather(*(
+            data_dispatcher.write_data_content(
+                data_dispatcher.processing, self.codec.payload_file_name(reference), payload)
+            for reference, payload in payloads.items()
+        ))
+
+    async def remove_event_payloads(self, references: List[str]):
+        data_dispatcher = self.global_manager.backend_internal_data_processing_dispatcher
+        for reference in references:
+            try:
+                await data_dispatcher.remove_data_content(
+                    data_dispatcher.processing, self.codec.payload_file_name(reference))
+            except Exception as e:
+                self.logger.error(f"Failed to remove queued event payload {reference}: {e}")
+
+    async def load_event(self, message_json) -> dict:
+        """Decode an event read back from the backend queues, with its out of line payloads."""
+        event_data = self.codec.decode(message_json)
+        references = self.codec.references(event_data)
+        if references:
+            data_dispatcher = self.global_manager.backend_internal_data_processing_dispatcher
+            contents = await asyncio.gather(*(
+                data_dispatcher.read_data_content(data_dispatcher.processing, self.codec.payload_file_name(reference))
+                for reference in references
+            ))
+            self.codec.resolve(event_data, dict(zip(references, contents)))
+            event_data['payload_refs'] = references
+        return event_data
+
     async def mark_event_processed(self, event_data: dict, internal: bool):
+        payload_refs = event_data.get('payload_refs') or []
         try:
             message_id = event_data['message_id']
             guid = event_data['guid']
@@ -274,143 +469,117 @@ class InteractionQueueManager:
                 guid=guid
             )
             self.logger.debug(f"Event dequeued from backend: {channel_id}/{thread_id} - {message_id}_{guid}")
+            if payload_refs:
+                await self.remove_event_payloads(payload_refs)
 
         except Exception as e:
             self.logger.error(f"Error marking event as processed: {e}\nTraceback: {traceback.format_exc()}")
 
-    async def process_internal_queue(self, queue_key):
+    def register_event_handler(self, event_type: str, handler_name: str,
+                               deserializer: Callable[[dict], dict]):
+        """
+        Register how a queued event is replayed: the deserializer turns the stored method_params into
+        the keyword arguments of the user interactions dispatcher method named handler_name.
+        """
+        self.event_handlers[event_type] = (handler_name, deserializer)
+
+    def _register_default_event_handlers(self):
+        for event_type in ("send_message", "upload_file", "add_reaction", "remove_reaction",
+                           "remove_reaction_from_thread"):
+            self.register_event_handler(event_type, event_type, self._deserialize_method_params)
+        self.register_event_handler("add_reactions", "add_reactions", self._deserialize_reactions)
+        self.register_event_handler("remove_reactions", "remove_reactions", self._deserialize_reactions)
+        self.register_event_handler("update_reactions_batch", "update_reactions_batch",
+                                    self._deserialize_reactions_actions)
+
+    @staticmethod
+    def _deserialize_event(event):
+        # Events queued in memory are still objects, only events reloaded from the backend are dicts
+        if isinstance(event, dict):
+            return IncomingNotificationDataBase.from_dict(event)
+        return event
+
+    def _deserialize_method_params(self, method_params: dict) -> dict:
+        if 'event' in method_params:
+            method_params['event'] = self._deserialize_event(method_params['event'])
+        if 'message_type' in method_params and not isinstance(method_params['message_type'], MessageType):
+            method_params['message_type'] = MessageType(method_params['message_type'])
+        return method_params
+
+    def _deserialize_reactions(self, method_params: dict) -> dict:
+        reactions = method_params['reactions']
+        for reaction in reactions:
+            if 'event' in reaction:
+                reaction['event'] = self._deserialize_event(reaction['event'])
+        return {'reactions': reactions}
+
+    def _deserialize_reactions_actions(self, method_params: dict) -> dict:
+        reactions_actions = method_params['reactions_actions']
+        for action in reactions_actions:
+            reaction = action.get('reaction', {})
+            if 'event' in reaction:
+                reaction['event'] = self._deserialize_event(reaction['event'])
+        return {'reactions_actions': reactions_actions}
+
+    async def replay_event(self, event_data: dict):
+        event_type = event_data['event_type']
+        handler = self.event_handlers.get(event_type)
+        if handler is None:
+            self.logger.error(f"Unknown event_type '{event_type}' in queued event {event_data.get('guid')}")
+            return
+        handler_name, deserializer = handler
+        kwargs = deserializer(event_data['method_params'])
+        await getattr(self.user_interaction_dispatcher, handler_name)(**kwargs, is_replayed=True)
+
+    async def process_queue(self, queue_key, internal: bool) -> Tuple[int, int]:
+        """
+        Replay the events of a (channel_id, thread_id) queue in order, until it is empty.
+        Return the number of events replayed and of events that failed.
+        """
+        queue = self.internal_queues[queue_key] if internal else self.external_queues[queue_key]
+        processing_tasks = self.internal_processing_tasks if internal else self.external_processing_tasks
+        queue_label = "internal" if internal else "external"
+        replayed = 0
+        failures = 0
         try:
             while True:
-                event_data = await self.internal_queues[queue_key].get()
+                event_data = await queue.get()
+                started = time.perf_counter()
+                failed = False
+                if self.pending_reaction_events.get((internal, queue_key)) is event_data:
+                    del self.pending_reaction_events[(internal, queue_key)]
 
                 try:
-                    event_type = event_data['event_type']
-                    method_params = event_data['method_params']
-
-                    if 'event' in method_params:
-                        event_dict = method_params['event']
-                        method_params['event'] = IncomingNotificationDataBase.from_dict(event_dict)
-
-                    if 'message_type' in method_params:
-                        method_params['message_type'] = MessageType(method_params['message_type'])
-
-                    dispatcher = self.user_interaction_dispatcher
-
-                    if event_type == "send_message":
-                        await dispatcher.send_message(**method_params, is_replayed=True)
-                    elif event_type == "upload_file":
-                        await dispatcher.upload_file(**method_params, is_replayed=True)
-                    elif event_type == "add_reaction":
-                        await dispatcher.add_reaction(**method_params, is_replayed=True)
-                    elif event_type == "remove_reaction":
-                        await dispatcher.remove_reaction(**method_params, is_replayed=True)
-                    elif event_type == "remove_reaction_from_thread":
-                        await dispatcher.remove_reaction_from_thread(**method_params, is_replayed=True)
-                    elif event_type == "update_reactions_batch":
-                        await dispatcher.update_reactions_batch(reactions_actions=method_params['reactions_actions'],
-                                                                is_replayed=True)
-                    else:
-                        self.logger.error(f"Unknown event_type '{event_type}' in process_internal_queue")
-
-                    await self.mark_event_processed(event_data, internal=True)
-
+                    # Reaction events folded down to nothing were already removed from the backend
+                    if not event_data.get('superseded'):
+                        await self.replay_event(event_data)
+                        await self.mark_event_processed(event_data, internal=internal)
+                        replayed += 1
                 except Exception as e:
-                    self.logger.error(f"Error processing internal event: {e}")
+                    failed = True
+                    failures += 1
+                    self.logger.error(f"Error processing {queue_label} event: {e}")
                 finally:
-                    self.internal_queues[queue_key].task_done()
-
-                if self.internal_queues[queue_key].empty():
+                    queue.task_done()
+                    duration = time.perf_counter() - started
+                    self.replay_metrics.record_event(queue_key, duration, queue.qsize(), failed=failed)
+                    self.logger.debug(
+                        f"Replayed {event_data.get('event_type')} from {queue_label} queue {queue_key} "
+                        f"in {duration * 1000:.1f} ms, {queue.qsize()} left")
+
+                if queue.empty():
                     break
 
         finally:
-            if queue_key in self.internal_processing_tasks:
-                del self.internal_processing_tasks[queue_key]
+            processing_tasks.pop(queue_key, None)
+        return replayed, failures
 
-    async def process_external_queue(self, queue_key):
-        try:
-            while True:
-                event_data = await self.external_queues[queue_key].get()
-
-                try:
-                    event_type = event_data['event_type']
-                    method_params = event_data['method_params']
-
-                    if 'event' in method_params:
-                        event_dict = method_params['event']
-                        method_params['event'] = IncomingNotificationDataBase.from_dict(event_dict)
-
-                    if 'message_type' in method_params:
-                        method_params['message_type'] = MessageType(method_params['message_type'])
-
-                    dispatcher = self.user_interaction_dispatcher
-
-                    if event_type == "send_message":
-                        await dispatcher.send_message(**method_params, is_replayed=True)
-                    elif event_type == "upload_file":
-                        await dispatcher.upload_file(**method_params, is_replayed=True)
-                    elif event_type == "add_reaction":
-                        await dispatcher.add_reaction(**method_params, is_replayed=True)
-                    elif event_type == "remove_reaction":
-                        await dispatcher.remove_reaction(**method_params, is_replayed=True)
-                    elif event_type == "remove_reaction_from_thread":
-                        await dispatcher.remove_reaction_from_thread(**method_params, is_replayed=True)
-                    elif event_type == "update_reactions_batch":
-                        await dispatcher.update_reactions_batch(reactions_actions=method_params['reactions_actions'],
-                                                                is_replayed=True)
-                    else:
-                        self.logger.error(f"Unknown event_type '{event_type}' in process_external_queue")
-
-                    await self.mark_event_processed(event_data, internal=False)
-
-                except Exception as e:
-                    self.logger.error(f"Error processing external event: {e}")
-                finally:
-                    self.external_queues[queue_key].task_done()
-
-                if self.external_queues[queue_key].empty():
-                    break
+    async def process_internal_queue(self, queue_key):
+        await self.process_queue(queue_key, internal=True)
 
-        finally:
-            if queue_key in self.external_processing_tasks:
-                del self.external_processing_tasks[queue_key]
+    async def process_external_queue(self, queue_key):
+        await self.process_queue(queue_key, internal=False)
 
     async def process_external_reactions(self, queue_key):
-        try:
-            while True:
-                event_data = await self.external_queues[queue_key].get()
-
-                try:
-                    event_type = event_data['event_type']
-                    method_params = event_data['method_params']
-
-                    dispatcher = self.user_interaction_dispatcher
-
-                    if event_type == "add_reactions":
-                        reactions = method_params['reactions']
-                        # Convertir les événements en objets IncomingNotificationDataBase
-                        for reaction in reactions:
-                            if 'event' in reaction and isinstance(reaction['event'], dict):
-                                reaction['event'] = IncomingNotificationDataBase.from_dict(reaction['event'])
-                        await dispatcher.add_reactions(reactions, is_replayed=True)
-                    elif event_type == "remove_reactions":
-                        reactions = method_params['reactions']
-                        # Convertir les événements en objets IncomingNotificationDataBase
-                        for reaction in reactions:
-                            if 'event' in reaction and isinstance(reaction['event'], dict):
-                                reaction['event'] = IncomingNotificationDataBase.from_dict(reaction['event'])
-                        await dispatcher.remove_reactions(reactions, is_replayed=True)
-
-                    # Marquer l'événement comme traité
-                    await self.mark_event_processed(event_data, internal=False)
-
-                except Exception as e:
-                    self.logger.error(f"Error processing external reaction event: {e}")
-                finally:
-                    self.external_queues[queue_key].task_done()
-
-                if self.external_queues[queue_key].empty():
-                    break
-
-        finally:
-            if queue_key in self.external_reaction_tasks:
-                del self.external_reaction_tasks[queue_key]
+        # Reaction events go through the external queue worker like the other events
+        await self.process_queue(queue_key, internal=False)
@@ -0,0 +1,44 @@
+from collections import OrderedDict
+from typing import Dict, Tuple
+
+
+class QueueReplayMetrics:
+    """
+    Replay statistics of the InteractionQueueManager, kept per (channel_id, thread_id) queue key:
+    events replayed, handling time and queue depth. Only the most recently active keys are kept.
+    """
+
+    def __init__(self, max_keys: int = 1000):
+        self.max_keys = max_keys
+        self._metrics: "OrderedDict[Tuple[str, str], Dict[str, float]]" = OrderedDict()
+
+    def _get(self, queue_key) -> Dict[str, float]:
+        metrics = self._metrics.get(queue_key)
+        if metrics is None:
+            metrics = {'events': 0, 'errors': 0, 'total_time': 0.0, 'max_time': 0.0, 'depth': 0, 'max_depth': 0}
+            self._metrics[queue_key] = metrics
+            while len(self._metrics) > self.max_keys:
+                self._metrics.popitem(last=False)
+        self._metrics.move_to_end(queue_key)
+        return metrics
+
+    def record_depth(self, queue_key, depth: int):
+        metrics = self._get(queue_key)
+        metrics['depth'] = depth
+        metrics['max_depth'] = max(metrics['max_depth'], depth)
+
+    def record_event(self, queue_key, duration: float, depth: int, failed: bool = False):
+        metrics = self._get(queue_key)
+        metrics['events'] += 1
+        metrics['errors'] += int(failed)
+        metrics['total_time'] += duration
+        metrics['max_time'] = max(metrics['max_time'], duration)
+        metrics['depth'] = depth
+
+    def snapshot(self) -> Dict[str, Dict[str, float]]:
+        """Metrics per 'channel_id/thread_id', with the average handling time in seconds."""
+        snapshot = {}
+        for (channel_id, thread_id), metrics in self._metrics.items():
+            average = metrics['total_time'] / metrics['events'] if metrics['events'] else 0.0
+            snapshot[f"{channel_id}/{thread_id}"] = {**metrics, 'avg_time': average}
+        return snapshot
@@ -0,0 +1,167 @@
+import base64
+import json
+from enum import Enum
+from typing import Dict, Iterator, List, Optional, Tuple
+
+from core.user_interactions.incoming_notification_data_base import (
+    IncomingNotificationDataBase,
+)
+
+try:
+    import orjson
+except ImportError:  # orjson is optional, the standard json module is used without it
+    orjson = None
+
+# Fields of a notification holding base64 images and file contents, stored out of line when large
+OUT_OF_LINE_FIELDS = ('images', 'files_content')
+REFERENCE_KEY = '$ref'
+# Name prefix of the payload files, stored in the backend processing container
+PAYLOAD_FILE_PREFIX = 'queued-payload-'
+
+
+class QueuedEventCodec:
+    """
+    Serializes the events of the InteractionQueueManager.
+
+    The codec knows where notifications sit in an event (method_params event, reactions and
+    reactions_actions) and converts them with their own to_dict. The rest of the event is handed
+    as is to the JSON encoder, only non-JSON values reaching the `_default` hook, instead of being
+    walked value by value. orjson is used when installed and enabled.
+
+    Image and file entries of a notification larger than `inline_max_bytes` are not written in the
+    event: they are replaced by a {"$ref": "<guid>-<n>"} placeholder and returned apart, to be
+    stored next to the event. `resolve` puts them back once loaded.
+    """
+
+    def __init__(self, inline_max_bytes: int = 64 * 1024, use_fast_json: bool = True):
+        self.inline_max_bytes = inline_max_bytes
+        self.use_orjson = use_fast_json and orjson is not None
+
+    @staticmethod
+    def payload_file_name(reference: str) -> str:
+        return f"{PAYLOAD_FILE_PREFIX}{reference}.txt"
+
+    @property
+    def json_backend(self) -> str:
+        return "orjson" if self.use_orjson else "json"
+
+    def _dumps(self, data, default) -> str:
+        if self.use_orjson:
+            return orjson.dumps(data, default=default, option=orjson.OPT_NON_STR_KEYS).decode('utf-8')
+        return json.dumps(data, default=default)
+
+    def _loads(self, text):
+        if self.use_orjson:
+            return orjson.loads(text)
+        return json.loads(text)
+
+    @staticmethod
+    def _notification_slots(method_params: dict) -> Iterator[Tuple[dict, str]]:
+        """Yield the (container, key) pairs of the notifications carried by the method parameters."""
+        if not isinstance(method_params, dict):
+            return
+        if 'event' in method_params:
+            yield method_params, 'event'
+        for reaction in method_params.get('reactions') or []:
+            if isinstance(reaction, dict) and 'event' in reaction:
+                yield reaction, 'event'
+        for action in method_params.get('reactions_actions') or []:
+            reaction = action.get('reaction') if isinstance(action, dict) else None
+            if isinstance(reaction, dict) and 'event' in reaction:
+                yield reaction, 'event'
+
+    def _encode_notification(self, notification, guid: str, payloads: Dict[str, str]):
+        if isinstance(notification, IncomingNotificationDataBase):
+            notification = notification.to_dict()
+        if not isinstance(notification, dict) or self.inline_max_bytes <= 0:
+            return notification
+        encoded = dict(notification)
+        for field in OUT_OF_LINE_FIELDS:
+            entries = encoded.get(field)
+            if not entries:
+                continue
+            out_of_line = []
+            for entry in entries:
+                if isinstance(entry, str) and len(entry) > self.inline_max_bytes:
+                    reference = f"{guid}-{len(payloads)}"
+                    payloads[reference] = entry
+                    entry = {REFERENCE_KEY: reference}
+                out_of_line.append(entry)
+            encoded[field] = out_of_line
+        return encoded
+
+    def _encode_reaction(self, reaction, guid: str, payloads: Dict[str, str]):
+        if not isinstance(reaction, dict) or 'event' not in reaction:
+            return reaction
+        return {**reaction, 'event': self._encode_notification(reaction['event'], guid, payloads)}
+
+    def _encode_method_params(self, method_params: dict, guid: str, payloads: Dict[str, str]) -> dict:
+        # Copies are made along the notification paths only, the queued event itself is left untouched
+        encoded = dict(method_params)
+        if 'event' in encoded:
+            encoded['event'] = self._encode_notification(encoded['event'], guid, payloads)
+        if encoded.get('reactions'):
+            encoded['reactions'] = [self._encode_reaction(reaction, guid, payloads) for reaction in encoded['reactions']]
+        if encoded.get('reactions_actions'):
+            encoded['reactions_actions'] = [
+                {**action, 'reaction': self._encode_reaction(action['reaction'], guid, payloads)}
+                if isinstance(action, dict) and 'reaction' in action else action
+                for action in encoded['reactions_actions']
+            ]
+        return encoded
+
+    @staticmethod
+    def _default(value):
+        if isinstance(value, Enum):
+            return value.value
+        if isinstance(value, (bytes, bytearray)):
+            return base64.b64encode(value).decode('ascii')
+        if isinstance(value, set):
+            return list(value)
+        to_dict = getattr(value, 'to_dict', None)
+        if callable(to_dict):
+            return to_dict()
+        if hasattr(value, '__dict__'):
+            return vars(value)
+        return str(value)
+
+    def encode(self, event_data: dict) -> Tuple[str, Dict[str, str]]:
+        """Return the event JSON and the payloads stored out of line, by reference."""
+        payloads: Dict[str, str] = {}
+        encoded_event = dict(event_data)
+        if isinstance(event_data.get('method_params'), dict):
+            encoded_event['method_params'] = self._encode_method_params(
+                event_data['method_params'], event_data.get('guid') or 'event', payloads)
+        return self._dumps(encoded_event, self._default), payloads
+
+    def decode(self, text) -> dict:
+        """Load an event; out of line payloads are left as references, see `references` and `resolve`."""
+        return self._loads(text)
+
+    def references(self, event_data: dict) -> List[str]:
+        references = []
+        for container, key in self._notification_slots(event_data.get('method_params')):
+            notification = container[key]
+            if not isinstance(notification, dict):
+                continue
+            for field in OUT_OF_LINE_FIELDS:
+                for entry in notification.get(field) or []:
+                    if isinstance(entry, dict) and REFERENCE_KEY in entry:
+                        references.append(entry[REFERENCE_KEY])
+        return references
+
+    def resolve(self, event_data: dict, payloads: Dict[str, Optional[str]]) -> dict:
+        """Replace the references of a decoded event by their payloads, in place."""
+        for container, key in self._notification_slots(event_data.get('method_params')):
+            notification = container[key]
+            if not isinstance(notification, dict):
+                continue
+            for field in OUT_OF_LINE_FIELDS:
+                entries = notification.get(field)
+                if entries:
+                    notification[field] = [
+                        payloads.get(entry[REFERENCE_KEY]) if isinstance(entry, dict) and REFERENCE_KEY in entry
+                        else entry
+                        for entry in entries
+                    ]
+        return event_data
@@ -0,0 +1,129 @@
+import asyncio
+from collections import deque
+from typing import Coroutine, Deque, Dict, Optional, Set, Tuple
+
+
+class TaskSupervisor:
+    """
+    Admission control for the background processing started by the user interactions plugins.
+
+    At most TASK_SUPERVISOR_MAX_CONCURRENT tasks run at once, and at most
+    TASK_SUPERVISOR_MAX_CONCURRENT_PER_CHANNEL for a given channel. Tasks beyond these limits wait
+    in a FIFO pending queue of TASK_SUPERVISOR_MAX_PENDING entries; once it is full, `submit`
+    refuses the task and the plugin answers with a 429/503 so the caller retries later.
+    New tasks are also refused once the application is shutting down.
+    """
+
+    def __init__(self, global_manager):
+        from core.global_manager import GlobalManager
+        self.global_manager: GlobalManager = global_manager
+        self.logger = global_manager.logger
+        bot_config = global_manager.bot_config
+        self.max_concurrent = max(1, bot_config.TASK_SUPERVISOR_MAX_CONCURRENT)
+        self.max_concurrent_per_channel = max(1, bot_config.TASK_SUPERVISOR_MAX_CONCURRENT_PER_CHANNEL)
+        self.max_pending = max(0, bot_config.TASK_SUPERVISOR_MAX_PENDING)
+        self._running: Set[asyncio.Task] = set()
+        self._running_per_channel: Dict[Optional[str], int] = {}
+        self._pending: Deque[Tuple[Optional[str], Coroutine]] = deque()
+        self.rejected = 0
+        self.accepting = True
+
+    @property
+    def running_count(self) -> int:
+        return len(self._running)
+
+    @property
+    def pending_count(self) -> int:
+        return len(self._pending)
+
+    def stats(self) -> dict:
+        return {
+            'running': self.running_count,
+            'pending': self.pending_count,
+            'rejected': self.rejected,
+            'running_per_channel': {str(channel): count for channel, count in self._running_per_channel.items()},
+            'max_concurrent': self.max_concurrent,
+            'max_concurrent_per_channel': self.max_concurrent_per_channel,
+            'max_pending': self.max_pending,
+        }
+
+    def _has_capacity(self, channel_id) -> bool:
+        return (len(self._running) < self.max_concurrent
+                and self._running_per_channel.get(channel_id, 0) < self.max_concurrent_per_channel)
+
+    def submit(self, coroutine: Coroutine, channel_id: Optional[str] = None) -> bool:
+        """
+        Run the coroutine now if the limits allow it, queue it otherwise.
+        Return False, closing the coroutine, when the pending queue is full.
+        """
+        if not self.accepting:
+            coroutine.close()
+            self.rejected += 1
+            self.logger.warning(f"Task rejected for channel {channel_id}: shutting down")
+            return False
+        if self._has_capacity(channel_id):
+            self._start(channel_id, coroutine)
+            return True
+        if len(self._pending) >= self.max_pending:
+            coroutine.close()
+            self.rejected += 1
+            self.logger.warning(
+                f"Task rejected for channel {channel_id}: {self.running_count} running, {self.pending_count} pending")
+            return False
+        self._pending.append((channel_id, coroutine))
+        self.logger.debug(f"Task queued for channel {channel_id}, {self.pending_count} pending")
+        return True
+
+    def _start(self, channel_id, coroutine: Coroutine):
+        self._running_per_channel[channel_id] = self._running_per_channel.get(channel_id, 0) + 1
+        task = asyncio.create_task(coroutine)
+        self._running.add(task)
+        task.add_done_callback(lambda done: self._on_done(done, channel_id))
+
+    def _on_done(self, task: asyncio.Task, channel_id):
+        self._running.discard(task)
+        remaining = self._running_per_channel.get(channel_id, 1) - 1
+        if remaining > 0:
+            self._running_per_channel[channel_id] = remaining
+        else:
+            self._running_per_channel.pop(channel_id, None)
+
+        if not task.cancelled() and task.exception() is not None:
+            self.logger.error(f"Background task for channel {channel_id} failed: {task.exception()}")
+        self._start_pending()
+
+    def _start_pending(self):
+        # The first pending task of a channel with capacity starts, others keep their place
+        index = 0
+        while index < len(self._pending) and len(self._running) < self.max_concurrent:
+            channel_id, coroutine = self._pending[index]
+            if self._has_capacity(channel_id):
+                del self._pending[index]
+                self._start(channel_id, coroutine)
+            else:
+                index += 1
+
+    def stop_accepting(self):
+        self.accepting = False
+
+    async def drain(self, timeout: float) -> bool:
+        """
+        Wait up to timeout seconds for the running and pending tasks to complete.
+        Return whether all of them did; the pending tasks left are dropped.
+        """
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + timeout
+        while self._running:
+            remaining = deadline - loop.time()
+            if remaining <= 0:
+                break
+            await asyncio.wait(set(self._running), timeout=remaining)
+
+        if not self._running and not self._pending:
+            return True
+        self.logger.warning(
+            f"Shutdown deadline reached with {self.running_count} running and {self.pending_count} pending tasks")
+        while self._pending:
+            _, coroutine = self._pending.popleft()
+            coroutine.close()
+        return False
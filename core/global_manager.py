@@ -1,3 +1,5 @@
+import asyncio
+import time
 from pathlib import Path
 from typing import List
 
@@ -13,9 +15,11 @@ from core.backend.backend_internal_queue_processing_dispatcher import (
 from core.backend.internal_data_processing_base import InternalDataProcessingBase
 from core.backend.session_manager_dispatcher import SessionManagerDispatcher
 from core.backend.session_manager_plugin_base import SessionManagerPluginBase
+from core.event_processing.in_flight_registry import InFlightRegistry
 from core.event_processing.interaction_queue_manager import (
     InteractionQueueManager,
 )
+from core.event_processing.task_supervisor import TaskSupervisor
 from core.genai_interactions.genai_interactions_image_generator_dispatcher import (
     GenaiInteractionsImageGeneratorDispatcher,
 )
@@ -40,6 +44,9 @@ from core.user_interactions_behaviors.user_interactions_behavior_dispatcher impo
 )
 from utils.config_manager.config_manager import ConfigManager
 from utils.config_manager.config_model import BotConfig
+from utils.cpu_executor.cpu_executor_service import CpuExecutorService
+from utils.http_client.shared_http_client import close_shared_session
+from utils.image_pipeline.image_pipeline import ImagePipeline
 from utils.logging.logger_loader import setup_logger_and_tracer
 from utils.prompt_manager.prompt_manager import PromptManager
 
@@ -61,6 +68,8 @@ class GlobalManager:
 
         bot_config_dict = self.config_manager.config_model.BOT_CONFIG
         self.bot_config: BotConfig = bot_config_dict
+        self.cpu_executor = CpuExecutorService(self)
+        self.image_pipeline = ImagePipeline(self)
 
         self.logger.info("Dispatchers creation...")
         self.backend_internal_data_processing_dispatcher = BackendInternalDataProcessingDispatcher(self)
@@ -71,6 +80,8 @@ class GlobalManager:
         self.user_interactions_dispatcher = UserInteractionsDispatcher(self)
         self.user_interactions_behavior_dispatcher = UserInteractionsBehaviorsDispatcher(self)
         self.session_manager_dispatcher = SessionManagerDispatcher(self)
+        self.in_flight_registry = InFlightRegistry(self)
+        self.task_supervisor = TaskSupervisor(self)
 
         self.logger.info("Loading plugins...")
         self.plugin_manager.load_plugins()
@@ -119,6 +130,8 @@ class GlobalManager:
         self.plugin_manager.initialize_plugins()
         self.logger.info("Plugins loaded.")
 
+        self.in_flight_registry.initialize()
+
         # Initialize the event queue manager only if enabled in the config
         if self.bot_config.ACTIVATE_USER_INTERACTION_EVENTS_QUEUING:
             self.logger.debug("Initializing interaction queue manager and Session manager...")
@@ -135,6 +148,52 @@ class GlobalManager:
 
         self.logger.info("Prompt manager loaded and initialized.")
 
+    async def startup(self):
+        """
+        Start the plugins background work and replay the queued events left in the backend by a
+        previous run, for up to QUEUE_RECOVERY_TIMEOUT seconds, before requests are accepted.
+        """
+        await self.plugin_manager.startup_plugins()
+
+        interaction_queue_manager = getattr(self, 'interaction_queue_manager', None)
+        if interaction_queue_manager is None or not self.bot_config.QUEUE_RECOVERY_ON_STARTUP:
+            return
+        self.logger.info("Recovering the queued events persisted by a previous run...")
+        # The worker sends no heartbeat to gunicorn before startup completes, the replay must end before its timeout
+        timeout = self.bot_config.QUEUE_RECOVERY_TIMEOUT
+        try:
+            await asyncio.wait_for(interaction_queue_manager.recover_persisted_events(), timeout=timeout)
+        except asyncio.TimeoutError:
+            self.logger.warning(f"Recovery of the persisted queued events stopped after {timeout}s, "
+                                f"the events not replayed yet stay in the backend.")
+        except Exception as e:
+            self.logger.error(f"Error while recovering the persisted queued events: {e}")
+
+    async def shutdown(self):
+        """
+        Stop accepting new requests and wait, up to SHUTDOWN_DRAIN_TIMEOUT seconds, for the ones being
+        processed and for the queued events, then flush the pending outputs and close the shared clients.
+        """
+        deadline = time.monotonic() + self.bot_config.SHUTDOWN_DRAIN_TIMEOUT
+        self.logger.info("Shutting down, draining the requests being processed...")
+        self.task_supervisor.stop_accepting()
+
+        try:
+            drained = await self.task_supervisor.drain(max(0.0, deadline - time.monotonic()))
+            interaction_queue_manager = getattr(self, 'interaction_queue_manager', None)
+            if interaction_queue_manager is not None:
+                drained = await interaction_queue_manager.drain(max(0.0, deadline - time.monotonic())) and drained
+            self.logger.info("Requests drained." if drained else "Shutdown deadline reached, remaining requests abandoned.")
+
+            await self.user_interactions_dispatcher.reaction_states.flush_all()
+            await self.plugin_manager.shutdown_plugins()
+        except Exception as e:
+            self.logger.error(f"Error while draining requests at shutdown: {e}")
+        finally:
+            await close_shared_session()
+            self.cpu_executor.shutdown(wait=False)
+            self.logger.info("Shutdown complete.")
+
     def get_plugin(self, category, subcategory):
         return self.plugin_manager.get_plugin_by_category(category, subcategory)
 
@@ -14,6 +14,14 @@ class PluginBase(ABC):
         """Initialize the plugin"""
         raise NotImplementedError("This method should be overridden by subclasses")
 
+    async def startup(self):
+        """Start the plugin background work, once the application event loop runs"""
+        return None
+
+    async def shutdown(self):
+        """Release the plugin resources before the application stops"""
+        return None
+
     @property
     @abstractmethod
     def plugin_name(self):
@@ -0,0 +1,150 @@
+import asyncio
+from collections import OrderedDict
+from typing import List, Optional, Set, Tuple
+
+
+class MessageReactionState:
+    """Reactions of a single message: the ones placed on the platform and the ones the bot wants."""
+
+    def __init__(self, plugin, event, channel_id, timestamp):
+        self.plugin = plugin
+        self.event = event
+        self.channel_id = channel_id
+        self.timestamp = timestamp
+        self.current: Set[str] = set()
+        self.desired: Set[str] = set()
+        # Removals of reactions whose presence is unknown (placed before a restart or by another path)
+        self.forced_removals: Set[str] = set()
+        # Reaction updates requested since the last flush, to measure the calls saved
+        self.requested_calls = 0
+        self.lock = asyncio.Lock()
+        self.flush_task: Optional[asyncio.Task] = None
+
+    @property
+    def thread_id(self):
+        return getattr(self.event, 'thread_id', None)
+
+    def apply(self, operation: str, reaction_name: str):
+        if operation == 'add':
+            self.desired.add(reaction_name)
+            self.forced_removals.discard(reaction_name)
+        elif operation == 'remove':
+            if reaction_name not in self.current and reaction_name not in self.desired:
+                self.forced_removals.add(reaction_name)
+            self.desired.discard(reaction_name)
+
+    def take_diff(self) -> Tuple[List[str], List[str]]:
+        """Return the (additions, removals) bringing the platform to the desired state, assumed applied."""
+        additions = sorted(self.desired - self.current)
+        removals = sorted((self.current - self.desired) | self.forced_removals)
+        self.current = set(self.desired)
+        self.forced_removals.clear()
+        return additions, removals
+
+
+class MessageReactionStateManager:
+    """
+    Per-message reaction state machine used by the UserInteractionsDispatcher.
+
+    Reaction updates only change the desired reactions of a message; the plugin is then called with the
+    minimal add/remove diff against the reactions already placed. Transitions received within
+    BOT_CONFIG.REACTION_DEBOUNCE_MS are merged into a single diff, so a message going through
+    acknowledge, processing, generating and writing quickly only shows the last state.
+    """
+
+    def __init__(self, global_manager):
+        self.global_manager = global_manager
+        self.logger = global_manager.logger
+        bot_config = global_manager.bot_config
+        self.debounce_delay = bot_config.REACTION_DEBOUNCE_MS / 1000
+        self.max_messages = bot_config.REACTION_STATE_MAX_MESSAGES
+        self.states: "OrderedDict[tuple, MessageReactionState]" = OrderedDict()
+        self.api_calls_saved = 0
+
+    def _get_state(self, plugin, event, channel_id, timestamp) -> MessageReactionState:
+        key = (plugin.plugin_name, channel_id, timestamp)
+        state = self.states.get(key)
+        if state is None:
+            state = MessageReactionState(plugin, event, channel_id, timestamp)
+            self.states[key] = state
+            self._evict()
+        else:
+            state.plugin = plugin
+            state.event = event or state.event
+        self.states.move_to_end(key)
+        return state
+
+    def _evict(self):
+        while len(self.states) > self.max_messages:
+            for key, state in self.states.items():
+                # Messages with a pending flush are kept until it ran
+                if state.flush_task is None or state.flush_task.done():
+                    del self.states[key]
+                    break
+            else:
+                return
+
+    async def apply(self, plugin, actions: List[tuple]):
+        """
+        Apply (operation, reaction) pairs, operation being 'add' or 'remove' and reaction holding
+        the event, channel_id, timestamp and reaction_name keys, in order.
+        """
+        touched = []
+        for operation, reaction in actions:
+            state = self._get_state(plugin, reaction.get('event'), reaction.get('channel_id'), reaction.get('timestamp'))
+            state.apply(operation, reaction.get('reaction_name'))
+            state.requested_calls += 1
+            if state not in touched:
+                touched.append(state)
+
+        if self.debounce_delay <= 0:
+            await asyncio.gather(*(self._flush(state) for state in touched))
+            return
+
+        for state in touched:
+            if state.flush_task is not None and not state.flush_task.done():
+                state.flush_task.cancel()
+            state.flush_task = asyncio.create_task(self._debounced_flush(state))
+
+    async def _debounced_flush(self, state: MessageReactionState):
+        try:
+            await asyncio.sleep(self.debounce_delay)
+        except asyncio.CancelledError:
+            return
+        # Once started, the flush is not cancelled by later transitions, they schedule their own
+        state.flush_task = None
+        await self._flush(state)
+
+    async def _flush(self, state: MessageReactionState):
+        async with state.lock:
+            additions, removals = state.take_diff()
+            requested_calls, state.requested_calls = state.requested_calls, 0
+            calls = [state.plugin.remove_reaction(event=state.event, channel_id=state.channel_id,
+                                                  timestamp=state.timestamp, reaction_name=name) for name in removals]
+            calls += [state.plugin.add_reaction(event=state.event, channel_id=state.channel_id,
+                                                timestamp=state.timestamp, reaction_name=name) for name in additions]
+            self.api_calls_saved += max(0, requested_calls - len(calls))
+            if not calls:
+                return
+            results = await asyncio.gather(*calls, return_exceptions=True)
+            for result in results:
+                if isinstance(result, Exception):
+                    self.logger.error(f"Error updating reactions on message {state.timestamp}: {result}")
+
+    async def flush_all(self):
+        """Apply the debounced reaction updates right away, used before shutting down."""
+        pending = []
+        for state in self.states.values():
+            if state.flush_task is not None and not state.flush_task.done():
+                state.flush_task.cancel()
+                state.flush_task = None
+                pending.append(state)
+        await asyncio.gather(*(self._flush(state) for state in pending))
+
+    def forget_reaction(self, channel_id, thread_id, reaction_name):
+        """Called when a reaction was removed from a whole thread outside of the state machine."""
+        for state in self.states.values():
+            if state.channel_id == channel_id and state.thread_id == thread_id:
+                state.current.discard(reaction_name)
+                state.desired.discard(reaction_name)
+                state.forced_removals.discard(reaction_name)
@@ -1,4 +1,3 @@
-import asyncio
 from datetime import datetime
 from typing import List, Optional
 
@@ -8,6 +7,9 @@ from core.backend.session_manager_dispatcher import SessionManagerDispatcher
 from core.user_interactions.incoming_notification_data_base import (
     IncomingNotificationDataBase,
 )
+from core.user_interactions.message_reaction_state import (
+    MessageReactionStateManager,
+)
 from core.user_interactions.message_type import MessageType
 from core.user_interactions.reaction_base import ReactionBase
 from core.user_interactions.user_interactions_plugin_base import (
@@ -24,6 +26,7 @@ class UserInteractionsDispatcher(UserInteractionsPluginBase):
         self.plugins: List[UserInteractionsPluginBase] = []
         self.default_plugin_name = None
         self.default_plugin: Optional[UserInteractionsPluginBase] = None
+        self.reaction_states = MessageReactionStateManager(global_manager)
 
     def initialize(self, plugins: List[UserInteractionsPluginBase] = None):
         # Access the event queue manager from the global manager
@@ -170,7 +173,9 @@ class UserInteractionsDispatcher(UserInteractionsPluginBase):
         else:
             # Process the event directly
             plugin: UserInteractionsPluginBase = self.get_plugin(plugin_name)
-            return await plugin.remove_reaction_from_thread(channel_id, thread_id, reaction_name)
+            result = await plugin.remove_reaction_from_thread(channel_id, thread_id, reaction_name)
+            self.reaction_states.forget_reaction(channel_id, thread_id, reaction_name)
+            return result
 
     async def _remove_reaction_from_thread_background(self, method_params):
         await self.remove_reaction_from_thread(
@@ -413,8 +418,7 @@ class UserInteractionsDispatcher(UserInteractionsPluginBase):
                     reaction['event'] = IncomingNotificationDataBase.from_dict(event)
 
             plugin = self.get_plugin(plugin_name)
-            tasks = [plugin.add_reaction(**reaction) for reaction in reactions]
-            await asyncio.gather(*tasks)
+            await self.reaction_states.apply(plugin, [('add', reaction) for reaction in reactions])
 
     async def remove_reactions(self, reactions: List[dict], is_replayed=False):
         """  
@@ -454,8 +458,7 @@ class UserInteractionsDispatcher(UserInteractionsPluginBase):
                     reaction['event'] = IncomingNotificationDataBase.from_dict(event)
 
             plugin = self.get_plugin(plugin_name)
-            tasks = [plugin.remove_reaction(**reaction) for reaction in reactions]
-            await asyncio.gather(*tasks)
+            await self.reaction_states.apply(plugin, [('remove', reaction) for reaction in reactions])
 
     async def update_reactions_batch(self, reactions_actions: List[dict], is_replayed=False):
         """  
@@ -499,13 +502,8 @@ class UserInteractionsDispatcher(UserInteractionsPluginBase):
 
             plugin = self.get_plugin(plugin_name)
 
-            # Prepare tasks
-            tasks = []
-            for action in reactions_actions:
-                operation = action.get('action')
-                reaction = action.get('reaction')
-                if operation == 'add':
-                    tasks.append(plugin.add_reaction(**reaction))
-                elif operation == 'remove':
-                    tasks.append(plugin.remove_reaction(**reaction))
-            await asyncio.gather(*tasks)
+            # Only the net change of each message's reactions reaches the plugin
+            await self.reaction_states.apply(plugin, [
+                (action.get('action'), action.get('reaction')) for action in reactions_actions
+                if action.get('action') in ('add', 'remove')
+            ])
@@ -30,6 +30,13 @@ class UserInteractionsPluginBase(PluginBase, ABC):
         """
         raise NotImplementedError
 
+    @property
+    def additional_routes(self) -> List[tuple]:
+        """
+        Extra (path, endpoint, methods) routes exposed by the plugin besides its main route.
+        """
+        return []
+
     @property
     @abstractmethod
     def reactions(self) -> ReactionBase:
@@ -2,6 +2,10 @@
 
 max_requests = 1000
 max_requests_jitter = 50
+# Leaves time for the application to drain the requests being processed (SHUTDOWN_DRAIN_TIMEOUT)
+graceful_timeout = 30
+# Workers silent for longer are killed, including during startup (see QUEUE_RECOVERY_TIMEOUT)
+timeout = 30
 
 log_file = "-"
 
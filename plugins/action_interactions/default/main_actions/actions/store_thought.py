@@ -43,12 +43,12 @@ class StoreThought(ActionBase):
 
             # If this is the last step, retrieve each thought and send as individual UserInteractions
             if laststep:
+                base_id = f"{event.channel_id}-{event.thread_id}-{event.timestamp}"
                 files = await self.global_manager.backend_internal_data_processing_dispatcher.list_container_files(
-                    container_name=data_container
+                    container_name=data_container, prefix=base_id
                 )
 
                 # Filter and sort files by step
-                base_id = f"{event.channel_id}-{event.thread_id}-{event.timestamp}"
                 step_files = [f for f in files if f.startswith(base_id)]
                 step_files_sorted = sorted(step_files, key=lambda x: int(x.split('-')[-1].split('.')[0]))
 
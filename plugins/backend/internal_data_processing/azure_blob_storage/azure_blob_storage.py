@@ -1,19 +1,36 @@
+import asyncio
 import json
 import logging
 import os
 import traceback
-
-from azure.core.exceptions import ResourceNotFoundError
+from typing import Callable, Dict, Optional
+
+from azure.core import MatchConditions
+from azure.core.exceptions import (
+    ResourceExistsError,
+    ResourceModifiedError,
+    ResourceNotFoundError,
+)
 from azure.identity import DefaultAzureCredential
-from azure.storage.blob import BlobServiceClient
+from azure.storage.blob import BlobServiceClient as SyncBlobServiceClient
+from azure.storage.blob.aio import BlobServiceClient
 from pydantic import BaseModel
 
 from core.backend.internal_data_processing_base import InternalDataProcessingBase
 from core.backend.pricing_data import PricingData
 from core.global_manager import GlobalManager
+from utils.compression.content_codec import DEFAULT_COMPRESSION_THRESHOLD, ContentCodec
+from utils.http_client.azure_blob_client import (
+    create_blob_service_client,
+    delete_blobs,
+    gather_bounded,
+    is_connection_string,
+)
 from utils.plugin_manager.plugin_manager import PluginManager
 
 AZURE_BLOB_STORAGE = "AZURE_BLOB_STORAGE"
+# Number of times a read-modify-write is attempted when the blob keeps being modified concurrently
+MAX_CONDITIONAL_WRITE_ATTEMPTS = 5
 
 
 class AzureBlobStorageConfig(BaseModel):
@@ -30,9 +47,27 @@ class AzureBlobStorageConfig(BaseModel):
     AZURE_BLOB_STORAGE_CUSTOM_ACTIONS_CONTAINER: str
     AZURE_BLOB_STORAGE_SUBPROMPTS_CONTAINER: str
     AZURE_BLOB_STORAGE_CHAINOFTHOUGHTS_CONTAINER: str
+    AZURE_BLOB_STORAGE_COMPRESSION: Dict[str, str] = {}
+    AZURE_BLOB_STORAGE_COMPRESSION_THRESHOLD: int = DEFAULT_COMPRESSION_THRESHOLD
 
 
 class AzureBlobStoragePlugin(InternalDataProcessingBase):
+    """
+    Data backend storing each data file as a blob of its container.
+
+    All asynchronous operations go through a single asynchronous BlobServiceClient whose HTTP transport
+    is the application shared aiohttp session. Read-modify-write updates (sessions, pricing, removals)
+    are conditional on the ETag read, and are retried from a fresh read when another writer got there
+    first, so concurrent updates of a blob are not lost.
+
+    AZURE_BLOB_STORAGE_CONNECTION_STRING is either the account URL, used with the default Azure
+    credential, or a full connection string (e.g. "UseDevelopmentStorage=true" for Azurite).
+
+    AZURE_BLOB_STORAGE_COMPRESSION maps container names to gzip or zstd: their blobs of at least
+    AZURE_BLOB_STORAGE_COMPRESSION_THRESHOLD bytes are stored compressed. Raw and compressed blobs are
+    read alike, whatever the current setting of their container.
+    """
+
     def __init__(self, global_manager: GlobalManager):
         super().__init__(global_manager)
         self.logger = global_manager.logger
@@ -59,6 +94,11 @@ class AzureBlobStoragePlugin(InternalDataProcessingBase):
         self.vectors_container = None
         self.custom_actions_container = None
         self.subprompts_container = None
+        self.chainofthoughts_container = None
+        self._blob_service_client: Optional[BlobServiceClient] = None
+        self._client_loop: Optional[asyncio.AbstractEventLoop] = None
+        self._sync_blob_service_client: Optional[SyncBlobServiceClient] = None
+        self.content_codec = ContentCodec()
 
     @property
     def plugin_name(self):
@@ -127,20 +167,50 @@ class AzureBlobStoragePlugin(InternalDataProcessingBase):
         self.subprompts_container = self.azure_blob_storage_config.AZURE_BLOB_STORAGE_SUBPROMPTS_CONTAINER
         self.chainofthoughts_container = self.azure_blob_storage_config.AZURE_BLOB_STORAGE_CHAINOFTHOUGHTS_CONTAINER
         self.plugin_name = self.azure_blob_storage_config.PLUGIN_NAME
+        self.content_codec = ContentCodec(
+            self.azure_blob_storage_config.AZURE_BLOB_STORAGE_COMPRESSION,
+            self.azure_blob_storage_config.AZURE_BLOB_STORAGE_COMPRESSION_THRESHOLD, self.logger)
 
-        try:
-            credential = DefaultAzureCredential()
-            self.blob_service_client = BlobServiceClient(
-                account_url=self.azure_blob_storage_config.AZURE_BLOB_STORAGE_CONNECTION_STRING,
-                credential=credential
-            )
+        if not self.connection_string:
+            self.logger.error("Azure Blob Storage Backend: missing connection string")
+            raise ValueError("AZURE_BLOB_STORAGE_CONNECTION_STRING is empty")
+
+    def create_blob_service_client(self) -> BlobServiceClient:
+        return create_blob_service_client(self.connection_string)
+
+    @property
+    def blob_service_client(self) -> BlobServiceClient:
+        """
+        Return the client shared by all asynchronous operations, creating it on first use.
+        A new client is created when used from another event loop, as its connections belong to the loop.
+        """
+        loop = asyncio.get_running_loop()
+        if self._blob_service_client is None or self._client_loop is not loop:
+            self._blob_service_client = self.create_blob_service_client()
+            self._client_loop = loop
             self.logger.info("Azure Blob Storage Backend: BlobServiceClient successfully created")
-        except Exception as e:
-            self.logger.error(f"Failed to create BlobServiceClient: {str(e)}")
+        return self._blob_service_client
+
+    @property
+    def sync_blob_service_client(self) -> SyncBlobServiceClient:
+        """Blocking client, only used by the *_sync methods called outside of an event loop."""
+        if self._sync_blob_service_client is None:
+            if is_connection_string(self.connection_string):
+                self._sync_blob_service_client = SyncBlobServiceClient.from_connection_string(self.connection_string)
+            else:
+                self._sync_blob_service_client = SyncBlobServiceClient(
+                    account_url=self.connection_string, credential=DefaultAzureCredential())
+        return self._sync_blob_service_client
 
-        self.init_containers()
+    async def startup(self):
+        await self.init_containers()
 
-    def init_containers(self):
+    async def shutdown(self):
+        if self._blob_service_client is not None and self._client_loop is asyncio.get_running_loop():
+            await self._blob_service_client.close()
+        self._blob_service_client = None
+
+    async def init_containers(self):
         containers = [
             self.sessions_container,
             self.feedbacks_container,
@@ -153,44 +223,73 @@ class AzureBlobStoragePlugin(InternalDataProcessingBase):
             self.custom_actions_container,
             self.subprompts_container
         ]
-
-        for container in containers:
-            try:
-                container_client = self.blob_service_client.get_container_client(container)
-                if not container_client.exists():
-                    container_client.create_container()
-                    self.logger.info(f"Created container: {container}")
-                else:
-                    self.logger.info(f"Container already exists: {container}")
-            except Exception as e:
-                self.logger.error(f"Failed to create container {container}: {str(e)}")
+        await gather_bounded(self.create_container(container) for container in containers)
 
     async def append_data(self, container_name: str, data_identifier: str, data: str) -> None:
         self.logger.debug(f"Appending data to blob {data_identifier} in container {container_name}")
         blob_client = self.blob_service_client.get_blob_client(container=container_name, blob=data_identifier)
         try:
-            blob_client.upload_blob(data, overwrite=True)
+            await blob_client.upload_blob(self.content_codec.encode(container_name, data), overwrite=True)
             self.logger.info(f"Data successfully appended to blob {data_identifier}")
         except Exception as e:
             self.logger.error(f"Failed to append data to blob: {str(e)}")
             self.logger.error(traceback.format_exc())
 
+    async def read_modify_write(self, data_container: str, data_file: str,
+                                modify: Callable[[Optional[str]], Optional[str]]) -> bool:
+        """
+        Replace the content of a blob by `modify(content)`, content being None when the blob does not exist.
+        The write only succeeds if the blob was not changed since it was read (same ETag, or still missing);
+        otherwise the blob is read again and `modify` applied to the new content, up to
+        MAX_CONDITIONAL_WRITE_ATTEMPTS times. `modify` returning None cancels the write.
+
+        Returns True when the new content was written. Errors other than a lost race are raised.
+        """
+        blob_client = self.blob_service_client.get_blob_client(container=data_container, blob=data_file)
+        for attempt in range(MAX_CONDITIONAL_WRITE_ATTEMPTS):
+            try:
+                download_stream = await blob_client.download_blob()
+                content = self.content_codec.decode(await download_stream.readall())
+                etag = download_stream.properties.etag
+            except ResourceNotFoundError:
+                content, etag = None, None
+
+            new_content = modify(content)
+            if new_content is None:
+                return False
+            new_data = self.content_codec.encode(data_container, new_content)
+
+            try:
+                if etag is None:
+                    await blob_client.upload_blob(new_data, overwrite=False)
+                else:
+                    await blob_client.upload_blob(
+                        new_data, overwrite=True, etag=etag, match_condition=MatchConditions.IfNotModified)
+                return True
+            except (ResourceModifiedError, ResourceExistsError):
+                self.logger.debug(
+                    f"Blob {data_file} in {data_container} modified concurrently, retrying (attempt {attempt + 1})")
+
+        raise RuntimeError(
+            f"Blob {data_file} in {data_container} kept being modified, gave up after "
+            f"{MAX_CONDITIONAL_WRITE_ATTEMPTS} attempts")
+
     async def remove_data(self, container_name: str, datafile_name: str, data: str) -> None:
         self.logger.debug(f"Removing data from blob {datafile_name} in container {container_name}")
+        data_lower = data.lower()
+
+        def remove_lines(existing_content: Optional[str]) -> Optional[str]:
+            if not existing_content or data_lower not in existing_content.lower():
+                return None
+            new_content = '\n'.join(
+                [line for line in existing_content.split('\n') if data_lower not in line.lower()])
+            return new_content or " "
+
         try:
-            data_lower = data.lower()
-            existing_content = await self.read_data_content(container_name, datafile_name)
-            if existing_content is None or existing_content == "":
-                self.logger.info(f"Nothing to remove from blob {datafile_name}")
-                return
-
-            if data_lower in existing_content.lower():
-                new_content = '\n'.join(
-                    [line for line in existing_content.split('\n') if data_lower not in line.lower()])
-                if new_content == "":
-                    new_content = " "
-                await self.write_data_content(container_name, datafile_name, new_content)
+            if await self.read_modify_write(container_name, datafile_name, remove_lines):
                 self.logger.info(f"Data successfully removed from blob {datafile_name}")
+            else:
+                self.logger.info(f"Nothing to remove from blob {datafile_name}")
         except Exception as e:
             self.logger.error(f"Failed to remove data from blob: {str(e)}")
             self.logger.error(traceback.format_exc())
@@ -199,14 +298,13 @@ class AzureBlobStoragePlugin(InternalDataProcessingBase):
         self.logger.debug(f"Reading data content from {data_file} in {data_container}")
         blob_client = self.blob_service_client.get_blob_client(container=data_container, blob=data_file)
         try:
-            if blob_client.exists():
-                download_stream = blob_client.download_blob()
-                blob_data = download_stream.readall()
-                self.logger.debug("Data successfully read")
-                return blob_data.decode('utf-8')
-            else:
-                self.logger.warning(f"Blob not found: {data_file}")
-                return None
+            download_stream = await blob_client.download_blob()
+            blob_data = await download_stream.readall()
+            self.logger.debug("Data successfully read")
+            return self.content_codec.decode(blob_data)
+        except ResourceNotFoundError:
+            self.logger.warning(f"Blob not found: {data_file}")
+            return None
         except Exception as e:
             self.logger.error(f"Failed to read blob: {str(e)}")
             self.logger.error(traceback.format_exc())
@@ -216,7 +314,7 @@ class AzureBlobStoragePlugin(InternalDataProcessingBase):
         self.logger.debug(f"Writing data content to {data_file} in {data_container}")
         blob_client = self.blob_service_client.get_blob_client(container=data_container, blob=data_file)
         try:
-            blob_client.upload_blob(data.encode('utf-8'), overwrite=True)
+            await blob_client.upload_blob(self.content_codec.encode(data_container, data), overwrite=True)
             self.logger.debug("Data successfully written to blob")
         except Exception as e:
             self.logger.error(f"Failed to write to blob: {str(e)}")
@@ -226,7 +324,7 @@ class AzureBlobStoragePlugin(InternalDataProcessingBase):
         self.logger.debug(f"Removing data content from {data_file} in {data_container}")
         blob_client = self.blob_service_client.get_blob_client(container=data_container, blob=data_file)
         try:
-            blob_client.delete_blob()
+            await blob_client.delete_blob()
             self.logger.debug("Blob successfully deleted")
         except ResourceNotFoundError:
             self.logger.warning(f"Blob not found: {data_file}")
@@ -236,37 +334,41 @@ class AzureBlobStoragePlugin(InternalDataProcessingBase):
 
     async def update_pricing(self, container_name, datafile_name: str, pricing_data):
         self.logger.debug(f"Updating pricing in blob {datafile_name} in container {container_name}")
-        existing_content = await self.read_data_content(container_name, datafile_name)
-        if existing_content:
-            try:
+        updated = {}
+
+        def add_pricing(existing_content: Optional[str]) -> str:
+            if existing_content:
                 data = PricingData(**json.loads(existing_content))
                 self.logger.debug("Existing pricing data retrieved")
-            except Exception as e:
-                self.logger.error(f"Failed to retrieve existing pricing data: {str(e)}")
-                return
-        else:
-            self.logger.debug("No existing pricing data found, initializing new pricing structure")
-            data = PricingData()
-
-        data.total_tokens += pricing_data.total_tokens
-        data.prompt_tokens += pricing_data.prompt_tokens
-        data.completion_tokens += pricing_data.completion_tokens
-        data.total_cost += pricing_data.total_cost
-        data.input_cost += pricing_data.input_cost
-        data.output_cost += pricing_data.output_cost
-        self.logger.debug(f"Updated pricing data: {data.__dict__}")
-
-        updated_content = json.dumps(data.__dict__)
-        await self.write_data_content(container_name, datafile_name, updated_content)
+            else:
+                self.logger.debug("No existing pricing data found, initializing new pricing structure")
+                data = PricingData()
+
+            data.total_tokens += pricing_data.total_tokens
+            data.prompt_tokens += pricing_data.prompt_tokens
+            data.completion_tokens += pricing_data.completion_tokens
+            data.total_cost += pricing_data.total_cost
+            data.input_cost += pricing_data.input_cost
+            data.output_cost += pricing_data.output_cost
+            updated['data'] = data
+            return json.dumps(data.__dict__)
+
+        try:
+            await self.read_modify_write(container_name, datafile_name, add_pricing)
+        except Exception as e:
+            self.logger.error(f"Failed to update pricing data: {str(e)}")
+            return
+
+        self.logger.debug(f"Updated pricing data: {updated['data'].__dict__}")
         self.logger.debug("Pricing update completed")
-        return data
+        return updated['data']
 
-    async def list_container_files(self, container_name: str):
+    async def list_container_files(self, container_name: str, prefix: Optional[str] = None):
         file_names = []
         container_client = self.blob_service_client.get_container_client(container_name)
         self.logger.debug(f"Listing files in container {container_name}")
         try:
-            async for blob in container_client.list_blobs():
+            async for blob in container_client.list_blobs(name_starts_with=prefix):
                 file_names.append(os.path.basename(blob.name))
             return file_names
         except Exception as e:
@@ -276,13 +378,12 @@ class AzureBlobStoragePlugin(InternalDataProcessingBase):
     async def update_prompt_system_message(self, channel_id: str, thread_id: str, message: str):
         self.logger.debug(f"Updating prompt system message for channel {channel_id}, thread {thread_id}")
         blob_name = f"{channel_id}-{thread_id}.json"
-        blob_client = self.blob_service_client.get_blob_client(container=self.sessions_container, blob=blob_name)
 
-        try:
-            # Download the session data
-            download_stream = await blob_client.download_blob()
-            blob_data = await download_stream.readall()
-            session = json.loads(blob_data)
+        def set_system_message(existing_content: Optional[str]) -> Optional[str]:
+            if existing_content is None:
+                self.logger.warning(f"Session blob {blob_name} not found")
+                return None
+            session = json.loads(existing_content)
             self.logger.debug("Session blob content parsed into JSON")
 
             # Check if system message exists, if not add it at the beginning
@@ -294,66 +395,52 @@ class AzureBlobStoragePlugin(InternalDataProcessingBase):
                     if obj.get('role') == 'system':
                         obj['content'] = message
                         break
+            return json.dumps(session)
 
-            # Convert updated session to JSON and upload it back to the blob
-            updated_session_data = json.dumps(session)
-            await blob_client.upload_blob(updated_session_data, overwrite=True)
-            self.logger.info("Prompt system message updated successfully")
-
+        try:
+            if await self.read_modify_write(self.sessions_container, blob_name, set_system_message):
+                self.logger.info("Prompt system message updated successfully")
         except Exception as e:
             self.logger.error(f"Failed to update prompt system message: {str(e)}")
 
     async def update_session(self, data_container: str, data_file: str, role: str, content: str):
         self.logger.debug(f"Updating session for file {data_file} in container {data_container}")
 
-        blob_client = self.blob_service_client.get_blob_client(container=data_container, blob=data_file)
-
-        try:
-            # Try to read existing data from the blob
-            if await blob_client.exists():
-                self.logger.debug(f"Blob {data_file} exists, downloading content.")
-                download_stream = await blob_client.download_blob()
-                blob_data = await download_stream.readall()
-                data = json.loads(blob_data)
-                self.logger.debug("Blob content successfully parsed into JSON")
-            else:
+        def append_message(existing_content: Optional[str]) -> str:
+            if existing_content is None:
                 self.logger.debug(f"Blob {data_file} not found, initializing new session data")
-                data = []  # Initialize as an empty list if blob does not exist
-        except ResourceNotFoundError:
-            self.logger.debug(
-                f"Blob {data_file} not found in container {data_container}, initializing new session data")
-            data = []  # Initialize as an empty list if the blob does not exist
-        except Exception as e:
-            self.logger.error(f"Failed to read blob: {str(e)}")
-            return
+                data = []
+            else:
+                data = json.loads(existing_content)
+                self.logger.debug("Blob content successfully parsed into JSON")
 
-        # Append new role and content to the data
-        data.append({"role": role, "content": content})
-        self.logger.debug(f"Appended new role/content: {role}/{content}")
+            # Append new role and content to the data
+            data.append({"role": role, "content": content})
+            self.logger.debug(f"Appended new role/content: {role}/{content}")
+            return json.dumps(data)
 
         try:
-            # Upload the updated data back to the blob, overwriting the existing content
-            updated_data = json.dumps(data)
-            self.logger.debug(f"Uploading updated session data: {updated_data}")
-            await blob_client.upload_blob(updated_data, overwrite=True)
+            await self.read_modify_write(data_container, data_file, append_message)
             self.logger.debug(f"Session update completed for {data_file} in container {data_container}")
         except Exception as e:
-            self.logger.error(f"Failed to write updated session to blob: {str(e)}")
+            self.logger.error(f"Failed to update session blob {data_file}: {str(e)}")
 
     async def create_container(self, data_container):
         try:
             container_client = self.blob_service_client.get_container_client(data_container)
-            if not container_client.exists():
-                container_client.create_container()
+            if not await container_client.exists():
+                await container_client.create_container()
                 self.logger.info(f"Created container: {data_container}")
             else:
                 self.logger.info(f"Container already exists: {data_container}")
+        except ResourceExistsError:
+            self.logger.info(f"Container already exists: {data_container}")
         except Exception as e:
             self.logger.error(f"Failed to create container {data_container}: {str(e)}")
 
     def create_container_sync(self, data_container):
         try:
-            container_client = self.blob_service_client.get_container_client(data_container)
+            container_client = self.sync_blob_service_client.get_container_client(data_container)
             if not container_client.exists():
                 container_client.create_container()
                 self.logger.info(f"Created container: {data_container}")
@@ -382,15 +469,13 @@ class AzureBlobStoragePlugin(InternalDataProcessingBase):
 
     async def clear_container(self, container_name: str):
         """
-        Clear all contents of the specified container in Azure Blob Storage.
+        Clear all contents of the specified container in Azure Blob Storage, with concurrent batch deletes.
         """
         container_client = self.blob_service_client.get_container_client(container_name)
         try:
-            async for blob in container_client.list_blobs():
-                blob_client = container_client.get_blob_client(blob)
-                blob_client.delete_blob()
-                self.logger.info(f"Blob {blob.name} successfully deleted.")
-            self.logger.info(f"All contents of container {container_name} have been cleared.")
+            blob_names = [blob.name async for blob in container_client.list_blobs()]
+            deleted = await delete_blobs(container_client, blob_names, self.logger)
+            self.logger.info(f"All contents of container {container_name} have been cleared ({deleted} blobs deleted).")
         except Exception as e:
             self.logger.error(f"Failed to clear container {container_name}: {str(e)}")
             raise
@@ -399,7 +484,7 @@ class AzureBlobStoragePlugin(InternalDataProcessingBase):
         """
         Clear all contents of the specified container in Azure Blob Storage.
         """
-        container_client = self.blob_service_client.get_container_client(container_name)
+        container_client = self.sync_blob_service_client.get_container_client(container_name)
         try:
             for blob in container_client.list_blobs():
                 blob_client = container_client.get_blob_client(blob)
@@ -1,12 +1,17 @@
 import json
 import os
+import shutil
 import traceback
+from typing import Dict
 
 from pydantic import BaseModel
 
 from core.backend.internal_data_processing_base import InternalDataProcessingBase
 from core.backend.pricing_data import PricingData
 from core.global_manager import GlobalManager
+from utils.compression.content_codec import DEFAULT_COMPRESSION_THRESHOLD, ContentCodec
+from utils.file_system.sharded_layout import file_path as sharded_file_path
+from utils.file_system.sharded_layout import is_shard_directory, iter_files
 from utils.plugin_manager.plugin_manager import PluginManager
 
 
@@ -24,6 +29,9 @@ class FileSystemConfig(BaseModel):
     FILE_SYSTEM_CUSTOM_ACTIONS_CONTAINER: str
     FILE_SYSTEM_SUBPROMPTS_CONTAINER: str
     FILE_SYSTEM_CHAINOFTHOUGHTS_CONTAINER: str
+    FILE_SYSTEM_SHARD_LEVELS: int = 0
+    FILE_SYSTEM_COMPRESSION: Dict[str, str] = {}
+    FILE_SYSTEM_COMPRESSION_THRESHOLD: int = DEFAULT_COMPRESSION_THRESHOLD
 
 
 class FileSystemPlugin(InternalDataProcessingBase):
@@ -49,6 +57,9 @@ class FileSystemPlugin(InternalDataProcessingBase):
         self.custom_actions_container = None
         self.subprompts_container = None
         self.chainofthoughts_container = None
+        self.shard_levels = 0
+        self._shard_directories = set()
+        self.content_codec = ContentCodec()
 
     @property
     def plugin_name(self):
@@ -117,6 +128,10 @@ class FileSystemPlugin(InternalDataProcessingBase):
             self.custom_actions_container = self.file_system_config.FILE_SYSTEM_CUSTOM_ACTIONS_CONTAINER
             self.subprompts_container = self.file_system_config.FILE_SYSTEM_SUBPROMPTS_CONTAINER
             self.chainofthoughts_container = self.file_system_config.FILE_SYSTEM_CHAINOFTHOUGHTS_CONTAINER
+            self.shard_levels = self.file_system_config.FILE_SYSTEM_SHARD_LEVELS
+            self.content_codec = ContentCodec(
+                self.file_system_config.FILE_SYSTEM_COMPRESSION,
+                self.file_system_config.FILE_SYSTEM_COMPRESSION_THRESHOLD, self.logger)
 
             self.plugin_name = self.file_system_config.PLUGIN_NAME
             self.init_shares()
@@ -145,16 +160,70 @@ class FileSystemPlugin(InternalDataProcessingBase):
                 self.logger.error(f"Failed to create directory: {directory_path} - {str(e)}")
                 raise
 
+    def data_file_path(self, container_name: str, file_name: str) -> str:
+        """
+        Path of a file of a container. With FILE_SYSTEM_SHARD_LEVELS > 0, files are spread over levels of
+        subdirectories named after the hash of the file name, to keep directories small.
+        """
+        return sharded_file_path(os.path.join(self.root_directory, container_name), file_name, self.shard_levels)
+
+    def ensure_shard_directory(self, file_path: str):
+        if not self.shard_levels:
+            return
+        directory = os.path.dirname(file_path)
+        if directory not in self._shard_directories:
+            os.makedirs(directory, exist_ok=True)
+            self._shard_directories.add(directory)
+
+    def read_file(self, file_path: str) -> str:
+        """
+        Text of a data file, decompressed if needed. Compressed files start with bytes that are never valid
+        UTF-8: only they fail the text read, and are then read again as binary.
+        """
+        try:
+            with open(file_path, 'r', encoding='utf-8') as file:
+                return file.read()
+        except UnicodeDecodeError:
+            with open(file_path, 'rb') as file:
+                data = file.read()
+            if not self.content_codec.is_compressed(data):
+                raise
+            return self.content_codec.decode(data)
+
+    def write_file(self, data_container: str, file_path: str, text: str):
+        """Write the text of a data file, compressed when configured for its container."""
+        self.ensure_shard_directory(file_path)
+        if self.content_codec.algorithm(data_container) is None:
+            with open(file_path, 'w', encoding='utf-8') as file:
+                file.write(text)
+        else:
+            with open(file_path, 'wb') as file:
+                file.write(self.content_codec.encode(data_container, text))
+
+    def write_json(self, data_container: str, file_path: str, data):
+        if self.content_codec.algorithm(data_container) is None:
+            self.ensure_shard_directory(file_path)
+            with open(file_path, 'w') as file:
+                json.dump(data, file)
+        else:
+            self.write_file(data_container, file_path, json.dumps(data))
+
     async def append_data(self, container_name: str, data_identifier: str, data: str):
         """
         Adds data to a specified container file.
         """
-        file_path = os.path.join(self.root_directory, container_name, data_identifier)
+        file_path = self.data_file_path(container_name, data_identifier)
 
         try:
-            with open(file_path, 'a', encoding='utf-8') as file:
-                file.write(data)
-                file.write("\n")
+            if self.content_codec.algorithm(container_name) is None:
+                self.ensure_shard_directory(file_path)
+                with open(file_path, 'a', encoding='utf-8') as file:
+                    file.write(data)
+                    file.write("\n")
+            else:
+                # A compressed file is rewritten as a whole
+                existing_content = self.read_file(file_path) if os.path.exists(file_path) else ""
+                self.write_file(container_name, file_path, f"{existing_content}{data}\n")
             self.logger.info(f"Data successfully appended to {file_path}.")
         except IOError as e:
             self.logger.error(f"Failed to append data to the file {file_path}: {e}")
@@ -164,7 +233,7 @@ class FileSystemPlugin(InternalDataProcessingBase):
         """
         Remove data from a specified container file.
         """
-        file_path = os.path.join(self.root_directory, container_name, datafile_name)
+        file_path = self.data_file_path(container_name, datafile_name)
         data_lower = data.lower()
 
         # Lire le contenu existant
@@ -201,11 +270,10 @@ class FileSystemPlugin(InternalDataProcessingBase):
 
     async def read_data_content(self, data_container, data_file):
         self.logger.debug(f"Reading data content from {data_file} in {data_container}")
-        file_path = os.path.join(self.root_directory, data_container, data_file)
+        file_path = self.data_file_path(data_container, data_file)
         if os.path.exists(file_path):
             try:
-                with open(file_path, 'r', encoding='utf-8') as file:
-                    data = file.read()
+                data = self.read_file(file_path)
                 self.logger.debug("Data successfully read")
                 return data
             except UnicodeDecodeError as e:
@@ -220,10 +288,9 @@ class FileSystemPlugin(InternalDataProcessingBase):
 
     async def write_data_content(self, data_container, data_file, data):
         self.logger.debug(f"Writing data content to {data_file} in {data_container}")
-        file_path = os.path.join(self.root_directory, data_container, data_file)
+        file_path = self.data_file_path(data_container, data_file)
         try:
-            with open(file_path, 'w', encoding='utf-8') as file:
-                file.write(data)
+            self.write_file(data_container, file_path, data)
             self.logger.debug("Data successfully written to file")
         except Exception:
             error_traceback = traceback.format_exc()
@@ -231,7 +298,7 @@ class FileSystemPlugin(InternalDataProcessingBase):
 
     async def remove_data_content(self, data_container, data_file):
         self.logger.debug(f"Removing data content from {data_file} in {data_container}")
-        file_path = os.path.join(self.root_directory, data_container, data_file)
+        file_path = self.data_file_path(data_container, data_file)
         if os.path.exists(file_path):
             try:
                 os.remove(file_path)
@@ -245,11 +312,10 @@ class FileSystemPlugin(InternalDataProcessingBase):
 
     async def update_pricing(self, container_name, datafile_name, pricing_data):
         self.logger.debug(f"Updating pricing in file {datafile_name} in container {container_name}")
-        file_path = os.path.join(self.root_directory, container_name, datafile_name)
+        file_path = self.data_file_path(container_name, datafile_name)
         if os.path.exists(file_path):
             try:
-                with open(file_path, 'r') as file:
-                    data = PricingData(**json.load(file))
+                data = PricingData(**json.loads(self.read_file(file_path)))
                 self.logger.debug("Existing pricing data retrieved")
             except Exception as e:
                 self.logger.error(f"Failed to read file: {str(e)}")
@@ -267,8 +333,7 @@ class FileSystemPlugin(InternalDataProcessingBase):
         self.logger.debug(f"Updated pricing data: {data.__dict__}")
 
         try:
-            with open(file_path, 'w') as file:
-                json.dump(data.__dict__, file)
+            self.write_json(container_name, file_path, data.__dict__)
             self.logger.debug("Pricing update completed")
         except Exception as e:
             self.logger.error(f"Failed to write to file: {str(e)}")
@@ -277,11 +342,10 @@ class FileSystemPlugin(InternalDataProcessingBase):
 
     async def update_prompt_system_message(self, channel_id, thread_id, message):
         self.logger.debug(f"Updating prompt system message for channel {channel_id}, thread {thread_id}")
-        file_path = os.path.join(self.root_directory, self.sessions, f"{channel_id}-{thread_id}.txt")
+        file_path = self.data_file_path(self.sessions, f"{channel_id}-{thread_id}.txt")
         if os.path.exists(file_path):
             try:
-                with open(file_path, 'r') as file:
-                    session = json.load(file)
+                session = json.loads(self.read_file(file_path))
                 self.logger.debug("Session string parsed into JSON")
             except Exception as e:
                 self.logger.error(f"Failed to read file: {str(e)}")
@@ -303,17 +367,22 @@ class FileSystemPlugin(InternalDataProcessingBase):
             return
 
         try:
-            with open(file_path, 'w') as file:
-                json.dump(session, file)
+            self.write_json(self.sessions, file_path, session)
             self.logger.info("Prompt system message update completed successfully")
         except Exception as e:
             self.logger.error(f"Failed to write to file: {str(e)}")
 
-    async def list_container_files(self, container_name):
+    async def list_container_files(self, container_name, prefix=None):
         try:
             file_names = []
             container_path = os.path.join(self.root_directory, container_name)
+            if self.shard_levels:
+                # The hash spreads names sharing a prefix over all the shards: every shard is listed
+                return [os.path.splitext(name)[0] for name, _ in iter_files(container_path, self.shard_levels)
+                        if not prefix or name.startswith(prefix)]
             for file in os.listdir(container_path):
+                if prefix and not file.startswith(prefix):
+                    continue
                 if os.path.isfile(os.path.join(container_path, file)):
                     file_name_without_extension = os.path.splitext(file)[0]
                     file_names.append(file_name_without_extension)
@@ -324,11 +393,10 @@ class FileSystemPlugin(InternalDataProcessingBase):
 
     async def update_session(self, data_container, data_file, role, content):
         self.logger.debug(f"Updating session for file {data_file} in container {data_container}")
-        file_path = os.path.join(self.root_directory, data_container, data_file)
+        file_path = self.data_file_path(data_container, data_file)
         if os.path.exists(file_path):
             try:
-                with open(file_path, 'r') as file:
-                    data = json.load(file)
+                data = json.loads(self.read_file(file_path))
                 self.logger.debug("JSON content successfully parsed")
             except Exception as e:
                 self.logger.error(f"Failed to read file: {str(e)}")
@@ -340,8 +408,7 @@ class FileSystemPlugin(InternalDataProcessingBase):
         self.logger.debug(f"Appended new role/content: {role}/{content}")
 
         try:
-            with open(file_path, 'w') as file:
-                json.dump(data, file)
+            self.write_json(data_container, file_path, data)
             self.logger.debug("Session update completed")
         except Exception as e:
             self.logger.error(f"Failed to write to file: {str(e)}")
@@ -366,7 +433,7 @@ class FileSystemPlugin(InternalDataProcessingBase):
         """
         Check if a file exists in the specified container.
         """
-        file_path = os.path.join(self.root_directory, container_name, file_name)
+        file_path = self.data_file_path(container_name, file_name)
         return os.path.exists(file_path)
 
     async def clear_container(self, container_name: str):
@@ -381,9 +448,15 @@ class FileSystemPlugin(InternalDataProcessingBase):
                     if os.path.isfile(file_path):
                         os.remove(file_path)
                         self.logger.info(f"File {file_path} successfully deleted.")
+                    elif self.shard_levels and is_shard_directory(filename):
+                        shutil.rmtree(file_path)
+                        self.logger.debug(f"Shard directory {file_path} successfully deleted.")
                     elif os.path.isdir(file_path):
                         os.rmdir(file_path)
                         self.logger.info(f"Directory {file_path} successfully deleted.")
+                self._shard_directories = {
+                    directory for directory in self._shard_directories
+                    if not directory.startswith(container_path + os.sep)}
                 self.logger.info(f"All contents of container {container_name} have been cleared.")
             except Exception as e:
                 self.logger.error(f"Failed to clear container {container_name}: {str(e)}")
@@ -0,0 +1,412 @@
+import json
+import os
+import sqlite3
+from typing import List, Optional
+
+from pydantic import BaseModel
+
+from core.backend.internal_data_processing_base import InternalDataProcessingBase
+from core.backend.pricing_data import PricingData
+from core.global_manager import GlobalManager
+from utils.plugin_manager.plugin_manager import PluginManager
+from utils.sqlite.sqlite_connection_pool import SQLiteConnectionPool
+
+SQLITE = "SQLITE"
+
+
+class SqliteConfig(BaseModel):
+    PLUGIN_NAME: str
+    SQLITE_DATABASE_PATH: str
+    SQLITE_SESSIONS_CONTAINER: str
+    SQLITE_FEEDBACKS_CONTAINER: str
+    SQLITE_CONCATENATE_CONTAINER: str
+    SQLITE_PROMPTS_CONTAINER: str
+    SQLITE_COSTS_CONTAINER: str
+    SQLITE_PROCESSING_CONTAINER: str
+    SQLITE_ABORT_CONTAINER: str
+    SQLITE_VECTORS_CONTAINER: str
+    SQLITE_CUSTOM_ACTIONS_CONTAINER: str
+    SQLITE_SUBPROMPTS_CONTAINER: str
+    SQLITE_CHAINOFTHOUGHTS_CONTAINER: str
+    SQLITE_POOL_SIZE: int = 4
+    SQLITE_BUSY_TIMEOUT: float = 30.0
+
+
+class SqlitePlugin(InternalDataProcessingBase):
+    """
+    Data backend storing every container in a single SQLite database, for single-node deployments.
+
+    Each container is a table keyed by file name, so reads, writes and existence checks are primary key
+    lookups and `list_container_files` with a prefix is a range scan of the key. Read-modify-write
+    updates (sessions, pricing, removals) run in a write transaction and are atomic, including across
+    processes sharing the database file. Calls run off the event loop through a connection pool.
+
+    File names are listed without their extension, as with the file_system backend.
+    """
+
+    def __init__(self, global_manager: GlobalManager):
+        super().__init__(global_manager)
+        self.logger = global_manager.logger
+        self.global_manager = global_manager
+        self.plugin_manager: PluginManager = global_manager.plugin_manager
+        config_dict = global_manager.config_manager.config_model.PLUGINS.BACKEND.INTERNAL_DATA_PROCESSING[SQLITE]
+        self.sqlite_config = SqliteConfig(**config_dict)
+
+        self.plugin_name = None
+        self.database_path = None
+        self.pool: Optional[SQLiteConnectionPool] = None
+        self.sessions_container = None
+        self.feedbacks_container = None
+        self.concatenate_container = None
+        self.prompts_container = None
+        self.costs_container = None
+        self.processing_container = None
+        self.abort_container = None
+        self.vectors_container = None
+        self.custom_actions_container = None
+        self.subprompts_container = None
+        self.chainofthoughts_container = None
+        self._tables = set()
+
+    @property
+    def plugin_name(self):
+        return "sqlite"
+
+    @plugin_name.setter
+    def plugin_name(self, value):
+        self._plugin_name = value
+
+    @property
+    def sessions(self):
+        return self.sessions_container
+
+    @property
+    def feedbacks(self):
+        return self.feedbacks_container
+
+    @property
+    def concatenate(self):
+        return self.concatenate_container
+
+    @property
+    def prompts(self):
+        return self.prompts_container
+
+    @property
+    def costs(self):
+        return self.costs_container
+
+    @property
+    def processing(self):
+        return self.processing_container
+
+    @property
+    def abort(self):
+        return self.abort_container
+
+    @property
+    def vectors(self):
+        return self.vectors_container
+
+    @property
+    def custom_actions(self):
+        return self.custom_actions_container
+
+    @property
+    def subprompts(self):
+        return self.subprompts_container
+
+    @property
+    def chainofthoughts(self):
+        return self.chainofthoughts_container
+
+    def initialize(self):
+        self.logger.debug("Initializing SQLite database")
+        self.database_path = self.sqlite_config.SQLITE_DATABASE_PATH
+        self.sessions_container = self.sqlite_config.SQLITE_SESSIONS_CONTAINER
+        self.feedbacks_container = self.sqlite_config.SQLITE_FEEDBACKS_CONTAINER
+        self.concatenate_container = self.sqlite_config.SQLITE_CONCATENATE_CONTAINER
+        self.prompts_container = self.sqlite_config.SQLITE_PROMPTS_CONTAINER
+        self.costs_container = self.sqlite_config.SQLITE_COSTS_CONTAINER
+        self.processing_container = self.sqlite_config.SQLITE_PROCESSING_CONTAINER
+        self.abort_container = self.sqlite_config.SQLITE_ABORT_CONTAINER
+        self.vectors_container = self.sqlite_config.SQLITE_VECTORS_CONTAINER
+        self.custom_actions_container = self.sqlite_config.SQLITE_CUSTOM_ACTIONS_CONTAINER
+        self.subprompts_container = self.sqlite_config.SQLITE_SUBPROMPTS_CONTAINER
+        self.chainofthoughts_container = self.sqlite_config.SQLITE_CHAINOFTHOUGHTS_CONTAINER
+        self.plugin_name = self.sqlite_config.PLUGIN_NAME
+
+        self.pool = SQLiteConnectionPool(
+            self.database_path, size=self.sqlite_config.SQLITE_POOL_SIZE,
+            busy_timeout=self.sqlite_config.SQLITE_BUSY_TIMEOUT)
+        self.init_tables()
+
+    def init_tables(self):
+        containers = [
+            self.sessions_container,
+            self.feedbacks_container,
+            self.concatenate_container,
+            self.prompts_container,
+            self.costs_container,
+            self.processing_container,
+            self.abort_container,
+            self.vectors_container,
+            self.custom_actions_container,
+            self.subprompts_container,
+            self.chainofthoughts_container
+        ]
+        for container in containers:
+            try:
+                self.create_container_sync(container)
+            except sqlite3.Error as e:
+                self.logger.error(f"Failed to create table for container {container}: {str(e)}")
+                raise
+        self.logger.info(f"SQLite database ready at {self.database_path}")
+
+    async def shutdown(self):
+        if self.pool is not None:
+            self.pool.close()
+
+    @staticmethod
+    def table_name(container_name: str) -> str:
+        """Quoted table name of a container; any container name is valid, quotes included."""
+        return '"' + f"container_{container_name}".replace('"', '""') + '"'
+
+    def _ensure_table(self, connection: sqlite3.Connection, container_name: str) -> str:
+        table = self.table_name(container_name)
+        if container_name not in self._tables:
+            connection.execute(
+                f"CREATE TABLE IF NOT EXISTS {table} (name TEXT PRIMARY KEY, content TEXT NOT NULL) WITHOUT ROWID")
+            self._tables.add(container_name)
+        return table
+
+    def _read(self, connection: sqlite3.Connection, container_name: str, name: str) -> Optional[str]:
+        table = self._ensure_table(connection, container_name)
+        row = connection.execute(f"SELECT content FROM {table} WHERE name = ?", (name,)).fetchone()
+        return row[0] if row else None
+
+    def _write(self, connection: sqlite3.Connection, container_name: str, name: str, content: str):
+        table = self._ensure_table(connection, container_name)
+        connection.execute(
+            f"INSERT INTO {table} (name, content) VALUES (?, ?) "
+            f"ON CONFLICT(name) DO UPDATE SET content = excluded.content", (name, content))
+
+    async def append_data(self, container_name: str, data_identifier: str, data: str):
+        """
+        Adds data to a specified container file.
+        """
+        def append(connection):
+            table = self._ensure_table(connection, container_name)
+            connection.execute(
+                f"INSERT INTO {table} (name, content) VALUES (?, ?) "
+                f"ON CONFLICT(name) DO UPDATE SET content = content || excluded.content",
+                (data_identifier, f"{data}\n"))
+
+        try:
+            await self.pool.run(append)
+            self.logger.info(f"Data successfully appended to {data_identifier} in {container_name}.")
+        except sqlite3.Error as e:
+            self.logger.error(f"Failed to append data to {data_identifier} in {container_name}: {e}")
+            raise e
+
+    async def remove_data(self, container_name: str, datafile_name: str, data: str):
+        """
+        Remove the lines containing data from a specified container file.
+        """
+        data_lower = data.lower()
+
+        def remove_lines(connection) -> bool:
+            with self.pool.transaction(connection):
+                existing_content = self._read(connection, container_name, datafile_name)
+                if not existing_content or data_lower not in existing_content.lower():
+                    return False
+                new_content = '\n'.join(
+                    [line for line in existing_content.split('\n') if data_lower not in line.lower()])
+                if new_content.strip() == "":
+                    new_content = " "
+                self._write(connection, container_name, datafile_name, new_content)
+                return True
+
+        try:
+            if await self.pool.run(remove_lines):
+                self.logger.info(f"Data successfully removed from {datafile_name} in {container_name}")
+            else:
+                self.logger.debug(f"No matching content in {datafile_name} in {container_name}")
+        except sqlite3.Error as e:
+            self.logger.error(f"Failed to remove data from {datafile_name} in {container_name}: {e}")
+            raise e
+
+    async def read_data_content(self, data_container, data_file):
+        self.logger.debug(f"Reading data content from {data_file} in {data_container}")
+        try:
+            data = await self.pool.run(self._read, data_container, data_file)
+        except sqlite3.Error as e:
+            self.logger.error(f"Failed to read data: {str(e)}")
+            return None
+        if data is None:
+            self.logger.debug(f"File not found: {data_file}")
+        return data
+
+    async def write_data_content(self, data_container, data_file, data):
+        self.logger.debug(f"Writing data content to {data_file} in {data_container}")
+        try:
+            await self.pool.run(self._write, data_container, data_file, data)
+            self.logger.debug("Data successfully written")
+        except sqlite3.Error as e:
+            self.logger.error(f"Failed to write data: {str(e)}")
+
+    async def remove_data_content(self, data_container, data_file):
+        self.logger.debug(f"Removing data content from {data_file} in {data_container}")
+
+        def delete(connection) -> int:
+            table = self._ensure_table(connection, data_container)
+            return connection.execute(f"DELETE FROM {table} WHERE name = ?", (data_file,)).rowcount
+
+        try:
+            if await self.pool.run(delete):
+                self.logger.debug("File successfully deleted")
+            else:
+                self.logger.debug(f"File not found: {data_file}")
+        except sqlite3.Error as e:
+            self.logger.error(f"Failed to delete data: {str(e)}")
+
+    async def update_pricing(self, container_name, datafile_name, pricing_data):
+        self.logger.debug(f"Updating pricing in {datafile_name} in container {container_name}")
+
+        def add_pricing(connection) -> PricingData:
+            with self.pool.transaction(connection):
+                existing_content = self._read(connection, container_name, datafile_name)
+                data = PricingData()
+                if existing_content:
+                    try:
+                        data = PricingData(**json.loads(existing_content))
+                        self.logger.debug("Existing pricing data retrieved")
+                    except Exception as e:
+                        self.logger.error(f"Failed to parse existing pricing data: {str(e)}")
+                else:
+                    self.logger.debug("No existing pricing data found, initializing new pricing structure")
+
+                data.total_tokens += pricing_data.total_tokens
+                data.prompt_tokens += pricing_data.prompt_tokens
+                data.completion_tokens += pricing_data.completion_tokens
+                data.total_cost += pricing_data.total_cost
+                data.input_cost += pricing_data.input_cost
+                data.output_cost += pricing_data.output_cost
+                self._write(connection, container_name, datafile_name, json.dumps(data.__dict__))
+                return data
+
+        try:
+            data = await self.pool.run(add_pricing)
+        except sqlite3.Error as e:
+            self.logger.error(f"Failed to update pricing data: {str(e)}")
+            return None
+        self.logger.debug(f"Updated pricing data: {data.__dict__}")
+        return data
+
+    async def update_prompt_system_message(self, channel_id, thread_id, message):
+        self.logger.debug(f"Updating prompt system message for channel {channel_id}, thread {thread_id}")
+        data_file = f"{channel_id}-{thread_id}.txt"
+
+        def set_system_message(connection) -> Optional[str]:
+            with self.pool.transaction(connection):
+                content = self._read(connection, self.sessions, data_file)
+                if content is None:
+                    return f"Session data not found for file {data_file}"
+                session = json.loads(content)
+                system_message = next((obj for obj in session if obj.get('role') == 'system'), None)
+                if system_message is None:
+                    return "System role not found in session JSON"
+                system_message['content'] = message
+                self._write(connection, self.sessions, data_file, json.dumps(session))
+                return None
+
+        try:
+            problem = await self.pool.run(set_system_message)
+        except (sqlite3.Error, ValueError) as e:
+            self.logger.error(f"Failed to update prompt system message: {str(e)}")
+            return
+        if problem:
+            self.logger.warning(problem)
+        else:
+            self.logger.info("Prompt system message update completed successfully")
+
+    async def list_container_files(self, container_name, prefix: Optional[str] = None) -> List[str]:
+        def list_names(connection) -> List[str]:
+            table = self._ensure_table(connection, container_name)
+            if not prefix:
+                rows = connection.execute(f"SELECT name FROM {table} ORDER BY name")
+            else:
+                # Range scan of the primary key: names >= prefix and below the next possible prefix
+                upper_bound = prefix[:-1] + chr(ord(prefix[-1]) + 1)
+                rows = connection.execute(
+                    f"SELECT name FROM {table} WHERE name >= ? AND name < ? ORDER BY name", (prefix, upper_bound))
+            return [row[0] for row in rows]
+
+        try:
+            names = await self.pool.run(list_names)
+            return [os.path.splitext(name)[0] for name in names]
+        except sqlite3.Error as e:
+            self.logger.error(f"An error occurred while listing files: {e}")
+            return []
+
+    async def update_session(self, data_container, data_file, role, content):
+        self.logger.debug(f"Updating session for file {data_file} in container {data_container}")
+
+        def append_message(connection):
+            with self.pool.transaction(connection):
+                existing_content = self._read(connection, data_container, data_file)
+                data = json.loads(existing_content) if existing_content is not None else []
+                data.append({"role": role, "content": content})
+                self._write(connection, data_container, data_file, json.dumps(data))
+
+        try:
+            await self.pool.run(append_message)
+            self.logger.debug(f"Appended new role/content: {role}/{content}")
+        except (sqlite3.Error, ValueError) as e:
+            self.logger.error(f"Failed to update session {data_file}: {str(e)}")
+
+    async def create_container(self, data_container):
+        await self.pool.run(self._ensure_table, data_container)
+
+    def create_container_sync(self, data_container):
+        self.pool.run_sync(self._ensure_table, data_container)
+
+    async def file_exists(self, container_name: str, file_name: str) -> bool:
+        """
+        Check if a file exists in the specified container.
+        """
+        def exists(connection) -> bool:
+            table = self._ensure_table(connection, container_name)
+            return connection.execute(f"SELECT 1 FROM {table} WHERE name = ?", (file_name,)).fetchone() is not None
+
+        try:
+            return await self.pool.run(exists)
+        except sqlite3.Error as e:
+            self.logger.error(f"Error checking if file {file_name} exists in container {container_name}: {str(e)}")
+            return False
+
+    def _clear(self, connection: sqlite3.Connection, container_name: str) -> int:
+        table = self._ensure_table(connection, container_name)
+        return connection.execute(f"DELETE FROM {table}").rowcount
+
+    async def clear_container(self, container_name: str):
+        """
+        Clear all contents of the specified container.
+        """
+        try:
+            removed = await self.pool.run(self._clear, container_name)
+            self.logger.info(f"All contents of container {container_name} have been cleared ({removed} files).")
+        except sqlite3.Error as e:
+            self.logger.error(f"Failed to clear container {container_name}: {str(e)}")
+            raise
+
+    def clear_container_sync(self, container_name: str):
+        """
+        Clear all contents of the specified container.
+        """
+        try:
+            removed = self.pool.run_sync(self._clear, container_name)
+            self.logger.info(f"All contents of container {container_name} have been cleared ({removed} files).")
+        except sqlite3.Error as e:
+            self.logger.error(f"Failed to clear container {container_name}: {str(e)}")
+            raise
@@ -1,15 +1,21 @@
+import asyncio
 import logging
 import time
 import uuid
 from typing import List, Optional, Tuple
 
 from azure.core.exceptions import ResourceExistsError, ResourceNotFoundError
-from azure.identity import DefaultAzureCredential
-from azure.storage.blob import BlobServiceClient
+from azure.storage.blob.aio import BlobServiceClient
 from pydantic import BaseModel
 
 from core.backend.internal_queue_processing_base import InternalQueueProcessingBase
+from core.backend.queue_expiry_scheduler import QueueExpiryScheduler
 from core.global_manager import GlobalManager
+from utils.http_client.azure_blob_client import (
+    create_blob_service_client,
+    delete_blobs,
+    gather_bounded,
+)
 from utils.plugin_manager.plugin_manager import PluginManager
 
 AZURE_BLOB_STORAGE_QUEUE = "AZURE_BLOB_STORAGE_QUEUE"
@@ -27,9 +33,21 @@ class AzureBlobStorageConfig(BaseModel):
     AZURE_BLOB_STORAGE_QUEUE_INTERNAL_EVENTS_QUEUE_TTL: int
     AZURE_BLOB_STORAGE_QUEUE_EXTERNAL_EVENTS_QUEUE_TTL: int
     AZURE_BLOB_STORAGE_QUEUE_WAIT_QUEUE_TTL: int
+    AZURE_BLOB_STORAGE_QUEUE_EXPIRY_INTERVAL: int = 60
 
 
 class AzureBlobStorageQueuePlugin(InternalQueueProcessingBase):
+    """
+    Queue backend storing each message as a blob named <channel_id>_<thread_id>_<message_id>_<guid>.txt.
+
+    All operations go through a single asynchronous BlobServiceClient whose HTTP transport is the
+    application shared aiohttp session, so connections are pooled across operations. Per-thread
+    operations only list the blobs of their thread prefix.
+
+    AZURE_BLOB_STORAGE_QUEUE_CONNECTION_STRING is either the account URL, used with the default Azure
+    credential, or a full connection string (e.g. "UseDevelopmentStorage=true" for Azurite).
+    """
+
     def __init__(self, global_manager: GlobalManager):
         self.logger = global_manager.logger
         super().__init__(global_manager)
@@ -38,22 +56,34 @@ class AzureBlobStorageQueuePlugin(InternalQueueProcessingBase):
             AZURE_BLOB_STORAGE_QUEUE]
         self.azure_blob_storage_config = AzureBlobStorageConfig(**config_dict)
         self.plugin_name = None
+        self.expiry_scheduler = QueueExpiryScheduler(
+            self.logger, self.remove_messages, self.azure_blob_storage_config.AZURE_BLOB_STORAGE_QUEUE_EXPIRY_INTERVAL)
+        self._blob_service_client: Optional[BlobServiceClient] = None
+        self._client_loop: Optional[asyncio.AbstractEventLoop] = None
 
     def initialize(self):
         logging.getLogger("azure").setLevel(logging.WARNING)
         logging.getLogger("azure.storage.blob").setLevel(logging.WARNING)
         self.logger.debug(f"{LOG_PREFIX} Initializing Azure Blob Storage connection")
-        try:
-            credential = DefaultAzureCredential()
-            self.blob_service_client = BlobServiceClient(
-                account_url=self.azure_blob_storage_config.AZURE_BLOB_STORAGE_QUEUE_CONNECTION_STRING,
-                credential=credential
-            )
+        if not self.azure_blob_storage_config.AZURE_BLOB_STORAGE_QUEUE_CONNECTION_STRING:
+            self.logger.error(f"{LOG_PREFIX} Missing Azure Blob Storage connection string")
+            raise ValueError("AZURE_BLOB_STORAGE_QUEUE_CONNECTION_STRING is empty")
+
+    def create_blob_service_client(self) -> BlobServiceClient:
+        return create_blob_service_client(self.azure_blob_storage_config.AZURE_BLOB_STORAGE_QUEUE_CONNECTION_STRING)
+
+    @property
+    def blob_service_client(self) -> BlobServiceClient:
+        """
+        Return the client shared by all operations, creating it on first use.
+        A new client is created when used from another event loop, as its connections belong to the loop.
+        """
+        loop = asyncio.get_running_loop()
+        if self._blob_service_client is None or self._client_loop is not loop:
+            self._blob_service_client = self.create_blob_service_client()
+            self._client_loop = loop
             self.logger.info(f"{LOG_PREFIX} BlobServiceClient successfully created")
-        except Exception as e:
-            self.logger.error(f"{LOG_PREFIX} Failed to create BlobServiceClient: {str(e)}")
-            raise
-        self.init_containers()
+        return self._blob_service_client
 
     @property
     def plugin_name(self):
@@ -95,7 +125,17 @@ class AzureBlobStorageQueuePlugin(InternalQueueProcessingBase):
     def wait_queue_ttl(self):
         return self.azure_blob_storage_config.AZURE_BLOB_STORAGE_QUEUE_WAIT_QUEUE_TTL
 
-    def init_containers(self):
+    async def startup(self):
+        await self.init_containers()
+        self.expiry_scheduler.start()
+
+    async def shutdown(self):
+        await self.expiry_scheduler.stop()
+        if self._blob_service_client is not None and self._client_loop is asyncio.get_running_loop():
+            await self._blob_service_client.close()
+        self._blob_service_client = None
+
+    async def init_containers(self):
         container_names = [
             self.messages_queue,
             self.internal_events_queue,
@@ -103,15 +143,20 @@ class AzureBlobStorageQueuePlugin(InternalQueueProcessingBase):
             self.wait_queue
         ]
         for container in container_names:
-            try:
-                container_client = self.blob_service_client.get_container_client(container)
-                if not container_client.exists():
-                    container_client.create_container()
-                    self.logger.info(f"{LOG_PREFIX} Created container: {container}")
-                else:
-                    self.logger.info(f"{LOG_PREFIX} Container already exists: {container}")
-            except Exception as e:
-                self.logger.error(f"{LOG_PREFIX} Failed to create container {container}: {str(e)}")
+            await self.create_container(container)
+
+    @staticmethod
+    def thread_prefix(channel_id: str, thread_id: str) -> str:
+        return f"{channel_id}_{thread_id}_"
+
+    async def list_blob_names(self, data_container: str, prefix: Optional[str] = None) -> List[str]:
+        container_client = self.blob_service_client.get_container_client(data_container)
+        return [blob.name async for blob in container_client.list_blobs(name_starts_with=prefix)]
+
+    async def download_message(self, data_container: str, blob_name: str) -> str:
+        blob_client = self.blob_service_client.get_blob_client(container=data_container, blob=blob_name)
+        stream = await blob_client.download_blob()
+        return (await stream.readall()).decode('utf-8')
 
     def extract_message_id(self, blob_name: str) -> Optional[float]:
         try:
@@ -140,57 +185,13 @@ class AzureBlobStorageQueuePlugin(InternalQueueProcessingBase):
         """
         self.logger.info(
             f"{LOG_PREFIX} Cleaning up expired messages for channel '{channel_id}', thread '{thread_id}' with TTL '{ttl_seconds}' seconds.")
-        container_client = self.blob_service_client.get_container_client(data_container)
-        blobs = list(container_client.list_blobs())
-
-        for blob in blobs:
-            if blob.name.startswith(f"{channel_id}_{thread_id}_"):
-                if self.is_message_expired(blob.name, ttl_seconds):
-                    blob_client = self.blob_service_client.get_blob_client(data_container, blob.name)
-                    self.logger.info(f"{LOG_PREFIX} Removing expired message: {blob.name}")
-                    try:
-                        blob_client.delete_blob()
-                        self.logger.info(f"{LOG_PREFIX} Expired message removed: {blob.name}")
-                    except Exception as e:
-                        self.logger.error(f"{LOG_PREFIX} Failed to delete expired message {blob.name}: {str(e)}")
-
-    async def clean_all_queues(self) -> None:
-        """
-        Cleans up all expired messages across all Azure Blob Storage queues based on their TTL values.
-        """
-        ttl_mapping = {
-            self.messages_queue: self.azure_blob_storage_config.AZURE_BLOB_STORAGE_QUEUE_MESSAGES_QUEUE_TTL,
-            self.internal_events_queue: self.azure_blob_storage_config.AZURE_BLOB_STORAGE_QUEUE_INTERNAL_EVENTS_QUEUE_TTL,
-            self.external_events_queue: self.azure_blob_storage_config.AZURE_BLOB_STORAGE_QUEUE_EXTERNAL_EVENTS_QUEUE_TTL,
-            self.wait_queue: self.azure_blob_storage_config.AZURE_BLOB_STORAGE_QUEUE_WAIT_QUEUE_TTL,
-        }
-
-        total_removed_files = 0  # Track the total number of removed files
-
-        for queue_container, ttl_seconds in ttl_mapping.items():
-            self.logger.info(
-                f"{LOG_PREFIX} Cleaning up expired messages in container: {queue_container} with TTL: {ttl_seconds} seconds.")
-            container_client = self.blob_service_client.get_container_client(queue_container)
-            blobs = list(container_client.list_blobs())
-
-            removed_files_count = 0  # Track removed files per queue
-
-            for blob in blobs:
-                if self.is_message_expired(blob.name, ttl_seconds):
-                    blob_client = self.blob_service_client.get_blob_client(queue_container, blob.name)
-                    self.logger.debug(f"{LOG_PREFIX} Removing expired message: {blob.name}")
-                    try:
-                        blob_client.delete_blob()
-                        self.logger.info(f"{LOG_PREFIX} Deleted expired message: {blob.name}")
-                        removed_files_count += 1
-                    except Exception as e:
-                        self.logger.error(f"{LOG_PREFIX} Failed to delete expired message {blob.name}: {str(e)}")
-
-            self.logger.info(
-                f"{LOG_PREFIX} Removed {removed_files_count} expired files from queue '{queue_container}'.")
-            total_removed_files += removed_files_count
-
-        self.logger.info(f"{LOG_PREFIX} Total removed expired files across all queues: {total_removed_files}.")
+        try:
+            blob_names = await self.list_blob_names(data_container, self.thread_prefix(channel_id, thread_id))
+            expired = [blob_name for blob_name in blob_names if self.is_message_expired(blob_name, ttl_seconds)]
+            if expired:
+                await self.remove_messages(data_container, expired)
+        except Exception as e:
+            self.logger.error(f"{LOG_PREFIX} Failed to clean up expired messages: {str(e)}")
 
     async def enqueue_message(self, data_container: str, channel_id: str, thread_id: str, message_id: str, message: str,
                               guid: Optional[str] = None) -> None:
@@ -202,14 +203,15 @@ class AzureBlobStorageQueuePlugin(InternalQueueProcessingBase):
 
         # Update message_id to include the GUID
         blob_name = f"{channel_id}_{thread_id}_{message_id}_{guid}.txt"
-        blob_client = self.blob_service_client.get_blob_client(container=data_container, blob=blob_name)
 
         self.logger.info(
             f"{LOG_PREFIX} Enqueueing message for channel '{channel_id}', thread '{thread_id}' with GUID '{guid}'.")
 
         try:
-            blob_client.upload_blob(message, overwrite=True)
+            blob_client = self.blob_service_client.get_blob_client(container=data_container, blob=blob_name)
+            await blob_client.upload_blob(message, overwrite=True)
             self.logger.info(f"{LOG_PREFIX} Message successfully enqueued with ID '{blob_name}'.")
+            self.schedule_expiry(data_container, blob_name, message_id)
         except ResourceExistsError:
             self.logger.warning(f"{LOG_PREFIX} Message with GUID '{guid}' already exists.")
         except Exception as e:
@@ -221,13 +223,14 @@ class AzureBlobStorageQueuePlugin(InternalQueueProcessingBase):
         Removes a message from the queue based on channel_id, thread_id, message_id, and guid.
         """
         blob_name = f"{channel_id}_{thread_id}_{message_id}_{guid}.txt"
-        blob_client = self.blob_service_client.get_blob_client(container=data_container, blob=blob_name)
 
         self.logger.info(
             f"{LOG_PREFIX} Dequeueing message '{blob_name}' for channel '{channel_id}', thread '{thread_id}' with GUID '{guid}'.")
+        self.expiry_scheduler.discard(data_container, blob_name)
 
         try:
-            blob_client.delete_blob()
+            blob_client = self.blob_service_client.get_blob_client(container=data_container, blob=blob_name)
+            await blob_client.delete_blob()
             self.logger.info(f"{LOG_PREFIX} Message '{blob_name}' successfully removed.")
         except ResourceNotFoundError:
             self.logger.warning(f"{LOG_PREFIX} Message '{blob_name}' not found.")
@@ -243,33 +246,25 @@ class AzureBlobStorageQueuePlugin(InternalQueueProcessingBase):
             f"{LOG_PREFIX} Retrieving next message for channel '{channel_id}', thread '{thread_id}' after '{current_message_id}'.")
 
         try:
-            container_client = self.blob_service_client.get_container_client(data_container)
-            blobs = list(container_client.list_blobs())
-
-            # Filter blobs by channel_id and thread_id
-            filtered_blobs = [blob for blob in blobs if blob.name.startswith(f"{channel_id}_{thread_id}_")]
-
-            if not filtered_blobs:
+            blob_names = await self.list_blob_names(data_container, self.thread_prefix(channel_id, thread_id))
+            if not blob_names:
                 return None, None
 
             current_timestamp = float(current_message_id)
 
             # Filter valid blobs with a message_id and sort them by timestamp
-            filtered_blobs = [blob for blob in filtered_blobs if self.extract_message_id(blob.name) is not None]
-            filtered_blobs.sort(key=lambda blob: self.extract_message_id(blob.name))
+            blob_names = [blob_name for blob_name in blob_names if self.extract_message_id(blob_name) is not None]
+            blob_names.sort(key=self.extract_message_id)
 
             # Find the next message after current_message_id
-            next_blob = next(
-                (blob for blob in filtered_blobs if float(self.extract_message_id(blob.name)) > current_timestamp),
-                None)
+            next_blob_name = next(
+                (blob_name for blob_name in blob_names if self.extract_message_id(blob_name) > current_timestamp), None)
 
-            if not next_blob:
+            if not next_blob_name:
                 return None, None
 
-            # Retrieve message content
-            blob_client = self.blob_service_client.get_blob_client(data_container, next_blob.name)
-            message_content = blob_client.download_blob().readall().decode('utf-8')
-            next_message_id = next_blob.name.split('_')[-2]  # Extract message_id (ignores the GUID)
+            message_content = await self.download_message(data_container, next_blob_name)
+            next_message_id = next_blob_name.split('_')[-2]  # Extract message_id (ignores the GUID)
 
             return next_message_id, message_content
 
@@ -286,21 +281,12 @@ class AzureBlobStorageQueuePlugin(InternalQueueProcessingBase):
             f"{LOG_PREFIX} Checking for older messages in queue for channel '{channel_id}', thread '{thread_id}', excluding message_id '{current_message_id}'.")
 
         try:
-            container_client = self.blob_service_client.get_container_client(data_container)
-            blobs = list(container_client.list_blobs())
-
-            # Filter blobs by channel_id and thread_id, excluding the current message
-            filtered_blobs = [blob for blob in blobs if blob.name.startswith(f"{channel_id}_{thread_id}_")]
-
+            blob_names = await self.list_blob_names(data_container, self.thread_prefix(channel_id, thread_id))
             current_timestamp = float(current_message_id)
 
-            # Filter blobs with a valid message_id
-            filtered_blobs = [blob for blob in filtered_blobs if self.extract_message_id(blob.name) is not None]
-
             # Check if any message has an older timestamp than current_message_id
-            has_older = any(float(self.extract_message_id(blob.name)) < current_timestamp for blob in filtered_blobs)
-
-            return has_older
+            timestamps = (self.extract_message_id(blob_name) for blob_name in blob_names)
+            return any(timestamp is not None and timestamp < current_timestamp for timestamp in timestamps)
 
         except Exception as e:
             self.logger.error(f"{LOG_PREFIX} Failed to check older messages: {str(e)}")
@@ -313,59 +299,48 @@ class AzureBlobStorageQueuePlugin(InternalQueueProcessingBase):
         self.logger.info(f"{LOG_PREFIX} Retrieving all messages for channel '{channel_id}', thread '{thread_id}'.")
 
         try:
-            container_client = self.blob_service_client.get_container_client(data_container)
-            blobs = list(container_client.list_blobs())
-
-            # Filter blobs for the given channel_id and thread_id
-            filtered_blobs = [blob for blob in blobs if blob.name.startswith(f"{channel_id}_{thread_id}_")]
+            blob_names = await self.list_blob_names(data_container, self.thread_prefix(channel_id, thread_id))
+            return await gather_bounded(self.download_message(data_container, name) for name in blob_names)
 
-            if not filtered_blobs:
-                return []
-
-            # Retrieve message contents
-            messages_content = []
-            for blob in filtered_blobs:
-                blob_client = self.blob_service_client.get_blob_client(data_container, blob.name)
-                message_content = blob_client.download_blob().readall().decode('utf-8')
-                messages_content.append(message_content)
+        except Exception as e:
+            self.logger.error(f"{LOG_PREFIX} Failed to retrieve messages: {str(e)}")
+            return []
 
+    async def get_container_messages(self, data_container: str) -> List[str]:
+        """
+        Retrieves all messages of a container, whatever their channel and thread.
+        """
+        try:
+            blob_names = await self.list_blob_names(data_container)
+            messages_content = await gather_bounded(
+                self.download_message(data_container, name) for name in blob_names)
+            self.logger.info(f"{LOG_PREFIX} Retrieved {len(messages_content)} messages from queue '{data_container}'.")
             return messages_content
 
         except Exception as e:
             self.logger.error(f"{LOG_PREFIX} Failed to retrieve messages: {str(e)}")
             return []
 
+    async def delete_blobs(self, data_container: str, blob_names: List[str]) -> int:
+        """
+        Deletes blobs with concurrent blob batch requests, returns how many were deleted.
+        """
+        container_client = self.blob_service_client.get_container_client(data_container)
+        return await delete_blobs(container_client, blob_names, self.logger)
+
     async def clear_all_queues(self) -> None:
         """
         Clears all messages from all Azure Blob Storage queues, regardless of TTL.
         """
-        queue_containers = [
-            self.messages_queue,
-            self.internal_events_queue,
-            self.external_events_queue,
-            self.wait_queue,
-        ]
-
         total_removed_files = 0  # Track the total number of removed blobs
 
-        for queue_container in queue_containers:
+        for queue_container in self.ttl_mapping:
             self.logger.info(f"{LOG_PREFIX} Clearing all messages in container: {queue_container}.")
             try:
-                container_client = self.blob_service_client.get_container_client(queue_container)
-                blobs = list(container_client.list_blobs())
-
-                removed_files_count = 0  # Track removed blobs per container
-
-                for blob in blobs:
-                    blob_client = self.blob_service_client.get_blob_client(container=queue_container, blob=blob.name)
-                    self.logger.debug(f"{LOG_PREFIX} Deleting blob: {blob.name}")
-                    try:
-                        blob_client.delete_blob()
-                        self.logger.info(f"{LOG_PREFIX} Deleted message: {blob.name}")
-                        removed_files_count += 1
-                    except Exception as e:
-                        self.logger.error(f"{LOG_PREFIX} Failed to delete message {blob.name}: {str(e)}")
-
+                blob_names = await self.list_blob_names(queue_container)
+                removed_files_count = await self.delete_blobs(queue_container, blob_names)
+                for blob_name in blob_names:
+                    self.expiry_scheduler.discard(queue_container, blob_name)
                 self.logger.info(
                     f"{LOG_PREFIX} Removed {removed_files_count} messages from container '{queue_container}'.")
                 total_removed_files += removed_files_count
@@ -375,49 +350,47 @@ class AzureBlobStorageQueuePlugin(InternalQueueProcessingBase):
 
         self.logger.info(f"{LOG_PREFIX} Total removed messages across all containers: {total_removed_files}.")
 
-    async def clean_all_queues(self) -> None:
-        """
-        Cleans up all expired messages across all Azure Blob Storage queues based on TTL values.
-        """
-        ttl_mapping = {
+    @property
+    def ttl_mapping(self) -> dict:
+        return {
             self.messages_queue: self.azure_blob_storage_config.AZURE_BLOB_STORAGE_QUEUE_MESSAGES_QUEUE_TTL,
             self.internal_events_queue: self.azure_blob_storage_config.AZURE_BLOB_STORAGE_QUEUE_INTERNAL_EVENTS_QUEUE_TTL,
             self.external_events_queue: self.azure_blob_storage_config.AZURE_BLOB_STORAGE_QUEUE_EXTERNAL_EVENTS_QUEUE_TTL,
             self.wait_queue: self.azure_blob_storage_config.AZURE_BLOB_STORAGE_QUEUE_WAIT_QUEUE_TTL,
         }
 
-        total_removed_files = 0  # Track the total number of removed blobs
-
-        for queue_container, ttl_seconds in ttl_mapping.items():
-            self.logger.info(
-                f"{LOG_PREFIX} Cleaning up expired messages in container: {queue_container} with TTL: {ttl_seconds} seconds.")
-            try:
-                container_client = self.blob_service_client.get_container_client(queue_container)
-                blobs = list(container_client.list_blobs())
-
-                removed_files_count = 0  # Track removed blobs per container
-
-                for blob in blobs:
-                    if self.is_message_expired(blob.name, ttl_seconds):
-                        blob_client = self.blob_service_client.get_blob_client(container=queue_container,
-                                                                               blob=blob.name)
-                        self.logger.debug(f"{LOG_PREFIX} Deleting expired blob: {blob.name}")
-                        try:
-                            blob_client.delete_blob()
-                            self.logger.info(f"{LOG_PREFIX} Deleted expired message: {blob.name}")
-                            removed_files_count += 1
-                        except Exception as e:
-                            self.logger.error(f"{LOG_PREFIX} Failed to delete expired message {blob.name}: {str(e)}")
+    def schedule_expiry(self, data_container: str, blob_name: str, message_id) -> None:
+        ttl_seconds = self.ttl_mapping.get(data_container)
+        if ttl_seconds is None:
+            return
+        self.expiry_scheduler.schedule(
+            data_container, blob_name, self.expiry_scheduler.deadline(message_id, ttl_seconds))
 
-                self.logger.info(
-                    f"{LOG_PREFIX} Removed {removed_files_count} expired messages from container '{queue_container}'.")
-                total_removed_files += removed_files_count
+    async def remove_messages(self, data_container: str, blob_names: List[str]) -> int:
+        """
+        Removes a batch of expired messages from a container, returns how many were removed.
+        """
+        removed_files_count = await self.delete_blobs(data_container, blob_names)
+        self.logger.info(
+            f"{LOG_PREFIX} Removed {removed_files_count} expired messages from container '{data_container}'.")
+        return removed_files_count
 
+    async def clean_all_queues(self) -> int:
+        """
+        Scans all Azure Blob Storage queues once to schedule the expiry of their messages, removes the ones
+        already expired and leaves the others to the background expiry.
+        """
+        for queue_container in self.ttl_mapping:
+            try:
+                for blob_name in await self.list_blob_names(queue_container):
+                    self.schedule_expiry(queue_container, blob_name, self.extract_message_id(blob_name))
             except Exception as e:
                 self.logger.error(
-                    f"{LOG_PREFIX} Failed to clean up expired messages from container '{queue_container}': {str(e)}")
+                    f"{LOG_PREFIX} Failed to list the messages of container '{queue_container}': {str(e)}")
 
+        total_removed_files = await self.expiry_scheduler.expire_due()
         self.logger.info(f"{LOG_PREFIX} Total removed expired messages across all containers: {total_removed_files}.")
+        return total_removed_files
 
     async def clear_messages_queue(self, data_container: str, channel_id: str, thread_id: str) -> None:
         """
@@ -426,16 +399,18 @@ class AzureBlobStorageQueuePlugin(InternalQueueProcessingBase):
         self.logger.info(f"{LOG_PREFIX} Clearing queue for channel '{channel_id}', thread '{thread_id}'.")
 
         try:
-            container_client = self.blob_service_client.get_container_client(data_container)
-            blobs = list(container_client.list_blobs())
+            blob_names = await self.list_blob_names(data_container, self.thread_prefix(channel_id, thread_id))
 
-            # Filter blobs for the given channel_id and thread_id
-            filtered_blobs = [blob for blob in blobs if blob.name.startswith(f"{channel_id}_{thread_id}_")]
+            async def delete(blob_name: str):
+                self.expiry_scheduler.discard(data_container, blob_name)
+                blob_client = self.blob_service_client.get_blob_client(container=data_container, blob=blob_name)
+                try:
+                    await blob_client.delete_blob()
+                    self.logger.info(f"{LOG_PREFIX} Message '{blob_name}' deleted successfully.")
+                except ResourceNotFoundError:
+                    pass
 
-            for blob in filtered_blobs:
-                blob_client = self.blob_service_client.get_blob_client(data_container, blob.name)
-                blob_client.delete_blob()
-                self.logger.info(f"{LOG_PREFIX} Message '{blob.name}' deleted successfully.")
+            await gather_bounded(delete(blob_name) for blob_name in blob_names)
 
         except Exception as e:
             self.logger.error(f"{LOG_PREFIX} Failed to clear queue: {str(e)}")
@@ -443,10 +418,12 @@ class AzureBlobStorageQueuePlugin(InternalQueueProcessingBase):
     async def create_container(self, data_container):
         try:
             container_client = self.blob_service_client.get_container_client(data_container)
-            if not container_client.exists():
-                container_client.create_container()
-                self.logger.info(f"Created container: {data_container}")
+            if not await container_client.exists():
+                await container_client.create_container()
+                self.logger.info(f"{LOG_PREFIX} Created container: {data_container}")
             else:
-                self.logger.info(f"Container already exists: {data_container}")
+                self.logger.info(f"{LOG_PREFIX} Container already exists: {data_container}")
+        except ResourceExistsError:
+            self.logger.info(f"{LOG_PREFIX} Container already exists: {data_container}")
         except Exception as e:
-            self.logger.error(f"Failed to create container {data_container}: {str(e)}")
+            self.logger.error(f"{LOG_PREFIX} Failed to create container {data_container}: {str(e)}")
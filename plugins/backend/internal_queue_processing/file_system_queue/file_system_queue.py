@@ -6,6 +6,7 @@ from typing import List, Optional, Tuple
 from pydantic import BaseModel
 
 from core.backend.internal_queue_processing_base import InternalQueueProcessingBase
+from core.backend.queue_expiry_scheduler import QueueExpiryScheduler
 from core.global_manager import GlobalManager
 from utils.plugin_manager.plugin_manager import PluginManager
 
@@ -23,6 +24,7 @@ class FileSystemQueueConfig(BaseModel):
     FILE_SYSTEM_QUEUE_INTERNAL_EVENTS_QUEUE_TTL: int
     FILE_SYSTEM_QUEUE_EXTERNAL_EVENTS_QUEUE_TTL: int
     FILE_SYSTEM_QUEUE_WAIT_QUEUE_TTL: int
+    FILE_SYSTEM_QUEUE_EXPIRY_INTERVAL: int = 60
 
 
 class FileSystemQueuePlugin(InternalQueueProcessingBase):
@@ -45,6 +47,9 @@ class FileSystemQueuePlugin(InternalQueueProcessingBase):
         self._wait_queue_container = None
         self._wait_queue_ttl = None
 
+        self.expiry_scheduler = QueueExpiryScheduler(
+            self.logger, self.remove_messages, self.file_system_config.FILE_SYSTEM_QUEUE_EXPIRY_INTERVAL)
+
     @property
     def plugin_name(self):
         return "file_system_queue"
@@ -169,6 +174,7 @@ class FileSystemQueuePlugin(InternalQueueProcessingBase):
             with open(file_path, 'w', encoding='utf-8') as file:
                 file.write(message)
             self.logger.info(f"{LOG_PREFIX} Message successfully enqueued with ID '{message_file_name}'.")
+            self.schedule_expiry(data_container, message_file_name, message_id)
         except Exception as e:
             self.logger.error(f"{LOG_PREFIX} Failed to enqueue message: {str(e)}")
 
@@ -184,6 +190,7 @@ class FileSystemQueuePlugin(InternalQueueProcessingBase):
 
         self.logger.debug(
             f"{LOG_PREFIX} Dequeuing message '{file_name}' for channel '{channel_id}', thread '{thread_id}'.")
+        self.expiry_scheduler.discard(data_container, file_name)
 
         if os.path.exists(file_path):
             try:
@@ -278,6 +285,25 @@ class FileSystemQueuePlugin(InternalQueueProcessingBase):
             self.logger.error(f"{LOG_PREFIX} Failed to retrieve messages: {str(e)}")
             return []
 
+    async def get_container_messages(self, data_container: str) -> List[str]:
+        """
+        Retrieves all messages of a container, whatever their channel and thread.
+        """
+        queue_path = os.path.join(self.root_directory, data_container)
+        if not os.path.exists(queue_path):
+            return []
+
+        messages_content = []
+        for file_name in os.listdir(queue_path):
+            file_path = os.path.join(queue_path, file_name)
+            try:
+                with open(file_path, 'r', encoding='utf-8') as file:
+                    messages_content.append(file.read())
+            except Exception as e:
+                self.logger.error(f"{LOG_PREFIX} Failed to read message '{file_name}': {str(e)}")
+        self.logger.info(f"{LOG_PREFIX} Retrieved {len(messages_content)} messages from queue '{data_container}'.")
+        return messages_content
+
     async def has_older_messages(self, data_container: str, channel_id: str, thread_id: str,
                                  current_message_id: str) -> bool:
         """
@@ -361,40 +387,62 @@ class FileSystemQueuePlugin(InternalQueueProcessingBase):
                     self.logger.info(f"{LOG_PREFIX} Removing expired message: {file_path}")
                     os.remove(file_path)
 
-    async def clean_all_queues(self) -> None:
-        """
-        Cleans up all expired messages across all queues based on their TTL values.
-        """
-        ttl_mapping = {
+    @property
+    def ttl_mapping(self) -> dict:
+        return {
             self.message_queue_container: self.messages_queue_ttl,
             self.internal_events_queue_container: self.internal_events_queue_ttl,
             self.external_events_queue_container: self.external_events_queue_ttl,
             self.wait_queue_container: self.wait_queue_ttl,
         }
 
-        total_removed_files = 0  # Track the total number of removed files
+    def schedule_expiry(self, data_container: str, file_name: str, message_id) -> None:
+        ttl_seconds = self.ttl_mapping.get(data_container)
+        if ttl_seconds is None:
+            return
+        self.expiry_scheduler.schedule(
+            data_container, file_name, self.expiry_scheduler.deadline(message_id, ttl_seconds))
 
-        for queue_container, ttl_seconds in ttl_mapping.items():
+    async def remove_messages(self, data_container: str, file_names: List[str]) -> int:
+        """
+        Removes a batch of messages from a queue, returns how many were removed.
+        """
+        queue_path = os.path.join(self.root_directory, data_container)
+        removed_files_count = 0
+        for file_name in file_names:
+            try:
+                os.remove(os.path.join(queue_path, file_name))
+                removed_files_count += 1
+            except FileNotFoundError:
+                pass
+            except Exception as e:
+                self.logger.error(f"{LOG_PREFIX} Failed to remove expired message '{file_name}': {str(e)}")
+        self.logger.info(f"{LOG_PREFIX} Removed {removed_files_count} expired files from queue '{data_container}'.")
+        return removed_files_count
+
+    async def clean_all_queues(self) -> int:
+        """
+        Scans all queues once to schedule the expiry of their messages, removes the ones already expired
+        and leaves the others to the background expiry.
+        """
+        for queue_container in self.ttl_mapping:
             queue_path = os.path.join(self.root_directory, queue_container)
             if not os.path.exists(queue_path):
                 self.logger.debug(f"{LOG_PREFIX} Queue path '{queue_path}' does not exist. Skipping.")
                 continue
 
-            files = os.listdir(queue_path)
-            removed_files_count = 0  # Track removed files per queue
+            for file_name in os.listdir(queue_path):
+                self.schedule_expiry(queue_container, file_name, self.extract_message_id(file_name))
 
-            for file_name in files:
-                if self.is_message_expired(file_name, ttl_seconds):
-                    file_path = os.path.join(queue_path, file_name)
-                    self.logger.debug(f"{LOG_PREFIX} Removing expired message: {file_path}")
-                    os.remove(file_path)
-                    removed_files_count += 1
+        total_removed_files = await self.expiry_scheduler.expire_due()
+        self.logger.info(f"{LOG_PREFIX} Total removed expired files across all queues: {total_removed_files}.")
+        return total_removed_files
 
-            self.logger.info(
-                f"{LOG_PREFIX} Removed {removed_files_count} expired files from queue '{queue_container}'.")
-            total_removed_files += removed_files_count
+    async def startup(self):
+        self.expiry_scheduler.start()
 
-        self.logger.info(f"{LOG_PREFIX} Total removed expired files across all queues: {total_removed_files}.")
+    async def shutdown(self):
+        await self.expiry_scheduler.stop()
 
     async def clear_all_queues(self) -> None:
         """
@@ -0,0 +1,428 @@
+import asyncio
+import sqlite3
+import time
+import uuid
+from typing import List, Optional, Tuple
+
+from pydantic import BaseModel
+
+from core.backend.internal_queue_processing_base import InternalQueueProcessingBase
+from core.global_manager import GlobalManager
+from utils.plugin_manager.plugin_manager import PluginManager
+from utils.sqlite.sqlite_connection_pool import SQLiteConnectionPool
+
+LOG_PREFIX = "[SQLITE_QUEUE]"
+SQLITE_QUEUE = "SQLITE_QUEUE"
+
+TABLE = "queue_messages"
+
+
+class SqliteQueueConfig(BaseModel):
+    PLUGIN_NAME: str
+    SQLITE_QUEUE_DATABASE_PATH: str
+    SQLITE_QUEUE_MESSAGES_QUEUE_CONTAINER: str
+    SQLITE_QUEUE_INTERNAL_EVENTS_QUEUE_CONTAINER: str
+    SQLITE_QUEUE_EXTERNAL_EVENTS_QUEUE_CONTAINER: str
+    SQLITE_QUEUE_WAIT_QUEUE_CONTAINER: str
+    SQLITE_QUEUE_MESSAGES_QUEUE_TTL: int
+    SQLITE_QUEUE_INTERNAL_EVENTS_QUEUE_TTL: int
+    SQLITE_QUEUE_EXTERNAL_EVENTS_QUEUE_TTL: int
+    SQLITE_QUEUE_WAIT_QUEUE_TTL: int
+    SQLITE_QUEUE_EXPIRY_INTERVAL: int = 60
+    SQLITE_QUEUE_POOL_SIZE: int = 4
+    SQLITE_QUEUE_BUSY_TIMEOUT: float = 30.0
+
+
+class SqliteQueuePlugin(InternalQueueProcessingBase):
+    """
+    Queue backend storing the messages of every container in one SQLite table, for single-host deployments.
+
+    The primary key (container, channel_id, thread_id, message_ts, message_id, guid) orders the messages
+    of a thread by timestamp, so `get_next_message` and `has_older_messages` are single index seeks and
+    clearing or cleaning up a thread is a range delete. Each message stores its expiry time, indexed per
+    container, and expiry is a range delete on that index run by every process on the same schedule;
+    several workers sharing the database file (WAL mode) therefore need no coordination.
+    Messages record no owning worker: the startup recovery of the event containers only replays the events
+    older than QUEUE_RECOVERY_MIN_EVENT_AGE, leaving the ones still queued by the other workers alone.
+    """
+
+    def __init__(self, global_manager: GlobalManager):
+        super().__init__(global_manager)
+        self.logger = global_manager.logger
+        self.global_manager = global_manager
+        self.plugin_manager: PluginManager = global_manager.plugin_manager
+        config_dict = global_manager.config_manager.config_model.PLUGINS.BACKEND.INTERNAL_QUEUE_PROCESSING[
+            SQLITE_QUEUE]
+        self.sqlite_queue_config = SqliteQueueConfig(**config_dict)
+
+        # Initialize queue containers and TTLs to None
+        self._message_queue_container = None
+        self._messages_queue_ttl = None
+        self._internal_events_queue_container = None
+        self._internal_events_queue_ttl = None
+        self._external_events_queue_container = None
+        self._external_events_queue_ttl = None
+        self._wait_queue_container = None
+        self._wait_queue_ttl = None
+
+        self.database_path = None
+        self.pool: Optional[SQLiteConnectionPool] = None
+        self._expiry_task: Optional[asyncio.Task] = None
+
+    @property
+    def plugin_name(self):
+        return "sqlite_queue"
+
+    @plugin_name.setter
+    def plugin_name(self, value):
+        self._plugin_name = value
+
+    @property
+    def messages_queue(self):
+        return self.sqlite_queue_config.SQLITE_QUEUE_MESSAGES_QUEUE_CONTAINER
+
+    @messages_queue.setter
+    def messages_queue(self, value):
+        self._message_queue_container = value
+
+    @property
+    def messages_queue_ttl(self):
+        return self.sqlite_queue_config.SQLITE_QUEUE_MESSAGES_QUEUE_TTL
+
+    @messages_queue_ttl.setter
+    def messages_queue_ttl(self, value):
+        self._messages_queue_ttl = value
+
+    @property
+    def internal_events_queue(self):
+        return self.sqlite_queue_config.SQLITE_QUEUE_INTERNAL_EVENTS_QUEUE_CONTAINER
+
+    @internal_events_queue.setter
+    def internal_events_queue(self, value):
+        self._internal_events_queue_container = value
+
+    @property
+    def internal_events_queue_ttl(self):
+        return self.sqlite_queue_config.SQLITE_QUEUE_INTERNAL_EVENTS_QUEUE_TTL
+
+    @internal_events_queue_ttl.setter
+    def internal_events_queue_ttl(self, value):
+        self._internal_events_queue_ttl = value
+
+    @property
+    def external_events_queue(self):
+        return self.sqlite_queue_config.SQLITE_QUEUE_EXTERNAL_EVENTS_QUEUE_CONTAINER
+
+    @external_events_queue.setter
+    def external_events_queue(self, value):
+        self._external_events_queue_container = value
+
+    @property
+    def external_events_queue_ttl(self):
+        return self.sqlite_queue_config.SQLITE_QUEUE_EXTERNAL_EVENTS_QUEUE_TTL
+
+    @external_events_queue_ttl.setter
+    def external_events_queue_ttl(self, value):
+        self._external_events_queue_ttl = value
+
+    @property
+    def wait_queue(self):
+        return self.sqlite_queue_config.SQLITE_QUEUE_WAIT_QUEUE_CONTAINER
+
+    @wait_queue.setter
+    def wait_queue(self, value):
+        self._wait_queue_container = value
+
+    @property
+    def wait_queue_ttl(self):
+        return self.sqlite_queue_config.SQLITE_QUEUE_WAIT_QUEUE_TTL
+
+    @wait_queue_ttl.setter
+    def wait_queue_ttl(self, value):
+        self._wait_queue_ttl = value
+
+    def initialize(self):
+        self.logger.debug(f"{LOG_PREFIX} Initializing SQLite database for queue management")
+        self.database_path = self.sqlite_queue_config.SQLITE_QUEUE_DATABASE_PATH
+        self.message_queue_container = self.sqlite_queue_config.SQLITE_QUEUE_MESSAGES_QUEUE_CONTAINER
+        self.internal_events_queue_container = self.sqlite_queue_config.SQLITE_QUEUE_INTERNAL_EVENTS_QUEUE_CONTAINER
+        self.external_events_queue_container = self.sqlite_queue_config.SQLITE_QUEUE_EXTERNAL_EVENTS_QUEUE_CONTAINER
+        self.wait_queue_container = self.sqlite_queue_config.SQLITE_QUEUE_WAIT_QUEUE_CONTAINER
+        self.messages_queue_ttl = self.sqlite_queue_config.SQLITE_QUEUE_MESSAGES_QUEUE_TTL
+        self.internal_events_queue_ttl = self.sqlite_queue_config.SQLITE_QUEUE_INTERNAL_EVENTS_QUEUE_TTL
+        self.external_events_queue_ttl = self.sqlite_queue_config.SQLITE_QUEUE_EXTERNAL_EVENTS_QUEUE_TTL
+        self.wait_queue_ttl = self.sqlite_queue_config.SQLITE_QUEUE_WAIT_QUEUE_TTL
+        self.plugin_name = self.sqlite_queue_config.PLUGIN_NAME
+
+        self.pool = SQLiteConnectionPool(
+            self.database_path, size=self.sqlite_queue_config.SQLITE_QUEUE_POOL_SIZE,
+            busy_timeout=self.sqlite_queue_config.SQLITE_QUEUE_BUSY_TIMEOUT)
+        self.init_queues()
+
+    def init_queues(self):
+        try:
+            self.pool.run_sync(self._create_table)
+        except sqlite3.Error as e:
+            self.logger.error(f"{LOG_PREFIX} Failed to create the queue table in {self.database_path}: {str(e)}")
+            raise
+        self.logger.info(f"{LOG_PREFIX} Queue database ready at {self.database_path}")
+
+    @staticmethod
+    def _create_table(connection: sqlite3.Connection):
+        # IF NOT EXISTS makes it safe for every worker to run at startup
+        connection.execute(
+            f"CREATE TABLE IF NOT EXISTS {TABLE} ("
+            "container TEXT NOT NULL, channel_id TEXT NOT NULL, thread_id TEXT NOT NULL, "
+            "message_ts REAL NOT NULL, message_id TEXT NOT NULL, guid TEXT NOT NULL, "
+            "content TEXT NOT NULL, expires_at REAL, "
+            "PRIMARY KEY (container, channel_id, thread_id, message_ts, message_id, guid)) WITHOUT ROWID")
+        connection.execute(f"CREATE INDEX IF NOT EXISTS {TABLE}_expiry ON {TABLE} (container, expires_at)")
+
+    @staticmethod
+    def message_timestamp(message_id) -> float:
+        """Sort key of a message id, which is its creation timestamp; ids that are not sort first."""
+        try:
+            return float(message_id)
+        except (TypeError, ValueError):
+            return 0.0
+
+    @property
+    def ttl_mapping(self) -> dict:
+        return {
+            self.message_queue_container: self.messages_queue_ttl,
+            self.internal_events_queue_container: self.internal_events_queue_ttl,
+            self.external_events_queue_container: self.external_events_queue_ttl,
+            self.wait_queue_container: self.wait_queue_ttl,
+        }
+
+    def expires_at(self, data_container: str, message_id) -> Optional[float]:
+        ttl_seconds = self.ttl_mapping.get(data_container)
+        if ttl_seconds is None:
+            return None
+        try:
+            return float(message_id) + ttl_seconds
+        except (TypeError, ValueError):
+            return None
+
+    async def enqueue_message(self, data_container: str, channel_id: str, thread_id: str, message_id: str, message: str,
+                              guid: Optional[str] = None) -> None:
+        """
+        Adds a message to the queue with a unique GUID for each message.
+        """
+        guid = guid or str(uuid.uuid4())
+        row = (data_container, channel_id, thread_id, self.message_timestamp(message_id), str(message_id), guid,
+               message, self.expires_at(data_container, message_id))
+
+        def insert(connection):
+            connection.execute(f"INSERT OR REPLACE INTO {TABLE} VALUES (?, ?, ?, ?, ?, ?, ?, ?)", row)
+
+        try:
+            self.logger.debug(
+                f"{LOG_PREFIX} Enqueuing message for channel '{channel_id}', thread '{thread_id}' with GUID '{guid}'.")
+            await self.pool.run(insert)
+            self.logger.info(f"{LOG_PREFIX} Message successfully enqueued with ID '{message_id}' and GUID '{guid}'.")
+        except sqlite3.Error as e:
+            self.logger.error(f"{LOG_PREFIX} Failed to enqueue message: {str(e)}")
+
+    async def dequeue_message(self, data_container: str, channel_id: str, thread_id: str, message_id: str,
+                              guid: str) -> None:
+        """
+        Removes a message from the queue based on channel_id, thread_id, message_id, and guid.
+        """
+        self.logger.debug(
+            f"{LOG_PREFIX} Dequeuing message '{message_id}' for channel '{channel_id}', thread '{thread_id}'.")
+
+        def delete(connection) -> int:
+            return connection.execute(
+                f"DELETE FROM {TABLE} WHERE container = ? AND channel_id = ? AND thread_id = ? "
+                f"AND message_ts = ? AND message_id = ? AND guid = ?",
+                (data_container, channel_id, thread_id, self.message_timestamp(message_id), str(message_id),
+                 guid)).rowcount
+
+        try:
+            if await self.pool.run(delete):
+                self.logger.info(f"{LOG_PREFIX} Message '{message_id}' removed successfully.")
+            else:
+                self.logger.warning(f"{LOG_PREFIX} Message '{message_id}' with GUID '{guid}' not found in queue.")
+        except sqlite3.Error as e:
+            self.logger.error(f"{LOG_PREFIX} Failed to remove message: {str(e)}")
+
+    async def get_next_message(self, data_container: str, channel_id: str, thread_id: str, current_message_id: str) -> \
+    Tuple[Optional[str], Optional[str]]:
+        """
+        Retrieves the next message in the queue for a given channel/thread.
+        """
+        self.logger.info(
+            f"{LOG_PREFIX} Retrieving next message for channel '{channel_id}', thread '{thread_id}' after '{current_message_id}'.")
+
+        def select(connection):
+            return connection.execute(
+                f"SELECT message_id, content FROM {TABLE} WHERE container = ? AND channel_id = ? AND thread_id = ? "
+                f"AND message_ts > ? ORDER BY message_ts LIMIT 1",
+                (data_container, channel_id, thread_id, float(current_message_id))).fetchone()
+
+        try:
+            row = await self.pool.run(select)
+        except (sqlite3.Error, TypeError, ValueError) as e:
+            self.logger.error(f"{LOG_PREFIX} Failed to retrieve next message: {str(e)}")
+            return None, None
+        return (row[0], row[1]) if row else (None, None)
+
+    async def has_older_messages(self, data_container: str, channel_id: str, thread_id: str,
+                                 current_message_id: str) -> bool:
+        """
+        Checks if there are any older messages in the queue, excluding the current message.
+        """
+        self.logger.info(
+            f"{LOG_PREFIX} Checking for older messages in queue for channel '{channel_id}', thread '{thread_id}', excluding message_id '{current_message_id}'.")
+
+        def exists(connection) -> bool:
+            return connection.execute(
+                f"SELECT EXISTS (SELECT 1 FROM {TABLE} WHERE container = ? AND channel_id = ? AND thread_id = ? "
+                f"AND message_ts < ?)",
+                (data_container, channel_id, thread_id, float(current_message_id))).fetchone()[0] == 1
+
+        try:
+            return await self.pool.run(exists)
+        except (sqlite3.Error, TypeError, ValueError) as e:
+            self.logger.error(f"{LOG_PREFIX} Failed to check older messages: {str(e)}")
+            return False
+
+    async def get_all_messages(self, data_container: str, channel_id: str, thread_id: str) -> List[str]:
+        """
+        Retrieves all messages for a given channel/thread.
+        """
+        self.logger.info(f"{LOG_PREFIX} Retrieving all messages for channel '{channel_id}', thread '{thread_id}'.")
+
+        def select(connection):
+            return connection.execute(
+                f"SELECT content FROM {TABLE} WHERE container = ? AND channel_id = ? AND thread_id = ? "
+                f"ORDER BY message_ts", (data_container, channel_id, thread_id)).fetchall()
+
+        try:
+            return [row[0] for row in await self.pool.run(select)]
+        except sqlite3.Error as e:
+            self.logger.error(f"{LOG_PREFIX} Failed to retrieve messages: {str(e)}")
+            return []
+
+    async def get_container_messages(self, data_container: str) -> List[str]:
+        """
+        Retrieves all messages of a container, whatever their channel and thread.
+        """
+        def select(connection):
+            return connection.execute(
+                f"SELECT content FROM {TABLE} WHERE container = ?", (data_container,)).fetchall()
+
+        try:
+            messages_content = [row[0] for row in await self.pool.run(select)]
+        except sqlite3.Error as e:
+            self.logger.error(f"{LOG_PREFIX} Failed to retrieve messages from queue '{data_container}': {str(e)}")
+            return []
+        self.logger.info(f"{LOG_PREFIX} Retrieved {len(messages_content)} messages from queue '{data_container}'.")
+        return messages_content
+
+    async def clear_messages_queue(self, data_container: str, channel_id: str, thread_id: str) -> None:
+        """
+        Clears all messages in the queue for a given channel/thread.
+        """
+        self.logger.info(f"{LOG_PREFIX} Clearing queue for channel '{channel_id}', thread '{thread_id}'.")
+
+        def delete(connection) -> int:
+            return connection.execute(
+                f"DELETE FROM {TABLE} WHERE container = ? AND channel_id = ? AND thread_id = ?",
+                (data_container, channel_id, thread_id)).rowcount
+
+        try:
+            removed = await self.pool.run(delete)
+            self.logger.info(f"{LOG_PREFIX} Removed {removed} messages from queue '{data_container}'.")
+        except sqlite3.Error as e:
+            self.logger.error(f"{LOG_PREFIX} Failed to clear queue: {str(e)}")
+
+    async def cleanup_expired_messages(self, data_container: str, channel_id: str, thread_id: str,
+                                       ttl_seconds: int) -> None:
+        """
+        Cleans up expired messages for a specific thread/channel based on the TTL.
+        """
+        def delete(connection) -> int:
+            return connection.execute(
+                f"DELETE FROM {TABLE} WHERE container = ? AND channel_id = ? AND thread_id = ? "
+                f"AND message_ts > 0 AND message_ts < ?",
+                (data_container, channel_id, thread_id, time.time() - ttl_seconds)).rowcount
+
+        try:
+            removed = await self.pool.run(delete)
+            if removed:
+                self.logger.info(f"{LOG_PREFIX} Removed {removed} expired messages from queue '{data_container}'.")
+        except sqlite3.Error as e:
+            self.logger.error(f"{LOG_PREFIX} Failed to clean up expired messages: {str(e)}")
+
+    async def remove_expired_messages(self, now: Optional[float] = None) -> int:
+        """
+        Removes the messages whose expiry time has passed from all queues, returns how many were removed.
+        """
+        now = time.time() if now is None else now
+        containers = list(self.ttl_mapping)
+
+        def delete(connection) -> int:
+            return sum(
+                connection.execute(
+                    f"DELETE FROM {TABLE} WHERE container = ? AND expires_at <= ?", (container, now)).rowcount
+                for container in containers)
+
+        try:
+            removed = await self.pool.run(delete)
+        except sqlite3.Error as e:
+            self.logger.error(f"{LOG_PREFIX} Failed to remove expired messages: {str(e)}")
+            return 0
+        if removed:
+            self.logger.info(f"{LOG_PREFIX} Removed {removed} expired messages from the queues.")
+        return removed
+
+    async def clean_all_queues(self) -> int:
+        """
+        Removes the expired messages of all queues; later ones are left to the background expiry.
+        """
+        total_removed = await self.remove_expired_messages()
+        self.logger.info(f"{LOG_PREFIX} Total removed expired messages across all queues: {total_removed}.")
+        return total_removed
+
+    async def _run_expiry(self):
+        while True:
+            await asyncio.sleep(self.sqlite_queue_config.SQLITE_QUEUE_EXPIRY_INTERVAL)
+            await self.remove_expired_messages()
+
+    async def startup(self):
+        if self._expiry_task is None or self._expiry_task.done():
+            self._expiry_task = asyncio.create_task(self._run_expiry())
+
+    async def shutdown(self):
+        if self._expiry_task is not None:
+            self._expiry_task.cancel()
+            try:
+                await self._expiry_task
+            except asyncio.CancelledError:
+                pass
+            self._expiry_task = None
+        if self.pool is not None:
+            self.pool.close()
+
+    async def clear_all_queues(self) -> None:
+        """
+        Clears all messages from all queues, regardless of TTL.
+        """
+        containers = list(self.ttl_mapping)
+
+        def delete(connection) -> int:
+            return sum(
+                connection.execute(f"DELETE FROM {TABLE} WHERE container = ?", (container,)).rowcount
+                for container in containers)
+
+        try:
+            total_removed = await self.pool.run(delete)
+            self.logger.info(f"{LOG_PREFIX} Total removed messages across all queues: {total_removed}.")
+        except sqlite3.Error as e:
+            self.logger.error(f"{LOG_PREFIX} Failed to clear queues: {str(e)}")
+
+    async def create_container(self, data_container):
+        # Containers are a column of the shared table, there is nothing to create
+        self.logger.debug(f"{LOG_PREFIX} Queue '{data_container}' is ready.")
@@ -352,11 +352,12 @@ class AzureChatgptPlugin(GenAIInteractionsTextPluginBase):
                         "If there are any aspects of the image that seem particularly relevant to the query, emphasize those. give as much detail as possible on what is provided in this, provide a long answer."
                     )
 
+                    image_pipeline = self.global_manager.image_pipeline
                     image_message = {
                         "type": "image_url",
                         "image_url": {
-                            "url": f"data:image/jpeg;base64,{base64_image}",
-                            "detail": "high"
+                            "url": image_pipeline.to_data_url(base64_image),
+                            "detail": image_pipeline.get_detail(vision_model)
                         }
                     }
 
@@ -288,12 +288,14 @@ class ChatInputHandler():
         user_content_images = []
 
         if event_data.images:
+            image_pipeline = self.global_manager.image_pipeline
+            image_detail = image_pipeline.get_detail(getattr(self.chat_plugin, 'model_name', None))
             for base64_image in event_data.images:
                 user_content_images.append({
                     "type": "image_url",
                     "image_url": {
-                        "url": f"data:image/jpeg;base64,{base64_image}",
-                        "detail": "high"
+                        "url": image_pipeline.to_data_url(base64_image),
+                        "detail": image_detail
                     }
                 })
 
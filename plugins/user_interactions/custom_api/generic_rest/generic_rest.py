@@ -1,12 +1,11 @@
-import asyncio
+import hmac
 import json
 from datetime import datetime
 from typing import List, Optional
 
-import aiohttp
 from fastapi import Request
 from pydantic import BaseModel
-from starlette.responses import Response
+from starlette.responses import Response, StreamingResponse
 
 from core.global_manager import GlobalManager
 from core.user_interactions.incoming_notification_data_base import (
@@ -28,6 +27,13 @@ from core.user_interactions.user_interactions_plugin_base import (
 from plugins.user_interactions.custom_api.generic_rest.utils.generic_rest_reactions import (
     GenericRestReactions,
 )
+from plugins.user_interactions.custom_api.generic_rest.utils.notification_batcher import (
+    NotificationBatcher,
+)
+from plugins.user_interactions.custom_api.generic_rest.utils.notification_stream import (
+    NotificationStreamHub,
+)
+from utils.http_client.shared_http_client import get_shared_session
 from utils.plugin_manager.plugin_manager import PluginManager
 
 
@@ -39,6 +45,14 @@ class RestConfig(BaseModel):
     GENERIC_REST_MESSAGE_URL: str
     GENERIC_REST_REACTION_URL: str
     GENERIC_REST_BOT_ID: str
+    GENERIC_REST_BATCHING: bool = False
+    GENERIC_REST_BATCH_MAX_SIZE: int = 20
+    GENERIC_REST_BATCH_MAX_DELAY_MS: int = 100
+    GENERIC_REST_STREAMING: bool = False
+    GENERIC_REST_STREAM_QUEUE_SIZE: int = 100
+    GENERIC_REST_STREAM_KEEPALIVE_SECONDS: int = 15
+    GENERIC_REST_STREAM_TOKEN: str = ""
+    GENERIC_REST_STREAM_ONLY: bool = False
 
 
 class GenericRestPlugin(UserInteractionsPluginBase):
@@ -53,6 +67,22 @@ class GenericRestPlugin(UserInteractionsPluginBase):
         self.backend_internal_data_processing_dispatcher = None
         config_dict = global_manager.config_manager.config_model.PLUGINS.USER_INTERACTIONS.CUSTOM_API["GENERIC_REST"]
         self.rest_config = RestConfig(**config_dict)
+        self.notification_batcher = None
+        if self.rest_config.GENERIC_REST_BATCHING:
+            self.notification_batcher = NotificationBatcher(
+                self.logger, self.post_notification_batch,
+                max_batch_size=self.rest_config.GENERIC_REST_BATCH_MAX_SIZE,
+                max_delay=self.rest_config.GENERIC_REST_BATCH_MAX_DELAY_MS / 1000)
+        self.notification_stream_hub = None
+        if self.rest_config.GENERIC_REST_STREAMING:
+            if not self.rest_config.GENERIC_REST_STREAM_TOKEN:
+                raise ValueError("GENERIC_REST_STREAM_TOKEN is required when GENERIC_REST_STREAMING is enabled")
+            # Notifications only streamed must not be dropped by a lagging stream, they go to the webhook instead
+            self.notification_stream_hub = NotificationStreamHub(
+                self.logger,
+                queue_size=self.rest_config.GENERIC_REST_STREAM_QUEUE_SIZE,
+                keepalive_interval=self.rest_config.GENERIC_REST_STREAM_KEEPALIVE_SECONDS,
+                drop_oldest=not self.rest_config.GENERIC_REST_STREAM_ONLY)
 
     def initialize(self):
         self._route_path = self.rest_config.GENERIC_REST_ROUTE_PATH
@@ -64,6 +94,10 @@ class GenericRestPlugin(UserInteractionsPluginBase):
         self.backend_internal_data_processing_dispatcher = self.global_manager.backend_internal_data_processing_dispatcher
         self.user_interactions_dispatcher: UserInteractionsDispatcher = self.global_manager.user_interactions_dispatcher
 
+    async def shutdown(self):
+        if self.notification_batcher is not None:
+            await self.notification_batcher.flush_all()
+
     @property
     def route_path(self):
         return self._route_path
@@ -72,6 +106,12 @@ class GenericRestPlugin(UserInteractionsPluginBase):
     def route_methods(self):
         return self._route_methods
 
+    @property
+    def additional_routes(self):
+        if self.notification_stream_hub is None:
+            return []
+        return [(f"{self.route_path.rstrip('/')}/stream/{{channel_id}}", self.handle_stream_request, ["GET"])]
+
     @property
     def plugin_name(self):
         return "generic_rest"
@@ -96,7 +136,9 @@ class GenericRestPlugin(UserInteractionsPluginBase):
             self.logger.info(f"Request received from <{request.url.path}>")
 
             # Create a new task to handle the rest of the processing
-            asyncio.create_task(self.process_event_data(event_data, headers, raw_body_str))
+            if not self.global_manager.task_supervisor.submit(
+                    self.process_event_data(event_data, headers, raw_body_str), channel_id=event_data.channel_id):
+                return Response("Too many requests", status_code=429, headers={'Retry-After': '1'})
 
             return Response("Request accepted for processing", status_code=202)
 
@@ -107,6 +149,31 @@ class GenericRestPlugin(UserInteractionsPluginBase):
             self.logger.error(f"Error processing request from <{request.headers.get('Referer')}>: {e}")
             return Response("Internal server error", status_code=500)
 
+    async def handle_stream_request(self, request: Request, channel_id: str, thread_id: Optional[str] = None):
+        """
+        Server-Sent Events stream of the notifications of a channel, or of one of its threads
+        with the thread_id query parameter, for clients authenticated with the GENERIC_REST_STREAM_TOKEN
+        bearer token. The stream gets a copy of the notifications: they are still posted to the
+        GENERIC_REST_MESSAGE_URL and GENERIC_REST_REACTION_URL webhooks, which remain the reliable
+        delivery path as a lagging stream drops its oldest notifications. With GENERIC_REST_STREAM_ONLY,
+        the notifications every open stream of the conversation received skip the webhooks, and a
+        lagging stream refuses new notifications instead, which are then posted to the webhooks.
+        """
+        if not self.is_stream_request_authorized(request.headers):
+            self.logger.warning(f"Unauthorized stream request for channel {channel_id}")
+            return Response("Unauthorized", status_code=401, headers={'WWW-Authenticate': 'Bearer'})
+        subscription = self.notification_stream_hub.subscribe(channel_id, thread_id)
+        return StreamingResponse(
+            self.notification_stream_hub.stream(subscription, request.is_disconnected),
+            media_type="text/event-stream",
+            headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'})
+
+    def is_stream_request_authorized(self, headers) -> bool:
+        scheme, _, token = headers.get("Authorization", "").partition(" ")
+        expected = self.rest_config.GENERIC_REST_STREAM_TOKEN
+        return scheme.lower() == "bearer" and bool(expected) and hmac.compare_digest(
+            token.encode('utf-8'), expected.encode('utf-8'))
+
     async def validate_request(self, event_data=None, headers=None, raw_body_str=None):
         try:
             # Convert JSON to dict
@@ -237,20 +304,34 @@ class GenericRestPlugin(UserInteractionsPluginBase):
         return formatted_message
 
     async def post_notification(self, notification: OutgoingNotificationDataBase, url):
+        if self.notification_stream_hub is not None:
+            # Extra copy for the open conversation streams, the webhook call below is still made
+            # unless the streams are trusted to deliver the notifications they all received
+            delivered = self.notification_stream_hub.publish(notification.to_dict())
+            if delivered and self.rest_config.GENERIC_REST_STREAM_ONLY:
+                return
+        if self.notification_batcher is not None:
+            # Sent later with the other notifications for this URL, as a JSON array
+            self.notification_batcher.add(url, notification.to_dict())
+            return
+        await self._post_json(url, json.dumps(notification.to_dict()))
+
+    async def post_notification_batch(self, url, notifications: List[dict]):
+        await self._post_json(url, json.dumps(notifications))
+
+    async def _post_json(self, url, data: str):
         headers = {'Content-Type': 'application/json'}
-        data = json.dumps(notification.to_dict())
-        async with aiohttp.ClientSession() as session:
-            async with session.post(
-                    url,
-                    data=data,
-                    headers=headers
-            ) as response:
-                if response.status != 200:
-                    self.logger.error(
-                        f"Failed to post notification to {url}. Status: {response.status}, Response: {await response.text()}, Data sent: {data}")
-                else:
-                    self.logger.info(f"Notification posted successfully to {url}")
-                    self.logger.debug(f"Data sent: {data}")
+        async with get_shared_session().post(
+                url,
+                data=data,
+                headers=headers
+        ) as response:
+            if response.status != 200:
+                self.logger.error(
+                    f"Failed to post notification to {url}. Status: {response.status}, Response: {await response.text()}, Data sent: {data}")
+            else:
+                self.logger.info(f"Notification posted successfully to {url}")
+                self.logger.debug(f"Data sent: {data}")
 
     async def fetch_conversation_history(
             self, event: IncomingNotificationDataBase, channel_id: Optional[str] = None, thread_id: Optional[str] = None
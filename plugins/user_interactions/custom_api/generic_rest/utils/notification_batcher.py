@@ -0,0 +1,64 @@
+import asyncio
+from collections import defaultdict
+from typing import Awaitable, Callable, Dict, List, Set
+
+
+class NotificationBatcher:
+    """
+    Coalesces the notifications posted to the same URL into batches, sent as a single request.
+
+    A batch is sent once it holds `max_batch_size` notifications or `max_delay` seconds after its
+    first notification. Batches for a URL are sent one at a time and notifications keep their
+    order, so the notifications of a thread arrive in the order they were produced.
+    """
+
+    def __init__(self, logger, send_batch: Callable[[str, List[dict]], Awaitable[None]],
+                 max_batch_size: int, max_delay: float):
+        self.logger = logger
+        self.send_batch = send_batch
+        self.max_batch_size = max(1, max_batch_size)
+        self.max_delay = max_delay
+        self._pending: Dict[str, List[dict]] = defaultdict(list)
+        self._timers: Dict[str, asyncio.Task] = {}
+        self._locks: Dict[str, asyncio.Lock] = defaultdict(asyncio.Lock)
+        self._tasks: Set[asyncio.Task] = set()
+
+    def add(self, url: str, payload: dict):
+        self._pending[url].append(payload)
+        if len(self._pending[url]) >= self.max_batch_size:
+            timer = self._timers.pop(url, None)
+            if timer is not None:
+                timer.cancel()
+            self._track(asyncio.create_task(self.flush(url)))
+        elif url not in self._timers:
+            self._timers[url] = self._track(asyncio.create_task(self._flush_later(url)))
+
+    def _track(self, task: asyncio.Task) -> asyncio.Task:
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+        return task
+
+    async def _flush_later(self, url: str):
+        try:
+            await asyncio.sleep(self.max_delay)
+        except asyncio.CancelledError:
+            return
+        self._timers.pop(url, None)
+        await self.flush(url)
+
+    async def flush(self, url: str):
+        async with self._locks[url]:
+            while self._pending.get(url):
+                batch = self._pending[url][:self.max_batch_size]
+                del self._pending[url][:len(batch)]
+                try:
+                    await self.send_batch(url, batch)
+                except Exception as e:
+                    self.logger.error(f"Failed to post a batch of {len(batch)} notifications to {url}: {e}")
+
+    async def flush_all(self):
+        """Send every pending notification, used before shutting down."""
+        for timer in list(self._timers.values()):
+            timer.cancel()
+        self._timers.clear()
+        await asyncio.gather(*(self.flush(url) for url in list(self._pending)))
@@ -0,0 +1,104 @@
+import asyncio
+import json
+from collections import defaultdict
+from typing import AsyncIterator, Dict, Optional, Set
+
+
+class NotificationSubscription:
+    """An open stream connection, receiving the notifications of a channel or of a single thread."""
+
+    def __init__(self, channel_id: str, thread_id: Optional[str], queue_size: int, drop_oldest: bool = True):
+        self.channel_id = channel_id
+        self.thread_id = thread_id
+        self.queue: asyncio.Queue = asyncio.Queue(maxsize=max(1, queue_size))
+        self.drop_oldest = drop_oldest
+        self.dropped = 0
+
+    def matches(self, notification: dict) -> bool:
+        return self.thread_id is None or self.thread_id == notification.get('thread_id')
+
+    def put(self, notification: dict) -> bool:
+        """Queue a notification without blocking, return whether it was queued."""
+        # A slow client loses notifications rather than slowing the bot down: its oldest ones,
+        # or the new one when the notifications it misses must be delivered another way
+        if self.queue.full():
+            self.dropped += 1
+            if not self.drop_oldest:
+                return False
+            self.queue.get_nowait()
+        self.queue.put_nowait(notification)
+        return True
+
+
+class NotificationStreamHub:
+    """
+    Fans the outgoing notifications of the GenericRestPlugin out to the clients streaming a conversation.
+
+    Subscriptions are keyed by channel, optionally narrowed to a thread. Publishing never blocks:
+    each subscription has a bounded queue and drops its oldest notifications when the client lags,
+    or with drop_oldest off refuses the new ones, which `publish` then reports as not delivered.
+    """
+
+    def __init__(self, logger, queue_size: int, keepalive_interval: float, drop_oldest: bool = True):
+        self.logger = logger
+        self.queue_size = queue_size
+        self.keepalive_interval = keepalive_interval
+        self.drop_oldest = drop_oldest
+        self._subscriptions: Dict[str, Set[NotificationSubscription]] = defaultdict(set)
+
+    def subscribe(self, channel_id: str, thread_id: Optional[str] = None) -> NotificationSubscription:
+        subscription = NotificationSubscription(channel_id, thread_id, self.queue_size, self.drop_oldest)
+        self._subscriptions[channel_id].add(subscription)
+        self.logger.info(f"Stream opened for channel {channel_id}" + (f", thread {thread_id}" if thread_id else ""))
+        return subscription
+
+    def unsubscribe(self, subscription: NotificationSubscription):
+        subscriptions = self._subscriptions.get(subscription.channel_id)
+        if subscriptions is None:
+            return
+        subscriptions.discard(subscription)
+        if not subscriptions:
+            del self._subscriptions[subscription.channel_id]
+        if subscription.dropped:
+            self.logger.warning(
+                f"Stream for channel {subscription.channel_id} dropped {subscription.dropped} notifications")
+        self.logger.info(f"Stream closed for channel {subscription.channel_id}")
+
+    def has_subscribers(self, channel_id: str) -> bool:
+        return bool(self._subscriptions.get(channel_id))
+
+    def publish(self, notification: dict) -> int:
+        """
+        Queue a notification for every matching subscription and return how many received it,
+        0 when a matching subscription could not take it so the caller can deliver it another way.
+        """
+        delivered = 0
+        missed = False
+        for subscription in self._subscriptions.get(notification.get('channel_id'), ()):
+            if subscription.matches(notification):
+                if subscription.put(notification):
+                    delivered += 1
+                else:
+                    missed = True
+        return 0 if missed else delivered
+
+    @staticmethod
+    def format_event(notification: dict) -> str:
+        event_type = (notification.get('event_type') or 'message').lower()
+        return f"event: {event_type}\ndata: {json.dumps(notification)}\n\n"
+
+    async def stream(self, subscription: NotificationSubscription, is_disconnected) -> AsyncIterator[str]:
+        """
+        Yield the subscription notifications as Server-Sent Events until the client disconnects,
+        with a comment line every keepalive_interval seconds so proxies keep the connection open.
+        """
+        try:
+            while not await is_disconnected():
+                try:
+                    notification = await asyncio.wait_for(subscription.queue.get(), timeout=self.keepalive_interval)
+                except asyncio.TimeoutError:
+                    yield ": keepalive\n\n"
+                    continue
+                yield self.format_event(notification)
+        finally:
+            self.unsubscribe(subscription)
@@ -3,6 +3,7 @@ import copy
 import hashlib
 import hmac
 import json
+import re
 import time
 import traceback
 from datetime import datetime, timezone
@@ -22,6 +23,7 @@ from core.user_interactions.message_type import MessageType
 from core.user_interactions.user_interactions_plugin_base import (
     UserInteractionsPluginBase,
 )
+from utils.cache.async_ttl_cache import AsyncTTLCache
 from utils.plugin_manager.plugin_manager import PluginManager
 
 from .utils.slack_input_handler import SlackInputHandler
@@ -50,6 +52,23 @@ class SlackConfig(BaseModel):
     SLACK_WORKSPACE_NAME: str
     SLACK_BEHAVIOR_PLUGIN_NAME: str
     SLACK_AUTHORIZE_DIRECT_MESSAGE: bool
+    SLACK_USER_INFO_CACHE_TTL: int = 3600
+    SLACK_USER_INFO_CACHE_NEGATIVE_TTL: int = 60
+    SLACK_USER_INFO_CACHE_MAX_SIZE: int = 5000
+    SLACK_MAX_FILE_DOWNLOAD_BYTES: int = 25 * 1024 * 1024
+    SLACK_MAX_MESSAGE_DOWNLOAD_BYTES: int = 50 * 1024 * 1024
+    SLACK_FILE_DOWNLOAD_TIMEOUT: int = 60
+    SLACK_MAX_CONCURRENT_DOWNLOADS: int = 4
+    SLACK_MAX_CONCURRENT_LINK_FETCHES: int = 8
+    SLACK_THREAD_CACHE_TTL: int = 30
+    SLACK_THREAD_CACHE_MAX_SIZE: int = 500
+    SLACK_EVENT_DEDUP_TTL: int = 900
+    SLACK_EVENT_DEDUP_MAX_SIZE: int = 10000
+    SLACK_REACTION_TRACKER_MAX_THREADS: int = 1000
+    SLACK_REACTION_TRACKER_PERSIST: bool = False
+
+# Slack puts event_id at the top level of event callbacks, it is read without decoding the whole payload
+EVENT_ID_PATTERN = re.compile(rb'"event_id"\s*:\s*"([^"]+)"')
 
 class SlackReactionsConfig(BaseModel):
     PROCESSING: str
@@ -74,6 +93,9 @@ class SlackPlugin(UserInteractionsPluginBase):
         self._reactions = SlackReactionsConfig(**config_dict_reaction)
         self.genai_interactions_text_dispatcher = None
         self.backend_internal_data_processing_dispatcher = None
+        # event_ids already received, Slack retries them when the acknowledgement is slow
+        self.seen_event_ids = AsyncTTLCache(max_size=self.slack_config.SLACK_EVENT_DEDUP_MAX_SIZE,
+                                            ttl=self.slack_config.SLACK_EVENT_DEDUP_TTL)
         
 
     @property
@@ -125,11 +147,16 @@ class SlackPlugin(UserInteractionsPluginBase):
             self.logger.debug(f"request received: {request}")
             response = Response("OK", status_code=200)
             raw_body = await request.body()
+
+            if self._is_retried_event(request.headers, raw_body):
+                return response
+
             raw_body_str = raw_body.decode('utf-8')  # Decode bytes to string
 
             # Check if the request is a slash command
             if request.headers['content-type'] == 'application/x-www-form-urlencoded':
-                asyncio.create_task(self.execute_slash_command(request, raw_body_str))
+                if not self.global_manager.task_supervisor.submit(self.execute_slash_command(request, raw_body_str)):
+                    return Response("Too many requests, retry later", status_code=503)
             else:
                 event_data = json.loads(raw_body_str)  # Parse JSON from string
 
@@ -144,7 +171,13 @@ class SlackPlugin(UserInteractionsPluginBase):
                 headers = request.headers
                 self.logger.info(f"Request received from <{request.url.path}>")
                 # Create a new task to handle the rest of the processing
-                asyncio.create_task(self.process_event_data(event_data, headers, raw_body_str))
+                channel_id = event_data.get('event', {}).get('channel')
+                if not self.global_manager.task_supervisor.submit(
+                        self.process_event_data(event_data, headers, raw_body_str), channel_id=channel_id):
+                    # Slack retries failed deliveries, the retry must not be discarded as already received
+                    if event_data.get('event_id'):
+                        self.seen_event_ids.invalidate(event_data['event_id'])
+                    return Response("Too many requests, retry later", status_code=503)
 
             return response
 
@@ -152,6 +185,25 @@ class SlackPlugin(UserInteractionsPluginBase):
             self.logger.error(f"Error processing request from <{request.headers.get('Referer')}>: {e}")
             return response
 
+    def _is_retried_event(self, headers, raw_body: bytes) -> bool:
+        """
+        Record the event_id of the request and tell whether it is a Slack retry of an event already received.
+        Retries are acknowledged right away, the original delivery is already being processed.
+        """
+        match = EVENT_ID_PATTERN.search(raw_body)
+        if match is None:
+            return False
+        event_id = match.group(1).decode('utf-8', errors='replace')
+
+        retry_num = headers.get('X-Slack-Retry-Num')
+        if retry_num is not None and event_id in self.seen_event_ids:
+            self.logger.info(
+                f"Discarding request: Slack retry {retry_num} ({headers.get('X-Slack-Retry-Reason')}) of event {event_id}")
+            return True
+
+        self.seen_event_ids.set(event_id, True)
+        return False
+
     async def execute_slash_command(self, request: Request, raw_body_str):
         self.logger.debug("Validating request...")
         headers = request.headers
@@ -344,13 +396,9 @@ class SlackPlugin(UserInteractionsPluginBase):
             self.logger.info("Discarding request: old message notification")
             return False
 
-        session_name = f"{channel_id}-{ts}.txt"
-        processing_container = self.backend_internal_data_processing_dispatcher.processing
-        result = await self.backend_internal_data_processing_dispatcher.read_data_content(processing_container,
-                                                                                          session_name)
-
-        if result is not None:
-            self.logger.warning(f"Discarding request: This request is already being processed for {session_name}")
+        in_flight_key = self.global_manager.in_flight_registry.make_key(channel_id, ts)
+        if await self.global_manager.in_flight_registry.is_in_flight(in_flight_key):
+            self.logger.warning(f"Discarding request: This request is already being processed for {in_flight_key}")
             return False
 
         return True
@@ -657,14 +705,16 @@ class SlackPlugin(UserInteractionsPluginBase):
         if missing:
             self.logger.debug('The following variables are empty: %s', ', '.join(missing))
         else:
-            await self.slack_output_handler.add_reaction(channel_id, timestamp, reaction_name)
+            await self.slack_output_handler.add_reaction(channel_id, timestamp, reaction_name,
+                                                         thread_id=getattr(event, 'thread_id', None))
 
     async def remove_reaction(self, event, channel_id, timestamp, reaction_name):
         missing = [var for var, value in locals().items() if value is None]
         if missing:
             self.logger.debug('The following variables are empty: %s', ', '.join(missing))
         else:
-            await self.slack_output_handler.remove_reaction(channel_id, timestamp, reaction_name)
+            await self.slack_output_handler.remove_reaction(channel_id, timestamp, reaction_name,
+                                                            thread_id=getattr(event, 'thread_id', None))
 
     async def is_message_too_old(self, event_ts):
         event_ts = datetime.fromtimestamp(float(event_ts.split('.')[0]), timezone.utc)
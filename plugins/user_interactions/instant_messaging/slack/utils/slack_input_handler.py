@@ -1,17 +1,11 @@
-import base64
-import io
+import asyncio
+import copy
 import json
-import os
 import re
-import zipfile
+from contextvars import ContextVar
 from datetime import datetime, timezone
 
 import aiohttp
-import requests
-from bs4 import BeautifulSoup
-from PIL import Image
-from pypdf import PdfReader
-from requests.exceptions import ConnectionError
 from slack_sdk import WebClient
 from slack_sdk.web.async_client import AsyncWebClient
 
@@ -22,8 +16,22 @@ from plugins.user_interactions.instant_messaging.slack.slack_event_data import (
 from plugins.user_interactions.instant_messaging.slack.utils.slack_block_processor import (
     SlackBlockProcessor,
 )
+from utils.cache.async_ttl_cache import AsyncTTLCache
+from utils.cpu_executor.document_processing import (
+    extract_html_text,
+    extract_pdf_text,
+    read_zip_entries,
+)
+from utils.http_client.shared_http_client import (
+    DownloadBudget,
+    DownloadLimitExceeded,
+    stream_download,
+)
 from utils.plugin_manager.plugin_manager import PluginManager
 
+# Byte budget shared by the attachment downloads of the message being processed
+_message_download_budget: ContextVar = ContextVar('message_download_budget', default=None)
+
 
 class SlackInputHandler:
     def __init__(self, global_manager: GlobalManager, slack_config):
@@ -62,6 +70,28 @@ class SlackInputHandler:
         self.async_client = AsyncWebClient(token=self.SLACK_BOT_TOKEN)
         self.async_user_client = AsyncWebClient(token=self.SLACK_BOT_USER_TOKEN)
 
+        # users.info / bots.info results are cached, failed lookups only briefly
+        self.user_info_cache = AsyncTTLCache(
+            max_size=self.slack_config.SLACK_USER_INFO_CACHE_MAX_SIZE,
+            ttl=self.slack_config.SLACK_USER_INFO_CACHE_TTL,
+            negative_ttl=self.slack_config.SLACK_USER_INFO_CACHE_NEGATIVE_TTL
+        )
+        self.bot_info_cache = AsyncTTLCache(
+            max_size=self.slack_config.SLACK_USER_INFO_CACHE_MAX_SIZE,
+            ttl=self.slack_config.SLACK_USER_INFO_CACHE_TTL,
+            negative_ttl=self.slack_config.SLACK_USER_INFO_CACHE_NEGATIVE_TTL
+        )
+
+        self.download_semaphore = asyncio.Semaphore(self.slack_config.SLACK_MAX_CONCURRENT_DOWNLOADS)
+
+        # Linked threads are fetched concurrently and kept briefly, so a link pasted repeatedly is fetched once
+        self.link_fetch_semaphore = asyncio.Semaphore(self.slack_config.SLACK_MAX_CONCURRENT_LINK_FETCHES)
+        self.thread_cache = AsyncTTLCache(
+            max_size=self.slack_config.SLACK_THREAD_CACHE_MAX_SIZE,
+            ttl=self.slack_config.SLACK_THREAD_CACHE_TTL,
+            negative_ttl=0
+        )
+
     def is_message_too_old(self, event_ts):
 
         # Convert the event timestamp into a datetime object
@@ -102,20 +132,27 @@ class SlackInputHandler:
     # Function to get user info
     async def get_user_info(self, user_id):
         if user_id is not None and user_id != 'Unknown':
-            try:
-                response = await self.async_client.users_info(user=user_id)
-                if response['ok']:
-                    user = response['user']
-                    name = user.get('real_name') or user.get('name', 'Unknown')
-                    email = user.get('profile', {}).get('email', 'Unknown')
-                    return name, email, user_id
-                else:
-                    self.logger.error(f"Failed to fetch user info: {response.get('error', 'Unknown error')}")
-            except Exception as e:
-                self.logger.error(f"Error fetching user info: {e}")
-                return 'Unknown', 'Unknown', user_id
+            user = await self.get_user_profile(user_id)
+            if user:
+                name = user.get('real_name') or user.get('name', 'Unknown')
+                email = user.get('profile', {}).get('email', 'Unknown')
+                return name, email, user_id
         return 'Unknown', 'Unknown', user_id
 
+    async def get_user_profile(self, user_id):
+        # Concurrent lookups for the same user share a single users.info call
+        return await self.user_info_cache.get_or_load(user_id, lambda: self._fetch_user_profile(user_id))
+
+    async def _fetch_user_profile(self, user_id):
+        try:
+            response = await self.async_client.users_info(user=user_id)
+            if response['ok']:
+                return response['user']
+            self.logger.error(f"Failed to fetch user info: {response.get('error', 'Unknown error')}")
+        except Exception as e:
+            self.logger.error(f"Error fetching user info: {e}")
+        return None
+
     def extract_event_details(self, event):
         try:
             ts = event.get('ts')
@@ -183,19 +220,6 @@ class SlackInputHandler:
         except Exception as ex:
             self.logger.error(f"Error reading request data: {ex}")
 
-    async def resize_image(self, image_bytes, max_size):
-        image = Image.open(io.BytesIO(image_bytes))
-        if image.mode in ("RGBA", "P"):  # Check if image has transparency
-            image = image.convert("RGB")  # Convert image to RGB
-        width, height = image.size
-        if width > max_size[0] or height > max_size[1]:  # Only resize if the image is larger than max_size
-            ratio = min(max_size[0] / width, max_size[1] / height)
-            new_size = (int(width * ratio), int(height * ratio))
-            image = image.resize(new_size, Image.BILINEAR)
-        byte_arr = io.BytesIO()
-        image.save(byte_arr, format='JPEG')
-        return byte_arr.getvalue()  # Get a bytes object from the BytesIO object
-
     async def handle_image_file(self, file, image_bytes=None):
         try:
             if image_bytes is None:
@@ -203,8 +227,7 @@ class SlackInputHandler:
                 image_bytes = await self.download_image_as_byte_array(image_url)
 
             if image_bytes:
-                resized_image_bytes = base64.b64encode(image_bytes).decode('utf-8')
-                return resized_image_bytes
+                return await self.global_manager.image_pipeline.prepare_base64(image_bytes)
         except Exception as e:
             self.logger.error(f"Failed to process image: {e}")
             return None
@@ -224,40 +247,38 @@ class SlackInputHandler:
         all_files_content = []
         zip_images = []
         try:
-            with zipfile.ZipFile(io.BytesIO(file_content), 'r') as zip_ref:
-                for zip_info in zip_ref.infolist():
-                    with zip_ref.open(zip_info) as file_in_zip:
-                        if zip_info.filename.lower().endswith(('.png', '.jpg', '.jpeg')):
-                            image_data = file_in_zip.read()
-                            file = {'url_private': None, 'name': zip_info.filename}
-                            img_str = await self.handle_image_file(file, image_bytes=image_data)
-                            zip_images.append(img_str)
-                            self.logger.debug(f'Successfully processed image file {zip_info.filename}')
-                        else:
-                            file_content = file_in_zip.read()
-                            if zip_info.filename.lower().endswith('.pdf'):
-                                file = {'url_private': file_content, 'mimetype': self.APPLICATION_PLACEHOLDER,
-                                        'name': zip_info.filename}
-                                text_contents = await self.handle_text_file(file, file_content=file_content)
-                                all_files_content.extend(text_contents)
-                                self.logger.debug(f'Successfully processed PDF file {zip_info.filename}')
-                            else:
-                                decoded = False
-                                for encoding in ['utf-8', 'latin-1', 'cp1252']:
-                                    try:
-                                        file_content_decoded = file_content.decode(encoding)
-                                        all_files_content.append(
-                                            f"SHARED FILE FULL NAME in a ZIP : {zip_info.filename}\n THIS FILE CONTENT: \n{file_content_decoded}")
-                                        self.logger.debug(
-                                            f'Successfully processed text file {zip_info.filename} with encoding {encoding}')
-                                        decoded = True
-                                        break
-                                    except UnicodeDecodeError as e:
-                                        self.logger.warning(
-                                            f'UnicodeDecodeError for file {zip_info.filename} with encoding {encoding}: start={e.start}, end={e.end}, reason={e.reason}')
-                                if not decoded:
-                                    self.logger.warning(
-                                        f'Error decoding file content for file {zip_info.filename}, content might be binary.')
+            zip_entries = await self.global_manager.cpu_executor.run(read_zip_entries, file_content)
+            for filename, entry_content in zip_entries:
+                if filename.lower().endswith(('.png', '.jpg', '.jpeg')):
+                    file = {'url_private': None, 'name': filename}
+                    img_str = await self.handle_image_file(file, image_bytes=entry_content)
+                    zip_images.append(img_str)
+                    self.logger.debug(f'Successfully processed image file {filename}')
+                else:
+                    file_content = entry_content
+                    if filename.lower().endswith('.pdf'):
+                        file = {'url_private': file_content, 'mimetype': self.APPLICATION_PLACEHOLDER,
+                                'name': filename}
+                        text_contents = await self.handle_text_file(file, file_content=file_content)
+                        all_files_content.extend(text_contents)
+                        self.logger.debug(f'Successfully processed PDF file {filename}')
+                    else:
+                        decoded = False
+                        for encoding in ['utf-8', 'latin-1', 'cp1252']:
+                            try:
+                                file_content_decoded = file_content.decode(encoding)
+                                all_files_content.append(
+                                    f"SHARED FILE FULL NAME in a ZIP : {filename}\n THIS FILE CONTENT: \n{file_content_decoded}")
+                                self.logger.debug(
+                                    f'Successfully processed text file {filename} with encoding {encoding}')
+                                decoded = True
+                                break
+                            except UnicodeDecodeError as e:
+                                self.logger.warning(
+                                    f'UnicodeDecodeError for file {filename} with encoding {encoding}: start={e.start}, end={e.end}, reason={e.reason}')
+                        if not decoded:
+                            self.logger.warning(
+                                f'Error decoding file content for file {filename}, content might be binary.')
         except Exception as e:
             self.logger.error(f"Failed to extract files from zip: {e}")
         return all_files_content, zip_images
@@ -268,13 +289,11 @@ class SlackInputHandler:
             file_content = await self.download_file_content(file_url)
         if file_content:
             if file.get('mimetype') == self.APPLICATION_PLACEHOLDER:
-                with io.BytesIO(file_content) as open_pdf_file:
-                    pdf_reader = PdfReader(open_pdf_file)
-                    pdftext = f"FileName: {file.get('name')}\n"
-                    for page_num in range(len(pdf_reader.pages)):
-                        page = pdf_reader.pages[page_num]
-                        pdftext += f"Page {page_num + 1}:\n{page.extract_text()}\n"
-                    file_content = pdftext
+                pages = await extract_pdf_text(self.global_manager.cpu_executor, file_content)
+                pdftext = f"FileName: {file.get('name')}\n"
+                for page_num, page_text in enumerate(pages):
+                    pdftext += f"Page {page_num + 1}:\n{page_text}\n"
+                file_content = pdftext
             else:
                 file_content = file_content.decode('utf-8')
             return [
@@ -345,8 +364,21 @@ class SlackInputHandler:
         if event.get('subtype') == 'file_share' and 'files' in event:
             self.logger.info('Event subtype is a file share and it contains files')
             files = event.get('files', [])
-            for file in files:
-                await self._process_single_file(file, base64_images, files_content)
+            # Attachments are downloaded concurrently, results are merged back in their original order
+            images_per_file = [[] for _ in files]
+            contents_per_file = [[] for _ in files]
+            budget_token = _message_download_budget.set(
+                DownloadBudget(self.slack_config.SLACK_MAX_MESSAGE_DOWNLOAD_BYTES))
+            try:
+                await asyncio.gather(*(
+                    self._process_single_file(file, images_per_file[index], contents_per_file[index])
+                    for index, file in enumerate(files)
+                ))
+            finally:
+                _message_download_budget.reset(budget_token)
+            for images, contents in zip(images_per_file, contents_per_file):
+                base64_images.extend(images)
+                files_content.extend(contents)
         return base64_images, files_content
 
     async def _process_single_file(self, file, base64_images, files_content):
@@ -381,9 +413,13 @@ class SlackInputHandler:
         return text
 
     async def _process_slack_links(self, text, main_timestamp, user_id):
-        slack_message_links = re.findall(r'<(https:\/\/[a-zA-Z0-9\.]+\.slack\.com\/archives\/.*?)>', text)
-        for link in slack_message_links:
-            processed_content = await self._process_single_slack_link(link, "", main_timestamp, user_id, depth=0)
+        slack_message_links = list(dict.fromkeys(
+            re.findall(r'<(https:\/\/[a-zA-Z0-9\.]+\.slack\.com\/archives\/.*?)>', text)))
+        processed_contents = await asyncio.gather(*(
+            self._process_single_slack_link(link, "", main_timestamp, user_id, depth=0)
+            for link in slack_message_links
+        ))
+        for link, processed_content in zip(slack_message_links, processed_contents):
             text = text.replace(f"<{link}>", processed_content)
         return text
 
@@ -438,60 +474,10 @@ class SlackInputHandler:
                 self.logger.error(f"No matching message found for the timestamp: {target_ts}")
                 return f"No exact message found for the given Slack link: {link}"
 
-            # Process the message text and handle nested links recursively
-            processed_messages = []
-            for message in messages:
-                # Collect all blocks
-                all_blocks = []
-                
-                # Add blocks from main message
-                if "blocks" in message:
-                    all_blocks.extend(message["blocks"])
-                    self.logger.debug(f"Added blocks from main message")
-                
-                # Add blocks from attachments
-                if "attachments" in message:
-                    for attachment in message['attachments']:
-                        if "blocks" in attachment:
-                            all_blocks.extend(attachment["blocks"])
-                            self.logger.debug(f"Added blocks from attachment")
-                
-                # Process all collected blocks if any exist
-                if all_blocks:
-                    slack_block_processor = SlackBlockProcessor()
-                    blocks_text = slack_block_processor.extract_text_from_blocks(all_blocks)
-                    if blocks_text:
-                        message['text'] = blocks_text
-                        self.logger.debug(f"Using text extracted from blocks")
-
-                # Process links in the text field
-                if "text" in message:
-                    processed_text = await self._process_slack_links_in_text(message['text'], depth + 1)
-                    message['text'] = processed_text
-
-                # Process additional URLs in attachments
-                if "attachments" in message:
-                    for attachment in message['attachments']:
-                        if "from_url" in attachment:
-                            processed_url = await self._process_single_slack_link(
-                                attachment['from_url'], "", main_timestamp, user_id, depth + 1)
-                            message['text'] = f"{message['text']}\n{processed_url}"
-                        
-                        if "title_link" in attachment:
-                            processed_link = await self._process_single_slack_link(
-                                attachment['title_link'], "", main_timestamp, user_id, depth + 1)
-                            attachment['title_link'] = processed_link
-
-                # Handle any message_blocks (maintain backward compatibility)
-                if "message_blocks" in message:
-                    for block in message['message_blocks']:
-                        if "from_url" in block:
-                            processed_block_url = await self._process_single_slack_link(
-                                block['from_url'], "", main_timestamp, user_id, depth + 1
-                            )
-                            message['text'] = f"{message['text']}\n{processed_block_url}"
-
-                processed_messages.append(message)
+            # Process the message text and handle nested links recursively, messages being expanded concurrently
+            processed_messages = await asyncio.gather(*(
+                self._expand_message_links(message, main_timestamp, user_id, depth) for message in messages
+            ))
 
             # Format the processed messages for display
             formatted_content = await self._format_message_content(processed_messages)
@@ -530,22 +516,78 @@ class SlackInputHandler:
             self.logger.error(f"Error processing Slack link: {link}. Error: {str(e)}", exc_info=True)
             raise
 
+    async def _expand_message_links(self, message, main_timestamp, user_id, depth):
+        # Collect all blocks
+        all_blocks = []
+        
+        # Add blocks from main message
+        if "blocks" in message:
+            all_blocks.extend(message["blocks"])
+            self.logger.debug(f"Added blocks from main message")
+        
+        # Add blocks from attachments
+        if "attachments" in message:
+            for attachment in message['attachments']:
+                if "blocks" in attachment:
+                    all_blocks.extend(attachment["blocks"])
+                    self.logger.debug(f"Added blocks from attachment")
+        
+        # Process all collected blocks if any exist
+        if all_blocks:
+            slack_block_processor = SlackBlockProcessor()
+            blocks_text = slack_block_processor.extract_text_from_blocks(all_blocks)
+            if blocks_text:
+                message['text'] = blocks_text
+                self.logger.debug(f"Using text extracted from blocks")
+
+        # Process links in the text field
+        if "text" in message:
+            processed_text = await self._process_slack_links_in_text(message['text'], depth + 1)
+            message['text'] = processed_text
+
+        # Process additional URLs in attachments
+        if "attachments" in message:
+            for attachment in message['attachments']:
+                if "from_url" in attachment:
+                    processed_url = await self._process_single_slack_link(
+                        attachment['from_url'], "", main_timestamp, user_id, depth + 1)
+                    message['text'] = f"{message['text']}\n{processed_url}"
+                
+                if "title_link" in attachment:
+                    processed_link = await self._process_single_slack_link(
+                        attachment['title_link'], "", main_timestamp, user_id, depth + 1)
+                    attachment['title_link'] = processed_link
+
+        # Handle any message_blocks (maintain backward compatibility)
+        if "message_blocks" in message:
+            for block in message['message_blocks']:
+                if "from_url" in block:
+                    processed_block_url = await self._process_single_slack_link(
+                        block['from_url'], "", main_timestamp, user_id, depth + 1
+                    )
+                    message['text'] = f"{message['text']}\n{processed_block_url}"
+
+        return message
+
     async def _process_slack_links_in_text(self, text, depth):
         #
-        matches = re.findall(r'<(https:\/\/[a-zA-Z0-9\.]+\.slack\.com\/archives\/[^|>]+)(?:\|([^>]+))?>', text)
+        matches = list(dict.fromkeys(
+            re.findall(r'<(https:\/\/[a-zA-Z0-9\.]+\.slack\.com\/archives\/[^|>]+)(?:\|([^>]+))?>', text)))
+        results = await asyncio.gather(*(
+            self._process_single_slack_link(full_url, "", "", "", depth=depth) for full_url, _ in matches
+        ), return_exceptions=True)
 
-        for match in matches:
+        for match, linked_content in zip(matches, results):
             full_url = match[0]
             display_url = match[1] if len(match) > 1 else full_url
 
-            try:
-                linked_content = await self._process_single_slack_link(full_url, "", "", "", depth=depth)
+            if not isinstance(linked_content, Exception):
                 # Replace slack link with original text
                 text = text.replace(f'<{full_url}|{display_url}>', f"[Linked content: {linked_content}]")
                 text = text.replace(f'<{full_url}>',
                                     f"[Linked content: {linked_content}]")  # Pour les cas sans texte d'affichage
-            except Exception as e:
-                self.logger.error(f"Failed to process nested Slack link: {full_url}. Error: {e}", exc_info=True)
+            else:
+                self.logger.error(f"Failed to process nested Slack link: {full_url}. Error: {linked_content}")
                 # Replace link with error message
                 error_message = f"[Failed to retrieve content for Slack link: {full_url}]"
                 text = text.replace(f'<{full_url}|{display_url}>', error_message)
@@ -559,9 +601,7 @@ class SlackInputHandler:
         non_slack_urls = [url for url in urls if "slack.com" not in url]
 
         if self.global_manager.bot_config.GET_URL_CONTENT:
-            final_texts = []
-            for url in non_slack_urls:
-                final_texts.append(await self._process_single_url(url))
+            final_texts = await asyncio.gather(*(self._process_single_url(url) for url in non_slack_urls))
             text += ''.join(final_texts)
         return text
 
@@ -592,14 +632,15 @@ class SlackInputHandler:
                 return f"Error processing Slack URL: {url}"
         else:
             try:
-                webcontent = requests.get(url)
-                webcontent.raise_for_status()
-                soup = BeautifulSoup(webcontent.text, 'html.parser')
-                content = soup.get_text()
-                content = content.replace('\n', '')
-                content = re.sub(' +', ' ', content)
+                async with self.link_fetch_semaphore:
+                    webcontent = await stream_download(
+                        url,
+                        max_bytes=self.slack_config.SLACK_MAX_FILE_DOWNLOAD_BYTES,
+                        timeout=self.slack_config.SLACK_FILE_DOWNLOAD_TIMEOUT
+                    )
+                content = await self.global_manager.cpu_executor.run(extract_html_text, webcontent)
                 return f"The following text is an automated response inserted in the user conversation automatically giving the content of the URL in the user message: {content}\n"
-            except requests.exceptions.RequestException as e:
+            except Exception as e:
                 self.logger.error(f"An error occurred while trying to get {url}: {e}")
                 return f"An error occurred while trying to get {url}:\n"
 
@@ -716,7 +757,14 @@ class SlackInputHandler:
             'ts': thread_ts,
             'limit': 100
         }
-        return await self._make_slack_api_call(url, params)
+
+        async def load():
+            async with self.link_fetch_semaphore:
+                return await self._make_slack_api_call(url, params)
+
+        data = await self.thread_cache.get_or_load((channel_id, thread_ts), load)
+        # Callers rewrite message texts in place, keep the cached copy untouched
+        return copy.deepcopy(data)
 
     async def _fetch_single_message(self, channel_id, message_ts):
         url = f"{self.SLACK_API_URL}conversations.history"
@@ -787,17 +835,20 @@ class SlackInputHandler:
         return response.get('messages', [])
 
     async def get_bot_info(self, bot_id):
+        bot_name = await self.bot_info_cache.get_or_load(bot_id, lambda: self._fetch_bot_name(bot_id))
+        return bot_name or 'Unknown Bot'
+
+    async def _fetch_bot_name(self, bot_id):
         try:
             response = await self.async_client.bots_info(bot=bot_id)
             if response['ok']:
                 bot_info = response.get('bot', {})
-                bot_name = bot_info.get('name', 'Unknown Bot')
-                return bot_name
+                return bot_info.get('name', 'Unknown Bot')
             else:
                 self.logger.error(f"Failed to fetch bot info: {response.get('error', 'Unknown error')}")
         except Exception as e:
             self.logger.error(f"Error fetching bot info: {e}")
-        return 'Unknown Bot'
+        return None
 
     def format_slack_timestamp(self, slack_timestamp: str) -> str:
         # Convert Slack timestamp to UTC datetime
@@ -860,27 +911,34 @@ class SlackInputHandler:
 
         return "\n".join(formatted_messages)
 
+    async def _download_slack_file(self, file_url):
+        headers = {'Authorization': f'Bearer {self.SLACK_BOT_TOKEN}'}
+        async with self.download_semaphore:
+            return await stream_download(
+                file_url,
+                headers=headers,
+                max_bytes=self.slack_config.SLACK_MAX_FILE_DOWNLOAD_BYTES,
+                budget=_message_download_budget.get(),
+                timeout=self.slack_config.SLACK_FILE_DOWNLOAD_TIMEOUT
+            )
+
     async def download_image_as_byte_array(self, image_url):
         try:
-            slack_token = os.environ.get('SLACK_BOT_TOKEN')
-            headers = {'Authorization': f'Bearer {slack_token}'}
-            response = requests.get(image_url, headers=headers, stream=True)
-            if response.status_code == 200:
-                return response.content  # Return bytes object
-            else:
-                print(f"Failed to download image: {response.status_code}, {response.text}")
-                return None
+            return await self._download_slack_file(image_url)
+        except DownloadLimitExceeded as e:
+            self.logger.warning(f"Image download aborted: {e}")
+            return None
         except Exception as e:
             self.logger.error(f"An error occurred while downloading the image: {e}")
             return None
 
     async def download_file_content(self, file_url):
-        headers = {'Authorization': 'Bearer ' + self.SLACK_BOT_TOKEN}
         try:
-            response = requests.get(file_url, headers=headers)
-            response.raise_for_status()  # Check for HTTP errors
-            return response.content
-        except ConnectionError as e:
+            return await self._download_slack_file(file_url)
+        except DownloadLimitExceeded as e:
+            self.logger.warning(f"File download aborted: {e}")
+            return None
+        except aiohttp.ClientError as e:
             self.logger.error(f"Error downloading file: {str(e)}")
             return None
         except Exception as e:
@@ -953,9 +1011,9 @@ class SlackInputHandler:
                                 f"timestamp={message.get('ts', 'N/A')}"
                             )
                         user_id = messages[0]['user']
-                        user_info_response = await self.async_client.users_info(user=user_id)
-                        if user_info_response['ok']:
-                            user_name = user_info_response['user']['name']
+                        user = await self.get_user_profile(user_id)
+                        if user:
+                            user_name = user['name']
                             message_text = f"*{user_name}*: _{messages[0]['text']}_"  # Prepend the user's name to the message and format it
                             return permalink, message_text
                     if "username" in messages[0]:
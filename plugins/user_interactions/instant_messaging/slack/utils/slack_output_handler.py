@@ -14,6 +14,8 @@ from core.user_interactions.incoming_notification_data_base import (
 from core.user_interactions.message_type import MessageType
 from utils.plugin_manager.plugin_manager import PluginManager
 
+from .slack_reaction_tracker import SlackReactionTracker
+
 
 class SlackOutputHandler:
     def __init__(self, global_manager: GlobalManager, slack_config):
@@ -26,9 +28,10 @@ class SlackOutputHandler:
         self.slack_bot_token = slack_config.SLACK_BOT_TOKEN
         self.slack_bot_user_token = slack_config.SLACK_BOT_USER_TOKEN
         self.client = WebClient(token=self.slack_bot_token)
+        self.reaction_tracker = SlackReactionTracker(global_manager, slack_config)
 
-    # Function to add reaction to a message
-    async def add_reaction(self, channel_id, timestamp, reaction):
+    # Function to add reaction to a message, tracked per thread when thread_id is given
+    async def add_reaction(self, channel_id, timestamp, reaction, thread_id=None):
         try:
             # Check if reaction name is valid
             if not re.match(r'^[\w-]+$', reaction):
@@ -40,9 +43,13 @@ class SlackOutputHandler:
                 timestamp=timestamp,
                 name=reaction
             )
+            if thread_id is not None:
+                await self.reaction_tracker.record_added(channel_id, thread_id, timestamp, reaction)
         except SlackApiError as e:
             if e.response["error"] == "already_reacted":
                 self.logger.debug("Already reacted. Skipping.")
+                if thread_id is not None:
+                    await self.reaction_tracker.record_added(channel_id, thread_id, timestamp, reaction)
             elif e.response["error"] == "invalid_name":
                 self.logger.error(f"Invalid reaction name: {reaction}")
             else:
@@ -51,7 +58,9 @@ class SlackOutputHandler:
             self.logger.error(f"Error adding reaction: {e}")
 
     # Function to remove reaction from a message
-    async def remove_reaction(self, channel_id, timestamp, reaction):
+    async def remove_reaction(self, channel_id, timestamp, reaction, thread_id=None):
+        if thread_id is not None:
+            await self.reaction_tracker.record_removed(channel_id, thread_id, timestamp, reaction)
         try:
             self.client.reactions_remove(
                 channel=channel_id,
@@ -237,28 +246,23 @@ class SlackOutputHandler:
 
     async def remove_reaction_from_thread(self, channel_id, thread_id, emoji_name):
         """
-        Fetches messages from a Slack thread, checks if they have a specific reaction, and removes that reaction.
-        
+        Removes a reaction from every message of a Slack thread the bot placed it on.
+        The messages come from the reaction tracker, the thread history is not fetched.
+
         :param channel_id: ID of the Slack channel
         :param thread_id: Thread timestamp of the Slack thread
         :param emoji_name: The name of the emoji reaction to remove
         """
         try:
-            # Step 1: Fetch the conversation history
-            messages = await self.fetch_conversation_history(channel_id, thread_id)
+            timestamps = await self.reaction_tracker.pop_reaction(channel_id, thread_id, emoji_name)
 
-            if not messages:
-                self.logger.info(f"No messages found in thread: {thread_id}")
+            if not timestamps:
+                self.logger.debug(f"No tracked reaction '{emoji_name}' in thread: {thread_id}")
                 return
 
-            # Step 2: Loop through messages to find the ones with the desired reaction
-            for message in messages:
-                if 'reactions' in message:
-                    for reaction in message['reactions']:
-                        if reaction['name'] == emoji_name:
-                            # Step 3: Remove the reaction
-                            self.logger.info(f"Removing reaction '{emoji_name}' from message: {message['ts']}")
-                            await self.remove_reaction(channel_id, message['ts'], emoji_name)
+            for timestamp in timestamps:
+                self.logger.info(f"Removing reaction '{emoji_name}' from message: {timestamp}")
+                await self.remove_reaction(channel_id, timestamp, emoji_name)
 
         except Exception as e:
             self.logger.error(f"Error in remove_reaction_from_thread: {e}")
@@ -0,0 +1,90 @@
+import json
+from collections import OrderedDict
+from typing import Dict, List, Set, Tuple
+
+from core.global_manager import GlobalManager
+
+
+class SlackReactionTracker:
+    """
+    Keeps track of the reactions the bot placed in each thread, so thread-wide removals
+    target the messages carrying the reaction instead of scanning the thread history.
+
+    Threads are kept in memory, the least recently used ones being dropped beyond
+    SLACK_REACTION_TRACKER_MAX_THREADS. With SLACK_REACTION_TRACKER_PERSIST, each thread state
+    is also saved in the backend processing container so it survives a restart.
+    """
+
+    def __init__(self, global_manager: GlobalManager, slack_config):
+        self.global_manager = global_manager
+        self.logger = global_manager.logger
+        self.max_threads = slack_config.SLACK_REACTION_TRACKER_MAX_THREADS
+        self.persist = slack_config.SLACK_REACTION_TRACKER_PERSIST
+        # (channel_id, thread_id) -> reaction name -> timestamps of the messages carrying it
+        self._threads: "OrderedDict[Tuple[str, str], Dict[str, Set[str]]]" = OrderedDict()
+
+    @property
+    def backend_dispatcher(self):
+        return self.global_manager.backend_internal_data_processing_dispatcher
+
+    @staticmethod
+    def _file_name(channel_id, thread_id) -> str:
+        return f"reactions-{channel_id}-{thread_id}.json"
+
+    async def _get_thread(self, channel_id, thread_id) -> Dict[str, Set[str]]:
+        key = (channel_id, thread_id)
+        reactions = self._threads.get(key)
+        if reactions is None:
+            reactions = await self._load(channel_id, thread_id) if self.persist else {}
+            self._threads[key] = reactions
+            while len(self._threads) > self.max_threads:
+                self._threads.popitem(last=False)
+        self._threads.move_to_end(key)
+        return reactions
+
+    async def _load(self, channel_id, thread_id) -> Dict[str, Set[str]]:
+        try:
+            content = await self.backend_dispatcher.read_data_content(
+                self.backend_dispatcher.processing, self._file_name(channel_id, thread_id))
+            if content:
+                return {name: set(timestamps) for name, timestamps in json.loads(content).items()}
+        except Exception as e:
+            self.logger.error(f"Error loading tracked reactions for thread {thread_id}: {e}")
+        return {}
+
+    async def _save(self, channel_id, thread_id, reactions: Dict[str, Set[str]]):
+        if not self.persist:
+            return
+        file_name = self._file_name(channel_id, thread_id)
+        try:
+            if reactions:
+                data = json.dumps({name: sorted(timestamps) for name, timestamps in reactions.items()})
+                await self.backend_dispatcher.write_data_content(self.backend_dispatcher.processing, file_name, data)
+            else:
+                await self.backend_dispatcher.remove_data_content(self.backend_dispatcher.processing, file_name)
+        except Exception as e:
+            self.logger.error(f"Error saving tracked reactions for thread {thread_id}: {e}")
+
+    async def record_added(self, channel_id, thread_id, timestamp, reaction_name):
+        reactions = await self._get_thread(channel_id, thread_id)
+        timestamps = reactions.setdefault(reaction_name, set())
+        if timestamp not in timestamps:
+            timestamps.add(timestamp)
+            await self._save(channel_id, thread_id, reactions)
+
+    async def record_removed(self, channel_id, thread_id, timestamp, reaction_name):
+        reactions = await self._get_thread(channel_id, thread_id)
+        timestamps = reactions.get(reaction_name)
+        if timestamps and timestamp in timestamps:
+            timestamps.discard(timestamp)
+            if not timestamps:
+                del reactions[reaction_name]
+            await self._save(channel_id, thread_id, reactions)
+
+    async def pop_reaction(self, channel_id, thread_id, reaction_name) -> List[str]:
+        """Forget a reaction in a thread and return the timestamps of the messages it was placed on."""
+        reactions = await self._get_thread(channel_id, thread_id)
+        timestamps = reactions.pop(reaction_name, set())
+        if timestamps:
+            await self._save(channel_id, thread_id, reactions)
+        return sorted(timestamps)
@@ -4,7 +4,6 @@ import json
 from datetime import datetime
 from typing import List, Optional
 
-import requests
 from botbuilder.core import (
     BotFrameworkAdapter,
     BotFrameworkAdapterSettings,
@@ -33,6 +32,11 @@ from plugins.user_interactions.instant_messaging.teams.bots import TeamsConversa
 from plugins.user_interactions.instant_messaging.teams.utils.teams_event_data import (
     TeamsEventData,
 )
+from utils.http_client.shared_http_client import (
+    DownloadBudget,
+    DownloadLimitExceeded,
+    stream_download,
+)
 from utils.logging.logger_loader import logging
 from utils.plugin_manager.plugin_manager import PluginManager
 
@@ -50,6 +54,10 @@ class TeamsConfig(BaseModel):
     TEAMS_FEEDBACK_CHANNEL: str
     TEAMS_FEEDBACK_BOT_USER_ID: str
     BEHAVIOR_PLUGIN_NAME: str
+    TEAMS_MAX_FILE_DOWNLOAD_BYTES: int = 25 * 1024 * 1024
+    TEAMS_MAX_MESSAGE_DOWNLOAD_BYTES: int = 50 * 1024 * 1024
+    TEAMS_FILE_DOWNLOAD_TIMEOUT: int = 60
+    TEAMS_MAX_CONCURRENT_DOWNLOADS: int = 4
 
 
 class TeamsPlugin(UserInteractionsPluginBase):
@@ -65,6 +73,7 @@ class TeamsPlugin(UserInteractionsPluginBase):
         self.genai_interactions_text_dispatcher = None
         self.backend_internal_data_processing_dispatcher = None
         self.APPJSON = "application/json"
+        self.download_semaphore = asyncio.Semaphore(self.teams_config.TEAMS_MAX_CONCURRENT_DOWNLOADS)
 
     @property
     def route_path(self):
@@ -118,7 +127,15 @@ class TeamsPlugin(UserInteractionsPluginBase):
             self.logger.info(f"Request received from <{request.url.path}>")
 
             # Create a new task to handle the rest of the processing
-            asyncio.create_task(self.process_event_data(event_data, self.headers, raw_request))
+            channel_id = event_data.get('conversation', {}).get('id')
+            if not self.global_manager.task_supervisor.submit(
+                    self.process_event_data(event_data, self.headers, raw_request), channel_id=channel_id):
+                return Response(
+                    content=json.dumps({"status": "error", "message": "Too many requests, retry later"}),
+                    media_type=self.APPJSON,
+                    headers={'Retry-After': '1'},
+                    status_code=503  # 503 Service Unavailable
+                )
 
             return Response(
                 content=json.dumps({"status": "success", "message": "Request accepted for processing"}),
@@ -257,17 +274,13 @@ class TeamsPlugin(UserInteractionsPluginBase):
         if channel_type != 'personal':
             conversation_id = event_data.get('conversation', {}).get('id', '').replace(':', '_')
             message_id = event_data.get('id')
-            session_name = f"{conversation_id}-{message_id}.txt"
+            in_flight_key = self.global_manager.in_flight_registry.make_key(conversation_id, message_id)
         else:
             message_id = event_data.get('conversation', {}).get('id', '').replace(':', '_')
-            session_name = f"{user_id}-{message_id}.txt"
-
-        processing_container = self.backend_internal_data_processing_dispatcher.processing
-        result = await self.backend_internal_data_processing_dispatcher.read_data_content(processing_container,
-                                                                                          session_name)
+            in_flight_key = self.global_manager.in_flight_registry.make_key(user_id, message_id)
 
-        if result is not None:
-            self.logger.warning(f"Discarding request: This request is already being processed for {session_name}")
+        if await self.global_manager.in_flight_registry.is_in_flight(in_flight_key):
+            self.logger.warning(f"Discarding request: This request is already being processed for {in_flight_key}")
             return True
         return False
 
@@ -335,25 +348,37 @@ class TeamsPlugin(UserInteractionsPluginBase):
         return conversation_id, ts, thread_id, event_label
 
     async def _process_image_attachments(self, activity):
-        base64_images = []
-        if activity.attachments:
-            for attachment in activity.attachments:
-                if attachment.content_type.startswith("image/"):
-                    base64_image = await self._process_single_image_attachment(attachment)
-                    if base64_image:
-                        base64_images.append(base64_image)
-        return base64_images
-
-    async def _process_single_image_attachment(self, attachment):
+        if not activity.attachments:
+            return []
+        # Images of a message are downloaded concurrently, within a shared size budget, and kept in order
+        budget = DownloadBudget(self.teams_config.TEAMS_MAX_MESSAGE_DOWNLOAD_BYTES)
+        results = await asyncio.gather(*(
+            self._process_single_image_attachment(attachment, budget)
+            for attachment in activity.attachments if attachment.content_type.startswith("image/")
+        ))
+        return [base64_image for base64_image in results if base64_image]
+
+    async def _process_single_image_attachment(self, attachment, budget: Optional[DownloadBudget] = None):
         if attachment.content_url:
             try:
-                image_response = requests.get(attachment.content_url)
-                image_response.raise_for_status()
-                return base64.b64encode(image_response.content).decode('utf-8')
-            except requests.RequestException as e:
+                async with self.download_semaphore:
+                    image_bytes = await stream_download(
+                        attachment.content_url,
+                        max_bytes=self.teams_config.TEAMS_MAX_FILE_DOWNLOAD_BYTES,
+                        budget=budget,
+                        timeout=self.teams_config.TEAMS_FILE_DOWNLOAD_TIMEOUT
+                    )
+                return await self.global_manager.image_pipeline.prepare_base64(image_bytes)
+            except DownloadLimitExceeded as e:
+                self.logger.warning(f"Image download aborted: {e}")
+            except Exception as e:
                 self.logger.error(f"Failed to fetch image: {e}")
         elif attachment.content and 'base64' in attachment.content:
-            return attachment.content.split('base64,')[1]
+            base64_image = attachment.content.split('base64,')[1]
+            try:
+                return await self.global_manager.image_pipeline.prepare_base64(base64.b64decode(base64_image))
+            except ValueError:
+                return base64_image
         return None
 
     def _create_teams_event_data(self, timestamp, ts, event_label, channel_id, thread_id,
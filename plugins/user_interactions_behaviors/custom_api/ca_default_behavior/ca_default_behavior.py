@@ -47,6 +47,7 @@ class CaDefaultBehaviorPlugin(UserInteractionsBehaviorBase):
         self._plugin_name = value
 
     async def process_interaction(self, event_data, event_origin=None):
+        in_flight_key = None
         try:
             start_time = time.time()  # Start the timer
 
@@ -66,12 +67,14 @@ class CaDefaultBehaviorPlugin(UserInteractionsBehaviorBase):
             channel_id = event.channel_id
             thread_id = event.thread_id or event.timestamp  # Ensure thread_id is unique
 
-            # Prepare the processing session
-            session_name = f"{str(channel_id).replace(':', '_')}-{ts}.txt"
-            processing_container = self.backend_internal_data_processing_dispatcher.processing
-            await self.backend_internal_data_processing_dispatcher.write_data_content(processing_container,
-                                                                                      session_name, data="processing")
-            self.logger.info(f"IM behavior: Processing session {session_name} created successfully.")
+            # Register the message as being processed so duplicated notifications are discarded
+            key = self.global_manager.in_flight_registry.make_key(channel_id, ts)
+            if not await self.global_manager.in_flight_registry.mark_in_flight(key):
+                self.logger.info(f"IM behavior: Message {key} is already being processed, duplicate discarded.")
+                return
+            # Only set once registered, so a discarded duplicate never clears the marker of the original
+            in_flight_key = key
+            self.logger.info(f"IM behavior: Processing session {in_flight_key} registered successfully.")
 
             # Retrieve bot configuration settings
             require_mention_new_message = self.bot_config.REQUIRE_MENTION_NEW_MESSAGE
@@ -285,6 +288,8 @@ class CaDefaultBehaviorPlugin(UserInteractionsBehaviorBase):
             raise
 
         finally:
+            if in_flight_key is not None:
+                await self.global_manager.in_flight_registry.mark_done(in_flight_key)
             end_time = time.time()  # End the timer
             elapsed_time = end_time - start_time  # Calculate elapsed time
             self.logger.info(f"IM behavior: process_interaction took {elapsed_time} seconds.")
@@ -7,6 +7,8 @@ from unittest.mock import AsyncMock, MagicMock, patch
 
 import pytest
 
+from core.event_processing.in_flight_registry import InFlightRegistry
+from core.event_processing.task_supervisor import TaskSupervisor
 from core.global_manager import GlobalManager
 from core.user_interactions.incoming_notification_data_base import (
     IncomingNotificationDataBase,
@@ -36,6 +38,8 @@ from utils.config_manager.config_model import (
     UserInteractionsBehaviors,
     Utils,
 )
+from utils.cpu_executor.cpu_executor_service import CpuExecutorService
+from utils.image_pipeline.image_pipeline import ImagePipeline
 
 # Utiliser la boucle SelectorEventLoop sur Windows
 if sys.platform == "win32":
@@ -215,6 +219,14 @@ def mock_global_manager(mock_config_manager, mock_plugin_manager, mock_user_inte
     mock_global_manager.genai_image_generator_dispatcher = AsyncMock()
     mock_global_manager.bot_config.INTERNAL_DATA_PROCESSING_DEFAULT_PLUGIN_NAME = 'mock_plugin'
     mock_global_manager.session_manager_dispatcher = AsyncMock()  # Add this line
+    # Run CPU-bound jobs in a thread during tests rather than spawning worker processes
+    mock_global_manager.bot_config.CPU_EXECUTOR_MAX_WORKERS = 0
+    # Apply reaction updates immediately rather than after the debounce delay
+    mock_global_manager.bot_config.REACTION_DEBOUNCE_MS = 0
+    mock_global_manager.cpu_executor = CpuExecutorService(mock_global_manager)
+    mock_global_manager.image_pipeline = ImagePipeline(mock_global_manager)
+    mock_global_manager.in_flight_registry = InFlightRegistry(mock_global_manager)
+    mock_global_manager.task_supervisor = TaskSupervisor(mock_global_manager)
 
     # Ensure the Azure Service Bus plugin is available
     mock_global_manager.config_manager.config_model.PLUGINS.BACKEND.INTERNAL_QUEUE_PROCESSING = {
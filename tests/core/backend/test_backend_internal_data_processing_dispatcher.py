@@ -112,7 +112,10 @@ async def test_list_container_files(dispatcher, mock_plugin):
     dispatcher.initialize([mock_plugin])
     dispatcher.default_plugin = mock_plugin  # Définir manuellement le default_plugin
     await dispatcher.list_container_files('container')
-    mock_plugin.list_container_files.assert_called_with(container_name='container')
+    mock_plugin.list_container_files.assert_called_with(container_name='container', prefix=None)
+
+    await dispatcher.list_container_files('container', prefix='C1-')
+    mock_plugin.list_container_files.assert_called_with(container_name='container', prefix='C1-')
 
 def test_property_feedbacks(dispatcher, mock_plugin):
     mock_plugin.feedbacks = 'mock_feedbacks'
@@ -108,6 +108,9 @@ def mock_plugin():
         async def get_all_messages(self, *args, **kwargs):
             return self._messages_queue
 
+        async def get_container_messages(self, *args, **kwargs):
+            return self._messages_queue
+
     return MockPlugin("mock_plugin")
 
 @pytest.fixture
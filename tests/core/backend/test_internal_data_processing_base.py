@@ -97,7 +97,7 @@ class MinimalImplementation(InternalDataProcessingBase):
     async def remove_data_content(self, data_container, data_file):
         pass
 
-    async def list_container_files(self, container_name):
+    async def list_container_files(self, container_name, prefix=None):
         pass
 
     async def create_container(self, data_container: str) -> None:
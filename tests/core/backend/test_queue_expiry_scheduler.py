@@ -0,0 +1,64 @@
+import asyncio
+from unittest.mock import AsyncMock, MagicMock
+
+import pytest
+
+from core.backend.queue_expiry_scheduler import QueueExpiryScheduler
+
+
+@pytest.fixture
+def scheduler():
+    return QueueExpiryScheduler(MagicMock(), AsyncMock(side_effect=lambda container, names: len(names)), interval=0.01)
+
+def test_deadline():
+    assert QueueExpiryScheduler.deadline("100.5", 60) == 160.5
+    assert QueueExpiryScheduler.deadline("not-a-timestamp", 60) is None
+    assert QueueExpiryScheduler.deadline(None, 60) is None
+
+def test_pop_due_in_deadline_order(scheduler):
+    scheduler.schedule("events", "b", 20)
+    scheduler.schedule("events", "a", 10)
+    scheduler.schedule("messages", "c", 15)
+    scheduler.schedule("events", "later", 100)
+    scheduler.schedule("events", "never", None)
+
+    assert scheduler.pop_due(now=50) == {"events": ["a", "b"], "messages": ["c"]}
+    assert len(scheduler) == 1
+    assert scheduler.pop_due(now=50) == {}
+
+def test_discarded_entries_are_skipped(scheduler):
+    scheduler.schedule("events", "a", 10)
+    scheduler.schedule("events", "a", 10)
+    scheduler.discard("events", "a")
+
+    assert len(scheduler) == 0
+    assert scheduler.pop_due(now=50) == {}
+
+@pytest.mark.asyncio
+async def test_expire_due_removes_in_one_batch_per_container(scheduler):
+    scheduler.schedule("events", "a", 10)
+    scheduler.schedule("events", "b", 20)
+    scheduler.schedule("messages", "c", 15)
+
+    assert await scheduler.expire_due(now=50) == 3
+    scheduler.remove_batch.assert_any_await("events", ["a", "b"])
+    scheduler.remove_batch.assert_any_await("messages", ["c"])
+    assert scheduler.remove_batch.await_count == 2
+    assert scheduler.expired == 3
+
+@pytest.mark.asyncio
+async def test_expire_due_logs_batch_failures(scheduler):
+    scheduler.remove_batch.side_effect = Exception("storage unavailable")
+    scheduler.schedule("events", "a", 10)
+
+    assert await scheduler.expire_due(now=50) == 0
+    scheduler.logger.error.assert_called_once()
+
+@pytest.mark.asyncio
+async def test_background_expiry(scheduler):
+    scheduler.schedule("events", "a", 10)
+    scheduler.start()
+    await asyncio.sleep(0.05)
+    await scheduler.stop()
+
+    scheduler.remove_batch.assert_awaited_once_with("events", ["a"])
@@ -0,0 +1,95 @@
+import time
+from unittest.mock import AsyncMock
+
+import pytest
+
+from core.event_processing.in_flight_registry import InFlightRegistry
+
+
+@pytest.fixture
+def registry(mock_global_manager):
+    mock_global_manager.bot_config.IN_FLIGHT_TTL = 600
+    mock_global_manager.bot_config.IN_FLIGHT_BACKEND_MIRROR = False
+    return InFlightRegistry(mock_global_manager)
+
+@pytest.fixture
+def mirrored_registry(mock_global_manager):
+    mock_global_manager.bot_config.IN_FLIGHT_BACKEND_MIRROR = True
+    mock_global_manager.backend_internal_data_processing_dispatcher.processing = "processing"
+    return InFlightRegistry(mock_global_manager)
+
+def test_make_key():
+    assert InFlightRegistry.make_key("19:abc@thread", "123.456") == "19_abc@thread-123.456"
+
+@pytest.mark.asyncio
+async def test_mark_in_flight_once(registry):
+    backend = registry.backend_dispatcher
+
+    assert await registry.mark_in_flight("C1-1") is True
+    assert await registry.mark_in_flight("C1-1") is False
+    assert await registry.is_in_flight("C1-1") is True
+    assert await registry.is_in_flight("C1-2") is False
+    backend.write_data_content.assert_not_called()
+    backend.read_data_content.assert_not_called()
+
+@pytest.mark.asyncio
+async def test_entries_expire(registry):
+    registry.ttl = 0
+
+    await registry.mark_in_flight("C1-1")
+
+    assert await registry.is_in_flight("C1-1") is False
+    assert len(registry._entries) == 0
+
+@pytest.mark.asyncio
+async def test_mark_done_keeps_entry_until_expiry(registry):
+    await registry.mark_in_flight("C1-1")
+    await registry.mark_done("C1-1")
+
+    assert await registry.is_in_flight("C1-1") is True
+
+@pytest.mark.asyncio
+async def test_backend_mirror(mirrored_registry):
+    backend = mirrored_registry.backend_dispatcher
+
+    await mirrored_registry.mark_in_flight("C1-1")
+    backend.write_data_content.assert_awaited_once()
+    assert backend.write_data_content.call_args.args[:2] == ("processing", "C1-1.txt")
+
+    await mirrored_registry.mark_done("C1-1")
+    backend.remove_data_content.assert_awaited_once_with("processing", "C1-1.txt")
+
+@pytest.mark.asyncio
+async def test_backend_mirror_reads_other_workers_markers(mirrored_registry):
+    backend = mirrored_registry.backend_dispatcher
+
+    backend.read_data_content = AsyncMock(return_value=str(time.time() + 60))
+    assert await mirrored_registry.is_in_flight("C1-1") is True
+
+    backend.read_data_content = AsyncMock(return_value=str(time.time() - 60))
+    assert await mirrored_registry.is_in_flight("C1-1") is False
+
+    backend.read_data_content = AsyncMock(return_value="processing")
+    assert await mirrored_registry.is_in_flight("C1-1") is True
+
+    backend.read_data_content = AsyncMock(return_value=None)
+    assert await mirrored_registry.is_in_flight("C1-1") is False
+
+@pytest.mark.asyncio
+async def test_purge_backend_markers(mirrored_registry):
+    backend = mirrored_registry.backend_dispatcher
+    backend.list_container_files = AsyncMock(return_value=["a", "b"])
+
+    await mirrored_registry.purge_backend_markers()
+
+    backend.clear_container.assert_awaited_once_with("processing")
+
+@pytest.mark.asyncio
+async def test_purge_backend_markers_keeps_other_files(mirrored_registry):
+    backend = mirrored_registry.backend_dispatcher
+    backend.list_container_files = AsyncMock(return_value=["C1-1", "queued-payload-event123-0", "reactions-C1-T1"])
+
+    await mirrored_registry.purge_backend_markers()
+
+    backend.clear_container.assert_not_called()
+    backend.remove_data_content.assert_awaited_once_with("processing", "C1-1.txt")
@@ -1,13 +1,11 @@
 import asyncio
 import json
-from unittest.mock import AsyncMock, MagicMock, patch
+import time
+from unittest.mock import ANY, AsyncMock, MagicMock, patch
 
 import pytest
 
-from core.event_processing.interaction_queue_manager import (
-    InteractionQueueManager,
-    make_serializable,
-)
+from core.event_processing.interaction_queue_manager import InteractionQueueManager
 from core.user_interactions.incoming_notification_data_base import (
     IncomingNotificationDataBase,
 )
@@ -63,9 +61,11 @@ async def test_save_event_to_backend(interaction_queue_manager, mock_global_mana
         channel_id='channel1',
         thread_id='thread1',
         message_id='123456789',
-        message=json.dumps(event_data),
+        message=ANY,
         guid='event123'
     )
+    message = mock_backend_dispatcher.enqueue_message.call_args.kwargs['message']
+    assert json.loads(message) == event_data
 
 # Test the initialization of the InteractionQueueManager
 def test_interaction_queue_manager_initialization(interaction_queue_manager, mock_global_manager):
@@ -329,33 +329,6 @@ def test_generate_unique_event_id(interaction_queue_manager):
     assert len(id1) == 36
     assert len(id2) == 36
 
-def test_make_serializable(interaction_queue_manager):
-    # Test avec différents types de données simples
-    test_data = {
-        'str': 'test',
-        'int': 123,
-        'float': 123.45,
-        'bool': True,
-        'none': None,
-        'list': [1, 2, 3],
-        'dict': {'nested': 'dict'},
-    }
-
-    result = make_serializable(test_data)
-
-    # Vérifications basiques
-    assert result['str'] == 'test'
-    assert result['int'] == 123
-    assert result['float'] == 123.45
-    assert result['bool'] is True
-    assert result['none'] is None
-    assert result['list'] == [1, 2, 3]
-    assert result['dict'] == {'nested': 'dict'}
-
-    # Vérifier que le résultat est JSON serializable
-    serialized = json.dumps(result)
-    assert isinstance(serialized, str)
-
 @pytest.mark.asyncio
 async def test_add_to_queue_with_reactions(interaction_queue_manager, mock_global_manager):
     # Fix: Initialize backend_dispatcher properly
@@ -478,9 +451,6 @@ async def test_process_queue_with_message_type(interaction_queue_manager, mock_g
 
 @pytest.mark.asyncio
 async def test_process_external_reactions_batch(interaction_queue_manager, mock_global_manager):
-    # Fix: Initialize the external_reaction_tasks attribute
-    interaction_queue_manager.external_reaction_tasks = {}
-
     dispatcher = mock_global_manager.user_interactions_dispatcher
     dispatcher.add_reactions = AsyncMock()
     interaction_queue_manager.user_interaction_dispatcher = dispatcher
@@ -541,28 +511,6 @@ async def test_clear_expired_messages_without_running_loop(interaction_queue_man
         # Verify correct number of calls
         assert mock_clean.call_count == 1
 
-# Test serialization of complex objects
-def test_make_serializable_with_custom_objects(interaction_queue_manager):
-    class CustomObject:
-        def __init__(self):
-            self.value = "test"
-
-    test_data = {
-        'custom': CustomObject(),
-        'nested': {
-            'custom': CustomObject()
-        },
-        'list': [CustomObject(), CustomObject()]
-    }
-
-    result = make_serializable(test_data)
-
-    # Verify all CustomObjects were converted to dicts
-    assert isinstance(result['custom'], dict)
-    assert result['custom']['value'] == "test"
-    assert isinstance(result['nested']['custom'], dict)
-    assert all(isinstance(x, dict) for x in result['list'])
-
 # Test IncomingNotificationDataBase conversion
 @pytest.mark.asyncio
 async def test_process_queue_with_notification_data(interaction_queue_manager, mock_global_manager):
@@ -625,3 +573,228 @@ def initialize_queue_manager(interaction_queue_manager, mock_global_manager):
     interaction_queue_manager.backend_dispatcher.dequeue_message = AsyncMock()
     interaction_queue_manager.backend_dispatcher.enqueue_message = AsyncMock()
     return interaction_queue_manager
+
+@pytest.mark.asyncio
+async def test_drain_waits_for_queue_processing(interaction_queue_manager):
+    release = asyncio.Event()
+    interaction_queue_manager.external_processing_tasks[("C1", "T1")] = asyncio.create_task(release.wait())
+
+    assert not await interaction_queue_manager.drain(0.01)
+
+    release.set()
+    assert await interaction_queue_manager.drain(1)
+
+@pytest.mark.asyncio
+async def test_replay_reactions_and_in_memory_events(interaction_queue_manager, mock_global_manager):
+    dispatcher = mock_global_manager.user_interactions_dispatcher
+    dispatcher.add_reactions = AsyncMock()
+    dispatcher.send_message = AsyncMock()
+    interaction_queue_manager.user_interaction_dispatcher = dispatcher
+    interaction_queue_manager.backend_dispatcher = mock_global_manager.backend_internal_queue_processing_dispatcher
+    interaction_queue_manager.backend_dispatcher.dequeue_message = AsyncMock()
+
+    queue_key = ('channel1', 'thread1')
+    event = IncomingNotificationDataBase.from_dict({'channel_id': 'channel1', 'thread_id': 'thread1', 'timestamp': '1'})
+    await interaction_queue_manager.external_queues[queue_key].put({
+        'event_type': 'add_reactions',
+        'method_params': {'reactions': [{'event': {'channel_id': 'channel1', 'thread_id': 'thread1', 'timestamp': '1'},
+                                         'reaction_name': 'wait'}], 'is_internal': False},
+        'message_id': '1', 'guid': 'guid-1'
+    })
+    # Events queued in memory keep their IncomingNotificationDataBase instance
+    await interaction_queue_manager.external_queues[queue_key].put({
+        'event_type': 'send_message',
+        'method_params': {'event': event, 'message': 'hello', 'message_type': 'text', 'is_internal': False},
+        'message_id': '1', 'guid': 'guid-2'
+    })
+
+    await interaction_queue_manager.process_external_queue(queue_key)
+
+    reactions = dispatcher.add_reactions.call_args.kwargs['reactions']
+    assert isinstance(reactions[0]['event'], IncomingNotificationDataBase)
+    assert dispatcher.send_message.call_args.kwargs['event'] is event
+    assert dispatcher.send_message.call_args.kwargs['message_type'] == MessageType.TEXT
+
+    metrics = interaction_queue_manager.replay_metrics.snapshot()['channel1/thread1']
+    assert metrics['events'] == 2
+    assert metrics['errors'] == 0
+    assert metrics['depth'] == 0
+
+@pytest.mark.asyncio
+async def test_register_event_handler(interaction_queue_manager, mock_global_manager):
+    dispatcher = mock_global_manager.user_interactions_dispatcher
+    dispatcher.custom_method = AsyncMock()
+    interaction_queue_manager.user_interaction_dispatcher = dispatcher
+    interaction_queue_manager.register_event_handler('custom_event', 'custom_method', lambda params: {'value': params['value'] * 2})
+
+    await interaction_queue_manager.replay_event({'event_type': 'custom_event', 'method_params': {'value': 21}})
+    await interaction_queue_manager.replay_event({'event_type': 'unknown_event', 'method_params': {}})
+
+    dispatcher.custom_method.assert_awaited_once_with(value=42, is_replayed=True)
+    interaction_queue_manager.logger.error.assert_called_once()
+
+def test_fold_reaction_actions():
+    def reaction(name, timestamp='1'):
+        return {'timestamp': timestamp, 'reaction_name': name}
+
+    folded = InteractionQueueManager.fold_reaction_actions([
+        ('add', reaction('processing')),
+        ('add', reaction('wait', timestamp='2')),
+        ('remove', reaction('processing')),
+        ('remove', reaction('done')),
+        ('add', reaction('done')),
+        ('add', reaction('generating')),
+    ])
+
+    assert [(action['action'], action['reaction']['reaction_name']) for action in folded] == [
+        ('add', 'wait'), ('add', 'done'), ('add', 'generating')]
+
+@pytest.mark.asyncio
+async def test_consecutive_reaction_events_are_folded(interaction_queue_manager, mock_global_manager):
+    backend = mock_global_manager.backend_internal_queue_processing_dispatcher
+    backend.enqueue_message = AsyncMock()
+    backend.dequeue_message = AsyncMock()
+    interaction_queue_manager.backend_dispatcher = backend
+    interaction_queue_manager.external_event_container = 'external_events'
+    queue_key = ('channel1', 'thread1')
+    # Keep the worker from consuming the queue
+    interaction_queue_manager.external_processing_tasks[queue_key] = MagicMock()
+    event = {'channel_id': 'channel1', 'thread_id': 'thread1', 'timestamp': '1'}
+
+    def reactions(name):
+        return {'reactions': [{'event': event, 'channel_id': 'channel1', 'timestamp': '1', 'reaction_name': name}]}
+
+    await interaction_queue_manager.add_to_queue('add_reactions', reactions('processing'))
+    await interaction_queue_manager.add_to_queue('remove_reactions', reactions('processing'))
+
+    queue = interaction_queue_manager.external_queues[queue_key]
+    assert queue.qsize() == 1
+    assert backend.enqueue_message.await_count == 1
+    # Added then removed before being dispatched: the queued event is dropped from the backend
+    backend.dequeue_message.assert_awaited_once()
+
+    await interaction_queue_manager.add_to_queue('add_reactions', reactions('done'))
+    assert queue.qsize() == 1
+    assert backend.enqueue_message.await_count == 2
+    assert interaction_queue_manager.folded_reaction_events == 2
+
+    queued = queue.get_nowait()
+    assert queued['event_type'] == 'update_reactions_batch'
+    assert not queued['superseded']
+    assert [action['reaction']['reaction_name'] for action in queued['method_params']['reactions_actions']] == ['done']
+    # Rewritten under the GUID of the first event
+    assert backend.enqueue_message.await_args.kwargs['guid'] == queued['guid']
+
+    # Another event type ends the folding
+    await queue.put(queued)
+    await interaction_queue_manager.add_to_queue('send_message', {'event': event, 'message': 'hi'})
+    await interaction_queue_manager.add_to_queue('add_reactions', reactions('wait'))
+    assert queue.qsize() == 3
+
+@pytest.mark.asyncio
+async def test_large_images_are_stored_out_of_line(interaction_queue_manager, mock_global_manager):
+    backend = mock_global_manager.backend_internal_queue_processing_dispatcher
+    backend.enqueue_message = AsyncMock()
+    backend.dequeue_message = AsyncMock()
+    data_backend = mock_global_manager.backend_internal_data_processing_dispatcher
+    data_backend.processing = 'processing'
+    data_backend.write_data_content = AsyncMock()
+    data_backend.remove_data_content = AsyncMock()
+    interaction_queue_manager.backend_dispatcher = backend
+    interaction_queue_manager.codec.inline_max_bytes = 10
+    image = 'i' * 100
+    event_data = {
+        'guid': 'event123',
+        'message_id': '1',
+        'event_type': 'send_message',
+        'method_params': {'event': {'channel_id': 'C1', 'thread_id': 'T1', 'timestamp': '1', 'images': [image]}},
+    }
+
+    await interaction_queue_manager.save_event_to_backend(event_data, 'C1', 'T1')
+
+    data_backend.write_data_content.assert_awaited_once_with('processing', 'queued-payload-event123-0.txt', image)
+    assert event_data['payload_refs'] == ['event123-0']
+    message = backend.enqueue_message.await_args.kwargs['message']
+    assert image not in message
+
+    data_backend.read_data_content = AsyncMock(return_value=image)
+    loaded = await interaction_queue_manager.load_event(message)
+    assert loaded['method_params']['event']['images'] == [image]
+
+    await interaction_queue_manager.mark_event_processed(loaded, internal=False)
+    data_backend.remove_data_content.assert_awaited_once_with('processing', 'queued-payload-event123-0.txt')
+
+@pytest.mark.asyncio
+async def test_recover_persisted_events(interaction_queue_manager, mock_global_manager):
+    backend = mock_global_manager.backend_internal_queue_processing_dispatcher
+    backend.dequeue_message = AsyncMock()
+    interaction_queue_manager.backend_dispatcher = backend
+    interaction_queue_manager.internal_event_container = 'internal_events'
+    interaction_queue_manager.external_event_container = 'external_events'
+    interaction_queue_manager.bot_config = MagicMock(QUEUE_RECOVERY_MAX_CONCURRENT_GROUPS=2, QUEUE_RECOVERY_MIN_EVENT_AGE=60)
+    replayed = []
+
+    async def send_message(message, **kwargs):
+        if message == 'broken':
+            raise ValueError("replay failed")
+        replayed.append(message)
+
+    interaction_queue_manager.user_interaction_dispatcher = MagicMock(send_message=send_message)
+
+    def persisted(guid, channel_id, message, queued_at):
+        return json.dumps({
+            'guid': guid, 'event_type': 'send_message', 'message_id': guid, 'queued_at': queued_at,
+            'method_params': {'channel_id': channel_id, 'thread_id': 'T1', 'message': message},
+        })
+
+    messages = {
+        'internal_events': [],
+        'external_events': [
+            persisted('2', 'C1', 'second', 2.0), persisted('1', 'C1', 'first', 1.0),
+            persisted('3', 'C2', 'broken', 1.0), 'not json',
+            # Queued moments ago, possibly by another live worker
+            persisted('4', 'C1', 'recent', time.time()),
+        ],
+    }
+    backend.get_container_messages = AsyncMock(side_effect=lambda container: messages[container])
+
+    result = await interaction_queue_manager.recover_persisted_events()
+
+    assert result == {'recovered': 2, 'failed': 2, 'queues': 2, 'skipped': 1}
+    # Events of a thread are replayed in the order they were queued
+    assert replayed == ['first', 'second']
+    assert backend.dequeue_message.await_count == 2
+
+@pytest.mark.asyncio
+async def test_recover_persisted_events_cancelled(interaction_queue_manager, mock_global_manager):
+    backend = mock_global_manager.backend_internal_queue_processing_dispatcher
+    backend.dequeue_message = AsyncMock()
+    interaction_queue_manager.backend_dispatcher = backend
+    interaction_queue_manager.internal_event_container = 'internal_events'
+    interaction_queue_manager.external_event_container = 'external_events'
+    interaction_queue_manager.bot_config = MagicMock(QUEUE_RECOVERY_MAX_CONCURRENT_GROUPS=1, QUEUE_RECOVERY_MIN_EVENT_AGE=60)
+    replaying = asyncio.Event()
+
+    async def send_message(message, **kwargs):
+        replaying.set()
+        await asyncio.sleep(10)
+
+    interaction_queue_manager.user_interaction_dispatcher = MagicMock(send_message=send_message)
+    messages = {
+        'internal_events': [],
+        'external_events': [json.dumps({
+            'guid': guid, 'event_type': 'send_message', 'message_id': guid, 'queued_at': 1.0,
+            'method_params': {'channel_id': 'C1', 'thread_id': 'T1', 'message': guid},
+        }) for guid in ('1', '2')],
+    }
+    backend.get_container_messages = AsyncMock(side_effect=lambda container: messages[container])
+
+    recovery = asyncio.create_task(interaction_queue_manager.recover_persisted_events())
+    await replaying.wait()
+    recovery.cancel()
+    with pytest.raises(asyncio.CancelledError):
+        await recovery
+
+    # Nothing was replayed: both events stay in the backend and none is left in memory
+    backend.dequeue_message.assert_not_called()
+    assert interaction_queue_manager.external_queues[('C1', 'T1')].empty()
@@ -0,0 +1,85 @@
+import json
+
+import pytest
+
+from core.event_processing.queued_event_codec import QueuedEventCodec
+from core.user_interactions.incoming_notification_data_base import (
+    IncomingNotificationDataBase,
+)
+from core.user_interactions.message_type import MessageType
+
+
+def make_notification(**kwargs):
+    data = {
+        'timestamp': '1', 'event_label': 'message', 'channel_id': 'C1', 'thread_id': 'T1',
+        'response_id': '1', 'user_name': 'user', 'user_email': 'user@example.com', 'user_id': 'U1',
+        'is_mention': True, 'text': 'hello', 'origin_plugin_name': 'slack',
+    }
+    data.update(kwargs)
+    return IncomingNotificationDataBase(**data)
+
+def make_event(notification):
+    return {
+        'guid': 'event123',
+        'event_type': 'send_message',
+        'message_id': '1',
+        'method_params': {'event': notification, 'message': 'hi', 'message_type': MessageType.TEXT},
+    }
+
+@pytest.mark.parametrize("use_fast_json", [True, False])
+def test_round_trip(use_fast_json):
+    codec = QueuedEventCodec(use_fast_json=use_fast_json)
+    notification = make_notification()
+
+    text, payloads = codec.encode(make_event(notification))
+    decoded = codec.decode(text)
+
+    assert payloads == {}
+    assert json.loads(text) == decoded
+    assert decoded['method_params']['message_type'] == 'text'
+    assert decoded['method_params']['event'] == notification.to_dict()
+
+def test_fast_json_falls_back_without_orjson(monkeypatch):
+    monkeypatch.setattr('core.event_processing.queued_event_codec.orjson', None)
+    assert QueuedEventCodec(use_fast_json=True).json_backend == "json"
+
+def test_large_entries_are_stored_out_of_line():
+    codec = QueuedEventCodec(inline_max_bytes=10)
+    image = 'i' * 100
+    event = make_event(make_notification(images=[image, 'small'], files_content=['f' * 100]))
+
+    text, payloads = codec.encode(event)
+
+    assert payloads == {'event123-0': image, 'event123-1': 'f' * 100}
+    assert image not in text
+    decoded = codec.decode(text)
+    assert codec.references(decoded) == ['event123-0', 'event123-1']
+    codec.resolve(decoded, payloads)
+    assert decoded['method_params']['event']['images'] == [image, 'small']
+    assert decoded['method_params']['event']['files_content'] == ['f' * 100]
+
+def test_reaction_notifications_are_encoded():
+    codec = QueuedEventCodec(inline_max_bytes=10)
+    event = {
+        'guid': 'event123',
+        'event_type': 'update_reactions_batch',
+        'method_params': {'reactions_actions': [
+            {'action': 'add', 'reaction': {'reaction_name': 'done', 'event': make_notification(images=['i' * 100])}},
+        ]},
+    }
+
+    text, payloads = codec.encode(event)
+
+    assert list(payloads) == ['event123-0']
+    assert codec.references(codec.decode(text)) == ['event123-0']
+
+def test_encode_leaves_the_event_untouched():
+    codec = QueuedEventCodec(inline_max_bytes=10)
+    notification = {'channel_id': 'C1', 'images': ['i' * 100]}
+    event = make_event(notification)
+
+    codec.encode(event)
+
+    assert event['method_params']['event'] is notification
+    assert notification['images'] == ['i' * 100]
+    assert event['method_params']['message_type'] is MessageType.TEXT
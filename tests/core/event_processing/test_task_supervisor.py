@@ -0,0 +1,75 @@
+import asyncio
+
+import pytest
+
+from core.event_processing.task_supervisor import TaskSupervisor
+
+
+@pytest.fixture
+def supervisor(mock_global_manager):
+    mock_global_manager.bot_config.TASK_SUPERVISOR_MAX_CONCURRENT = 2
+    mock_global_manager.bot_config.TASK_SUPERVISOR_MAX_CONCURRENT_PER_CHANNEL = 1
+    mock_global_manager.bot_config.TASK_SUPERVISOR_MAX_PENDING = 2
+    return TaskSupervisor(mock_global_manager)
+
+async def _work(started, release, name):
+    started.append(name)
+    await release.wait()
+
+@pytest.mark.asyncio
+async def test_limits_and_pending_queue(supervisor):
+    started = []
+    release = asyncio.Event()
+
+    assert supervisor.submit(_work(started, release, "a1"), channel_id="A")
+    # Same channel, waits for a1
+    assert supervisor.submit(_work(started, release, "a2"), channel_id="A")
+    assert supervisor.submit(_work(started, release, "b1"), channel_id="B")
+    # Both running slots are used
+    assert supervisor.submit(_work(started, release, "c1"), channel_id="C")
+    # Pending queue is full
+    assert not supervisor.submit(_work(started, release, "d1"), channel_id="D")
+
+    await asyncio.sleep(0)
+    assert started == ["a1", "b1"]
+    assert supervisor.stats()["running"] == 2
+    assert supervisor.stats()["pending"] == 2
+    assert supervisor.stats()["rejected"] == 1
+
+    release.set()
+    for _ in range(5):
+        await asyncio.sleep(0)
+
+    assert started == ["a1", "b1", "a2", "c1"]
+    assert supervisor.running_count == 0
+    assert supervisor.pending_count == 0
+    assert supervisor.stats()["running_per_channel"] == {}
+
+@pytest.mark.asyncio
+async def test_failed_tasks_release_their_slot(supervisor):
+    async def fail():
+        raise ValueError("boom")
+
+    assert supervisor.submit(fail(), channel_id="A")
+    await asyncio.sleep(0)
+    await asyncio.sleep(0)
+
+    assert supervisor.running_count == 0
+    supervisor.logger.error.assert_called()
+
+@pytest.mark.asyncio
+async def test_drain_waits_up_to_deadline(supervisor):
+    started = []
+    release = asyncio.Event()
+    for name in ("a1", "a2", "a3"):
+        supervisor.submit(_work(started, release, name), channel_id="A")
+    supervisor.stop_accepting()
+
+    assert not await supervisor.drain(0.01)
+    # Pending tasks are dropped once the deadline is reached
+    assert supervisor.pending_count == 0
+    assert not supervisor.submit(_work(started, release, "b1"), channel_id="B")
+
+    release.set()
+    assert await supervisor.drain(1)
+    assert started == ["a1"]
@@ -1,3 +1,4 @@
+import asyncio
 from pathlib import Path
 from unittest.mock import AsyncMock, MagicMock, Mock, PropertyMock, patch
 
@@ -141,3 +142,64 @@ def test_register_and_get_actions():
 
     assert action == actions['action1']
     assert mock_global_manager.get_action('invalid') is None
+
+
+@pytest.mark.asyncio
+async def test_shutdown_drains_and_flushes(mock_global_manager):
+    from core.global_manager import GlobalManager
+    mock_global_manager.bot_config.SHUTDOWN_DRAIN_TIMEOUT = 1
+    mock_global_manager.user_interactions_dispatcher.reaction_states.flush_all = AsyncMock()
+    mock_global_manager.plugin_manager.shutdown_plugins = AsyncMock()
+    processed = []
+
+    async def request():
+        processed.append("done")
+
+    assert mock_global_manager.task_supervisor.submit(request(), channel_id="C1")
+
+    with patch('core.global_manager.close_shared_session', new_callable=AsyncMock) as mock_close:
+        await GlobalManager.shutdown(mock_global_manager)
+
+    assert processed == ["done"]
+    mock_global_manager.user_interactions_dispatcher.reaction_states.flush_all.assert_awaited_once()
+    mock_global_manager.plugin_manager.shutdown_plugins.assert_awaited_once()
+    mock_close.assert_awaited_once()
+
+    # New requests are refused once shutting down
+    coroutine = request()
+    assert not mock_global_manager.task_supervisor.submit(coroutine)
+
+
+@pytest.mark.asyncio
+async def test_startup_starts_plugins_and_recovers_persisted_events(mock_global_manager):
+    from core.global_manager import GlobalManager
+    mock_global_manager.bot_config.QUEUE_RECOVERY_ON_STARTUP = True
+    mock_global_manager.bot_config.QUEUE_RECOVERY_TIMEOUT = 20
+    mock_global_manager.plugin_manager.startup_plugins = AsyncMock()
+    mock_global_manager.interaction_queue_manager = MagicMock()
+    mock_global_manager.interaction_queue_manager.recover_persisted_events = AsyncMock(
+        return_value={'recovered': 1, 'failed': 0, 'queues': 1})
+
+    await GlobalManager.startup(mock_global_manager)
+    mock_global_manager.plugin_manager.startup_plugins.assert_awaited_once()
+    mock_global_manager.interaction_queue_manager.recover_persisted_events.assert_awaited_once()
+
+    mock_global_manager.bot_config.QUEUE_RECOVERY_ON_STARTUP = False
+    await GlobalManager.startup(mock_global_manager)
+    mock_global_manager.interaction_queue_manager.recover_persisted_events.assert_awaited_once()
+
+@pytest.mark.asyncio
+async def test_startup_recovery_time_limit(mock_global_manager):
+    from core.global_manager import GlobalManager
+    mock_global_manager.bot_config.QUEUE_RECOVERY_ON_STARTUP = True
+    mock_global_manager.bot_config.QUEUE_RECOVERY_TIMEOUT = 0.01
+    mock_global_manager.plugin_manager.startup_plugins = AsyncMock()
+
+    async def recover_persisted_events():
+        await asyncio.sleep(10)
+
+    mock_global_manager.interaction_queue_manager = MagicMock(recover_persisted_events=recover_persisted_events)
+
+    await asyncio.wait_for(GlobalManager.startup(mock_global_manager), timeout=1)
+
+    mock_global_manager.logger.warning.assert_called_once()
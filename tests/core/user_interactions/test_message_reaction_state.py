@@ -0,0 +1,94 @@
+import asyncio
+from unittest.mock import AsyncMock, MagicMock
+
+import pytest
+
+from core.user_interactions.message_reaction_state import (
+    MessageReactionStateManager,
+)
+
+
+@pytest.fixture
+def plugin():
+    plugin = MagicMock()
+    plugin.plugin_name = "test_plugin"
+    plugin.add_reaction = AsyncMock()
+    plugin.remove_reaction = AsyncMock()
+    return plugin
+
+@pytest.fixture
+def event():
+    event = MagicMock()
+    event.thread_id = "T1"
+    return event
+
+def _reaction(event, name, timestamp="M1"):
+    return {"event": event, "channel_id": "C1", "timestamp": timestamp, "reaction_name": name}
+
+def _called_names(mock):
+    return [call.kwargs["reaction_name"] for call in mock.call_args_list]
+
+@pytest.mark.asyncio
+async def test_only_the_diff_is_applied(mock_global_manager, plugin, event):
+    manager = MessageReactionStateManager(mock_global_manager)
+
+    await manager.apply(plugin, [("add", _reaction(event, "ack"))])
+    await manager.apply(plugin, [("add", _reaction(event, "ack")), ("add", _reaction(event, "processing"))])
+
+    assert _called_names(plugin.add_reaction) == ["ack", "processing"]
+    plugin.remove_reaction.assert_not_called()
+
+@pytest.mark.asyncio
+async def test_remove_then_add_in_same_batch_cancels_out(mock_global_manager, plugin, event):
+    manager = MessageReactionStateManager(mock_global_manager)
+    await manager.apply(plugin, [("add", _reaction(event, "processing"))])
+    plugin.add_reaction.reset_mock()
+
+    await manager.apply(plugin, [("remove", _reaction(event, "processing")), ("add", _reaction(event, "processing"))])
+
+    plugin.add_reaction.assert_not_called()
+    plugin.remove_reaction.assert_not_called()
+    assert manager.api_calls_saved == 2
+
+@pytest.mark.asyncio
+async def test_unknown_reactions_are_still_removed(mock_global_manager, plugin, event):
+    manager = MessageReactionStateManager(mock_global_manager)
+
+    await manager.apply(plugin, [("remove", _reaction(event, "wait"))])
+
+    assert _called_names(plugin.remove_reaction) == ["wait"]
+
+@pytest.mark.asyncio
+async def test_transitions_are_debounced(mock_global_manager, plugin, event):
+    mock_global_manager.bot_config.REACTION_DEBOUNCE_MS = 20
+    manager = MessageReactionStateManager(mock_global_manager)
+
+    await manager.apply(plugin, [("add", _reaction(event, "ack"))])
+    await manager.apply(plugin, [("remove", _reaction(event, "ack")), ("add", _reaction(event, "processing"))])
+    await manager.apply(plugin, [("remove", _reaction(event, "processing")), ("add", _reaction(event, "generating"))])
+    plugin.add_reaction.assert_not_called()
+
+    await asyncio.sleep(0.05)
+
+    assert _called_names(plugin.add_reaction) == ["generating"]
+    plugin.remove_reaction.assert_not_called()
+
+@pytest.mark.asyncio
+async def test_forget_reaction_after_thread_removal(mock_global_manager, plugin, event):
+    manager = MessageReactionStateManager(mock_global_manager)
+    await manager.apply(plugin, [("add", _reaction(event, "wait"))])
+
+    manager.forget_reaction("C1", "T1", "wait")
+    await manager.apply(plugin, [("add", _reaction(event, "wait"))])
+
+    assert _called_names(plugin.add_reaction) == ["wait", "wait"]
+
+@pytest.mark.asyncio
+async def test_flush_all_applies_debounced_updates(mock_global_manager, plugin, event):
+    mock_global_manager.bot_config.REACTION_DEBOUNCE_MS = 10000
+    manager = MessageReactionStateManager(mock_global_manager)
+    await manager.apply(plugin, [("add", _reaction(event, "done"))])
+
+    await manager.flush_all()
+
+    assert _called_names(plugin.add_reaction) == ["done"]
@@ -1,33 +1,125 @@
+import asyncio
 import json
-from unittest.mock import AsyncMock, MagicMock, patch
+from types import SimpleNamespace
+from unittest.mock import MagicMock, patch
 
 import pytest
-from azure.core.exceptions import ResourceNotFoundError
-from azure.identity import DefaultAzureCredential
-from azure.storage.blob import BlobServiceClient
+from azure.core import MatchConditions
+from azure.core.exceptions import (
+    ResourceExistsError,
+    ResourceModifiedError,
+    ResourceNotFoundError,
+)
 
 from core.backend.pricing_data import PricingData
+from core.event_processing.in_flight_registry import InFlightRegistry
 from plugins.backend.internal_data_processing.azure_blob_storage.azure_blob_storage import (
     AZURE_BLOB_STORAGE,
+    MAX_CONDITIONAL_WRITE_ATTEMPTS,
     AzureBlobStoragePlugin,
 )
+from utils.http_client.shared_http_client import close_shared_session
+
+
+class FakeBlobStorage:
+    """In-memory stand-in for an Azurite account, implementing the asynchronous client calls used by the plugin."""
+
+    def __init__(self):
+        self.containers = {}
+        self.etags = {}
+        self.version = 0
+        self.batch_requests = 0
+        # Called after each download, to simulate a concurrent writer
+        self.after_download = None
+
+    def put(self, container, blob, data):
+        self.version += 1
+        self.containers.setdefault(container, {})[blob] = data.encode('utf-8') if isinstance(data, str) else data
+        self.etags[(container, blob)] = f'"{self.version}"'
+
+
+class FakeBlobClient:
+    def __init__(self, storage: FakeBlobStorage, container: str, blob: str):
+        self.storage = storage
+        self.container = container
+        self.blob = blob
+
+    async def exists(self):
+        return self.blob in self.storage.containers.get(self.container, {})
+
+    async def download_blob(self):
+        try:
+            data = self.storage.containers[self.container][self.blob]
+        except KeyError:
+            raise ResourceNotFoundError("Blob not found")
+        etag = self.storage.etags[(self.container, self.blob)]
+        if self.storage.after_download:
+            self.storage.after_download(self.container, self.blob)
+
+        async def readall():
+            return data
+
+        return SimpleNamespace(readall=readall, properties=SimpleNamespace(etag=etag))
+
+    async def upload_blob(self, data, overwrite=False, etag=None, match_condition=None):
+        exists = self.blob in self.storage.containers.get(self.container, {})
+        if exists and not overwrite:
+            raise ResourceExistsError("Blob exists")
+        if match_condition == MatchConditions.IfNotModified and \
+                (not exists or self.storage.etags[(self.container, self.blob)] != etag):
+            raise ResourceModifiedError("Condition not met")
+        self.storage.put(self.container, self.blob, data)
+
+    async def delete_blob(self):
+        try:
+            del self.storage.containers[self.container][self.blob]
+        except KeyError:
+            raise ResourceNotFoundError("Blob not found")
+
+
+class FakeContainerClient:
+    def __init__(self, storage: FakeBlobStorage, container: str):
+        self.storage = storage
+        self.container_name = container
 
+    async def exists(self):
+        return self.container_name in self.storage.containers
 
-# Custom async iterator for list_blobs mock
-class AsyncIterator:
-    def __init__(self, items):
-        self._items = items
-        self._index = 0
+    async def create_container(self):
+        if self.container_name in self.storage.containers:
+            raise ResourceExistsError("Container exists")
+        self.storage.containers[self.container_name] = {}
 
-    def __aiter__(self):
-        return self
+    async def list_blobs(self, name_starts_with=None):
+        for name in sorted(self.storage.containers[self.container_name]):
+            if name_starts_with is None or name.startswith(name_starts_with):
+                yield SimpleNamespace(name=name)
+
+    async def delete_blobs(self, *blobs, raise_on_any_failure=True):
+        self.storage.batch_requests += 1
+        blob_store = self.storage.containers[self.container_name]
+
+        async def responses():
+            for name in blobs:
+                yield SimpleNamespace(status_code=202 if blob_store.pop(name, None) is not None else 404)
+
+        return responses()
+
+
+class FakeBlobServiceClient:
+    def __init__(self, storage: FakeBlobStorage):
+        self.storage = storage
+        self.closed = False
+
+    def get_container_client(self, container):
+        return FakeContainerClient(self.storage, container)
+
+    def get_blob_client(self, container, blob):
+        return FakeBlobClient(self.storage, container, blob)
+
+    async def close(self):
+        self.closed = True
 
-    async def __anext__(self):
-        if self._index >= len(self._items):
-            raise StopAsyncIteration
-        item = self._items[self._index]
-        self._index += 1
-        return item
 
 @pytest.fixture
 def mock_config():
@@ -57,388 +149,386 @@ def extended_mock_global_manager(mock_global_manager, mock_config):
     return mock_global_manager
 
 @pytest.fixture
-def azure_blob_storage_plugin(extended_mock_global_manager):
-    with patch.object(DefaultAzureCredential, '__init__', return_value=None), \
-         patch.object(BlobServiceClient, '__init__', return_value=None):
-        plugin = AzureBlobStoragePlugin(global_manager=extended_mock_global_manager)
-        plugin.initialize()
-        return plugin
+def storage():
+    storage = FakeBlobStorage()
+    storage.containers["container"] = {}
+    return storage
+
+@pytest.fixture
+def azure_blob_storage_plugin(extended_mock_global_manager, storage):
+    plugin = AzureBlobStoragePlugin(global_manager=extended_mock_global_manager)
+    plugin.initialize()
+    plugin.create_blob_service_client = lambda: FakeBlobServiceClient(storage)
+    return plugin
 
 def test_initialize(azure_blob_storage_plugin):
-    with patch.object(DefaultAzureCredential, '__init__', return_value=None):
-        with patch.object(BlobServiceClient, '__init__', return_value=None):
-            azure_blob_storage_plugin.initialize()
-            assert azure_blob_storage_plugin.connection_string == azure_blob_storage_plugin.azure_blob_storage_config.AZURE_BLOB_STORAGE_CONNECTION_STRING
-            assert azure_blob_storage_plugin.sessions_container == azure_blob_storage_plugin.azure_blob_storage_config.AZURE_BLOB_STORAGE_SESSIONS_CONTAINER
+    assert azure_blob_storage_plugin.connection_string == azure_blob_storage_plugin.azure_blob_storage_config.AZURE_BLOB_STORAGE_CONNECTION_STRING
+    assert azure_blob_storage_plugin.sessions_container == azure_blob_storage_plugin.azure_blob_storage_config.AZURE_BLOB_STORAGE_SESSIONS_CONTAINER
+
+def test_initialize_with_missing_connection(extended_mock_global_manager, mock_config):
+    mock_config["AZURE_BLOB_STORAGE_CONNECTION_STRING"] = ""
+    plugin = AzureBlobStoragePlugin(global_manager=extended_mock_global_manager)
+
+    with pytest.raises(ValueError):
+        plugin.initialize()
 
 @pytest.mark.asyncio
-async def test_update_session_blob_exists(azure_blob_storage_plugin):
-    with patch.object(azure_blob_storage_plugin.blob_service_client, 'get_blob_client') as mock_get_blob_client:
-        mock_blob_client = mock_get_blob_client.return_value
-        mock_blob_client.exists = AsyncMock(return_value=True)
+async def test_create_blob_service_client(azure_blob_storage_plugin):
+    azure_blob_storage_plugin.connection_string = "UseDevelopmentStorage=true"
+    client = AzureBlobStoragePlugin.create_blob_service_client(azure_blob_storage_plugin)
+    assert client.account_name == "devstoreaccount1"
+    await close_shared_session()
 
-        mock_download_stream = AsyncMock()
-        mock_download_stream.readall = AsyncMock(return_value=b'[]')
-        mock_blob_client.download_blob = AsyncMock(return_value=mock_download_stream)
+@pytest.mark.asyncio
+async def test_blob_service_client_is_shared(azure_blob_storage_plugin):
+    client = azure_blob_storage_plugin.blob_service_client
+    assert azure_blob_storage_plugin.blob_service_client is client
+
+def test_blob_service_client_recreated_per_event_loop(azure_blob_storage_plugin):
+    async def get_client():
+        return azure_blob_storage_plugin.blob_service_client
+
+    loops = [asyncio.new_event_loop(), asyncio.new_event_loop()]
+    try:
+        first, second = (loop.run_until_complete(get_client()) for loop in loops)
+    finally:
+        for loop in loops:
+            loop.close()
+    assert first is not second
 
-        mock_blob_client.upload_blob = AsyncMock()
+@pytest.mark.asyncio
+async def test_startup_creates_containers_and_shutdown_closes_client(azure_blob_storage_plugin, storage):
+    await azure_blob_storage_plugin.startup()
+    client = azure_blob_storage_plugin.blob_service_client
+    assert {"sessions", "feedbacks", "processing", "subprompts"} <= set(storage.containers)
+    assert len(storage.containers) == 11
 
-        # Call the method
-        await azure_blob_storage_plugin.update_session('sessions', 'file', 'role', 'content')
+    # Containers already there are left as is
+    await azure_blob_storage_plugin.init_containers()
 
-        # Ensure all async methods are awaited correctly
-        mock_blob_client.exists.assert_awaited_once()
-        mock_blob_client.download_blob.assert_awaited_once()
-        mock_download_stream.readall.assert_awaited_once()
-        mock_blob_client.upload_blob.assert_awaited_once_with(
-            '[{"role": "role", "content": "content"}]', overwrite=True
-        )
+    await azure_blob_storage_plugin.shutdown()
+    assert client.closed
 
 @pytest.mark.asyncio
-async def test_read_data_content(azure_blob_storage_plugin):
-    with patch.object(BlobServiceClient, 'get_blob_client') as mock_get_blob_client:
-        mock_blob_client = mock_get_blob_client.return_value
-        mock_blob_client.exists = AsyncMock(return_value=True)
-        mock_blob_client.download_blob = AsyncMock()
-        mock_download_blob = mock_blob_client.download_blob.return_value
-        mock_download_blob.readall = AsyncMock(return_value=b'{"key": "value"}')
+async def test_write_and_read_data_content(azure_blob_storage_plugin, storage):
+    await azure_blob_storage_plugin.write_data_content('container', 'file', 'data')
+    assert storage.containers['container']['file'] == b'data'
+    assert await azure_blob_storage_plugin.read_data_content('container', 'file') == 'data'
 
 @pytest.mark.asyncio
 async def test_read_data_content_blob_not_exists(azure_blob_storage_plugin):
-    with patch.object(BlobServiceClient, 'get_blob_client') as mock_get_blob_client:
-        mock_blob_client = mock_get_blob_client.return_value
-        mock_blob_client.exists = MagicMock(return_value=False)
-        mock_blob_client.download_blob = AsyncMock()  # Mock download_blob to ensure it's not called
+    assert await azure_blob_storage_plugin.read_data_content('container', 'file') is None
 
-        content = await azure_blob_storage_plugin.read_data_content('container', 'file')
+@pytest.mark.asyncio
+async def test_read_data_content_error(azure_blob_storage_plugin):
+    with patch.object(FakeBlobClient, 'download_blob', side_effect=Exception("Read error")):
+        assert await azure_blob_storage_plugin.read_data_content('container', 'file') is None
 
-        assert content is None
-        mock_blob_client.download_blob.assert_not_called()
+@pytest.mark.asyncio
+async def test_write_data_content_error(azure_blob_storage_plugin):
+    with patch.object(FakeBlobClient, 'upload_blob', side_effect=Exception("Write error")):
+        await azure_blob_storage_plugin.write_data_content('container', 'file.txt', 'test data')
+    azure_blob_storage_plugin.logger.error.assert_called()
 
 @pytest.mark.asyncio
-async def test_remove_data_content(azure_blob_storage_plugin):
-    with patch.object(BlobServiceClient, 'get_blob_client') as mock_get_blob_client:
-        mock_blob_client = mock_get_blob_client.return_value
-        mock_blob_client.exists = AsyncMock(return_value=True)
-        mock_blob_client.delete_blob = AsyncMock()
-        await azure_blob_storage_plugin.remove_data_content('container', 'file')
-        mock_blob_client.delete_blob.assert_called_once()
+async def test_append_data(azure_blob_storage_plugin, storage):
+    await azure_blob_storage_plugin.append_data('container', 'file.txt', 'test data')
+    assert storage.containers['container']['file.txt'] == b'test data'
 
 @pytest.mark.asyncio
-async def test_write_data_content(azure_blob_storage_plugin):
-    with patch.object(BlobServiceClient, 'get_blob_client') as mock_get_blob_client:
-        mock_blob_client = mock_get_blob_client.return_value
-        mock_blob_client.upload_blob = AsyncMock()
-        await azure_blob_storage_plugin.write_data_content('container', 'file', 'data')
-        mock_blob_client.upload_blob.assert_called_once_with(b'data', overwrite=True)
+async def test_append_data_error(azure_blob_storage_plugin):
+    with patch.object(FakeBlobClient, 'upload_blob', side_effect=Exception("Upload error")):
+        await azure_blob_storage_plugin.append_data('container', 'file.txt', 'test data')
+    azure_blob_storage_plugin.logger.error.assert_called()
 
+@pytest.mark.asyncio
+async def test_remove_data_content(azure_blob_storage_plugin, storage):
+    storage.put('container', 'file', 'data')
+    await azure_blob_storage_plugin.remove_data_content('container', 'file')
+    assert 'file' not in storage.containers['container']
 
+@pytest.mark.asyncio
+async def test_remove_data_content_not_found(azure_blob_storage_plugin):
+    await azure_blob_storage_plugin.remove_data_content('container', 'file.txt')
+    azure_blob_storage_plugin.logger.warning.assert_called_with("Blob not found: file.txt")
 
 @pytest.mark.asyncio
-async def test_update_pricing(azure_blob_storage_plugin):
-    with patch.object(azure_blob_storage_plugin, 'read_data_content', new_callable=AsyncMock) as mock_read, \
-         patch.object(azure_blob_storage_plugin, 'write_data_content', new_callable=AsyncMock) as mock_write:
+async def test_file_exists(azure_blob_storage_plugin, storage):
+    storage.put('container', 'file', 'data')
+    assert await azure_blob_storage_plugin.file_exists('container', 'file')
+    assert not await azure_blob_storage_plugin.file_exists('container', 'missing')
 
-        existing_data = PricingData(total_tokens=100, prompt_tokens=50, completion_tokens=50, total_cost=1.0, input_cost=0.5, output_cost=0.5)
-        mock_read.return_value = json.dumps(existing_data.__dict__)
+@pytest.mark.asyncio
+async def test_update_session_blob_exists(azure_blob_storage_plugin, storage):
+    storage.put('sessions', 'file', '[]')
+    await azure_blob_storage_plugin.update_session('sessions', 'file', 'role', 'content')
+    assert json.loads(storage.containers['sessions']['file']) == [{"role": "role", "content": "content"}]
 
-        new_pricing_data = PricingData(total_tokens=50, prompt_tokens=25, completion_tokens=25, total_cost=0.5, input_cost=0.25, output_cost=0.25)
+@pytest.mark.asyncio
+async def test_update_session_empty_blob(azure_blob_storage_plugin, storage):
+    await azure_blob_storage_plugin.update_session('container', 'file.txt', 'user', 'test message')
+    assert json.loads(storage.containers['container']['file.txt']) == [{"role": "user", "content": "test message"}]
+
+@pytest.mark.asyncio
+async def test_update_session_retries_on_concurrent_write(azure_blob_storage_plugin, storage):
+    storage.put('container', 'file', '[{"role": "user", "content": "first"}]')
 
-        updated_data = await azure_blob_storage_plugin.update_pricing("container", "datafile.json", new_pricing_data)
+    def concurrent_write(container, blob):
+        # Another instance appends its message between our read and our write, once
+        storage.after_download = None
+        storage.put(container, blob, '[{"role": "user", "content": "first"}, {"role": "user", "content": "other"}]')
 
-        assert updated_data.total_tokens == 150
-        assert updated_data.prompt_tokens == 75
-        assert updated_data.completion_tokens == 75
-        assert updated_data.total_cost == 1.5
-        assert updated_data.input_cost == 0.75
-        assert updated_data.output_cost == 0.75
+    storage.after_download = concurrent_write
+    await azure_blob_storage_plugin.update_session('container', 'file', 'assistant', 'answer')
 
-        mock_write.assert_called_once()
+    assert [message['content'] for message in json.loads(storage.containers['container']['file'])] == \
+        ['first', 'other', 'answer']
 
 @pytest.mark.asyncio
-async def test_remove_data(azure_blob_storage_plugin):
-    with patch.object(azure_blob_storage_plugin, 'read_data_content', new_callable=AsyncMock) as mock_read, \
-         patch.object(azure_blob_storage_plugin, 'write_data_content', new_callable=AsyncMock) as mock_write:
+async def test_update_session_retries_when_created_concurrently(azure_blob_storage_plugin, storage):
+    original_upload = FakeBlobClient.upload_blob
 
-        mock_read.return_value = "toto value"
+    async def upload_after_other_writer(self, data, **kwargs):
+        if not await self.exists():
+            storage.put(self.container, self.blob, '[{"role": "user", "content": "other"}]')
+        return await original_upload(self, data, **kwargs)
 
-        # Ensure the conditions for write_data_content to be called are met
-        await azure_blob_storage_plugin.remove_data("container", "datafile.txt", "toto")
+    with patch.object(FakeBlobClient, 'upload_blob', upload_after_other_writer):
+        await azure_blob_storage_plugin.update_session('container', 'file', 'user', 'mine')
 
-        mock_write.assert_called_once()
+    assert [message['content'] for message in json.loads(storage.containers['container']['file'])] == \
+        ['other', 'mine']
 
-class AsyncIterator:
-    def __init__(self, items):
-        self._items = items
-        self._index = 0
+@pytest.mark.asyncio
+async def test_update_session_gives_up_after_max_attempts(azure_blob_storage_plugin, storage):
+    storage.put('container', 'file', '[]')
+    storage.after_download = lambda container, blob: storage.put(container, blob, '[]')
 
-    def __aiter__(self):
-        return self
+    await azure_blob_storage_plugin.update_session('container', 'file', 'user', 'message')
 
-    async def __anext__(self):
-        if self._index >= len(self._items):
-            raise StopAsyncIteration
-        item = self._items[self._index]
-        self._index += 1
-        return item
+    assert json.loads(storage.containers['container']['file']) == []
+    assert storage.version == 1 + MAX_CONDITIONAL_WRITE_ATTEMPTS
+    azure_blob_storage_plugin.logger.error.assert_called()
 
 @pytest.mark.asyncio
-async def test_list_container_files(azure_blob_storage_plugin):
-    with patch.object(BlobServiceClient, 'get_container_client') as mock_get_container_client:
-        mock_container_client = mock_get_container_client.return_value
-        mock_blob1 = MagicMock()
-        mock_blob1.name = "path/to/file1.txt"
-        mock_blob2 = MagicMock()
-        mock_blob2.name = "another/path/file2.json"
-        mock_container_client.list_blobs = MagicMock(return_value=AsyncIterator([mock_blob1, mock_blob2]))
-
-        files = await azure_blob_storage_plugin.list_container_files("test_container")
-
-        assert files == ["file1.txt", "file2.json"]
-        mock_get_container_client.assert_called_once_with("test_container")
+async def test_update_session_read_error(azure_blob_storage_plugin, storage):
+    with patch.object(FakeBlobClient, 'download_blob', side_effect=Exception("Read error")):
+        await azure_blob_storage_plugin.update_session('container', 'file', 'user', 'message')
+    assert 'file' not in storage.containers['container']
+    azure_blob_storage_plugin.logger.error.assert_called()
 
 @pytest.mark.asyncio
-async def test_update_prompt_system_message_no_system_role(azure_blob_storage_plugin):
-    with patch.object(azure_blob_storage_plugin.blob_service_client, 'get_blob_client') as mock_get_blob_client:
-        mock_blob_client = mock_get_blob_client.return_value
-        mock_blob_client.download_blob = AsyncMock()
-        mock_blob_client.download_blob.return_value.readall = AsyncMock(
-            return_value=b'[{"role": "user", "content": "user message"}]'
-        )
-        mock_blob_client.upload_blob = AsyncMock()
+async def test_update_pricing(azure_blob_storage_plugin, storage):
+    existing_data = PricingData(total_tokens=100, prompt_tokens=50, completion_tokens=50, total_cost=1.0, input_cost=0.5, output_cost=0.5)
+    storage.put('container', 'datafile.json', json.dumps(existing_data.__dict__))
+    new_pricing_data = PricingData(total_tokens=50, prompt_tokens=25, completion_tokens=25, total_cost=0.5, input_cost=0.25, output_cost=0.25)
 
-        await azure_blob_storage_plugin.update_prompt_system_message("channel1", "thread1", "new system message")
+    updated_data = await azure_blob_storage_plugin.update_pricing("container", "datafile.json", new_pricing_data)
 
-        # Vérifier que upload_blob est appelé avec le nouveau message système ajouté au début
-        mock_blob_client.upload_blob.assert_awaited_once_with(
-            '[{"role": "system", "content": "new system message"}, {"role": "user", "content": "user message"}]',
-            overwrite=True
-        )
+    assert updated_data.total_tokens == 150
+    assert updated_data.prompt_tokens == 75
+    assert updated_data.completion_tokens == 75
+    assert updated_data.total_cost == 1.5
+    assert updated_data.input_cost == 0.75
+    assert updated_data.output_cost == 0.75
+    assert json.loads(storage.containers['container']['datafile.json'])['total_tokens'] == 150
 
 @pytest.mark.asyncio
-async def test_update_pricing_empty_initial_data(azure_blob_storage_plugin):
-    with patch.object(azure_blob_storage_plugin, 'read_data_content', new_callable=AsyncMock) as mock_read, \
-         patch.object(azure_blob_storage_plugin, 'write_data_content', new_callable=AsyncMock) as mock_write:
+async def test_update_pricing_empty_initial_data(azure_blob_storage_plugin, storage):
+    new_pricing_data = PricingData(total_tokens=50, prompt_tokens=25, completion_tokens=25, total_cost=0.5, input_cost=0.25, output_cost=0.25)
 
-        mock_read.return_value = None
+    updated_data = await azure_blob_storage_plugin.update_pricing("container", "datafile.json", new_pricing_data)
 
-        new_pricing_data = PricingData(total_tokens=50, prompt_tokens=25, completion_tokens=25, total_cost=0.5, input_cost=0.25, output_cost=0.25)
+    assert updated_data.total_tokens == 50
+    assert updated_data.prompt_tokens == 25
+    assert updated_data.completion_tokens == 25
+    assert updated_data.total_cost == 0.5
+    assert updated_data.input_cost == 0.25
+    assert updated_data.output_cost == 0.25
+    assert 'datafile.json' in storage.containers['container']
 
-        updated_data = await azure_blob_storage_plugin.update_pricing("container", "datafile.json", new_pricing_data)
+@pytest.mark.asyncio
+async def test_concurrent_update_pricing_counts_every_update(azure_blob_storage_plugin, storage):
+    pricing_data = PricingData(total_tokens=10, prompt_tokens=5, completion_tokens=5, total_cost=0.1, input_cost=0.05, output_cost=0.05)
+    original_download = FakeBlobClient.download_blob
 
-        assert updated_data.total_tokens == 50
-        assert updated_data.prompt_tokens == 25
-        assert updated_data.completion_tokens == 25
-        assert updated_data.total_cost == 0.5
-        assert updated_data.input_cost == 0.25
-        assert updated_data.output_cost == 0.25
+    async def slow_download(self):
+        result = await original_download(self)
+        await asyncio.sleep(0)
+        return result
 
-        mock_write.assert_called_once()
+    with patch.object(FakeBlobClient, 'download_blob', slow_download):
+        await asyncio.gather(*(
+            azure_blob_storage_plugin.update_pricing("container", "costs.json", pricing_data) for _ in range(3)))
 
-def test_properties(azure_blob_storage_plugin):
-    assert azure_blob_storage_plugin.sessions == azure_blob_storage_plugin.sessions_container
-    assert azure_blob_storage_plugin.feedbacks == azure_blob_storage_plugin.feedbacks_container
-    assert azure_blob_storage_plugin.concatenate == azure_blob_storage_plugin.concatenate_container
-    assert azure_blob_storage_plugin.prompts == azure_blob_storage_plugin.prompts_container
-    assert azure_blob_storage_plugin.costs == azure_blob_storage_plugin.costs_container
-    assert azure_blob_storage_plugin.processing == azure_blob_storage_plugin.processing_container
-    assert azure_blob_storage_plugin.abort == azure_blob_storage_plugin.abort_container
-    assert azure_blob_storage_plugin.vectors == azure_blob_storage_plugin.vectors_container
+    assert json.loads(storage.containers['container']['costs.json'])['total_tokens'] == 30
 
 @pytest.mark.asyncio
-async def test_read_data_content_error(azure_blob_storage_plugin):
-    with patch.object(BlobServiceClient, 'get_blob_client') as mock_get_blob_client:
-        mock_blob_client = mock_get_blob_client.return_value
-        mock_blob_client.exists = AsyncMock(return_value=True)
-        mock_blob_client.download_blob = AsyncMock(side_effect=Exception("Read error"))
+async def test_update_pricing_invalid_existing_data(azure_blob_storage_plugin, storage):
+    storage.put('container', 'datafile.json', 'not json')
+    pricing_data = PricingData(total_tokens=50)
 
-        content = await azure_blob_storage_plugin.read_data_content('container', 'file')
-        assert content is None
+    assert await azure_blob_storage_plugin.update_pricing("container", "datafile.json", pricing_data) is None
+    assert storage.containers['container']['datafile.json'] == b'not json'
 
+@pytest.mark.asyncio
+async def test_remove_data(azure_blob_storage_plugin, storage):
+    storage.put('container', 'datafile.txt', 'toto value\nother value')
+    await azure_blob_storage_plugin.remove_data("container", "datafile.txt", "TOTO")
+    assert storage.containers['container']['datafile.txt'] == b'other value'
 
 @pytest.mark.asyncio
-async def test_list_container_files_error(azure_blob_storage_plugin):
-    with patch.object(BlobServiceClient, 'get_container_client') as mock_get_container_client:
-        mock_container_client = mock_get_container_client.return_value
-        mock_container_client.list_blobs = AsyncMock(side_effect=Exception("List error"))
+async def test_remove_data_last_line(azure_blob_storage_plugin, storage):
+    storage.put('container', 'datafile.txt', 'toto value')
+    await azure_blob_storage_plugin.remove_data("container", "datafile.txt", "toto")
+    assert storage.containers['container']['datafile.txt'] == b' '
 
-        result = await azure_blob_storage_plugin.list_container_files("test_container")
-        assert result == []
+@pytest.mark.asyncio
+async def test_remove_data_empty_content(azure_blob_storage_plugin, storage):
+    storage.put('container', 'file.txt', '')
+    await azure_blob_storage_plugin.remove_data('container', 'file.txt', 'test data')
+    assert storage.version == 1
 
 @pytest.mark.asyncio
-async def test_append_data(azure_blob_storage_plugin):
-    with patch.object(azure_blob_storage_plugin.blob_service_client, 'get_blob_client') as mock_get_blob_client:
-        mock_blob_client = mock_get_blob_client.return_value
-        mock_blob_client.upload_blob = AsyncMock()
+async def test_list_container_files(azure_blob_storage_plugin, storage):
+    storage.put('test_container', 'path/to/file1.txt', 'a')
+    storage.put('test_container', 'another/path/file2.json', 'b')
 
-        # La méthode append_data ne fait pas await sur upload_blob, c'est une erreur dans l'implémentation
-        # On va tester le comportement actuel en attendant la correction
-        await azure_blob_storage_plugin.append_data('container', 'file.txt', 'test data')
+    files = await azure_blob_storage_plugin.list_container_files("test_container")
 
-        # On vérifie que upload_blob a été appelé avec les bons arguments, sans vérifier l'await
-        mock_blob_client.upload_blob.assert_called_once_with('test data', overwrite=True)
+    assert sorted(files) == ["file1.txt", "file2.json"]
 
 @pytest.mark.asyncio
-async def test_append_data_error(azure_blob_storage_plugin):
-    with patch.object(azure_blob_storage_plugin.blob_service_client, 'get_blob_client') as mock_get_blob_client:
-        mock_blob_client = mock_get_blob_client.return_value
-        mock_blob_client.upload_blob = AsyncMock(side_effect=Exception("Upload error"))
+async def test_list_container_files_with_prefix(azure_blob_storage_plugin, storage):
+    for name in ['C1-1.txt', 'C1-2.txt', 'C2-1.txt']:
+        storage.put('test_container', name, 'data')
 
-        await azure_blob_storage_plugin.append_data('container', 'file.txt', 'test data')
-        # Verify that the error is logged but doesn't raise exception
+    assert await azure_blob_storage_plugin.list_container_files("test_container", prefix="C1-") == ["C1-1.txt", "C1-2.txt"]
 
 @pytest.mark.asyncio
-async def test_create_container(azure_blob_storage_plugin):
-    with patch.object(azure_blob_storage_plugin.blob_service_client, 'get_container_client') as mock_get_container_client:
-        mock_container_client = mock_get_container_client.return_value
-        mock_container_client.exists = MagicMock(return_value=False)
-        mock_container_client.create_container = MagicMock()
-
-        await azure_blob_storage_plugin.create_container("test_container")
-
-        mock_container_client.create_container.assert_called_once()
+async def test_list_container_files_error(azure_blob_storage_plugin):
+    assert await azure_blob_storage_plugin.list_container_files("missing_container") == []
 
 @pytest.mark.asyncio
-async def test_create_container_already_exists(azure_blob_storage_plugin):
-    with patch.object(azure_blob_storage_plugin.blob_service_client, 'get_container_client') as mock_get_container_client:
-        mock_container_client = mock_get_container_client.return_value
-        mock_container_client.exists = MagicMock(return_value=True)
-        mock_container_client.create_container = MagicMock()
+async def test_update_prompt_system_message_no_system_role(azure_blob_storage_plugin, storage):
+    storage.put('sessions', 'channel1-thread1.json', '[{"role": "user", "content": "user message"}]')
 
-        await azure_blob_storage_plugin.create_container("test_container")
+    await azure_blob_storage_plugin.update_prompt_system_message("channel1", "thread1", "new system message")
 
-        mock_container_client.create_container.assert_not_called()
+    assert json.loads(storage.containers['sessions']['channel1-thread1.json']) == [
+        {"role": "system", "content": "new system message"}, {"role": "user", "content": "user message"}]
 
 @pytest.mark.asyncio
-async def test_create_container_error(azure_blob_storage_plugin):
-    with patch.object(azure_blob_storage_plugin.blob_service_client, 'get_container_client') as mock_get_container_client:
-        mock_container_client = mock_get_container_client.return_value
-        mock_container_client.exists = MagicMock(side_effect=Exception("Container error"))
-
-        await azure_blob_storage_plugin.create_container("test_container")
-        # Verify that the error is logged but doesn't raise exception
-
-def test_create_container_sync(azure_blob_storage_plugin):
-    with patch.object(azure_blob_storage_plugin.blob_service_client, 'get_container_client') as mock_get_container_client:
-        mock_container_client = mock_get_container_client.return_value
-        mock_container_client.exists = MagicMock(return_value=False)
-        mock_container_client.create_container = MagicMock()
+async def test_update_prompt_system_message_existing_system(azure_blob_storage_plugin, storage):
+    storage.put('sessions', 'channel1-thread1.json',
+                '[{"role": "system", "content": "old message"}, {"role": "user", "content": "user message"}]')
 
-        azure_blob_storage_plugin.create_container_sync("test_container")
+    await azure_blob_storage_plugin.update_prompt_system_message("channel1", "thread1", "new system message")
 
-        mock_container_client.create_container.assert_called_once()
+    assert json.loads(storage.containers['sessions']['channel1-thread1.json']) == [
+        {"role": "system", "content": "new system message"}, {"role": "user", "content": "user message"}]
 
 @pytest.mark.asyncio
-async def test_update_session_empty_blob(azure_blob_storage_plugin):
-    with patch.object(azure_blob_storage_plugin.blob_service_client, 'get_blob_client') as mock_get_blob_client:
-        mock_blob_client = mock_get_blob_client.return_value
-        mock_blob_client.exists = AsyncMock(return_value=False)
-        mock_blob_client.upload_blob = AsyncMock()
-
-        await azure_blob_storage_plugin.update_session('container', 'file.txt', 'user', 'test message')
-
-        mock_blob_client.upload_blob.assert_awaited_once_with(
-            '[{"role": "user", "content": "test message"}]',
-            overwrite=True
-        )
+async def test_update_prompt_system_message_missing_session(azure_blob_storage_plugin, storage):
+    storage.containers['sessions'] = {}
+    await azure_blob_storage_plugin.update_prompt_system_message("channel1", "thread1", "new message")
+    assert storage.containers['sessions'] == {}
 
 @pytest.mark.asyncio
-async def test_update_prompt_system_message_existing_system(azure_blob_storage_plugin):
-    with patch.object(azure_blob_storage_plugin.blob_service_client, 'get_blob_client') as mock_get_blob_client:
-        mock_blob_client = mock_get_blob_client.return_value
-        mock_blob_client.download_blob = AsyncMock()
-        mock_blob_client.download_blob.return_value.readall = AsyncMock(
-            return_value=b'[{"role": "system", "content": "old message"}, {"role": "user", "content": "user message"}]'
-        )
-        mock_blob_client.upload_blob = AsyncMock()
+async def test_update_prompt_system_message_error(azure_blob_storage_plugin):
+    with patch.object(FakeBlobClient, 'download_blob', side_effect=Exception("Download error")):
+        await azure_blob_storage_plugin.update_prompt_system_message("channel1", "thread1", "new message")
+    azure_blob_storage_plugin.logger.error.assert_called()
 
-        await azure_blob_storage_plugin.update_prompt_system_message("channel1", "thread1", "new system message")
+def test_properties(azure_blob_storage_plugin):
+    assert azure_blob_storage_plugin.sessions == azure_blob_storage_plugin.sessions_container
+    assert azure_blob_storage_plugin.feedbacks == azure_blob_storage_plugin.feedbacks_container
+    assert azure_blob_storage_plugin.concatenate == azure_blob_storage_plugin.concatenate_container
+    assert azure_blob_storage_plugin.prompts == azure_blob_storage_plugin.prompts_container
+    assert azure_blob_storage_plugin.costs == azure_blob_storage_plugin.costs_container
+    assert azure_blob_storage_plugin.processing == azure_blob_storage_plugin.processing_container
+    assert azure_blob_storage_plugin.abort == azure_blob_storage_plugin.abort_container
+    assert azure_blob_storage_plugin.vectors == azure_blob_storage_plugin.vectors_container
 
-        mock_blob_client.upload_blob.assert_awaited_once_with(
-            '[{"role": "system", "content": "new system message"}, {"role": "user", "content": "user message"}]',
-            overwrite=True
-        )
+@pytest.mark.asyncio
+async def test_create_container(azure_blob_storage_plugin, storage):
+    await azure_blob_storage_plugin.create_container("test_container")
+    assert "test_container" in storage.containers
 
 @pytest.mark.asyncio
-async def test_update_prompt_system_message_error(azure_blob_storage_plugin):
-    with patch.object(azure_blob_storage_plugin.blob_service_client, 'get_blob_client') as mock_get_blob_client:
-        mock_blob_client = mock_get_blob_client.return_value
-        mock_blob_client.download_blob = AsyncMock(side_effect=Exception("Download error"))
+async def test_create_container_created_concurrently(azure_blob_storage_plugin, storage):
+    with patch.object(FakeContainerClient, 'exists', return_value=False):
+        storage.containers["test_container"] = {}
+        await azure_blob_storage_plugin.create_container("test_container")
+    azure_blob_storage_plugin.logger.error.assert_not_called()
 
-        await azure_blob_storage_plugin.update_prompt_system_message("channel1", "thread1", "new message")
-        # Verify that the error is logged but doesn't raise exception
+@pytest.mark.asyncio
+async def test_create_container_error(azure_blob_storage_plugin):
+    with patch.object(FakeContainerClient, 'exists', side_effect=Exception("Container error")):
+        await azure_blob_storage_plugin.create_container("test_container")
+    azure_blob_storage_plugin.logger.error.assert_called()
 
 @pytest.mark.asyncio
-async def test_clear_container(azure_blob_storage_plugin):
-    with patch.object(azure_blob_storage_plugin.blob_service_client, 'get_container_client') as mock_get_container_client:
-        mock_container_client = mock_get_container_client.return_value
-        mock_blob1 = MagicMock(name="blob1.txt")
-        mock_blob2 = MagicMock(name="blob2.txt")
-        mock_container_client.list_blobs = MagicMock(return_value=AsyncIterator([mock_blob1, mock_blob2]))
-        mock_container_client.get_blob_client = MagicMock()
-        mock_blob_client = mock_container_client.get_blob_client.return_value
-        mock_blob_client.delete_blob = MagicMock()
+async def test_clear_container(azure_blob_storage_plugin, storage):
+    for index in range(600):
+        storage.put('test_container', f'blob{index}.txt', 'data')
 
-        await azure_blob_storage_plugin.clear_container("test_container")
+    await azure_blob_storage_plugin.clear_container("test_container")
 
-        assert mock_blob_client.delete_blob.call_count == 2
+    assert storage.containers['test_container'] == {}
+    assert storage.batch_requests == 3
 
 @pytest.mark.asyncio
 async def test_clear_container_error(azure_blob_storage_plugin):
-    with patch.object(azure_blob_storage_plugin.blob_service_client, 'get_container_client') as mock_get_container_client:
-        mock_container_client = mock_get_container_client.return_value
-        mock_container_client.list_blobs = MagicMock(side_effect=Exception("Clear error"))
+    with pytest.raises(Exception):
+        await azure_blob_storage_plugin.clear_container("missing_container")
 
-        with pytest.raises(Exception):
-            await azure_blob_storage_plugin.clear_container("test_container")
+def test_create_container_sync(azure_blob_storage_plugin):
+    with patch.object(AzureBlobStoragePlugin, 'sync_blob_service_client') as mock_client:
+        mock_container_client = mock_client.get_container_client.return_value
+        mock_container_client.exists = MagicMock(return_value=False)
+
+        azure_blob_storage_plugin.create_container_sync("test_container")
+
+        mock_container_client.create_container.assert_called_once()
 
 def test_clear_container_sync(azure_blob_storage_plugin):
-    with patch.object(azure_blob_storage_plugin.blob_service_client, 'get_container_client') as mock_get_container_client:
-        mock_container_client = mock_get_container_client.return_value
-        mock_blob1 = MagicMock(name="blob1.txt")
-        mock_blob2 = MagicMock(name="blob2.txt")
-        mock_container_client.list_blobs = MagicMock(return_value=[mock_blob1, mock_blob2])
-        mock_container_client.get_blob_client = MagicMock()
+    with patch.object(AzureBlobStoragePlugin, 'sync_blob_service_client') as mock_client:
+        mock_container_client = mock_client.get_container_client.return_value
+        mock_container_client.list_blobs = MagicMock(return_value=[MagicMock(name="blob1.txt"), MagicMock(name="blob2.txt")])
         mock_blob_client = mock_container_client.get_blob_client.return_value
-        mock_blob_client.delete_blob = MagicMock()
 
         azure_blob_storage_plugin.clear_container_sync("test_container")
 
         assert mock_blob_client.delete_blob.call_count == 2
 
 @pytest.mark.asyncio
-async def test_write_data_content_error(azure_blob_storage_plugin):
-    with patch.object(azure_blob_storage_plugin.blob_service_client, 'get_blob_client') as mock_get_blob_client:
-        mock_blob_client = mock_get_blob_client.return_value
-        mock_blob_client.upload_blob = AsyncMock(side_effect=Exception("Write error"))
-
-        await azure_blob_storage_plugin.write_data_content('container', 'file.txt', 'test data')
-        # Verify that the error is logged but doesn't raise exception
-
-@pytest.mark.asyncio
-async def test_remove_data_content_not_found(azure_blob_storage_plugin):
-    with patch.object(azure_blob_storage_plugin.blob_service_client, 'get_blob_client') as mock_get_blob_client:
-        mock_blob_client = mock_get_blob_client.return_value
-        mock_blob_client.delete_blob = AsyncMock(side_effect=ResourceNotFoundError("Not found"))
+async def test_purge_in_flight_markers(azure_blob_storage_plugin, extended_mock_global_manager, storage):
+    extended_mock_global_manager.backend_internal_data_processing_dispatcher = azure_blob_storage_plugin
+    extended_mock_global_manager.bot_config.IN_FLIGHT_BACKEND_MIRROR = True
+    registry = InFlightRegistry(extended_mock_global_manager)
+    storage.put("processing", "C1-1700000000.0001.txt", "1")
+    storage.put("processing", "reactions-C1-T1.txt", "[]")
 
-        await azure_blob_storage_plugin.remove_data_content('container', 'file.txt')
-        # Verify that warning is logged but doesn't raise exception
+    await registry.purge_backend_markers()
 
-@pytest.mark.asyncio
-async def test_remove_data_empty_content(azure_blob_storage_plugin):
-    with patch.object(azure_blob_storage_plugin, 'read_data_content', new_callable=AsyncMock) as mock_read:
-        mock_read.return_value = ""
-        await azure_blob_storage_plugin.remove_data('container', 'file.txt', 'test data')
-        # Verify that no further action is taken when content is empty
+    assert list(storage.containers["processing"]) == ["reactions-C1-T1.txt"]
 
 @pytest.mark.asyncio
-async def test_init_containers(azure_blob_storage_plugin):
-    with patch.object(azure_blob_storage_plugin.blob_service_client, 'get_container_client') as mock_get_container_client:
-        mock_container_client = mock_get_container_client.return_value
-        mock_container_client.exists = MagicMock(return_value=False)
-        mock_container_client.create_container = MagicMock()
-
-        azure_blob_storage_plugin.init_containers()
-
-        # Verify that create_container was called for each container
-        assert mock_container_client.create_container.call_count == 10
+async def test_compressed_container(extended_mock_global_manager, mock_config, storage):
+    mock_config["AZURE_BLOB_STORAGE_COMPRESSION"] = {"container": "gzip"}
+    mock_config["AZURE_BLOB_STORAGE_COMPRESSION_THRESHOLD"] = 100
+    plugin = AzureBlobStoragePlugin(global_manager=extended_mock_global_manager)
+    plugin.initialize()
+    plugin.create_blob_service_client = lambda: FakeBlobServiceClient(storage)
+    storage.put("container", "raw.txt", json.dumps([{"role": "system", "content": "raw"}]))
+
+    await plugin.write_data_content("container", "blob.txt", "long text " * 1000)
+    assert storage.containers["container"]["blob.txt"].startswith(b"\x1f\x8b")
+    assert await plugin.read_data_content("container", "blob.txt") == "long text " * 1000
+
+    # Blobs written before compression was enabled are still read and updated
+    await plugin.update_session("container", "raw.txt", "user", "hello " * 100)
+    assert storage.containers["container"]["raw.txt"].startswith(b"\x1f\x8b")
+    session = json.loads(await plugin.read_data_content("container", "raw.txt"))
+    assert session[-1] == {"role": "user", "content": "hello " * 100}
@@ -189,6 +189,12 @@ async def test_list_container_files(file_system_plugin):
         files = await file_system_plugin.list_container_files("container")
         assert files == ["file1", "file2"]
 
+@pytest.mark.asyncio
+async def test_list_container_files_with_prefix(file_system_plugin):
+    with patch("os.listdir", return_value=["C1-1.txt", "C2-1.txt", "C1-2.txt"]), patch("os.path.isfile", return_value=True):
+        files = await file_system_plugin.list_container_files("container", prefix="C1-")
+        assert files == ["C1-1", "C1-2"]
+
 @pytest.mark.asyncio
 async def test_update_session_new_file(file_system_plugin):
     # Define a container to capture written content
@@ -476,4 +482,88 @@ def test_clear_container_sync_with_empty_directory(file_system_plugin):
         file_system_plugin.clear_container_sync("test_container")
 
         # Verify that `os.rmdir` is not called for the empty container itself
-        mock_rmdir.assert_not_called()
\ No newline at end of file
+        mock_rmdir.assert_not_called()
+@pytest.fixture
+def sharded_file_system_plugin(extended_mock_global_manager, mock_config, tmp_path):
+    mock_config["FILE_SYSTEM_DIRECTORY"] = str(tmp_path)
+    mock_config["FILE_SYSTEM_SHARD_LEVELS"] = 2
+    plugin = FileSystemPlugin(global_manager=extended_mock_global_manager)
+    plugin.initialize()
+    return plugin
+
+@pytest.mark.asyncio
+async def test_sharded_layout_read_write(sharded_file_system_plugin, tmp_path):
+    plugin = sharded_file_system_plugin
+    await plugin.write_data_content("sessions", "C1-1.txt", "session")
+    await plugin.append_data("processing", "C1-1.txt", "marker")
+    await plugin.update_session("sessions", "C1-2.txt", "user", "hello")
+
+    file_path = plugin.data_file_path("sessions", "C1-1.txt")
+    assert os.path.relpath(file_path, tmp_path).count(os.sep) == 3
+    assert os.path.isfile(file_path)
+    assert not os.path.exists(os.path.join(tmp_path, "sessions", "C1-1.txt"))
+    assert await plugin.read_data_content("sessions", "C1-1.txt") == "session"
+    assert await plugin.file_exists("processing", "C1-1.txt")
+
+    await plugin.remove_data_content("processing", "C1-1.txt")
+    assert not await plugin.file_exists("processing", "C1-1.txt")
+
+@pytest.mark.asyncio
+async def test_sharded_layout_list_and_clear(sharded_file_system_plugin, tmp_path):
+    plugin = sharded_file_system_plugin
+    for name in ["C1-1.txt", "C1-2.txt", "C2-1.txt"]:
+        await plugin.write_data_content("sessions", name, "{}")
+
+    assert sorted(await plugin.list_container_files("sessions")) == ["C1-1", "C1-2", "C2-1"]
+    assert sorted(await plugin.list_container_files("sessions", prefix="C1-")) == ["C1-1", "C1-2"]
+
+    await plugin.clear_container("sessions")
+    assert os.listdir(os.path.join(tmp_path, "sessions")) == []
+
+    # Shard directories are created again after a clear
+    await plugin.write_data_content("sessions", "C1-1.txt", "{}")
+    assert await plugin.list_container_files("sessions") == ["C1-1"]
+
+@pytest.fixture
+def compressed_file_system_plugin(extended_mock_global_manager, mock_config, tmp_path):
+    mock_config["FILE_SYSTEM_DIRECTORY"] = str(tmp_path)
+    mock_config["FILE_SYSTEM_COMPRESSION"] = {"sessions": "gzip", "concatenate": "gzip"}
+    mock_config["FILE_SYSTEM_COMPRESSION_THRESHOLD"] = 100
+    plugin = FileSystemPlugin(global_manager=extended_mock_global_manager)
+    plugin.initialize()
+    return plugin
+
+@pytest.mark.asyncio
+async def test_compressed_container_round_trip(compressed_file_system_plugin, tmp_path):
+    plugin = compressed_file_system_plugin
+    large_content = "long text " * 1000
+    await plugin.write_data_content("concatenate", "C1-1.txt", large_content)
+    await plugin.write_data_content("concatenate", "C1-2.txt", "short")
+    await plugin.write_data_content("feedbacks", "C1-1.txt", large_content)
+
+    with open(os.path.join(tmp_path, "concatenate", "C1-1.txt"), "rb") as file:
+        stored = file.read()
+    assert stored.startswith(b"\x1f\x8b") and len(stored) < len(large_content) / 10
+    assert await plugin.read_data_content("concatenate", "C1-1.txt") == large_content
+    assert await plugin.read_data_content("concatenate", "C1-2.txt") == "short"
+    assert os.path.getsize(os.path.join(tmp_path, "feedbacks", "C1-1.txt")) == len(large_content)
+
+    await plugin.append_data("concatenate", "C1-1.txt", "more")
+    assert await plugin.read_data_content("concatenate", "C1-1.txt") == f"{large_content}more\n"
+
+@pytest.mark.asyncio
+async def test_compressed_session_updates(compressed_file_system_plugin):
+    plugin = compressed_file_system_plugin
+    await plugin.update_session("sessions", "C1-1.txt", "system", "prompt " * 100)
+    await plugin.update_session("sessions", "C1-1.txt", "user", "hello")
+    await plugin.update_prompt_system_message("C1", "1", "new prompt")
+
+    session = json.loads(await plugin.read_data_content("sessions", "C1-1.txt"))
+    assert session == [{"role": "system", "content": "new prompt"}, {"role": "user", "content": "hello"}]
+
+@pytest.mark.asyncio
+async def test_compressed_files_stay_readable_when_compression_is_disabled(compressed_file_system_plugin):
+    await compressed_file_system_plugin.write_data_content("sessions", "C1-1.txt", "[]" + " " * 200)
+    compressed_file_system_plugin.content_codec.algorithms.clear()
+
+    assert await compressed_file_system_plugin.read_data_content("sessions", "C1-1.txt") == "[]" + " " * 200
@@ -0,0 +1,243 @@
+import asyncio
+import json
+import sqlite3
+from unittest.mock import patch
+
+import pytest
+
+from core.backend.pricing_data import PricingData
+from plugins.backend.internal_data_processing.sqlite.sqlite import (
+    SQLITE,
+    SqlitePlugin,
+)
+
+
+@pytest.fixture
+def mock_config(tmp_path):
+    return {
+        "PLUGIN_NAME": "sqlite",
+        "SQLITE_DATABASE_PATH": str(tmp_path / "genaibot.db"),
+        "SQLITE_SESSIONS_CONTAINER": "sessions",
+        "SQLITE_FEEDBACKS_CONTAINER": "feedbacks",
+        "SQLITE_CONCATENATE_CONTAINER": "concatenate",
+        "SQLITE_PROMPTS_CONTAINER": "prompts",
+        "SQLITE_COSTS_CONTAINER": "costs",
+        "SQLITE_PROCESSING_CONTAINER": "processing",
+        "SQLITE_ABORT_CONTAINER": "abort",
+        "SQLITE_VECTORS_CONTAINER": "vectors",
+        "SQLITE_CUSTOM_ACTIONS_CONTAINER": "custom_actions",
+        "SQLITE_SUBPROMPTS_CONTAINER": "subprompts",
+        "SQLITE_CHAINOFTHOUGHTS_CONTAINER": "chainofthoughts",
+    }
+
+@pytest.fixture
+def extended_mock_global_manager(mock_global_manager, mock_config):
+    mock_global_manager.config_manager.config_model.PLUGINS.BACKEND.INTERNAL_DATA_PROCESSING = {
+        SQLITE: mock_config
+    }
+    return mock_global_manager
+
+@pytest.fixture
+def sqlite_plugin(extended_mock_global_manager):
+    plugin = SqlitePlugin(global_manager=extended_mock_global_manager)
+    plugin.initialize()
+    yield plugin
+    plugin.pool.close()
+
+def test_sqlite_properties(sqlite_plugin):
+    assert sqlite_plugin.plugin_name == "sqlite"
+    assert sqlite_plugin.sessions == "sessions"
+    assert sqlite_plugin.feedbacks == "feedbacks"
+    assert sqlite_plugin.concatenate == "concatenate"
+    assert sqlite_plugin.prompts == "prompts"
+    assert sqlite_plugin.costs == "costs"
+    assert sqlite_plugin.processing == "processing"
+    assert sqlite_plugin.abort == "abort"
+    assert sqlite_plugin.vectors == "vectors"
+    assert sqlite_plugin.custom_actions == "custom_actions"
+    assert sqlite_plugin.subprompts == "subprompts"
+    assert sqlite_plugin.chainofthoughts == "chainofthoughts"
+
+def test_initialize_creates_tables_in_wal_database(sqlite_plugin, mock_config):
+    connection = sqlite3.connect(mock_config["SQLITE_DATABASE_PATH"])
+    try:
+        tables = {row[0] for row in connection.execute("SELECT name FROM sqlite_master WHERE type = 'table'")}
+        assert connection.execute("PRAGMA journal_mode").fetchone()[0] == "wal"
+    finally:
+        connection.close()
+    assert "container_sessions" in tables
+    assert len(tables) == 11
+
+@pytest.mark.asyncio
+async def test_write_read_and_remove_data_content(sqlite_plugin):
+    assert await sqlite_plugin.read_data_content("sessions", "file.txt") is None
+
+    await sqlite_plugin.write_data_content("sessions", "file.txt", "data")
+    await sqlite_plugin.write_data_content("sessions", "file.txt", "new data")
+    assert await sqlite_plugin.read_data_content("sessions", "file.txt") == "new data"
+    assert await sqlite_plugin.file_exists("sessions", "file.txt")
+
+    await sqlite_plugin.remove_data_content("sessions", "file.txt")
+    assert not await sqlite_plugin.file_exists("sessions", "file.txt")
+    await sqlite_plugin.remove_data_content("sessions", "file.txt")
+
+@pytest.mark.asyncio
+async def test_containers_are_isolated_tables(sqlite_plugin):
+    await sqlite_plugin.write_data_content("feedbacks", "file.txt", "feedback")
+    await sqlite_plugin.write_data_content('odd "name"-container', "file.txt", "other")
+
+    assert await sqlite_plugin.read_data_content("feedbacks", "file.txt") == "feedback"
+    assert await sqlite_plugin.read_data_content('odd "name"-container', "file.txt") == "other"
+    assert await sqlite_plugin.read_data_content("sessions", "file.txt") is None
+
+@pytest.mark.asyncio
+async def test_append_data(sqlite_plugin):
+    await sqlite_plugin.append_data("feedbacks", "feedback.txt", "first")
+    await sqlite_plugin.append_data("feedbacks", "feedback.txt", "second")
+    assert await sqlite_plugin.read_data_content("feedbacks", "feedback.txt") == "first\nsecond\n"
+
+@pytest.mark.asyncio
+async def test_remove_data(sqlite_plugin):
+    await sqlite_plugin.write_data_content("abort", "list.txt", "Keep this\nREMOVE that\nkeep too")
+    await sqlite_plugin.remove_data("abort", "list.txt", "remove")
+    assert await sqlite_plugin.read_data_content("abort", "list.txt") == "Keep this\nkeep too"
+
+    await sqlite_plugin.write_data_content("abort", "single.txt", "remove")
+    await sqlite_plugin.remove_data("abort", "single.txt", "remove")
+    assert await sqlite_plugin.read_data_content("abort", "single.txt") == " "
+
+    # Missing files and non matching data are left untouched
+    await sqlite_plugin.remove_data("abort", "missing.txt", "remove")
+    assert not await sqlite_plugin.file_exists("abort", "missing.txt")
+
+@pytest.mark.asyncio
+async def test_update_session(sqlite_plugin):
+    await sqlite_plugin.update_session("sessions", "C1-T1.txt", "user", "hello")
+    await sqlite_plugin.update_session("sessions", "C1-T1.txt", "assistant", "hi")
+
+    session = json.loads(await sqlite_plugin.read_data_content("sessions", "C1-T1.txt"))
+    assert session == [{"role": "user", "content": "hello"}, {"role": "assistant", "content": "hi"}]
+
+@pytest.mark.asyncio
+async def test_update_session_invalid_content(sqlite_plugin):
+    await sqlite_plugin.write_data_content("sessions", "C1-T1.txt", "not json")
+    await sqlite_plugin.update_session("sessions", "C1-T1.txt", "user", "hello")
+
+    assert await sqlite_plugin.read_data_content("sessions", "C1-T1.txt") == "not json"
+    sqlite_plugin.logger.error.assert_called()
+
+@pytest.mark.asyncio
+async def test_concurrent_updates_are_atomic(sqlite_plugin):
+    pricing_data = PricingData(total_tokens=10, prompt_tokens=4, completion_tokens=6, total_cost=1, input_cost=0.4, output_cost=0.6)
+
+    await asyncio.gather(
+        *(sqlite_plugin.update_session("sessions", "C1-T1.txt", "user", f"message {index}") for index in range(20)),
+        *(sqlite_plugin.update_pricing("costs", "costs.json", pricing_data) for _ in range(20)))
+
+    session = json.loads(await sqlite_plugin.read_data_content("sessions", "C1-T1.txt"))
+    assert sorted(message["content"] for message in session) == sorted(f"message {index}" for index in range(20))
+    pricing = json.loads(await sqlite_plugin.read_data_content("costs", "costs.json"))
+    assert pricing["total_tokens"] == 200
+    assert pricing["completion_tokens"] == 120
+
+@pytest.mark.asyncio
+async def test_update_pricing(sqlite_plugin):
+    existing_data = PricingData(total_tokens=100, prompt_tokens=50, completion_tokens=50, total_cost=1.0, input_cost=0.5, output_cost=0.5)
+    await sqlite_plugin.write_data_content("costs", "datafile.json", json.dumps(existing_data.__dict__))
+    new_pricing_data = PricingData(total_tokens=50, prompt_tokens=25, completion_tokens=25, total_cost=0.5, input_cost=0.25, output_cost=0.25)
+
+    updated_data = await sqlite_plugin.update_pricing("costs", "datafile.json", new_pricing_data)
+
+    assert updated_data.total_tokens == 150
+    assert updated_data.prompt_tokens == 75
+    assert updated_data.completion_tokens == 75
+    assert updated_data.total_cost == 1.5
+    assert updated_data.input_cost == 0.75
+    assert updated_data.output_cost == 0.75
+    assert json.loads(await sqlite_plugin.read_data_content("costs", "datafile.json")) == updated_data.__dict__
+
+@pytest.mark.asyncio
+async def test_update_pricing_invalid_existing_data(sqlite_plugin):
+    await sqlite_plugin.write_data_content("costs", "datafile.json", "not json")
+
+    updated_data = await sqlite_plugin.update_pricing("costs", "datafile.json", PricingData(total_tokens=5))
+
+    assert updated_data.total_tokens == 5
+    sqlite_plugin.logger.error.assert_called()
+
+@pytest.mark.asyncio
+async def test_update_pricing_database_error(sqlite_plugin):
+    with patch.object(sqlite_plugin.pool, 'run', side_effect=sqlite3.OperationalError("database is locked")):
+        assert await sqlite_plugin.update_pricing("costs", "datafile.json", PricingData(total_tokens=5)) is None
+    sqlite_plugin.logger.error.assert_called()
+
+@pytest.mark.asyncio
+async def test_update_prompt_system_message(sqlite_plugin):
+    session = [{"role": "system", "content": "old"}, {"role": "user", "content": "hello"}]
+    await sqlite_plugin.write_data_content("sessions", "C1-T1.txt", json.dumps(session))
+
+    await sqlite_plugin.update_prompt_system_message("C1", "T1", "new")
+
+    assert json.loads(await sqlite_plugin.read_data_content("sessions", "C1-T1.txt"))[0] == {"role": "system", "content": "new"}
+
+@pytest.mark.asyncio
+async def test_update_prompt_system_message_without_system_role(sqlite_plugin):
+    await sqlite_plugin.write_data_content("sessions", "C1-T1.txt", '[{"role": "user", "content": "hello"}]')
+
+    await sqlite_plugin.update_prompt_system_message("C1", "T1", "new")
+    await sqlite_plugin.update_prompt_system_message("C2", "T2", "new")
+
+    assert await sqlite_plugin.read_data_content("sessions", "C1-T1.txt") == '[{"role": "user", "content": "hello"}]'
+    assert sqlite_plugin.logger.warning.call_count == 2
+
+@pytest.mark.asyncio
+async def test_list_container_files(sqlite_plugin):
+    for name in ["C1-T1-1.txt", "C1-T1-2.txt", "C1-T2-1.txt", "C2-T1-1.txt", "custom.py"]:
+        await sqlite_plugin.write_data_content("chainofthoughts", name, "data")
+
+    assert await sqlite_plugin.list_container_files("chainofthoughts") == \
+        ["C1-T1-1", "C1-T1-2", "C1-T2-1", "C2-T1-1", "custom"]
+    assert await sqlite_plugin.list_container_files("chainofthoughts", prefix="C1-T1-") == ["C1-T1-1", "C1-T1-2"]
+    assert await sqlite_plugin.list_container_files("chainofthoughts", prefix="C3") == []
+    assert await sqlite_plugin.list_container_files("unknown_container") == []
+
+@pytest.mark.asyncio
+async def test_list_container_files_error(sqlite_plugin):
+    with patch.object(sqlite_plugin.pool, 'run', side_effect=sqlite3.OperationalError("disk I/O error")):
+        assert await sqlite_plugin.list_container_files("sessions") == []
+
+@pytest.mark.asyncio
+async def test_create_and_clear_container(sqlite_plugin):
+    await sqlite_plugin.create_container("new_container")
+    await sqlite_plugin.write_data_content("new_container", "a.txt", "a")
+    await sqlite_plugin.write_data_content("new_container", "b.txt", "b")
+
+    await sqlite_plugin.clear_container("new_container")
+
+    assert await sqlite_plugin.list_container_files("new_container") == []
+
+def test_create_and_clear_container_sync(sqlite_plugin):
+    sqlite_plugin.create_container_sync("sync_container")
+    sqlite_plugin.pool.run_sync(sqlite_plugin._write, "sync_container", "a.txt", "a")
+
+    sqlite_plugin.clear_container_sync("sync_container")
+
+    assert sqlite_plugin.pool.run_sync(sqlite_plugin._read, "sync_container", "a.txt") is None
+
+@pytest.mark.asyncio
+async def test_clear_container_error(sqlite_plugin):
+    with patch.object(sqlite_plugin.pool, 'run', side_effect=sqlite3.OperationalError("database is locked")):
+        with pytest.raises(sqlite3.OperationalError):
+            await sqlite_plugin.clear_container("sessions")
+
+@pytest.mark.asyncio
+async def test_data_persists_across_instances(extended_mock_global_manager, sqlite_plugin):
+    await sqlite_plugin.write_data_content("prompts", "main.txt", "prompt")
+    await sqlite_plugin.shutdown()
+
+    plugin = SqlitePlugin(global_manager=extended_mock_global_manager)
+    plugin.initialize()
+    try:
+        assert await plugin.read_data_content("prompts", "main.txt") == "prompt"
+    finally:
+        plugin.pool.close()
@@ -1,6 +1,7 @@
 import os
 import shutil
 import tempfile
+import time
 from unittest.mock import MagicMock, mock_open, patch
 
 import pytest
@@ -234,3 +235,36 @@ async def test_clear_all_queues(file_system_queue_plugin):
 
     # Make sure only two files were expected for removal
     assert mock_remove.call_count == 8  # Adjust the expected count if needed
+
+@pytest.mark.asyncio
+async def test_get_container_messages(file_system_queue_plugin, temp_queue_dir):
+    file_system_queue_plugin.root_directory = temp_queue_dir
+    os.makedirs(os.path.join(temp_queue_dir, "internal_events"), exist_ok=True)
+    await file_system_queue_plugin.enqueue_message("internal_events", "C1", "T1", "1", "first", "guid1")
+    await file_system_queue_plugin.enqueue_message("internal_events", "C2", "T2", "2", "second", "guid2")
+
+    messages = await file_system_queue_plugin.get_container_messages("internal_events")
+
+    assert sorted(messages) == ["first", "second"]
+    assert await file_system_queue_plugin.get_container_messages("missing") == []
+
+@pytest.mark.asyncio
+async def test_clean_all_queues_schedules_expiry(file_system_queue_plugin, temp_queue_dir):
+    file_system_queue_plugin.root_directory = temp_queue_dir
+    for container in file_system_queue_plugin.ttl_mapping:
+        os.makedirs(os.path.join(temp_queue_dir, container), exist_ok=True)
+    container = file_system_queue_plugin.internal_events_queue_container
+    now = time.time()
+    await file_system_queue_plugin.enqueue_message(container, "C1", "T1", str(now - 7200), "expired", "guid1")
+    await file_system_queue_plugin.enqueue_message(container, "C1", "T1", str(now), "recent", "guid2")
+
+    # A fresh plugin rebuilds its expiry heap from a single scan
+    file_system_queue_plugin.expiry_scheduler.pop_due(now=float('inf'))
+    removed = await file_system_queue_plugin.clean_all_queues()
+
+    assert removed == 1
+    assert os.listdir(os.path.join(temp_queue_dir, container)) == [f"C1_T1_{now}_guid2.txt"]
+    assert len(file_system_queue_plugin.expiry_scheduler) == 1
+
+    await file_system_queue_plugin.dequeue_message(container, "C1", "T1", str(now), "guid2")
+    assert len(file_system_queue_plugin.expiry_scheduler) == 0
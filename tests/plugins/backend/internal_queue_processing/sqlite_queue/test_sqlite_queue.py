@@ -0,0 +1,166 @@
+import asyncio
+import time
+
+import pytest
+
+from plugins.backend.internal_queue_processing.sqlite_queue.sqlite_queue import (
+    SQLITE_QUEUE,
+    TABLE,
+    SqliteQueuePlugin,
+)
+
+
+@pytest.fixture
+def mock_sqlite_queue_config(tmp_path):
+    return {
+        "PLUGIN_NAME": "sqlite_queue",
+        "SQLITE_QUEUE_DATABASE_PATH": str(tmp_path / "queues.db"),
+        "SQLITE_QUEUE_MESSAGES_QUEUE_CONTAINER": "messages",
+        "SQLITE_QUEUE_INTERNAL_EVENTS_QUEUE_CONTAINER": "internal_events",
+        "SQLITE_QUEUE_EXTERNAL_EVENTS_QUEUE_CONTAINER": "external_events",
+        "SQLITE_QUEUE_WAIT_QUEUE_CONTAINER": "wait",
+        "SQLITE_QUEUE_MESSAGES_QUEUE_TTL": 3600,
+        "SQLITE_QUEUE_INTERNAL_EVENTS_QUEUE_TTL": 3600,
+        "SQLITE_QUEUE_EXTERNAL_EVENTS_QUEUE_TTL": 3600,
+        "SQLITE_QUEUE_WAIT_QUEUE_TTL": 60,
+    }
+
+@pytest.fixture
+def sqlite_queue_global_manager(mock_global_manager, mock_sqlite_queue_config):
+    mock_global_manager.config_manager.config_model.PLUGINS.BACKEND.INTERNAL_QUEUE_PROCESSING = {
+        SQLITE_QUEUE: mock_sqlite_queue_config
+    }
+    return mock_global_manager
+
+@pytest.fixture
+def sqlite_queue_plugin(sqlite_queue_global_manager):
+    plugin = SqliteQueuePlugin(sqlite_queue_global_manager)
+    plugin.initialize()
+    yield plugin
+    plugin.pool.close()
+
+def test_initialize(sqlite_queue_plugin):
+    assert sqlite_queue_plugin.plugin_name == "sqlite_queue"
+    assert sqlite_queue_plugin.messages_queue == "messages"
+    assert sqlite_queue_plugin.wait_queue_ttl == 60
+
+    plans = sqlite_queue_plugin.pool.run_sync(lambda connection: connection.execute(
+        f"EXPLAIN QUERY PLAN SELECT message_id FROM {TABLE} WHERE container = 'messages' AND channel_id = 'c' "
+        f"AND thread_id = 't' AND message_ts > 1 ORDER BY message_ts LIMIT 1").fetchall())
+    assert any("USING PRIMARY KEY" in plan[-1] for plan in plans)
+
+@pytest.mark.asyncio
+async def test_enqueue_and_get_next_message_in_timestamp_order(sqlite_queue_plugin):
+    for message_id in ["1000.5", "999.9", "1000.25"]:
+        await sqlite_queue_plugin.enqueue_message("messages", "C1", "T1", message_id, f"content {message_id}")
+    await sqlite_queue_plugin.enqueue_message("messages", "C1", "T2", "1000.1", "other thread")
+
+    assert await sqlite_queue_plugin.get_next_message("messages", "C1", "T1", "999.9") == ("1000.25", "content 1000.25")
+    assert await sqlite_queue_plugin.get_next_message("messages", "C1", "T1", "1000.25") == ("1000.5", "content 1000.5")
+    assert await sqlite_queue_plugin.get_next_message("messages", "C1", "T1", "1000.5") == (None, None)
+    assert await sqlite_queue_plugin.get_all_messages("messages", "C1", "T1") == [
+        "content 999.9", "content 1000.25", "content 1000.5"]
+
+@pytest.mark.asyncio
+async def test_get_next_message_with_invalid_id(sqlite_queue_plugin):
+    assert await sqlite_queue_plugin.get_next_message("messages", "C1", "T1", "not-a-timestamp") == (None, None)
+    sqlite_queue_plugin.logger.error.assert_called_once()
+
+@pytest.mark.asyncio
+async def test_has_older_messages(sqlite_queue_plugin):
+    await sqlite_queue_plugin.enqueue_message("messages", "C1", "T1", "100.0", "first")
+
+    assert await sqlite_queue_plugin.has_older_messages("messages", "C1", "T1", "200.0")
+    assert not await sqlite_queue_plugin.has_older_messages("messages", "C1", "T1", "100.0")
+    assert not await sqlite_queue_plugin.has_older_messages("messages", "C1", "T2", "200.0")
+    assert not await sqlite_queue_plugin.has_older_messages("wait", "C1", "T1", "200.0")
+
+@pytest.mark.asyncio
+async def test_dequeue_message(sqlite_queue_plugin):
+    await sqlite_queue_plugin.enqueue_message("messages", "C1", "T1", "100.0", "first", guid="guid-1")
+    await sqlite_queue_plugin.enqueue_message("messages", "C1", "T1", "100.0", "second", guid="guid-2")
+
+    await sqlite_queue_plugin.dequeue_message("messages", "C1", "T1", "100.0", "guid-1")
+    assert await sqlite_queue_plugin.get_all_messages("messages", "C1", "T1") == ["second"]
+
+    await sqlite_queue_plugin.dequeue_message("messages", "C1", "T1", "100.0", "guid-1")
+    sqlite_queue_plugin.logger.warning.assert_called_once()
+
+@pytest.mark.asyncio
+async def test_clear_messages_queue(sqlite_queue_plugin):
+    await sqlite_queue_plugin.enqueue_message("messages", "C1", "T1", "100.0", "first")
+    await sqlite_queue_plugin.enqueue_message("messages", "C1", "T1", "200.0", "second")
+    await sqlite_queue_plugin.enqueue_message("messages", "C1", "T2", "100.0", "kept")
+
+    await sqlite_queue_plugin.clear_messages_queue("messages", "C1", "T1")
+
+    assert await sqlite_queue_plugin.get_all_messages("messages", "C1", "T1") == []
+    assert await sqlite_queue_plugin.get_container_messages("messages") == ["kept"]
+
+@pytest.mark.asyncio
+async def test_cleanup_expired_messages(sqlite_queue_plugin):
+    now = time.time()
+    await sqlite_queue_plugin.enqueue_message("messages", "C1", "T1", str(now - 100), "expired")
+    await sqlite_queue_plugin.enqueue_message("messages", "C1", "T1", str(now), "recent")
+
+    await sqlite_queue_plugin.cleanup_expired_messages("messages", "C1", "T1", ttl_seconds=50)
+
+    assert await sqlite_queue_plugin.get_all_messages("messages", "C1", "T1") == ["recent"]
+
+@pytest.mark.asyncio
+async def test_clean_all_queues_uses_each_queue_ttl(sqlite_queue_plugin):
+    now = time.time()
+    await sqlite_queue_plugin.enqueue_message("messages", "C1", "T1", str(now - 120), "within messages TTL")
+    await sqlite_queue_plugin.enqueue_message("wait", "C1", "T1", str(now - 120), "past wait TTL")
+    await sqlite_queue_plugin.enqueue_message("wait", "C1", "T1", "not-a-timestamp", "never expires")
+
+    assert await sqlite_queue_plugin.clean_all_queues() == 1
+
+    assert await sqlite_queue_plugin.get_container_messages("messages") == ["within messages TTL"]
+    assert await sqlite_queue_plugin.get_container_messages("wait") == ["never expires"]
+    assert await sqlite_queue_plugin.remove_expired_messages(now=now + 3600) == 1
+
+@pytest.mark.asyncio
+async def test_clear_all_queues(sqlite_queue_plugin):
+    for container in ["messages", "internal_events", "external_events", "wait"]:
+        await sqlite_queue_plugin.enqueue_message(container, "C1", "T1", "100.0", "message")
+
+    await sqlite_queue_plugin.clear_all_queues()
+
+    for container in ["messages", "internal_events", "external_events", "wait"]:
+        assert await sqlite_queue_plugin.get_container_messages(container) == []
+
+@pytest.mark.asyncio
+async def test_background_expiry(sqlite_queue_plugin):
+    sqlite_queue_plugin.sqlite_queue_config.SQLITE_QUEUE_EXPIRY_INTERVAL = 0
+    await sqlite_queue_plugin.enqueue_message("wait", "C1", "T1", str(time.time() - 120), "expired")
+
+    await sqlite_queue_plugin.startup()
+    for _ in range(50):
+        messages = await sqlite_queue_plugin.get_container_messages("wait")
+        if not messages:
+            break
+        await asyncio.sleep(0.01)
+    await sqlite_queue_plugin.shutdown()
+
+    assert messages == []
+    assert sqlite_queue_plugin._expiry_task is None
+
+@pytest.mark.asyncio
+async def test_plugins_share_the_database(sqlite_queue_global_manager):
+    # Two workers on the same host each load their own plugin on the same database file
+    first = SqliteQueuePlugin(sqlite_queue_global_manager)
+    second = SqliteQueuePlugin(sqlite_queue_global_manager)
+    first.initialize()
+    second.initialize()
+    try:
+        await asyncio.gather(*(
+            (first if index % 2 else second).enqueue_message("messages", "C1", "T1", str(100 + index), str(index))
+            for index in range(20)))
+
+        assert await second.get_next_message("messages", "C1", "T1", "100") == ("101", "1")
+        await first.clear_messages_queue("messages", "C1", "T1")
+        assert not await second.has_older_messages("messages", "C1", "T1", "1000")
+    finally:
+        first.pool.close()
+        second.pool.close()
@@ -1,6 +1,6 @@
 import json
 from typing import List
-from unittest.mock import AsyncMock, MagicMock, patch
+from unittest.mock import AsyncMock, MagicMock, call, patch
 
 import pytest
 from fastapi import Request
@@ -283,6 +283,123 @@ async def test_post_notification(generic_rest_plugin):
         with pytest.raises(Exception):
             await generic_rest_plugin.post_notification(notification, url)
 
+@pytest.mark.asyncio
+async def test_post_notification_batching(mock_global_manager, rest_config_data):
+    rest_config_data.update(GENERIC_REST_BATCHING=True, GENERIC_REST_BATCH_MAX_SIZE=3)
+    mock_global_manager.config_manager.config_model.PLUGINS.USER_INTERACTIONS.CUSTOM_API = {
+        "GENERIC_REST": rest_config_data
+    }
+    plugin = GenericRestPlugin(mock_global_manager)
+    plugin._post_json = AsyncMock()
+    url = "http://example.com/post_notification"
+
+    for n in range(3):
+        notification = MagicMock(spec=OutgoingNotificationDataBase)
+        notification.to_dict.return_value = {"n": n}
+        await plugin.post_notification(notification, url)
+    await plugin.notification_batcher.flush_all()
+
+    plugin._post_json.assert_awaited_once_with(url, json.dumps([{"n": 0}, {"n": 1}, {"n": 2}]))
+
+@pytest.mark.asyncio
+async def test_handle_request_rejected_when_saturated(generic_rest_plugin, mock_global_manager):
+    request = MagicMock(spec=Request)
+    request.body = AsyncMock(return_value=b'{"user_id": "123", "channel_id": "456"}')
+    request.headers = {}
+    request.url.path = "/webhook"
+    mock_global_manager.task_supervisor.submit = MagicMock(return_value=False)
+
+    with patch.object(generic_rest_plugin, 'process_event_data', new=MagicMock()):
+        response = await generic_rest_plugin.handle_request(request)
+
+    assert response.status_code == 429
+    assert mock_global_manager.task_supervisor.submit.call_args.kwargs["channel_id"] == "456"
+
+@pytest.mark.asyncio
+async def test_post_notification_streaming(mock_global_manager, rest_config_data):
+    rest_config_data.update(GENERIC_REST_STREAMING=True, GENERIC_REST_STREAM_TOKEN="secret")
+    mock_global_manager.config_manager.config_model.PLUGINS.USER_INTERACTIONS.CUSTOM_API = {
+        "GENERIC_REST": rest_config_data
+    }
+    plugin = GenericRestPlugin(mock_global_manager)
+    plugin.initialize()
+    plugin._post_json = AsyncMock()
+    url = "http://example.com/post_notification"
+
+    assert plugin.additional_routes == [("/webhook/stream/{channel_id}", plugin.handle_stream_request, ["GET"])]
+
+    subscription = plugin.notification_stream_hub.subscribe("C1")
+    streamed = MagicMock(spec=OutgoingNotificationDataBase)
+    streamed.to_dict.return_value = {"channel_id": "C1", "thread_id": "T1", "event_type": "MESSAGE"}
+    await plugin.post_notification(streamed, url)
+
+    # Conversations without an open stream go through the webhook only
+    posted = MagicMock(spec=OutgoingNotificationDataBase)
+    posted.to_dict.return_value = {"channel_id": "C2", "thread_id": "T2", "event_type": "MESSAGE"}
+    await plugin.post_notification(posted, url)
+
+    assert subscription.queue.get_nowait() == streamed.to_dict.return_value
+    assert subscription.queue.empty()
+    # The streamed notification is still posted to the webhook
+    assert plugin._post_json.await_args_list == [
+        call(url, json.dumps(streamed.to_dict.return_value)),
+        call(url, json.dumps(posted.to_dict.return_value)),
+    ]
+
+@pytest.mark.asyncio
+async def test_post_notification_stream_only(mock_global_manager, rest_config_data):
+    rest_config_data.update(GENERIC_REST_STREAMING=True, GENERIC_REST_STREAM_TOKEN="secret",
+                            GENERIC_REST_STREAM_ONLY=True, GENERIC_REST_STREAM_QUEUE_SIZE=1)
+    mock_global_manager.config_manager.config_model.PLUGINS.USER_INTERACTIONS.CUSTOM_API = {
+        "GENERIC_REST": rest_config_data
+    }
+    plugin = GenericRestPlugin(mock_global_manager)
+    plugin.initialize()
+    plugin._post_json = AsyncMock()
+    url = "http://example.com/post_notification"
+    subscription = plugin.notification_stream_hub.subscribe("C1")
+    notifications = []
+    for channel_id in ("C1", "C1", "C2"):
+        notification = MagicMock(spec=OutgoingNotificationDataBase)
+        notification.to_dict.return_value = {"channel_id": channel_id, "thread_id": "T1", "event_type": "MESSAGE"}
+        notifications.append(notification)
+        await plugin.post_notification(notification, url)
+
+    # Only the notification the stream received skips the webhook: the stream was full for the
+    # second one and nobody streams the third conversation
+    assert subscription.queue.get_nowait() == notifications[0].to_dict.return_value
+    assert plugin._post_json.await_args_list == [
+        call(url, json.dumps(notifications[1].to_dict.return_value)),
+        call(url, json.dumps(notifications[2].to_dict.return_value)),
+    ]
+
+def test_streaming_requires_token(mock_global_manager, rest_config_data):
+    rest_config_data.update(GENERIC_REST_STREAMING=True)
+    mock_global_manager.config_manager.config_model.PLUGINS.USER_INTERACTIONS.CUSTOM_API = {
+        "GENERIC_REST": rest_config_data
+    }
+
+    with pytest.raises(ValueError):
+        GenericRestPlugin(mock_global_manager)
+
+@pytest.mark.asyncio
+async def test_handle_stream_request_authorization(mock_global_manager, rest_config_data):
+    rest_config_data.update(GENERIC_REST_STREAMING=True, GENERIC_REST_STREAM_TOKEN="secret")
+    mock_global_manager.config_manager.config_model.PLUGINS.USER_INTERACTIONS.CUSTOM_API = {
+        "GENERIC_REST": rest_config_data
+    }
+    plugin = GenericRestPlugin(mock_global_manager)
+    plugin.initialize()
+
+    for headers in ({}, {"Authorization": "Bearer wrong"}, {"Authorization": "Basic secret"}):
+        response = await plugin.handle_stream_request(MagicMock(headers=headers), "C1")
+        assert response.status_code == 401
+    assert not plugin.notification_stream_hub.has_subscribers("C1")
+
+    response = await plugin.handle_stream_request(MagicMock(headers={"Authorization": "Bearer secret"}), "C1")
+    assert response.media_type == "text/event-stream"
+    assert plugin.notification_stream_hub.has_subscribers("C1")
+
 @pytest.mark.asyncio
 async def test_initialize(generic_rest_plugin):
     # Test if the initialize method sets up the correct attributes
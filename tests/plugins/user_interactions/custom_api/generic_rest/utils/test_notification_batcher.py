@@ -0,0 +1,58 @@
+import asyncio
+from unittest.mock import AsyncMock, MagicMock
+
+import pytest
+
+from plugins.user_interactions.custom_api.generic_rest.utils.notification_batcher import (
+    NotificationBatcher,
+)
+
+
+@pytest.mark.asyncio
+async def test_notifications_are_sent_after_max_delay():
+    send_batch = AsyncMock()
+    batcher = NotificationBatcher(MagicMock(), send_batch, max_batch_size=10, max_delay=0.01)
+
+    batcher.add("http://a", {"n": 1})
+    batcher.add("http://a", {"n": 2})
+    batcher.add("http://b", {"n": 3})
+    send_batch.assert_not_called()
+
+    await asyncio.sleep(0.05)
+
+    send_batch.assert_any_await("http://a", [{"n": 1}, {"n": 2}])
+    send_batch.assert_any_await("http://b", [{"n": 3}])
+    assert send_batch.await_count == 2
+
+@pytest.mark.asyncio
+async def test_full_batches_are_sent_in_order():
+    sent = []
+
+    async def send_batch(url, batch):
+        await asyncio.sleep(0.01)
+        sent.append(batch)
+
+    batcher = NotificationBatcher(MagicMock(), send_batch, max_batch_size=2, max_delay=10)
+
+    for n in range(4):
+        batcher.add("http://a", {"n": n})
+    await asyncio.sleep(0.05)
+    assert sent == [[{"n": 0}, {"n": 1}], [{"n": 2}, {"n": 3}]]
+
+    # A partial batch waits for max_delay, unless flushed
+    batcher.add("http://a", {"n": 4})
+    await asyncio.sleep(0.02)
+    assert len(sent) == 2
+    await batcher.flush_all()
+    assert sent[-1] == [{"n": 4}]
+
+@pytest.mark.asyncio
+async def test_failed_batch_is_logged():
+    logger = MagicMock()
+    batcher = NotificationBatcher(logger, AsyncMock(side_effect=Exception("down")), max_batch_size=1, max_delay=10)
+
+    batcher.add("http://a", {"n": 1})
+    await batcher.flush_all()
+    await asyncio.sleep(0)
+
+    logger.error.assert_called_once()
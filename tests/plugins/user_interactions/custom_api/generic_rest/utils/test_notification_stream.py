@@ -0,0 +1,58 @@
+import json
+from unittest.mock import AsyncMock, MagicMock
+
+import pytest
+
+from plugins.user_interactions.custom_api.generic_rest.utils.notification_stream import (
+    NotificationStreamHub,
+)
+
+
+@pytest.fixture
+def hub():
+    return NotificationStreamHub(MagicMock(), queue_size=2, keepalive_interval=0.01)
+
+def _notification(n, thread_id="T1", channel_id="C1"):
+    return {"channel_id": channel_id, "thread_id": thread_id, "event_type": "MESSAGE", "text": str(n)}
+
+def test_publish_to_channel_and_thread_subscriptions(hub):
+    channel = hub.subscribe("C1")
+    thread = hub.subscribe("C1", "T2")
+
+    assert hub.publish(_notification(1, thread_id="T1")) == 1
+    assert hub.publish(_notification(2, thread_id="T2")) == 2
+    assert hub.publish(_notification(3, channel_id="C2")) == 0
+
+    assert channel.queue.qsize() == 2
+    assert thread.queue.get_nowait()["text"] == "2"
+
+def test_slow_subscriptions_drop_oldest(hub):
+    subscription = hub.subscribe("C1")
+    for n in range(3):
+        hub.publish(_notification(n))
+
+    assert [subscription.queue.get_nowait()["text"] for _ in range(2)] == ["1", "2"]
+    assert subscription.dropped == 1
+
+def test_full_subscriptions_refuse_new_notifications_without_drop_oldest():
+    hub = NotificationStreamHub(MagicMock(), queue_size=1, keepalive_interval=0.01, drop_oldest=False)
+    subscription = hub.subscribe("C1")
+    hub.subscribe("C1", "T1")
+
+    assert hub.publish(_notification(1)) == 2
+    # One of the matching subscriptions is full: the notification is reported as not delivered
+    assert hub.publish(_notification(2)) == 0
+
+    assert subscription.queue.get_nowait()["text"] == "1"
+    assert subscription.dropped == 1
+
+@pytest.mark.asyncio
+async def test_stream_yields_events_and_unsubscribes(hub):
+    subscription = hub.subscribe("C1")
+    hub.publish(_notification(1))
+    is_disconnected = AsyncMock(side_effect=[False, False, True])
+
+    events = [event async for event in hub.stream(subscription, is_disconnected)]
+
+    assert events == [f"event: message\ndata: {json.dumps(_notification(1))}\n\n", ": keepalive\n\n"]
+    assert not hub.has_subscribers("C1")
@@ -165,6 +165,46 @@ async def test_handle_request(slack_plugin):
     assert isinstance(response, Response)
     assert response.status_code == 200
 
+@pytest.mark.asyncio
+async def test_handle_request_discards_slack_retries(slack_plugin):
+    body = b'{"token": "t", "event_id": "Ev123", "event": {"type": "message"}}'
+    request = MagicMock(spec=Request)
+    request.body = AsyncMock(return_value=body)
+    request.headers = {'content-type': 'application/json'}
+    request.url.path = "/slack/events"
+
+    with patch.object(slack_plugin, 'process_event_data', new_callable=AsyncMock) as mock_process:
+        await slack_plugin.handle_request(request)
+        assert mock_process.call_count == 1
+
+        # Retry of the same event is acknowledged without being processed again
+        request.headers = {'content-type': 'application/json', 'X-Slack-Retry-Num': '1', 'X-Slack-Retry-Reason': 'http_timeout'}
+        response = await slack_plugin.handle_request(request)
+        assert response.status_code == 200
+        assert mock_process.call_count == 1
+
+        # Retry of an event never received, e.g. before a restart, is processed
+        request.body = AsyncMock(return_value=body.replace(b"Ev123", b"Ev456"))
+        await slack_plugin.handle_request(request)
+        assert mock_process.call_count == 2
+
+@pytest.mark.asyncio
+async def test_handle_request_rejected_when_saturated(slack_plugin, mock_global_manager):
+    body = b'{"token": "t", "event_id": "Ev789", "event": {"type": "message", "channel": "C1"}}'
+    request = MagicMock(spec=Request)
+    request.body = AsyncMock(return_value=body)
+    request.headers = {'content-type': 'application/json'}
+    request.url.path = "/slack/events"
+    mock_global_manager.task_supervisor.submit = MagicMock(return_value=False)
+
+    with patch.object(slack_plugin, 'process_event_data', new=MagicMock()):
+        response = await slack_plugin.handle_request(request)
+
+    assert response.status_code == 503
+    assert mock_global_manager.task_supervisor.submit.call_args.kwargs["channel_id"] == "C1"
+    # The Slack retry of the refused event is processed
+    assert "Ev789" not in slack_plugin.seen_event_ids
+
 @pytest.mark.asyncio
 async def test_validate_request(slack_plugin):
     event_data = {
@@ -479,7 +519,6 @@ async def test_validate_event_data_webhook(slack_plugin):
 @pytest.mark.asyncio
 async def test_validate_processing_status(slack_plugin):
     slack_plugin.is_message_too_old = AsyncMock(return_value=False)
-    slack_plugin.backend_internal_data_processing_dispatcher.read_data_content = AsyncMock(return_value=None)
 
     assert await slack_plugin._validate_processing_status("C12345678", "1234567890.123456") is True
 
@@ -489,7 +528,8 @@ async def test_validate_processing_status(slack_plugin):
 
     # Test with already processing message
     slack_plugin.is_message_too_old = AsyncMock(return_value=False)
-    slack_plugin.backend_internal_data_processing_dispatcher.read_data_content = AsyncMock(return_value="Some content")
+    registry = slack_plugin.global_manager.in_flight_registry
+    await registry.mark_in_flight(registry.make_key("C12345678", "1234567890.123456"))
     assert await slack_plugin._validate_processing_status("C12345678", "1234567890.123456") is False
 
 @pytest.mark.asyncio
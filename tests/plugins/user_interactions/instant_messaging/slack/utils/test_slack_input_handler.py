@@ -1,9 +1,11 @@
+import asyncio
 import base64
 import io
 import zipfile
 from datetime import datetime, timedelta, timezone
 from unittest.mock import AsyncMock, MagicMock
 
+import aiohttp
 import pytest
 from PIL import Image
 
@@ -13,6 +15,7 @@ from plugins.user_interactions.instant_messaging.slack.slack_event_data import (
 from plugins.user_interactions.instant_messaging.slack.utils.slack_input_handler import (
     SlackInputHandler,
 )
+from utils.http_client.shared_http_client import DownloadLimitExceeded
 
 
 @pytest.fixture
@@ -29,6 +32,16 @@ def slack_config():
         PLUGIN_NAME = "slack_plugin"
         SLACK_WORKSPACE_NAME = "workspace_name"
         SLACK_BEHAVIOR_PLUGIN_NAME = "behavior_plugin"  # Add this missing field
+        SLACK_USER_INFO_CACHE_TTL = 3600
+        SLACK_USER_INFO_CACHE_NEGATIVE_TTL = 60
+        SLACK_USER_INFO_CACHE_MAX_SIZE = 100
+        SLACK_MAX_FILE_DOWNLOAD_BYTES = 1024
+        SLACK_MAX_MESSAGE_DOWNLOAD_BYTES = 2048
+        SLACK_FILE_DOWNLOAD_TIMEOUT = 5
+        SLACK_MAX_CONCURRENT_DOWNLOADS = 2
+        SLACK_MAX_CONCURRENT_LINK_FETCHES = 4
+        SLACK_THREAD_CACHE_TTL = 30
+        SLACK_THREAD_CACHE_MAX_SIZE = 10
     return MockSlackConfig()
 
 @pytest.fixture
@@ -156,18 +169,6 @@ async def test_handle_exception(slack_input_handler, mocker, mock_global_manager
     mock_global_manager.logger.error.assert_any_call(f"Error processing request from Slack: {e} {str(req)}")
     mock_global_manager.logger.error.assert_any_call("Request data: {'key': 'value'}")
 
-async def test_resize_image(slack_input_handler):
-    # Utiliser une image valide au format PNG
-    image_bytes = base64.b64decode(
-        'iVBORw0KGgoAAAANSUhEUgAAAAUAAAAFCAYAAACNbyblAAAAHElEQVQI12P4'
-        '//8/w38GIAXDIBKE0DHxgljNBAAO9TXL0Y4OHwAAAABJRU5ErkJggg=='
-    )
-    max_size = (100, 100)
-    result = await slack_input_handler.resize_image(image_bytes, max_size)
-    assert result is not None
-    image = Image.open(io.BytesIO(result))
-    assert image.size[0] <= max_size[0] and image.size[1] <= max_size[1]
-
 
 @pytest.mark.asyncio
 async def test_handle_image_file(slack_input_handler, mocker):
@@ -292,7 +293,7 @@ async def test_handle_text_file_pdf(slack_input_handler, mocker):
     mock_page = mocker.MagicMock()
     mock_page.extract_text.return_value = "PDF content"
     mock_pdf_reader.pages = [mock_page]
-    mocker.patch("plugins.user_interactions.instant_messaging.slack.utils.slack_input_handler.PdfReader", return_value=mock_pdf_reader)
+    mocker.patch("utils.cpu_executor.document_processing.PdfReader", return_value=mock_pdf_reader)
 
     file = {"url_private": "https://example.com/file.pdf", "mimetype": "application/pdf", "name": "file.pdf"}
     result = await slack_input_handler.handle_text_file(file)
@@ -355,10 +356,7 @@ async def test_get_message_content_api_error(slack_input_handler, mocker):
 
 @pytest.mark.asyncio
 async def test_download_image_as_byte_array_failure(slack_input_handler, mocker):
-    mock_response = mocker.Mock()
-    mock_response.status_code = 404
-    mock_response.text = "Not Found"
-    mocker.patch("requests.get", return_value=mock_response)
+    mocker.patch("plugins.user_interactions.instant_messaging.slack.utils.slack_input_handler.stream_download", side_effect=aiohttp.ClientResponseError(mocker.Mock(), (), status=404, message="Not Found"))
 
     result = await slack_input_handler.download_image_as_byte_array("https://example.com/image.png")
     assert result is None
@@ -473,10 +471,8 @@ async def test_request_to_notification_data_with_url(slack_input_handler, mocker
     # Ensure SLACK_AUTHORIZED_CHANNELS includes the test channel
     slack_input_handler.SLACK_AUTHORIZED_CHANNELS = ["CHANNEL_ID"]
 
-    # Mock requests.get for URL content fetching
-    mock_response = mocker.Mock()
-    mock_response.text = "<html><body>Example content</body></html>"
-    mocker.patch("requests.get", return_value=mock_response)
+    # Mock the URL content download
+    mocker.patch("plugins.user_interactions.instant_messaging.slack.utils.slack_input_handler.stream_download", return_value=b"<html><body>Example content</body></html>")
 
     # Mock SlackEventData
     mock_slack_event_data = mocker.Mock()  # Create a mock SlackEventData object
@@ -516,10 +512,8 @@ async def test_request_to_notification_data_with_url(slack_input_handler, mocker
     # Ensure SLACK_AUTHORIZED_CHANNELS includes the test channel
     slack_input_handler.SLACK_AUTHORIZED_CHANNELS = ["CHANNEL_ID"]
 
-    # Mock requests.get for URL content fetching
-    mock_response = mocker.Mock()
-    mock_response.text = "<html><body>Example content</body></html>"
-    mocker.patch("requests.get", return_value=mock_response)
+    # Mock the URL content download
+    mocker.patch("plugins.user_interactions.instant_messaging.slack.utils.slack_input_handler.stream_download", return_value=b"<html><body>Example content</body></html>")
 
     # Mock SlackEventData
     mock_slack_event_data = mocker.Mock()  # Create a mock SlackEventData object
@@ -735,23 +729,20 @@ async def test_get_message_content_threaded(slack_input_handler, mocker):
 
 @pytest.mark.asyncio
 async def test_download_image_as_byte_array_success(slack_input_handler, mocker):
-    mock_response = mocker.Mock()
-    mock_response.status_code = 200
-    mock_response.content = b"image content"
-    mocker.patch("requests.get", return_value=mock_response)
+    mocker.patch("plugins.user_interactions.instant_messaging.slack.utils.slack_input_handler.stream_download", return_value=b"image content")
 
     result = await slack_input_handler.download_image_as_byte_array("https://example.com/image.png")
     assert result == b"image content"
 
 @pytest.mark.asyncio
 async def test_download_file_content_success(slack_input_handler, mocker):
-    mock_response = mocker.Mock()
-    mock_response.status_code = 200
-    mock_response.content = b"file content"
-    mocker.patch("requests.get", return_value=mock_response)
+    mock_download = mocker.patch("plugins.user_interactions.instant_messaging.slack.utils.slack_input_handler.stream_download", return_value=b"file content")
 
     result = await slack_input_handler.download_file_content("https://example.com/file.txt")
     assert result == b"file content"
+    _, kwargs = mock_download.call_args
+    assert kwargs["headers"] == {"Authorization": "Bearer xoxb-1234"}
+    assert kwargs["max_bytes"] == 1024
 
 @pytest.mark.asyncio
 async def test_get_message_content_api_error(slack_input_handler, mocker):
@@ -867,9 +858,7 @@ async def test_format_message_content(slack_input_handler, mocker):
 
 @pytest.mark.asyncio
 async def test_download_image_as_byte_array_error(slack_input_handler, mocker):
-    mock_response = mocker.Mock()
-    mock_response.status_code = 404
-    mocker.patch("requests.get", return_value=mock_response)
+    mocker.patch("plugins.user_interactions.instant_messaging.slack.utils.slack_input_handler.stream_download", side_effect=aiohttp.ClientResponseError(mocker.Mock(), (), status=404))
 
     result = await slack_input_handler.download_image_as_byte_array("https://example.com/image.png")
     assert result is None
@@ -912,7 +901,7 @@ async def test_handle_text_file_pdf(slack_input_handler, mocker):
     mock_page = mocker.Mock()
     mock_page.extract_text.return_value = "Extracted PDF text"
     mock_pdf_reader.pages = [mock_page]
-    mocker.patch("plugins.user_interactions.instant_messaging.slack.utils.slack_input_handler.PdfReader", return_value=mock_pdf_reader)
+    mocker.patch("utils.cpu_executor.document_processing.PdfReader", return_value=mock_pdf_reader)
 
     file = {"url_private": "https://example.com/file.pdf", "mimetype": "application/pdf", "name": "test.pdf"}
     result = await slack_input_handler.handle_text_file(file)
@@ -1185,9 +1174,7 @@ async def test_process_urls(slack_input_handler, mocker):
 
 @pytest.mark.asyncio
 async def test_process_single_url(slack_input_handler, mocker):
-    mock_response = mocker.Mock()
-    mock_response.text = "<html><body>Example content</body></html>"
-    mocker.patch("requests.get", return_value=mock_response)
+    mocker.patch("plugins.user_interactions.instant_messaging.slack.utils.slack_input_handler.stream_download", return_value=b"<html><body>Example content</body></html>")
 
     url = "https://example.com"
     result = await slack_input_handler._process_single_url(url)
@@ -1290,21 +1277,9 @@ async def test_is_relevant_message_missing_fields(slack_input_handler):
     result = await slack_input_handler.is_relevant_message("message", event_ts, None, None, None, "BOT_USER_ID", None)
     assert result is False
 
-@pytest.mark.asyncio
-async def test_resize_image_no_resize_needed(slack_input_handler):
-    small_image_bytes = base64.b64decode(
-        'iVBORw0KGgoAAAANSUhEUgAAAAEAAAABCAYAAAAfFcSJAAAADUlEQVQI12NgYGBgAAAABQAB'
-        'JzQnCgAAAABJRU5ErkJggg=='  # Very small 1x1 image
-    )
-    max_size = (100, 100)
-    result = await slack_input_handler.resize_image(small_image_bytes, max_size)
-    image = Image.open(io.BytesIO(result))
-
-    assert image.size == (1, 1)  # Ensure the image is not resized
-
 @pytest.mark.asyncio
 async def test_download_image_as_byte_array_failure_handling(slack_input_handler, mocker):
-    mocker.patch("requests.get", side_effect=Exception("Download failed"))
+    mocker.patch("plugins.user_interactions.instant_messaging.slack.utils.slack_input_handler.stream_download", side_effect=Exception("Download failed"))
     result = await slack_input_handler.download_image_as_byte_array("https://example.com/image.png")
 
     assert result is None
@@ -1595,3 +1570,126 @@ async def test_format_message_content_bot_message(slack_input_handler, mocker):
     assert "TestBot" in result
     assert "Bot message" in result
     assert "Bot/App (No email)" in result
+
+@pytest.mark.asyncio
+async def test_get_user_info_is_cached(slack_input_handler, mocker):
+    users_info = mocker.patch.object(slack_input_handler.async_client, 'users_info', return_value={'ok': True, 'user': {'real_name': 'John Doe', 'profile': {'email': 'john.doe@example.com'}}})
+
+    results = await asyncio.gather(*(slack_input_handler.get_user_info('USER_ID') for _ in range(5)))
+    results.append(await slack_input_handler.get_user_info('USER_ID'))
+
+    assert all(result == ('John Doe', 'john.doe@example.com', 'USER_ID') for result in results)
+    users_info.assert_called_once_with(user='USER_ID')
+
+@pytest.mark.asyncio
+async def test_get_user_info_failure_is_cached_briefly(slack_input_handler, mocker):
+    users_info = mocker.patch.object(slack_input_handler.async_client, 'users_info', return_value={'ok': False, 'error': 'user_not_found'})
+
+    await slack_input_handler.get_user_info('USER_ID')
+    await slack_input_handler.get_user_info('USER_ID')
+
+    users_info.assert_called_once()
+    assert slack_input_handler.user_info_cache.negative_ttl == 60
+
+@pytest.mark.asyncio
+async def test_get_bot_info_is_cached(slack_input_handler, mocker):
+    bots_info = mocker.patch.object(slack_input_handler.async_client, 'bots_info', return_value={'ok': True, 'bot': {'name': 'TestBot'}})
+
+    assert await slack_input_handler.get_bot_info('B12345') == 'TestBot'
+    assert await slack_input_handler.get_bot_info('B12345') == 'TestBot'
+
+    bots_info.assert_called_once_with(bot='B12345')
+
+@pytest.mark.asyncio
+async def test_download_file_content_limit_exceeded(slack_input_handler, mocker):
+    mocker.patch("plugins.user_interactions.instant_messaging.slack.utils.slack_input_handler.stream_download", side_effect=DownloadLimitExceeded("File exceeds the 1024 bytes limit"))
+
+    result = await slack_input_handler.download_file_content("https://example.com/big.txt")
+
+    assert result is None
+    slack_input_handler.logger.warning.assert_called_once_with("File download aborted: File exceeds the 1024 bytes limit")
+
+@pytest.mark.asyncio
+async def test_process_files_downloads_concurrently_and_keeps_order(slack_input_handler, mocker):
+    budgets = set()
+
+    async def fake_download(url, **kwargs):
+        budgets.add(id(kwargs["budget"]))
+        # The first file finishes last, its content must still come first
+        await asyncio.sleep(0.02 if url.endswith("first.txt") else 0)
+        return url.rsplit("/", 1)[-1].encode()
+
+    mocker.patch("plugins.user_interactions.instant_messaging.slack.utils.slack_input_handler.stream_download", side_effect=fake_download)
+    event = {
+        "subtype": "file_share",
+        "files": [
+            {"url_private": "https://example.com/first.txt", "mimetype": "text/plain", "name": "first.txt"},
+            {"url_private": "https://example.com/second.txt", "mimetype": "text/plain", "name": "second.txt"}
+        ]
+    }
+
+    base64_images, files_content = await slack_input_handler._process_files(event)
+
+    assert base64_images == []
+    assert "first.txt" in files_content[0]
+    assert "second.txt" in files_content[1]
+    assert len(budgets) == 1
+
+@pytest.mark.asyncio
+async def test_handle_image_file_goes_through_image_pipeline(slack_input_handler):
+    buffer = io.BytesIO()
+    Image.new("RGBA", (4000, 1000)).save(buffer, format="PNG")
+    file = {"url_private": None, "name": "screenshot.png"}
+
+    result = await slack_input_handler.handle_image_file(file, image_bytes=buffer.getvalue())
+
+    image = Image.open(io.BytesIO(base64.b64decode(result)))
+    assert image.format == "JPEG"
+    assert image.size == (2048, 512)
+
+@pytest.mark.asyncio
+async def test_fetch_thread_messages_is_cached(slack_input_handler, mocker):
+    mock_make_slack_api_call = mocker.patch.object(
+        slack_input_handler,
+        "_make_slack_api_call",
+        return_value={"messages": [{"text": "Thread message"}]}
+    )
+
+    first = await slack_input_handler._fetch_thread_messages("C12345", "1620834875.000300")
+    first["messages"][0]["text"] = "Rewritten by the caller"
+    second = await slack_input_handler._fetch_thread_messages("C12345", "1620834875.000300")
+
+    assert second == {"messages": [{"text": "Thread message"}]}
+    mock_make_slack_api_call.assert_called_once()
+
+@pytest.mark.asyncio
+async def test_fetch_thread_messages_failure_is_not_cached(slack_input_handler, mocker):
+    mock_make_slack_api_call = mocker.patch.object(slack_input_handler, "_make_slack_api_call", return_value=None)
+
+    await slack_input_handler._fetch_thread_messages("C12345", "1620834875.000300")
+    await slack_input_handler._fetch_thread_messages("C12345", "1620834875.000300")
+
+    assert mock_make_slack_api_call.call_count == 2
+
+@pytest.mark.asyncio
+async def test_process_slack_links_resolves_links_concurrently(slack_input_handler, mocker):
+    in_flight = 0
+    max_in_flight = 0
+
+    async def fake_process(link, original_text, main_timestamp, user_id, depth=0):
+        nonlocal in_flight, max_in_flight
+        in_flight += 1
+        max_in_flight = max(max_in_flight, in_flight)
+        await asyncio.sleep(0.01)
+        in_flight -= 1
+        return f"content of {link[-1]}"
+
+    mocker.patch.object(slack_input_handler, "_process_single_slack_link", side_effect=fake_process)
+    text = ("See <https://workspace.slack.com/archives/C1/p1> and <https://workspace.slack.com/archives/C1/p2> "
+            "and again <https://workspace.slack.com/archives/C1/p1>")
+
+    result = await slack_input_handler._process_slack_links(text, "1620834875.000400", "USER_ID")
+
+    assert result == "See content of 1 and content of 2 and again content of 1"
+    assert max_in_flight == 2
+    assert slack_input_handler._process_single_slack_link.call_count == 2
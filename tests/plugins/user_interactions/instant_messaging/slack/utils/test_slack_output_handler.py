@@ -1,4 +1,4 @@
-from unittest.mock import AsyncMock, MagicMock, patch
+from unittest.mock import AsyncMock, MagicMock, call, patch
 
 import pytest
 from slack_sdk.errors import SlackApiError
@@ -28,6 +28,8 @@ def slack_config():
         SLACK_API_URL = "https://slack.com/api/"
         SLACK_BOT_TOKEN = "xoxb-1234"
         SLACK_BOT_USER_TOKEN = "xoxp-5678"
+        SLACK_REACTION_TRACKER_MAX_THREADS = 100
+        SLACK_REACTION_TRACKER_PERSIST = False
 
     return MockSlackConfig()
 
@@ -232,38 +234,36 @@ async def test_fetch_conversation_history(slack_output_handler, mocker):
 
 @pytest.mark.asyncio
 async def test_remove_reaction_from_thread_with_reaction(slack_output_handler, mocker):
-    # Mock fetch_conversation_history to return messages with reactions
-    mock_fetch = mocker.patch.object(slack_output_handler, 'fetch_conversation_history', return_value=[
-        {"ts": "1620834875.000400", "reactions": [{"name": "thumbsup"}]}
-    ])
+    mocker.patch.object(slack_output_handler.client, 'reactions_add')
+    mock_fetch = mocker.patch.object(slack_output_handler, 'fetch_conversation_history', new_callable=AsyncMock)
+    await slack_output_handler.add_reaction("CHANNEL_ID", "1620834875.000400", "thumbsup", thread_id="1620834875.000400")
+    await slack_output_handler.add_reaction("CHANNEL_ID", "1620834876.000500", "thumbsup", thread_id="1620834875.000400")
 
     # Mock remove_reaction
     mock_remove_reaction = mocker.patch.object(slack_output_handler, 'remove_reaction', new_callable=AsyncMock)
 
     await slack_output_handler.remove_reaction_from_thread("CHANNEL_ID", "1620834875.000400", "thumbsup")
 
-    # Ensure fetch_conversation_history is called correctly
-    mock_fetch.assert_called_once_with("CHANNEL_ID", "1620834875.000400")
-
-    # Ensure remove_reaction is called for the correct message
-    mock_remove_reaction.assert_called_once_with("CHANNEL_ID", "1620834875.000400", "thumbsup")
+    # The thread history is not fetched, tracked messages are targeted directly
+    mock_fetch.assert_not_called()
+    assert mock_remove_reaction.call_args_list == [
+        call("CHANNEL_ID", "1620834875.000400", "thumbsup"),
+        call("CHANNEL_ID", "1620834876.000500", "thumbsup"),
+    ]
 
 @pytest.mark.asyncio
 async def test_remove_reaction_from_thread_no_reaction(slack_output_handler, mocker):
-    # Mock fetch_conversation_history to return messages without reactions
-    mock_fetch = mocker.patch.object(slack_output_handler, 'fetch_conversation_history', return_value=[
-        {"ts": "1620834875.000400"}
-    ])
+    mocker.patch.object(slack_output_handler.client, 'reactions_add')
+    mocker.patch.object(slack_output_handler.client, 'reactions_remove')
+    await slack_output_handler.add_reaction("CHANNEL_ID", "1620834875.000400", "thumbsup", thread_id="1620834875.000400")
+    await slack_output_handler.remove_reaction("CHANNEL_ID", "1620834875.000400", "thumbsup", thread_id="1620834875.000400")
 
     # Mock remove_reaction (should not be called)
     mock_remove_reaction = mocker.patch.object(slack_output_handler, 'remove_reaction', new_callable=AsyncMock)
 
     await slack_output_handler.remove_reaction_from_thread("CHANNEL_ID", "1620834875.000400", "thumbsup")
 
-    # Ensure fetch_conversation_history is called correctly
-    mock_fetch.assert_called_once_with("CHANNEL_ID", "1620834875.000400")
-
-    # Ensure remove_reaction is not called as no reaction exists
+    # Ensure remove_reaction is not called as the reaction was already removed
     mock_remove_reaction.assert_not_called()
 
 def test_format_slack_message_text(slack_output_handler):
@@ -0,0 +1,59 @@
+import json
+from unittest.mock import AsyncMock
+
+import pytest
+
+from plugins.user_interactions.instant_messaging.slack.utils.slack_reaction_tracker import (
+    SlackReactionTracker,
+)
+
+
+class MockSlackConfig:
+    SLACK_REACTION_TRACKER_MAX_THREADS = 2
+    SLACK_REACTION_TRACKER_PERSIST = False
+
+class MockPersistentSlackConfig(MockSlackConfig):
+    SLACK_REACTION_TRACKER_PERSIST = True
+
+@pytest.fixture
+def tracker(mock_global_manager):
+    return SlackReactionTracker(mock_global_manager, MockSlackConfig())
+
+@pytest.fixture
+def persistent_tracker(mock_global_manager):
+    mock_global_manager.backend_internal_data_processing_dispatcher.processing = "processing"
+    mock_global_manager.backend_internal_data_processing_dispatcher.read_data_content = AsyncMock(return_value=None)
+    return SlackReactionTracker(mock_global_manager, MockPersistentSlackConfig())
+
+@pytest.mark.asyncio
+async def test_pop_reaction_returns_tracked_messages(tracker):
+    await tracker.record_added("C1", "T1", "T1", "wait")
+    await tracker.record_added("C1", "T1", "T2", "wait")
+    await tracker.record_added("C1", "T1", "T2", "done")
+    await tracker.record_removed("C1", "T1", "T1", "wait")
+
+    assert await tracker.pop_reaction("C1", "T1", "wait") == ["T2"]
+    assert await tracker.pop_reaction("C1", "T1", "wait") == []
+    assert await tracker.pop_reaction("C1", "T1", "done") == ["T2"]
+
+@pytest.mark.asyncio
+async def test_least_recently_used_threads_are_dropped(tracker):
+    await tracker.record_added("C1", "T1", "T1", "wait")
+    await tracker.record_added("C1", "T2", "T2", "wait")
+    await tracker.record_added("C1", "T3", "T3", "wait")
+
+    assert await tracker.pop_reaction("C1", "T1", "wait") == []
+    assert await tracker.pop_reaction("C1", "T3", "wait") == ["T3"]
+
+@pytest.mark.asyncio
+async def test_backend_persistence(persistent_tracker):
+    backend = persistent_tracker.backend_dispatcher
+
+    await persistent_tracker.record_added("C1", "T1", "T2", "wait")
+
+    backend.write_data_content.assert_awaited_once_with("processing", "reactions-C1-T1.json", '{"wait": ["T2"]}')
+
+    # State saved by another worker or before a restart is loaded from the backend
+    backend.read_data_content = AsyncMock(return_value=json.dumps({"wait": ["T5"]}))
+    assert await persistent_tracker.pop_reaction("C1", "T4", "wait") == ["T5"]
+    backend.remove_data_content.assert_awaited_once_with("processing", "reactions-C1-T4.json")
@@ -19,6 +19,7 @@ from plugins.user_interactions.instant_messaging.teams.teams import (
 from plugins.user_interactions.instant_messaging.teams.utils.teams_event_data import (
     TeamsEventData,
 )
+from utils.http_client.shared_http_client import DownloadLimitExceeded
 
 
 @pytest.fixture
@@ -186,12 +187,10 @@ async def test_is_duplicate_request(teams_plugin):
         'id': 'message_id'
     }
 
-    with patch.object(teams_plugin.backend_internal_data_processing_dispatcher, 'read_data_content', new_callable=AsyncMock) as mock_read_data:
-        mock_read_data.return_value = None
-        assert await teams_plugin._is_duplicate_request(event_data, 'user_id', 'channel_id', 'channel') is False
+    assert await teams_plugin._is_duplicate_request(event_data, 'user_id', 'channel_id', 'channel') is False
 
-        mock_read_data.return_value = 'Some content'
-        assert await teams_plugin._is_duplicate_request(event_data, 'user_id', 'channel_id', 'channel') is True
+    await teams_plugin.global_manager.in_flight_registry.mark_in_flight('conversation_id-message_id')
+    assert await teams_plugin._is_duplicate_request(event_data, 'user_id', 'channel_id', 'channel') is True
 
 @pytest.mark.asyncio
 async def test_send_message(teams_plugin, mock_request):
@@ -278,22 +277,40 @@ async def test_process_image_attachments(teams_plugin):
         Attachment(content_type="image/jpeg", content="data:image/jpeg;base64,base64content")
     ])
 
-    with patch('requests.get') as mock_get:
-        mock_response = MagicMock()
-        mock_response.content = b'image content'
-        mock_get.return_value = mock_response
-
-        with patch.object(teams_plugin, '_process_single_image_attachment', new_callable=AsyncMock) as mock_process:
-            mock_process.side_effect = [
-                base64.b64encode(b'image content').decode('utf-8'),
-                'base64content'
-            ]
-            result = await teams_plugin._process_image_attachments(activity)
+    with patch.object(teams_plugin, '_process_single_image_attachment', new_callable=AsyncMock) as mock_process:
+        mock_process.side_effect = [
+            base64.b64encode(b'image content').decode('utf-8'),
+            'base64content'
+        ]
+        result = await teams_plugin._process_image_attachments(activity)
 
     assert len(result) == 2
     assert result[0] == base64.b64encode(b'image content').decode('utf-8')
     assert result[1] == 'base64content'
 
+@pytest.mark.asyncio
+async def test_process_single_image_attachment_downloads_through_pipeline(teams_plugin):
+    attachment = Attachment(content_type="image/png", content_url="http://example.com/image.png")
+    teams_plugin.global_manager.image_pipeline.prepare_base64 = AsyncMock(return_value="processed")
+
+    with patch('plugins.user_interactions.instant_messaging.teams.teams.stream_download',
+               new_callable=AsyncMock, return_value=b'image content') as mock_download:
+        result = await teams_plugin._process_single_image_attachment(attachment)
+
+    assert result == "processed"
+    assert mock_download.call_args.kwargs['max_bytes'] == teams_plugin.teams_config.TEAMS_MAX_FILE_DOWNLOAD_BYTES
+    teams_plugin.global_manager.image_pipeline.prepare_base64.assert_awaited_once_with(b'image content')
+
+@pytest.mark.asyncio
+async def test_process_single_image_attachment_too_large(teams_plugin):
+    attachment = Attachment(content_type="image/png", content_url="http://example.com/image.png")
+
+    with patch('plugins.user_interactions.instant_messaging.teams.teams.stream_download',
+               new_callable=AsyncMock, side_effect=DownloadLimitExceeded("too large")):
+        result = await teams_plugin._process_single_image_attachment(attachment)
+
+    assert result is None
+
 def test_extract_user_info(teams_plugin):
     activity = Activity(
         from_property=ChannelAccount(aad_object_id='user_id', name='User Name'),
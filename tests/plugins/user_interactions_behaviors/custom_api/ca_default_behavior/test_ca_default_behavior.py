@@ -117,9 +117,25 @@ async def test_process_interaction_general_event(ca_default_behavior_plugin, glo
 
     await ca_default_behavior_plugin.process_interaction(event_data, event_origin="test_origin")
 
-    ca_default_behavior_plugin.backend_internal_data_processing_dispatcher.write_data_content.assert_awaited()
+    assert await global_manager.in_flight_registry.is_in_flight("C123-1234567890.123456")
     ca_default_behavior_plugin.backend_internal_queue_processing_dispatcher.enqueue_message.assert_awaited()
 
+@pytest.mark.asyncio
+async def test_process_interaction_duplicate_event(ca_default_behavior_plugin, global_manager, event_data):
+    event = IncomingNotificationDataBase.from_dict(event_data)
+
+    ca_default_behavior_plugin.user_interaction_dispatcher = AsyncMock()
+    ca_default_behavior_plugin.user_interaction_dispatcher.request_to_notification_data = AsyncMock(return_value=event)
+    ca_default_behavior_plugin.backend_internal_queue_processing_dispatcher = AsyncMock()
+    global_manager.in_flight_registry.mark_done = AsyncMock()
+    await global_manager.in_flight_registry.mark_in_flight("C123-1234567890.123456")
+
+    await ca_default_behavior_plugin.process_interaction(event_data, event_origin="test_origin")
+
+    ca_default_behavior_plugin.backend_internal_queue_processing_dispatcher.enqueue_message.assert_not_called()
+    ca_default_behavior_plugin.user_interaction_dispatcher.add_reaction.assert_not_called()
+    global_manager.in_flight_registry.mark_done.assert_not_called()
+
 @pytest.mark.asyncio
 async def test_begin_genai_completion(ca_default_behavior_plugin):
     event = AsyncMock(IncomingNotificationDataBase)
@@ -276,7 +292,7 @@ async def test_process_interaction_basic(ca_default_behavior_plugin, global_mana
     await ca_default_behavior_plugin.process_interaction(event_data, event_origin="test_origin")
 
     ca_default_behavior_plugin.user_interaction_dispatcher.request_to_notification_data.assert_awaited_once()
-    ca_default_behavior_plugin.backend_internal_data_processing_dispatcher.write_data_content.assert_awaited_once()
+    assert await global_manager.in_flight_registry.is_in_flight("C123-1234567890.123456")
     ca_default_behavior_plugin.backend_internal_queue_processing_dispatcher.enqueue_message.assert_awaited_once()
 
 @pytest.mark.asyncio
@@ -507,16 +523,15 @@ async def test_process_interaction_error_handling(ca_default_behavior_plugin, ev
     mock_event = IncomingNotificationDataBase.from_dict(event_data)
     ca_default_behavior_plugin.user_interaction_dispatcher.request_to_notification_data = AsyncMock(return_value=mock_event)
 
-    # Mock the backend_internal_data_processing_dispatcher to raise an exception
-    ca_default_behavior_plugin.backend_internal_data_processing_dispatcher.write_data_content = AsyncMock(side_effect=Exception("Test error"))
-
     ca_default_behavior_plugin.mark_error = AsyncMock()
 
     # Mock the necessary attributes
     ca_default_behavior_plugin.logger = MagicMock()
 
-    # Mock the global_manager and its attributes
+    # Mock the global_manager and its attributes, registering the message raises an exception
     ca_default_behavior_plugin.global_manager = MagicMock()
+    ca_default_behavior_plugin.global_manager.in_flight_registry.mark_in_flight = AsyncMock(side_effect=Exception("Test error"))
+    ca_default_behavior_plugin.global_manager.in_flight_registry.mark_done = AsyncMock()
     ca_default_behavior_plugin.global_manager.bot_config.BREAK_KEYWORD = "break"
     ca_default_behavior_plugin.global_manager.bot_config.START_KEYWORD = "start"
     ca_default_behavior_plugin.global_manager.bot_config.CLEARQUEUE_KEYWORD = "clear"
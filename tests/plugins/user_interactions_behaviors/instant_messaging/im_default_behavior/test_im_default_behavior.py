@@ -103,10 +103,39 @@ async def test_process_interaction_general_event(im_default_behavior_plugin, glo
     await im_default_behavior_plugin.process_interaction(event_data, event_origin="test_origin")
 
     # Verify that the appropriate methods were called
-    im_default_behavior_plugin.backend_internal_data_processing_dispatcher.write_data_content.assert_awaited()
+    assert await global_manager.in_flight_registry.is_in_flight("C123-1234567890.123456")
     im_default_behavior_plugin.backend_internal_queue_processing_dispatcher.enqueue_message.assert_awaited()
 
 
+@pytest.mark.asyncio
+async def test_process_interaction_duplicate_event(im_default_behavior_plugin, global_manager):
+    event_data = {
+        "timestamp": "1234567890.123456",
+        "event_label": "message",
+        "channel_id": "C123",
+        "thread_id": "thread_1",
+        "response_id": "response_1",
+        "user_name": "test_user",
+        "user_email": "test_user@example.com",
+        "user_id": "user_1",
+        "is_mention": True,
+        "text": "hello",
+        "origin_plugin_name": "test_plugin"
+    }
+    event = IncomingNotificationDataBase.from_dict(event_data)
+
+    im_default_behavior_plugin.user_interaction_dispatcher = AsyncMock()
+    im_default_behavior_plugin.user_interaction_dispatcher.request_to_notification_data = AsyncMock(return_value=event)
+    im_default_behavior_plugin.backend_internal_queue_processing_dispatcher = AsyncMock()
+    global_manager.in_flight_registry.mark_done = AsyncMock()
+    await global_manager.in_flight_registry.mark_in_flight("C123-1234567890.123456")
+
+    await im_default_behavior_plugin.process_interaction(event_data, event_origin="test_origin")
+
+    im_default_behavior_plugin.backend_internal_queue_processing_dispatcher.enqueue_message.assert_not_called()
+    im_default_behavior_plugin.user_interaction_dispatcher.add_reaction.assert_not_called()
+    global_manager.in_flight_registry.mark_done.assert_not_called()
+
 @pytest.mark.asyncio
 async def test_begin_genai_completion(im_default_behavior_plugin):
     event = AsyncMock(IncomingNotificationDataBase)
@@ -626,7 +655,7 @@ async def test_process_interaction_event_none_after_conversion(im_default_behavi
     # Assert
     im_default_behavior_plugin.logger.error.assert_called_with("IM behavior: No event data found")
     # Verify that other methods are not called
-    im_default_behavior_plugin.backend_internal_data_processing_dispatcher.write_data_content.assert_not_awaited()
+    assert len(im_default_behavior_plugin.global_manager.in_flight_registry._entries) == 0
 
 @pytest.mark.asyncio
 async def test_process_interaction_clear_keyword(im_default_behavior_plugin, global_manager):
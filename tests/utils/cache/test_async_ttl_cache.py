@@ -0,0 +1,101 @@
+import asyncio
+from unittest.mock import patch
+
+import pytest
+
+from utils.cache.async_ttl_cache import AsyncTTLCache
+
+
+def test_set_and_get():
+    cache = AsyncTTLCache(max_size=10, ttl=60)
+    cache.set("key", "value")
+
+    assert cache.get("key") == "value"
+    assert "key" in cache
+    assert cache.get("missing", "default") == "default"
+
+def test_entry_expires():
+    cache = AsyncTTLCache(max_size=10, ttl=60)
+    with patch("utils.cache.async_ttl_cache.time.monotonic", return_value=1000):
+        cache.set("key", "value")
+    with patch("utils.cache.async_ttl_cache.time.monotonic", return_value=1061):
+        assert cache.get("key") is None
+    assert len(cache) == 0
+
+def test_least_recently_used_entry_is_evicted():
+    cache = AsyncTTLCache(max_size=2, ttl=60)
+    cache.set("a", 1)
+    cache.set("b", 2)
+    cache.get("a")
+    cache.set("c", 3)
+
+    assert "a" in cache
+    assert "b" not in cache
+    assert "c" in cache
+
+def test_invalidate_and_clear():
+    cache = AsyncTTLCache(max_size=10, ttl=60)
+    cache.set("a", 1)
+    cache.set("b", 2)
+
+    cache.invalidate("a")
+    assert "a" not in cache
+
+    cache.clear()
+    assert len(cache) == 0
+
+@pytest.mark.asyncio
+async def test_get_or_load_single_flight():
+    cache = AsyncTTLCache(max_size=10, ttl=60)
+    calls = 0
+
+    async def loader():
+        nonlocal calls
+        calls += 1
+        await asyncio.sleep(0.01)
+        return "value"
+
+    results = await asyncio.gather(*(cache.get_or_load("key", loader) for _ in range(10)))
+
+    assert results == ["value"] * 10
+    assert calls == 1
+    assert cache.misses == 1
+    assert await cache.get_or_load("key", loader) == "value"
+    assert cache.hits == 1
+
+@pytest.mark.asyncio
+async def test_get_or_load_negative_result_uses_negative_ttl():
+    cache = AsyncTTLCache(max_size=10, ttl=60, negative_ttl=5)
+
+    async def loader():
+        return None
+
+    with patch("utils.cache.async_ttl_cache.time.monotonic", return_value=1000):
+        await cache.get_or_load("key", loader)
+        assert "key" in cache
+    with patch("utils.cache.async_ttl_cache.time.monotonic", return_value=1006):
+        assert "key" not in cache
+
+@pytest.mark.asyncio
+async def test_get_or_load_zero_negative_ttl_skips_caching():
+    cache = AsyncTTLCache(max_size=10, ttl=60, negative_ttl=0)
+
+    async def loader():
+        return None
+
+    await cache.get_or_load("key", loader)
+
+    assert "key" not in cache
+
+@pytest.mark.asyncio
+async def test_get_or_load_propagates_exceptions_without_caching():
+    cache = AsyncTTLCache(max_size=10, ttl=60)
+
+    async def loader():
+        raise RuntimeError("boom")
+
+    with pytest.raises(RuntimeError):
+        await cache.get_or_load("key", loader)
+
+    assert "key" not in cache
+    assert cache._in_flight == {}
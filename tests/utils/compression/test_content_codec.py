@@ -0,0 +1,51 @@
+import gzip
+from unittest.mock import MagicMock, patch
+
+import pytest
+
+from utils.compression import content_codec
+from utils.compression.content_codec import GZIP_MAGIC, ContentCodec
+
+LARGE_TEXT = '{"role": "user", "content": "' + "hello world " * 1000 + '"}'
+
+
+def test_encode_compresses_configured_containers_above_threshold():
+    codec = ContentCodec({"sessions": "gzip"}, threshold=100)
+
+    compressed = codec.encode("sessions", LARGE_TEXT)
+    assert compressed.startswith(GZIP_MAGIC)
+    assert len(compressed) < len(LARGE_TEXT) / 10
+    assert codec.decode(compressed) == LARGE_TEXT
+
+    assert codec.encode("sessions", "small") == b"small"
+    assert codec.encode("feedbacks", LARGE_TEXT) == LARGE_TEXT.encode("utf-8")
+
+
+def test_decode_reads_raw_and_compressed_content():
+    assert ContentCodec.decode("déjà vu".encode("utf-8")) == "déjà vu"
+    assert ContentCodec.decode(gzip.compress("déjà vu".encode("utf-8"))) == "déjà vu"
+    assert not ContentCodec.is_compressed(b'{"key": "value"}')
+
+
+def test_unknown_algorithm():
+    with pytest.raises(ValueError):
+        ContentCodec({"sessions": "brotli"})
+
+
+def test_zstd_falls_back_to_gzip_without_zstandard():
+    logger = MagicMock()
+    with patch.object(content_codec, "zstandard", None):
+        codec = ContentCodec({"sessions": "ZSTD"}, threshold=0, logger=logger)
+        assert codec.algorithm("sessions") == "gzip"
+        assert codec.encode("sessions", LARGE_TEXT).startswith(GZIP_MAGIC)
+        with pytest.raises(RuntimeError):
+            codec.decode(b"\x28\xb5\x2f\xfd" + b"frame")
+    logger.warning.assert_called_once()
+
+
+def test_zstd_round_trip():
+    pytest.importorskip("zstandard")
+    codec = ContentCodec({"vectors": "zstd"}, threshold=0)
+    compressed = codec.encode("vectors", LARGE_TEXT)
+    assert codec.is_compressed(compressed)
+    assert codec.decode(compressed) == LARGE_TEXT
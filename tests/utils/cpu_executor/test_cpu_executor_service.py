@@ -0,0 +1,88 @@
+import asyncio
+import io
+import time
+
+import pytest
+from pypdf import PdfWriter
+
+from utils.cpu_executor.cpu_executor_service import CpuExecutorService
+from utils.cpu_executor.document_processing import (
+    extract_pdf_text,
+    read_zip_entries,
+)
+
+
+def _add(a, b):
+    return a + b
+
+def _fail():
+    raise ValueError("boom")
+
+def _slow():
+    time.sleep(0.5)
+    return "done"
+
+
+@pytest.fixture
+def cpu_executor(mock_global_manager):
+    return mock_global_manager.cpu_executor
+
+@pytest.fixture
+def process_executor(mock_global_manager):
+    mock_global_manager.bot_config.CPU_EXECUTOR_MAX_WORKERS = 1
+    executor = CpuExecutorService(mock_global_manager)
+    yield executor
+    executor.shutdown()
+
+@pytest.mark.asyncio
+async def test_run_records_metrics(cpu_executor):
+    result = await cpu_executor.run(_add, 1, 2)
+
+    assert result == 3
+    metrics = cpu_executor.get_metrics()
+    assert metrics["jobs"] == 1
+    assert metrics["avg_queue_wait"] >= 0
+    assert metrics["avg_execution_time"] >= 0
+
+@pytest.mark.asyncio
+async def test_run_in_process_pool(process_executor):
+    assert await process_executor.run(_add, 2, 3) == 5
+    assert process_executor._pool is not None
+
+@pytest.mark.asyncio
+async def test_run_propagates_errors(cpu_executor):
+    with pytest.raises(ValueError):
+        await cpu_executor.run(_fail)
+
+    assert cpu_executor.get_metrics()["failures"] == 1
+
+@pytest.mark.asyncio
+async def test_run_times_out(cpu_executor):
+    with pytest.raises(asyncio.TimeoutError):
+        await cpu_executor.run(_slow, timeout=0.05)
+
+    assert cpu_executor.get_metrics()["timeouts"] == 1
+
+@pytest.mark.asyncio
+async def test_extract_pdf_text_keeps_page_order(cpu_executor, mocker):
+    writer = PdfWriter()
+    for _ in range(5):
+        writer.add_blank_page(width=72, height=72)
+    pdf_bytes = io.BytesIO()
+    writer.write(pdf_bytes)
+    run = mocker.spy(cpu_executor, "run")
+
+    pages = await extract_pdf_text(cpu_executor, pdf_bytes.getvalue(), pages_per_job=2)
+
+    assert len(pages) == 5
+    # One call to count the pages, then one job per range of 2 pages
+    assert run.call_count == 4
+
+def test_read_zip_entries():
+    import zipfile
+    buffer = io.BytesIO()
+    with zipfile.ZipFile(buffer, 'w') as zip_file:
+        zip_file.writestr('a.txt', 'first')
+        zip_file.writestr('b.txt', 'second')
+
+    assert read_zip_entries(buffer.getvalue()) == [('a.txt', b'first'), ('b.txt', b'second')]
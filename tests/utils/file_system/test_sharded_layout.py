@@ -0,0 +1,62 @@
+import os
+
+from utils.file_system.sharded_layout import (
+    file_path,
+    iter_files,
+    migrate_container,
+    shard_directories,
+)
+
+
+def write(path, content="content"):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, "w", encoding="utf-8") as file:
+        file.write(content)
+
+
+def test_shard_directories():
+    assert shard_directories("C1-1.txt", 0) == []
+    directories = shard_directories("C1-1.txt", 2)
+    assert len(directories) == 2 and all(len(directory) == 2 for directory in directories)
+    assert shard_directories("C1-1.txt", 2) == directories
+    assert file_path("/data/sessions", "C1-1.txt", 2) == os.path.join("/data/sessions", *directories, "C1-1.txt")
+
+
+def test_iter_files_only_yields_files_at_the_layout_depth(tmp_path):
+    container = str(tmp_path)
+    write(file_path(container, "sharded.txt", 2))
+    write(os.path.join(container, "flat.txt"))
+    write(os.path.join(container, "other", "nested.txt"))
+
+    assert [name for name, _ in iter_files(container, 2)] == ["sharded.txt"]
+    assert [name for name, _ in iter_files(container, 0)] == ["flat.txt"]
+
+
+def test_migrate_container_both_ways(tmp_path):
+    container = str(tmp_path)
+    names = [f"C1-{index}.txt" for index in range(20)]
+    for name in names:
+        write(os.path.join(container, name), name)
+    write(os.path.join(container, "other", "nested.txt"))
+
+    assert migrate_container(container, 2) == 20
+    for name in names:
+        with open(file_path(container, name, 2), encoding="utf-8") as file:
+            assert file.read() == name
+    # Running it again has nothing to move
+    assert migrate_container(container, 2) == 0
+
+    assert migrate_container(container, 0) == 20
+    assert sorted(os.listdir(container)) == sorted(names + ["other"])
+    assert os.listdir(os.path.join(container, "other")) == ["nested.txt"]
+
+
+def test_migrate_container_keeps_existing_destination(tmp_path):
+    container = str(tmp_path)
+    write(os.path.join(container, "C1-1.txt"), "flat")
+    write(file_path(container, "C1-1.txt", 1), "sharded")
+
+    assert migrate_container(container, 1) == 0
+    with open(file_path(container, "C1-1.txt", 1), encoding="utf-8") as file:
+        assert file.read() == "sharded"
+    assert os.path.exists(os.path.join(container, "C1-1.txt"))
@@ -0,0 +1,76 @@
+import asyncio
+from types import SimpleNamespace
+from unittest.mock import MagicMock, patch
+
+import pytest
+
+from utils.http_client.azure_blob_client import (
+    DELETE_BATCH_SIZE,
+    create_blob_service_client,
+    delete_blobs,
+    gather_bounded,
+    is_connection_string,
+)
+from utils.http_client.shared_http_client import close_shared_session
+
+
+def test_is_connection_string():
+    assert is_connection_string("UseDevelopmentStorage=true")
+    assert is_connection_string("DefaultEndpointsProtocol=https;AccountName=a;AccountKey=b")
+    assert not is_connection_string("https://account.blob.core.windows.net")
+
+
+@pytest.mark.asyncio
+async def test_create_blob_service_client():
+    with patch('utils.http_client.azure_blob_client.DefaultAzureCredential') as mock_credential:
+        client = create_blob_service_client("https://account.blob.core.windows.net")
+    assert client.url.startswith("https://account.blob.core.windows.net")
+    mock_credential.assert_called_once()
+
+    client = create_blob_service_client("UseDevelopmentStorage=true")
+    assert client.account_name == "devstoreaccount1"
+    await close_shared_session()
+
+
+@pytest.mark.asyncio
+async def test_gather_bounded_limits_concurrency():
+    running = 0
+    peak = 0
+
+    async def task(value):
+        nonlocal running, peak
+        running += 1
+        peak = max(peak, running)
+        await asyncio.sleep(0)
+        running -= 1
+        return value
+
+    assert await gather_bounded((task(value) for value in range(10)), limit=3) == list(range(10))
+    assert peak == 3
+
+
+@pytest.mark.asyncio
+async def test_delete_blobs_in_batches():
+    batches = []
+
+    async def fake_delete_blobs(*names, raise_on_any_failure=True):
+        batches.append(len(names))
+        if len(batches) == 2:
+            raise Exception("Batch error")
+
+        async def responses():
+            for name in names:
+                yield SimpleNamespace(status_code=404 if name == 'missing' else 202)
+
+        return responses()
+
+    container_client = SimpleNamespace(container_name='container', delete_blobs=fake_delete_blobs)
+    logger = MagicMock()
+    names = ['missing'] + [f'blob{index}' for index in range(2 * DELETE_BATCH_SIZE)]
+
+    deleted = await delete_blobs(container_client, names, logger)
+
+    assert batches == [DELETE_BATCH_SIZE, DELETE_BATCH_SIZE, 1]
+    # First batch minus the missing blob, second batch failed
+    assert deleted == DELETE_BATCH_SIZE - 1 + 1
+    logger.error.assert_called_once()
@@ -0,0 +1,78 @@
+import aiohttp
+import pytest
+import pytest_asyncio
+from aiohttp import web
+from aiohttp.test_utils import TestServer
+
+from utils.http_client.shared_http_client import (
+    DownloadBudget,
+    DownloadLimitExceeded,
+    close_shared_session,
+    get_shared_session,
+    stream_download,
+)
+
+
+@pytest_asyncio.fixture
+async def file_server():
+    async def small(request):
+        return web.Response(body=b"a" * 100)
+
+    async def large(request):
+        return web.Response(body=b"b" * 10000)
+
+    async def chunked(request):
+        response = web.StreamResponse()
+        response.enable_chunked_encoding()
+        await response.prepare(request)
+        for _ in range(10):
+            await response.write(b"c" * 1000)
+        await response.write_eof()
+        return response
+
+    async def missing(request):
+        return web.Response(status=404)
+
+    app = web.Application()
+    app.router.add_get("/small", small)
+    app.router.add_get("/large", large)
+    app.router.add_get("/chunked", chunked)
+    app.router.add_get("/missing", missing)
+    server = TestServer(app)
+    await server.start_server()
+    yield server
+    await server.close()
+    await close_shared_session()
+
+@pytest.mark.asyncio
+async def test_stream_download_returns_content(file_server):
+    content = await stream_download(str(file_server.make_url("/small")), max_bytes=1000)
+    assert content == b"a" * 100
+
+@pytest.mark.asyncio
+async def test_stream_download_rejects_announced_oversized_file(file_server):
+    with pytest.raises(DownloadLimitExceeded):
+        await stream_download(str(file_server.make_url("/large")), max_bytes=1000)
+
+@pytest.mark.asyncio
+async def test_stream_download_aborts_chunked_file_past_limit(file_server):
+    with pytest.raises(DownloadLimitExceeded):
+        await stream_download(str(file_server.make_url("/chunked")), max_bytes=2500, chunk_size=500)
+
+@pytest.mark.asyncio
+async def test_stream_download_shares_budget(file_server):
+    budget = DownloadBudget(150)
+    await stream_download(str(file_server.make_url("/small")), budget=budget)
+    assert budget.used == 100
+
+    with pytest.raises(DownloadLimitExceeded):
+        await stream_download(str(file_server.make_url("/small")), budget=budget)
+
+@pytest.mark.asyncio
+async def test_stream_download_raises_on_http_error(file_server):
+    with pytest.raises(aiohttp.ClientResponseError):
+        await stream_download(str(file_server.make_url("/missing")))
+
+@pytest.mark.asyncio
+async def test_shared_session_is_reused(file_server):
+    assert get_shared_session() is get_shared_session()
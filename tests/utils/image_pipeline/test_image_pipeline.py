@@ -0,0 +1,66 @@
+import base64
+import io
+
+import pytest
+from PIL import Image
+
+from utils.image_pipeline.image_pipeline import ImagePipeline, process_image_bytes
+
+
+def _image_bytes(size, image_format="PNG", mode="RGB"):
+    buffer = io.BytesIO()
+    Image.new(mode, size, color=(200, 100, 50) if mode == "RGB" else None).save(buffer, format=image_format)
+    return buffer.getvalue()
+
+@pytest.fixture
+def image_pipeline(mock_global_manager):
+    mock_global_manager.bot_config.IMAGE_MAX_WIDTH = 100
+    mock_global_manager.bot_config.IMAGE_MAX_HEIGHT = 100
+    mock_global_manager.bot_config.IMAGE_DETAIL_PER_MODEL = {"small-vision-model": "low"}
+    return ImagePipeline(mock_global_manager)
+
+def test_process_image_bytes_downscales_and_recompresses():
+    processed = process_image_bytes(_image_bytes((400, 200)), 100, 100, "JPEG", 80)
+
+    image = Image.open(io.BytesIO(processed))
+    assert image.size == (100, 50)
+    assert image.format == "JPEG"
+
+def test_process_image_bytes_webp_with_transparency():
+    processed = process_image_bytes(_image_bytes((50, 50), mode="RGBA"), 100, 100, "WEBP", 80)
+
+    assert Image.open(io.BytesIO(processed)).format == "WEBP"
+
+def test_process_image_bytes_keeps_smaller_original():
+    original = _image_bytes((10, 10), image_format="JPEG")
+
+    assert process_image_bytes(original, 100, 100, "JPEG", 100) == original
+
+@pytest.mark.asyncio
+async def test_prepare_base64_is_cached_by_content(image_pipeline, mocker):
+    run = mocker.spy(image_pipeline.global_manager.cpu_executor, "run")
+    image_bytes = _image_bytes((400, 400))
+
+    first = await image_pipeline.prepare_base64(image_bytes)
+    second = await image_pipeline.prepare_base64(image_bytes)
+
+    assert first == second
+    assert run.call_count == 1
+    assert Image.open(io.BytesIO(base64.b64decode(first))).size == (100, 100)
+
+@pytest.mark.asyncio
+async def test_prepare_base64_forwards_unreadable_images(image_pipeline):
+    result = await image_pipeline.prepare_base64(b"not an image")
+
+    assert base64.b64decode(result) == b"not an image"
+
+def test_get_detail_per_model(image_pipeline):
+    assert image_pipeline.get_detail("small-vision-model") == "low"
+    assert image_pipeline.get_detail("other-model") == "high"
+
+def test_to_data_url_detects_format():
+    jpeg = base64.b64encode(_image_bytes((5, 5), image_format="JPEG")).decode()
+    webp = base64.b64encode(_image_bytes((5, 5), image_format="WEBP")).decode()
+
+    assert ImagePipeline.to_data_url(jpeg).startswith("data:image/jpeg;base64,")
+    assert ImagePipeline.to_data_url(webp).startswith("data:image/webp;base64,")
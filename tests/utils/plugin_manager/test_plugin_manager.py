@@ -139,6 +139,26 @@ def test_initialize_plugins(plugin_manager):
     plugin_manager.initialize_plugins()
     mock_plugin.initialize.assert_called_once()
 
+@pytest.mark.asyncio
+async def test_startup_plugins(plugin_manager):
+    failing_plugin = MagicMock()
+    failing_plugin.startup = AsyncMock(side_effect=Exception("boom"))
+    mock_plugin = MagicMock()
+    mock_plugin.startup = AsyncMock()
+    plugin_manager.plugins = {'CATEGORY': {'SUBCATEGORY': [failing_plugin, mock_plugin]}}
+    await plugin_manager.startup_plugins()
+    mock_plugin.startup.assert_awaited_once()
+
+@pytest.mark.asyncio
+async def test_shutdown_plugins(plugin_manager):
+    failing_plugin = MagicMock()
+    failing_plugin.shutdown = AsyncMock(side_effect=Exception("boom"))
+    mock_plugin = MagicMock()
+    mock_plugin.shutdown = AsyncMock()
+    plugin_manager.plugins = {'CATEGORY': {'SUBCATEGORY': [failing_plugin, mock_plugin]}}
+    await plugin_manager.shutdown_plugins()
+    mock_plugin.shutdown.assert_awaited_once()
+
 def test_initialize_routes(plugin_manager):
     mock_app = MagicMock()
     mock_router = MagicMock()
@@ -152,6 +172,19 @@ def test_initialize_routes(plugin_manager):
         mock_router.add_api_route.assert_called_once_with('/test', mock_plugin_instance.handle_request, methods=['get'])
         mock_app.include_router.assert_called_once_with(mock_router)
 
+def test_initialize_additional_routes(plugin_manager):
+    mock_app = MagicMock()
+    mock_router = MagicMock()
+    with patch('utils.plugin_manager.plugin_manager.APIRouter', return_value=mock_router):
+        mock_plugin_instance = MagicMock()
+        mock_plugin_instance.route_methods = ['POST']
+        mock_plugin_instance.route_path = '/test'
+        stream_endpoint = MagicMock()
+        mock_plugin_instance.additional_routes = [('/test/stream/{channel_id}', stream_endpoint, ['GET'])]
+        plugin_manager.plugins = {'USER_INTERACTIONS': {'SUBCATEGORY': [mock_plugin_instance]}}
+        plugin_manager.intialize_routes(mock_app)
+        mock_router.add_api_route.assert_any_call('/test/stream/{channel_id}', stream_endpoint, methods=['get'])
+
 # Additional test to improve coverage on custom actions from plugin folders
 def test_load_custom_actions_from_plugin_folders(plugin_manager, mock_plugins):
     with patch.object(plugin_manager, 'get_plugin', return_value=None) as mock_get_plugin:
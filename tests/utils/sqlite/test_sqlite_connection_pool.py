@@ -0,0 +1,62 @@
+import asyncio
+import threading
+
+import pytest
+
+from utils.sqlite.sqlite_connection_pool import SQLiteConnectionPool
+
+
+@pytest.fixture
+def pool(tmp_path):
+    pool = SQLiteConnectionPool(str(tmp_path / "data" / "test.db"), size=2)
+    yield pool
+    pool.close()
+
+
+def test_connections_use_wal(pool):
+    assert pool.run_sync(lambda connection: connection.execute("PRAGMA journal_mode").fetchone()[0]) == "wal"
+
+
+def test_run_sync_reuses_connections(pool):
+    first = pool.run_sync(lambda connection: connection)
+    second = pool.run_sync(lambda connection: connection)
+    assert first is second
+
+
+@pytest.mark.asyncio
+async def test_run_off_the_event_loop_with_bounded_connections(pool):
+    event_loop_thread = threading.get_ident()
+    connections = set()
+    threads = set()
+
+    def use(connection):
+        connections.add(id(connection))
+        threads.add(threading.get_ident())
+        return connection.execute("SELECT 1").fetchone()[0]
+
+    assert await asyncio.gather(*(pool.run(use) for _ in range(10))) == [1] * 10
+    assert event_loop_thread not in threads
+    assert len(connections) <= 2
+
+
+def test_transaction_commits_or_rolls_back(pool):
+    pool.run_sync(lambda connection: connection.execute("CREATE TABLE items (name TEXT PRIMARY KEY)"))
+
+    def insert(connection, name, fail):
+        with pool.transaction(connection):
+            connection.execute("INSERT INTO items VALUES (?)", (name,))
+            if fail:
+                raise ValueError("rollback")
+
+    pool.run_sync(insert, "kept", False)
+    with pytest.raises(ValueError):
+        pool.run_sync(insert, "dropped", True)
+
+    assert pool.run_sync(lambda connection: connection.execute("SELECT name FROM items").fetchall()) == [("kept",)]
+
+
+def test_close_releases_connections(pool):
+    pool.run_sync(lambda connection: None)
+    pool.close()
+    # The pool opens new connections when used again
+    assert pool.run_sync(lambda connection: connection.execute("SELECT 1").fetchone()[0]) == 1
@@ -0,0 +1,143 @@
+import argparse
+import asyncio
+import json
+import logging
+import os
+import sys
+import time
+import uuid
+from types import SimpleNamespace
+
+from azure.storage.blob import BlobServiceClient
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from plugins.backend.internal_data_processing.azure_blob_storage.azure_blob_storage import (  # noqa: E402
+    AZURE_BLOB_STORAGE,
+    AzureBlobStoragePlugin,
+)
+from utils.http_client.shared_http_client import close_shared_session  # noqa: E402
+
+help_description = """
+Azure Blob Storage Backend Benchmark
+
+This script measures the throughput of the AzureBlobStoragePlugin data operations against a storage
+account, typically a local Azurite emulator, and compares it to blocking calls made one after the
+other with the synchronous BlobServiceClient, as the plugin did before moving to the asynchronous client.
+
+Start Azurite first, e.g.:
+  docker run -p 10000:10000 mcr.microsoft.com/azure-storage/azurite azurite-blob --blobHost 0.0.0.0
+
+Usage:
+  python tools/benchmark_azure_blob_storage.py [--connection-string <value>] [--operations <count>] [--blobs <count>]
+
+Arguments:
+  --connection-string  : Connection string or account URL (default: UseDevelopmentStorage=true, i.e. Azurite).
+  --operations         : Number of operations per scenario (default: 200).
+  --blobs              : Number of distinct blobs the operations are spread on (default: 20).
+"""
+
+
+def build_plugin(connection_string: str, container: str) -> AzureBlobStoragePlugin:
+    logger = logging.getLogger("benchmark")
+    config = {'PLUGIN_NAME': 'azure_blob_storage', 'AZURE_BLOB_STORAGE_CONNECTION_STRING': connection_string}
+    for name in ('SESSIONS', 'FEEDBACKS', 'CONCATENATE', 'PROMPTS', 'COSTS', 'PROCESSING', 'ABORT', 'VECTORS',
+                 'CUSTOM_ACTIONS', 'SUBPROMPTS', 'CHAINOFTHOUGHTS'):
+        config[f'AZURE_BLOB_STORAGE_{name}_CONTAINER'] = container
+    global_manager = SimpleNamespace(
+        logger=logger, plugin_manager=None,
+        config_manager=SimpleNamespace(config_model=SimpleNamespace(PLUGINS=SimpleNamespace(BACKEND=SimpleNamespace(
+            INTERNAL_DATA_PROCESSING={AZURE_BLOB_STORAGE: config})))))
+    plugin = AzureBlobStoragePlugin(global_manager)
+    plugin.initialize()
+    return plugin
+
+
+def run_blocking(client: BlobServiceClient, container: str, operations: int, blobs: int):
+    """Same requests as the plugin, made one at a time as blocking calls."""
+    timings = {}
+    started = time.perf_counter()
+    for index in range(operations):
+        client.get_blob_client(container, f"blocking-{index % blobs}.json").upload_blob(b'[]', overwrite=True)
+    timings['write_data_content'] = time.perf_counter() - started
+
+    started = time.perf_counter()
+    for index in range(operations):
+        client.get_blob_client(container, f"blocking-{index % blobs}.json").download_blob().readall()
+    timings['read_data_content'] = time.perf_counter() - started
+
+    started = time.perf_counter()
+    for index in range(operations):
+        blob_client = client.get_blob_client(container, f"blocking-{index % blobs}.json")
+        session = json.loads(blob_client.download_blob().readall())
+        session.append({"role": "user", "content": f"message {index}"})
+        blob_client.upload_blob(json.dumps(session), overwrite=True)
+    timings['update_session'] = time.perf_counter() - started
+    return timings
+
+
+async def run_async(plugin: AzureBlobStoragePlugin, container: str, operations: int, blobs: int):
+    timings = {}
+    started = time.perf_counter()
+    await asyncio.gather(*(
+        plugin.write_data_content(container, f"async-{index % blobs}.json", '[]') for index in range(operations)))
+    timings['write_data_content'] = time.perf_counter() - started
+
+    started = time.perf_counter()
+    await asyncio.gather(*(
+        plugin.read_data_content(container, f"async-{index % blobs}.json") for index in range(operations)))
+    timings['read_data_content'] = time.perf_counter() - started
+
+    started = time.perf_counter()
+    await asyncio.gather(*(
+        plugin.update_session(container, f"async-{index % blobs}.json", 'user', f"message {index}")
+        for index in range(operations)))
+    timings['update_session'] = time.perf_counter() - started
+
+    # Concurrent updates of the same blob are serialized by the ETag conditions, none is lost
+    messages = 0
+    for index in range(blobs):
+        messages += len(json.loads(await plugin.read_data_content(container, f"async-{index}.json")))
+    timings['lost_updates'] = operations - messages
+
+    started = time.perf_counter()
+    await plugin.clear_container(container)
+    timings['clear_container'] = time.perf_counter() - started
+    return timings
+
+
+async def benchmark(args) -> dict:
+    container = f"benchmark-{uuid.uuid4().hex[:8]}"
+    plugin = build_plugin(args.connection_string, container)
+    await plugin.create_container(container)
+    try:
+        blocking_client = plugin.sync_blob_service_client
+        blocking = await asyncio.to_thread(run_blocking, blocking_client, container, args.operations, args.blobs)
+        concurrent = await run_async(plugin, container, args.operations, args.blobs)
+    finally:
+        await plugin.blob_service_client.delete_container(container)
+        await plugin.shutdown()
+        await close_shared_session()
+    return {'blocking': blocking, 'async': concurrent}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=help_description, formatter_class=argparse.RawTextHelpFormatter)
+    parser.add_argument('--connection-string', default='UseDevelopmentStorage=true')
+    parser.add_argument('--operations', type=int, default=200)
+    parser.add_argument('--blobs', type=int, default=20)
+    args = parser.parse_args()
+
+    results = asyncio.run(benchmark(args))
+    print(f"{args.operations} operations on {args.blobs} blobs")
+    print(f"{'operation':<22}{'blocking ops/s':>16}{'async ops/s':>14}")
+    for operation in ('write_data_content', 'read_data_content', 'update_session'):
+        blocking = args.operations / results['blocking'][operation]
+        concurrent = args.operations / results['async'][operation]
+        print(f"{operation:<22}{blocking:>16.0f}{concurrent:>14.0f}")
+    print(f"async clear_container: {results['async']['clear_container']:.2f}s, "
+          f"lost session updates: {results['async']['lost_updates']}")
+
+
+if __name__ == '__main__':
+    main()
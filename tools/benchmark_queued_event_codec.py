@@ -0,0 +1,99 @@
+import argparse
+import json
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from core.event_processing.queued_event_codec import QueuedEventCodec  # noqa: E402
+from core.user_interactions.incoming_notification_data_base import (  # noqa: E402
+    IncomingNotificationDataBase,
+)
+
+help_description = """
+Queued Event Codec Benchmark
+
+This script measures how fast the events of the user interaction events queue are encoded and decoded,
+comparing the QueuedEventCodec (with orjson when installed, and with the standard json module)
+to the previous make_serializable + json.dumps serialization.
+
+Usage:
+  python tools/benchmark_queued_event_codec.py [--iterations <count>] [--image-size <bytes>] [--images <count>]
+
+Arguments:
+  --iterations         : Number of events encoded and decoded per serializer (default: 2000).
+  --image-size         : Size in bytes of each base64 image attached to the event (default: 200000).
+  --images             : Number of images attached to the event (default: 1, 0 for a text only event).
+"""
+
+
+def make_serializable(obj):
+    """Serialization used by the events queue before the QueuedEventCodec, kept as the benchmark baseline."""
+    if isinstance(obj, (str, int, float, bool)) or obj is None:
+        return obj
+    elif isinstance(obj, dict):
+        return {k: make_serializable(v) for k, v in obj.items()}
+    elif isinstance(obj, list):
+        return [make_serializable(item) for item in obj]
+    elif isinstance(obj, IncomingNotificationDataBase):
+        return obj.to_dict()
+    elif hasattr(obj, '__dict__'):
+        return {k: make_serializable(v) for k, v in obj.__dict__.items()}
+    else:
+        return str(obj)
+
+
+def build_event(image_size: int, image_count: int) -> dict:
+    notification = IncomingNotificationDataBase(
+        timestamp='1700000000.000100', event_label='message', channel_id='C0123456', thread_id='1700000000.000100',
+        response_id='1700000000.000100', is_mention=True, text='Summarize the attached document please. ' * 20,
+        origin_plugin_name='slack', user_name='user', user_email='user@example.com', user_id='U0123456',
+        images=['A' * image_size for _ in range(image_count)],
+        raw_data={'blocks': [{'type': 'rich_text', 'elements': [{'type': 'text', 'text': 'hello'}] * 20}]})
+    return {
+        'guid': 'benchmark',
+        'event_type': 'send_message',
+        'message_id': '1700000000.000100',
+        'full_message_id': 'C0123456_1700000000.000100_1700000000.000100_benchmark',
+        'method_params': {'event': notification, 'message': 'Processing your request...', 'is_internal': False},
+    }
+
+
+def measure(encode, decode, event: dict, iterations: int):
+    started = time.perf_counter()
+    for _ in range(iterations):
+        encoded = encode(event)
+    encode_time = time.perf_counter() - started
+    started = time.perf_counter()
+    for _ in range(iterations):
+        decode(encoded)
+    decode_time = time.perf_counter() - started
+    size = len(encoded[0] if isinstance(encoded, tuple) else encoded)
+    return encode_time, decode_time, size
+
+
+def main():
+    parser = argparse.ArgumentParser(description=help_description, formatter_class=argparse.RawTextHelpFormatter)
+    parser.add_argument('--iterations', type=int, default=2000)
+    parser.add_argument('--image-size', type=int, default=200000)
+    parser.add_argument('--images', type=int, default=1)
+    args = parser.parse_args()
+
+    event = build_event(args.image_size, args.images)
+    serializers = {
+        'make_serializable + json': (lambda data: json.dumps(make_serializable(data)), json.loads),
+    }
+    for use_fast_json in (False, True):
+        codec = QueuedEventCodec(use_fast_json=use_fast_json)
+        serializers[f'codec ({codec.json_backend})'] = (codec.encode, lambda encoded, codec=codec: codec.decode(encoded[0]))
+
+    print(f"{args.iterations} events, {args.images} image(s) of {args.image_size} bytes")
+    print(f"{'serializer':<28}{'encode/s':>12}{'decode/s':>12}{'event bytes':>14}")
+    for name, (encode, decode) in serializers.items():
+        encode_time, decode_time, size = measure(encode, decode, event, args.iterations)
+        print(f"{name:<28}{args.iterations / encode_time:>12.0f}{args.iterations / decode_time:>12.0f}{size:>14}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,51 @@
+import argparse
+import logging
+import os
+import sys
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from utils.file_system.sharded_layout import migrate_container  # noqa: E402
+
+help_description = """
+File System Layout Migration
+
+This script moves the files of file_system data containers to the directory layout selected by
+FILE_SYSTEM_SHARD_LEVELS: flat (0) or spread over levels of hash-named subdirectories (1 or more).
+Containers can be migrated in either direction and the script can be run again safely.
+Stop the bot before migrating, and set FILE_SYSTEM_SHARD_LEVELS to the same value afterwards.
+
+Only list data containers: the queue directories of the file_system_queue plugin stay flat.
+
+Usage:
+  python tools/migrate_file_system_layout.py --directory <root_directory> --levels <levels> --containers <container1> <container2> ...
+
+Arguments:
+  --directory          : FILE_SYSTEM_DIRECTORY of the file_system plugin (required).
+  --levels             : Number of shard directory levels of the target layout (default: 2, 0 for flat).
+  --containers         : Names of the containers to migrate (required), e.g. sessions processing abort.
+"""
+
+
+def main():
+    parser = argparse.ArgumentParser(description=help_description, formatter_class=argparse.RawTextHelpFormatter)
+    parser.add_argument('--directory', required=True)
+    parser.add_argument('--levels', type=int, default=2)
+    parser.add_argument('--containers', nargs='+', required=True)
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format='%(message)s')
+    logger = logging.getLogger(__name__)
+
+    total_moved = 0
+    for container in args.containers:
+        container_path = os.path.join(args.directory, container)
+        if not os.path.isdir(container_path):
+            logger.warning(f"Container {container_path} does not exist, skipping")
+            continue
+        total_moved += migrate_container(container_path, args.levels, logger)
+    logger.info(f"Moved {total_moved} files in total")
+
+
+if __name__ == '__main__':
+    main()
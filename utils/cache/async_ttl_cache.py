@@ -0,0 +1,99 @@
+import asyncio
+import time
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Hashable, Optional
+
+
+class AsyncTTLCache:
+    """
+    Bounded in-memory cache with per-entry expiry, meant to sit in front of async lookups.
+
+    Concurrent `get_or_load` calls for the same key share a single in-flight loader call
+    (single-flight), so a burst of identical lookups results in one upstream request.
+    Results flagged as negative are kept for `negative_ttl` seconds instead of `ttl`.
+    When `max_size` is reached, the least recently used entry is evicted.
+    """
+
+    def __init__(self, max_size: int = 1000, ttl: float = 300, negative_ttl: Optional[float] = None):
+        self.max_size = max_size
+        self.ttl = ttl
+        self.negative_ttl = ttl if negative_ttl is None else negative_ttl
+        self._entries: "OrderedDict[Hashable, tuple]" = OrderedDict()
+        self._in_flight = {}
+        self.hits = 0
+        self.misses = 0
+
+    def __len__(self):
+        return len(self._entries)
+
+    def __contains__(self, key):
+        found, _ = self._lookup(key, count=False)
+        return found
+
+    def _lookup(self, key, count=True):
+        entry = self._entries.get(key)
+        if entry is None:
+            return False, None
+        expires_at, value = entry
+        if expires_at <= time.monotonic():
+            del self._entries[key]
+            return False, None
+        self._entries.move_to_end(key)
+        if count:
+            self.hits += 1
+        return True, value
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        found, value = self._lookup(key)
+        return value if found else default
+
+    def set(self, key: Hashable, value: Any, ttl: Optional[float] = None) -> None:
+        ttl = self.ttl if ttl is None else ttl
+        if ttl <= 0 or self.max_size <= 0:
+            return
+        self._entries[key] = (time.monotonic() + ttl, value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_size:
+            self._entries.popitem(last=False)
+
+    def invalidate(self, key: Hashable) -> None:
+        self._entries.pop(key, None)
+
+    def clear(self) -> None:
+        self._entries.clear()
+
+    async def get_or_load(self, key: Hashable, loader: Callable[[], Awaitable[Any]],
+                          is_negative: Optional[Callable[[Any], bool]] = None) -> Any:
+        """
+        Return the cached value for `key`, or await `loader()` to produce it.
+
+        :param key: Cache key
+        :param loader: Zero-argument coroutine function fetching the value on a miss
+        :param is_negative: Predicate flagging negative results; defaults to `value is None`
+        """
+        found, value = self._lookup(key)
+        if found:
+            return value
+
+        task = self._in_flight.get(key)
+        if task is None:
+            self.misses += 1
+            task = asyncio.ensure_future(self._load(key, loader, is_negative))
+            self._in_flight[key] = task
+            task.add_done_callback(lambda done, k=key: self._on_load_done(k, done))
+
+        # Shield the shared load so a cancelled caller does not cancel it for the others
+        return await asyncio.shield(task)
+
+    async def _load(self, key, loader, is_negative):
+        value = await loader()
+        negative = is_negative(value) if is_negative is not None else value is None
+        self.set(key, value, ttl=self.negative_ttl if negative else self.ttl)
+        return value
+
+    def _on_load_done(self, key, task):
+        if self._in_flight.get(key) is task:
+            del self._in_flight[key]
+        if not task.cancelled():
+            # Mark the exception as retrieved when every waiter went away
+            task.exception()
@@ -0,0 +1,68 @@
+import gzip
+from typing import Dict, Optional
+
+try:
+    import zstandard
+except ImportError:  # zstandard is optional, containers configured for zstd use gzip without it
+    zstandard = None
+
+GZIP = "gzip"
+ZSTD = "zstd"
+GZIP_MAGIC = b"\x1f\x8b"
+ZSTD_MAGIC = b"\x28\xb5\x2f\xfd"
+GZIP_LEVEL = 6
+ZSTD_LEVEL = 3
+# Content smaller than this is stored raw: compression would barely save anything
+DEFAULT_COMPRESSION_THRESHOLD = 4096
+
+
+class ContentCodec:
+    """
+    Encodes the text of the data files for storage, compressing it with the algorithm configured for its
+    container (gzip or zstd) when it is at least `threshold` bytes long.
+
+    Compressed content starts with the magic bytes of its format, which can never start valid UTF-8
+    text, so `decode` reads compressed and raw content alike: compression can be enabled, changed or
+    disabled for a container without migrating what it already holds.
+    """
+
+    def __init__(self, algorithms: Optional[Dict[str, str]] = None, threshold: int = DEFAULT_COMPRESSION_THRESHOLD,
+                 logger=None):
+        self.threshold = threshold
+        self.algorithms: Dict[str, str] = {}
+        for container, algorithm in (algorithms or {}).items():
+            algorithm = algorithm.lower()
+            if algorithm not in (GZIP, ZSTD):
+                raise ValueError(f"Unknown compression '{algorithm}' for container {container}, use gzip or zstd")
+            if algorithm == ZSTD and zstandard is None:
+                if logger:
+                    logger.warning(f"zstandard is not installed, container {container} is compressed with gzip")
+                algorithm = GZIP
+            self.algorithms[container] = algorithm
+
+    def algorithm(self, container: str) -> Optional[str]:
+        return self.algorithms.get(container)
+
+    def encode(self, container: str, text: str) -> bytes:
+        data = text.encode('utf-8')
+        algorithm = self.algorithms.get(container)
+        if algorithm is None or len(data) < self.threshold:
+            return data
+        if algorithm == ZSTD:
+            return zstandard.ZstdCompressor(level=ZSTD_LEVEL).compress(data)
+        return gzip.compress(data, compresslevel=GZIP_LEVEL, mtime=0)
+
+    @staticmethod
+    def is_compressed(data: bytes) -> bool:
+        return data.startswith(GZIP_MAGIC) or data.startswith(ZSTD_MAGIC)
+
+    @staticmethod
+    def decode(data: bytes) -> str:
+        if data.startswith(GZIP_MAGIC):
+            data = gzip.decompress(data)
+        elif data.startswith(ZSTD_MAGIC):
+            if zstandard is None:
+                raise RuntimeError("Content is compressed with zstd but zstandard is not installed")
+            # The frame written by ZstdCompressor.compress records its size
+            data = zstandard.ZstdDecompressor().decompress(data)
+        return data.decode('utf-8')
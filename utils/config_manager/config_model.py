@@ -92,6 +92,67 @@ class BotConfig(BaseModel):
 
     # Specify if the bot uses the user interaction events queue.
     ACTIVATE_USER_INTERACTION_EVENTS_QUEUING: bool
+    # Images and file contents of a queued event larger than this (in bytes) are stored apart from the event.
+    QUEUE_EVENT_INLINE_MAX_BYTES: int = 65536
+    # Encode queued events with orjson when it is installed.
+    QUEUE_EVENT_FAST_JSON: bool = True
+    # Replay at startup the queued events left in the backend by a previous run, before accepting requests.
+    QUEUE_RECOVERY_ON_STARTUP: bool = True
+    # Number of (channel, thread) queues replayed at the same time during the startup recovery.
+    QUEUE_RECOVERY_MAX_CONCURRENT_GROUPS: int = 10
+    # Only events queued more than this many seconds ago are recovered, younger ones may belong to another live worker.
+    QUEUE_RECOVERY_MIN_EVENT_AGE: int = 120
+    # Seconds the startup recovery may run, keep below the gunicorn worker timeout. Events not replayed stay in the backend.
+    QUEUE_RECOVERY_TIMEOUT: int = 20
+
+    # Number of worker processes used for CPU-bound work (PDF, ZIP and image processing). 0 runs it in a thread instead.
+    CPU_EXECUTOR_MAX_WORKERS: int = 2
+
+    # Maximum time in seconds a single CPU-bound job may take before it is abandoned.
+    CPU_EXECUTOR_JOB_TIMEOUT: int = 120
+
+    # Images larger than these dimensions are downscaled before being sent to vision models.
+    IMAGE_MAX_WIDTH: int = 2048
+    IMAGE_MAX_HEIGHT: int = 2048
+
+    # Format ("JPEG" or "WEBP") and quality (1-100) used to recompress images sent to vision models.
+    IMAGE_OUTPUT_FORMAT: str = "JPEG"
+    IMAGE_QUALITY: int = 85
+
+    # Detail level ("low", "high" or "auto") requested from vision models, with optional overrides per model name.
+    IMAGE_DETAIL: str = "high"
+    IMAGE_DETAIL_PER_MODEL: Dict[str, str] = {}
+
+    # Processed images are cached by content hash to avoid processing the same image twice.
+    IMAGE_CACHE_MAX_SIZE: int = 64
+    IMAGE_CACHE_TTL: int = 3600
+
+    # Seconds a message stays registered as processed, duplicated notifications received meanwhile are discarded.
+    IN_FLIGHT_TTL: int = 600
+
+    # Also write processing markers to the backend, needed when several workers receive notifications.
+    IN_FLIGHT_BACKEND_MIRROR: bool = False
+
+    # Remove every processing marker left in the backend at startup (markers were never removed by older versions).
+    IN_FLIGHT_PURGE_BACKEND_MARKERS_ON_STARTUP: bool = False
+
+    # Maximum number of user requests processed at the same time, further requests wait in the pending queue.
+    TASK_SUPERVISOR_MAX_CONCURRENT: int = 50
+
+    # Maximum number of user requests of a single channel processed at the same time.
+    TASK_SUPERVISOR_MAX_CONCURRENT_PER_CHANNEL: int = 5
+
+    # Maximum number of user requests waiting to be processed, requests beyond are refused with a 429/503.
+    TASK_SUPERVISOR_MAX_PENDING: int = 500
+
+    # Seconds the application waits at shutdown for the requests being processed to complete.
+    SHUTDOWN_DRAIN_TIMEOUT: int = 25
+
+    # Reaction updates of a message received within this delay (ms) are merged into a single add/remove diff.
+    REACTION_DEBOUNCE_MS: int = 300
+
+    # Number of messages whose reaction state is kept in memory.
+    REACTION_STATE_MAX_MESSAGES: int = 1000
 
 class LocalLogging(BaseModel):
     PLUGIN_NAME: str
@@ -0,0 +1,110 @@
+import asyncio
+import time
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Any, Callable, Optional
+
+
+def _timed_call(func: Callable, submitted_at: float, *args):
+    # Runs in the worker: report when the job actually started so the caller can split queue wait from execution
+    started_at = time.time()
+    result = func(*args)
+    return result, started_at - submitted_at, time.time() - started_at
+
+
+class CpuExecutorMetrics:
+    def __init__(self):
+        self.jobs = 0
+        self.failures = 0
+        self.timeouts = 0
+        self.total_queue_wait = 0.0
+        self.max_queue_wait = 0.0
+        self.total_execution_time = 0.0
+        self.max_execution_time = 0.0
+
+    def record(self, queue_wait: float, execution_time: float):
+        self.jobs += 1
+        self.total_queue_wait += queue_wait
+        self.max_queue_wait = max(self.max_queue_wait, queue_wait)
+        self.total_execution_time += execution_time
+        self.max_execution_time = max(self.max_execution_time, execution_time)
+
+    def to_dict(self):
+        completed = self.jobs or 1
+        return {
+            "jobs": self.jobs,
+            "failures": self.failures,
+            "timeouts": self.timeouts,
+            "avg_queue_wait": self.total_queue_wait / completed,
+            "max_queue_wait": self.max_queue_wait,
+            "avg_execution_time": self.total_execution_time / completed,
+            "max_execution_time": self.max_execution_time,
+        }
+
+
+class CpuExecutorService:
+    """
+    Shared executor for CPU-bound work (PDF parsing, archive extraction, image processing)
+    that must not run on the event loop thread.
+
+    Jobs run in a process pool sized by BOT_CONFIG.CPU_EXECUTOR_MAX_WORKERS, created on first use.
+    With CPU_EXECUTOR_MAX_WORKERS set to 0, jobs run in the default thread executor instead.
+    Submitted functions and their arguments must be picklable when the process pool is used.
+    """
+
+    def __init__(self, global_manager):
+        from core.global_manager import GlobalManager
+        self.global_manager: GlobalManager = global_manager
+        self.logger = global_manager.logger
+        self.max_workers = global_manager.bot_config.CPU_EXECUTOR_MAX_WORKERS
+        self.job_timeout = global_manager.bot_config.CPU_EXECUTOR_JOB_TIMEOUT
+        self.metrics = CpuExecutorMetrics()
+        self._pool: Optional[ProcessPoolExecutor] = None
+
+    def _get_pool(self) -> Optional[ProcessPoolExecutor]:
+        if self.max_workers <= 0:
+            return None
+        if self._pool is None:
+            self.logger.info(f"Starting CPU executor process pool with {self.max_workers} workers")
+            self._pool = ProcessPoolExecutor(max_workers=self.max_workers)
+        return self._pool
+
+    async def run(self, func: Callable, *args, timeout: Optional[float] = None) -> Any:
+        """
+        Run `func(*args)` off the event loop and return its result.
+
+        :param timeout: Seconds to wait for the job, defaults to CPU_EXECUTOR_JOB_TIMEOUT
+        :raises asyncio.TimeoutError: if the job did not complete in time
+        """
+        timeout = self.job_timeout if timeout is None else timeout
+        loop = asyncio.get_running_loop()
+        pool = self._get_pool()
+        future = loop.run_in_executor(pool, _timed_call, func, time.time(), *args)
+
+        try:
+            result, queue_wait, execution_time = await asyncio.wait_for(future, timeout=timeout)
+        except asyncio.TimeoutError:
+            self.metrics.timeouts += 1
+            self.logger.error(f"CPU job {getattr(func, '__name__', func)} timed out after {timeout}s")
+            raise
+        except BrokenProcessPool:
+            self.metrics.failures += 1
+            self.logger.error("CPU executor process pool is broken, it will be recreated on next use")
+            self._pool = None
+            raise
+        except Exception:
+            self.metrics.failures += 1
+            raise
+
+        self.metrics.record(queue_wait, execution_time)
+        self.logger.debug(
+            f"CPU job {getattr(func, '__name__', func)} waited {queue_wait:.3f}s in queue, ran {execution_time:.3f}s")
+        return result
+
+    def get_metrics(self):
+        return self.metrics.to_dict()
+
+    def shutdown(self, wait: bool = True):
+        if self._pool is not None:
+            self._pool.shutdown(wait=wait, cancel_futures=True)
+            self._pool = None
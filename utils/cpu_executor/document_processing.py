@@ -0,0 +1,53 @@
+import asyncio
+import io
+import math
+import re
+import zipfile
+from typing import List, Tuple
+
+from bs4 import BeautifulSoup
+from pypdf import PdfReader
+
+# Below this number of pages a PDF is extracted by a single job, parsing it again in each worker would cost more
+PDF_PAGES_PER_JOB = 20
+
+
+def count_pdf_pages(pdf_bytes: bytes) -> int:
+    return len(PdfReader(io.BytesIO(pdf_bytes)).pages)
+
+
+def extract_pdf_pages(pdf_bytes: bytes, start: int, end: int) -> List[str]:
+    """Extract the text of pages [start, end) of a PDF."""
+    pdf_reader = PdfReader(io.BytesIO(pdf_bytes))
+    return [pdf_reader.pages[page_num].extract_text() for page_num in range(start, min(end, len(pdf_reader.pages)))]
+
+
+async def extract_pdf_text(cpu_executor, pdf_bytes: bytes, pages_per_job: int = PDF_PAGES_PER_JOB) -> List[str]:
+    """
+    Extract the text of every page of a PDF on the CPU executor, page ranges being extracted in parallel.
+    Returns one string per page, in page order.
+    """
+    page_count = await cpu_executor.run(count_pdf_pages, pdf_bytes)
+    job_count = max(1, math.ceil(page_count / pages_per_job))
+    chunks = await asyncio.gather(*(
+        cpu_executor.run(extract_pdf_pages, pdf_bytes, index * pages_per_job, (index + 1) * pages_per_job)
+        for index in range(job_count)
+    ))
+    return [page_text for chunk in chunks for page_text in chunk]
+
+
+def read_zip_entries(zip_bytes: bytes) -> List[Tuple[str, bytes]]:
+    """Decompress every file of a zip archive, returned as (filename, content) pairs."""
+    entries = []
+    with zipfile.ZipFile(io.BytesIO(zip_bytes), 'r') as zip_ref:
+        for zip_info in zip_ref.infolist():
+            with zip_ref.open(zip_info) as file_in_zip:
+                entries.append((zip_info.filename, file_in_zip.read()))
+    return entries
+
+
+def extract_html_text(html_bytes: bytes) -> str:
+    """Visible text of an HTML page, with line breaks and repeated spaces collapsed."""
+    content = BeautifulSoup(html_bytes, 'html.parser').get_text()
+    content = content.replace('\n', '')
+    return re.sub(' +', ' ', content)
@@ -0,0 +1,71 @@
+import hashlib
+import os
+from typing import Iterator, List, Tuple
+
+# Hex characters of the file name hash per directory level: 256 subdirectories per level
+SHARD_WIDTH = 2
+
+
+def shard_directories(file_name: str, levels: int) -> List[str]:
+    """Subdirectories holding `file_name` in a layout with `levels` levels, none for a flat layout."""
+    if levels <= 0:
+        return []
+    digest = hashlib.md5(file_name.encode('utf-8'), usedforsecurity=False).hexdigest()
+    return [digest[level * SHARD_WIDTH:(level + 1) * SHARD_WIDTH] for level in range(levels)]
+
+
+def file_path(container_path: str, file_name: str, levels: int) -> str:
+    return os.path.join(container_path, *shard_directories(file_name, levels), file_name)
+
+
+def is_shard_directory(name: str) -> bool:
+    return len(name) == SHARD_WIDTH and all(character in '0123456789abcdef' for character in name)
+
+
+def iter_files(container_path: str, levels: int) -> Iterator[Tuple[str, str]]:
+    """
+    Yields the name and path of the files stored in a container with `levels` levels of shard
+    directories; files at another depth are not part of the layout and are skipped.
+    """
+    with os.scandir(container_path) as entries:
+        for entry in entries:
+            if levels <= 0:
+                if entry.is_file():
+                    yield entry.name, entry.path
+            elif entry.is_dir() and is_shard_directory(entry.name):
+                yield from iter_files(entry.path, levels - 1)
+
+
+def migrate_container(container_path: str, levels: int, logger=None) -> int:
+    """
+    Moves the files of a container, whether flat or sharded with any number of levels, to their
+    place in a layout with `levels` levels, then removes the shard directories left empty.
+    Subdirectories that are not shard directories are left untouched. Returns the number of files moved.
+    """
+    files = []
+    for directory, subdirectories, names in os.walk(container_path):
+        # Only descend into shard directories
+        subdirectories[:] = [name for name in subdirectories if is_shard_directory(name)]
+        files.extend((name, os.path.join(directory, name)) for name in names)
+
+    moved = 0
+    for name, source in files:
+        destination = file_path(container_path, name, levels)
+        if destination == source:
+            continue
+        if os.path.exists(destination):
+            if logger:
+                logger.warning(f"Not moving {source}: {destination} already exists")
+            continue
+        os.makedirs(os.path.dirname(destination), exist_ok=True)
+        os.replace(source, destination)
+        moved += 1
+
+    for directory, _, _ in os.walk(container_path, topdown=False):
+        relative_parts = os.path.relpath(directory, container_path).split(os.sep)
+        if directory != container_path and all(map(is_shard_directory, relative_parts)) and not os.listdir(directory):
+            os.rmdir(directory)
+
+    if logger:
+        logger.info(f"Moved {moved} files of {container_path} to a layout with {levels} shard levels")
+    return moved
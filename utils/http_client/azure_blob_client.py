@@ -0,0 +1,60 @@
+import asyncio
+from typing import Awaitable, Iterable, List
+
+from azure.core.pipeline.transport import AioHttpTransport
+from azure.identity.aio import DefaultAzureCredential
+from azure.storage.blob.aio import BlobServiceClient, ContainerClient
+
+from utils.http_client.shared_http_client import get_shared_session
+
+# Maximum number of sub-requests of a blob batch request
+DELETE_BATCH_SIZE = 256
+# Maximum number of blob requests sent at the same time by a single operation
+MAX_CONCURRENT_REQUESTS = 16
+
+
+def is_connection_string(connection: str) -> bool:
+    return "AccountKey=" in connection or "UseDevelopmentStorage=true" in connection
+
+
+def create_blob_service_client(connection: str) -> BlobServiceClient:
+    """
+    Create an asynchronous BlobServiceClient whose HTTP transport is the shared aiohttp session,
+    so its connections are pooled with the other clients of the event loop.
+
+    `connection` is either an account URL, used with the default Azure credential, or a full
+    connection string (e.g. "UseDevelopmentStorage=true" for Azurite).
+    """
+    transport = AioHttpTransport(session=get_shared_session(), session_owner=False)
+    if is_connection_string(connection):
+        return BlobServiceClient.from_connection_string(connection, transport=transport)
+    return BlobServiceClient(account_url=connection, credential=DefaultAzureCredential(), transport=transport)
+
+
+async def gather_bounded(coroutines: Iterable[Awaitable], limit: int = MAX_CONCURRENT_REQUESTS) -> list:
+    """Run the coroutines concurrently, at most `limit` at a time, and return their results in order."""
+    semaphore = asyncio.Semaphore(limit)
+
+    async def run(coroutine):
+        async with semaphore:
+            return await coroutine
+
+    return await asyncio.gather(*(run(coroutine) for coroutine in coroutines))
+
+
+async def delete_blobs(container_client: ContainerClient, blob_names: List[str], logger) -> int:
+    """
+    Delete blobs with concurrent blob batch requests of up to DELETE_BATCH_SIZE blobs each,
+    and return how many were deleted. A failed batch is logged and counted as nothing deleted.
+    """
+    batches = [blob_names[start:start + DELETE_BATCH_SIZE] for start in range(0, len(blob_names), DELETE_BATCH_SIZE)]
+
+    async def delete_batch(batch: List[str]) -> int:
+        try:
+            responses = await container_client.delete_blobs(*batch, raise_on_any_failure=False)
+            return sum([1 async for response in responses if response.status_code in (200, 202)])
+        except Exception as e:
+            logger.error(f"Failed to delete {len(batch)} blobs from container '{container_client.container_name}': {str(e)}")
+            return 0
+
+    return sum(await gather_bounded(delete_batch(batch) for batch in batches))
@@ -0,0 +1,81 @@
+import asyncio
+from typing import Dict, Optional
+
+import aiohttp
+
+DEFAULT_CHUNK_SIZE = 64 * 1024
+
+_session: Optional[aiohttp.ClientSession] = None
+_session_loop: Optional[asyncio.AbstractEventLoop] = None
+
+
+class DownloadLimitExceeded(Exception):
+    """Raised when a download goes past its per-file or per-message byte limit."""
+
+
+class DownloadBudget:
+    """
+    Byte budget shared by several downloads, e.g. all the attachments of one message.
+    Downloads running concurrently consume the same budget as chunks arrive.
+    """
+
+    def __init__(self, max_bytes: Optional[int]):
+        self.max_bytes = max_bytes
+        self.used = 0
+
+    def consume(self, size: int):
+        self.used += size
+        if self.max_bytes is not None and self.used > self.max_bytes:
+            raise DownloadLimitExceeded(f"Download budget of {self.max_bytes} bytes exceeded")
+
+
+def get_shared_session() -> aiohttp.ClientSession:
+    """
+    Return the process-wide aiohttp session, creating it on first use.
+    A new session is created if the previous one was closed or belongs to another event loop.
+    """
+    global _session, _session_loop
+    loop = asyncio.get_running_loop()
+    if _session is None or _session.closed or _session_loop is not loop:
+        _session = aiohttp.ClientSession()
+        _session_loop = loop
+    return _session
+
+
+async def close_shared_session():
+    global _session, _session_loop
+    if _session is not None and not _session.closed:
+        await _session.close()
+    _session = None
+    _session_loop = None
+
+
+async def stream_download(url: str, headers: Optional[Dict[str, str]] = None, max_bytes: Optional[int] = None,
+                          budget: Optional[DownloadBudget] = None, timeout: Optional[float] = None,
+                          chunk_size: int = DEFAULT_CHUNK_SIZE) -> bytes:
+    """
+    Download `url` in chunks through the shared session and return its content.
+
+    The download is aborted as soon as it goes past `max_bytes` or exhausts `budget`,
+    announced Content-Length included, so oversized files are never held fully in memory.
+
+    :raises DownloadLimitExceeded: when a byte limit is exceeded
+    :raises aiohttp.ClientResponseError: on a non-2xx response
+    """
+    session = get_shared_session()
+    client_timeout = aiohttp.ClientTimeout(total=timeout) if timeout else None
+    async with session.get(url, headers=headers, timeout=client_timeout) as response:
+        response.raise_for_status()
+
+        content_length = response.content_length
+        if max_bytes is not None and content_length is not None and content_length > max_bytes:
+            raise DownloadLimitExceeded(f"File of {content_length} bytes exceeds the {max_bytes} bytes limit")
+
+        buffer = bytearray()
+        async for chunk in response.content.iter_chunked(chunk_size):
+            buffer.extend(chunk)
+            if max_bytes is not None and len(buffer) > max_bytes:
+                raise DownloadLimitExceeded(f"File exceeds the {max_bytes} bytes limit")
+            if budget is not None:
+                budget.consume(len(chunk))
+        return bytes(buffer)
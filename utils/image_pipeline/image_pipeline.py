@@ -0,0 +1,93 @@
+import base64
+import hashlib
+import io
+from typing import Optional
+
+from PIL import Image
+
+from utils.cache.async_ttl_cache import AsyncTTLCache
+
+SUPPORTED_FORMATS = ("JPEG", "WEBP")
+
+# Leading base64 characters of the image formats that can reach the models
+BASE64_MIME_PREFIXES = {
+    "/9j/": "image/jpeg",
+    "iVBORw0KGgo": "image/png",
+    "UklGR": "image/webp",
+    "R0lGOD": "image/gif",
+}
+
+
+def process_image_bytes(image_bytes: bytes, max_width: int, max_height: int, output_format: str, quality: int) -> bytes:
+    """
+    Downscale an image to fit within max_width x max_height and re-encode it in output_format.
+    The original bytes are kept when they are already in the target format, within bounds and smaller.
+    """
+    image = Image.open(io.BytesIO(image_bytes))
+    original_format = image.format
+    width, height = image.size
+    fits = width <= max_width and height <= max_height
+
+    if image.mode not in ("RGB", "L"):
+        image = image.convert("RGB")
+    if not fits:
+        ratio = min(max_width / width, max_height / height)
+        image = image.resize((max(1, int(width * ratio)), max(1, int(height * ratio))), Image.LANCZOS)
+
+    byte_arr = io.BytesIO()
+    image.save(byte_arr, format=output_format, quality=quality)
+    processed = byte_arr.getvalue()
+
+    if fits and original_format == output_format and len(image_bytes) <= len(processed):
+        return image_bytes
+    return processed
+
+
+class ImagePipeline:
+    """
+    Prepares user images before they are sent to vision models: downscaled to BOT_CONFIG.IMAGE_MAX_WIDTH/HEIGHT
+    and recompressed to IMAGE_OUTPUT_FORMAT at IMAGE_QUALITY on the CPU executor.
+    Results are cached by content hash, so an image shared again or replayed is processed once.
+    """
+
+    def __init__(self, global_manager):
+        from core.global_manager import GlobalManager
+        self.global_manager: GlobalManager = global_manager
+        self.logger = global_manager.logger
+        bot_config = global_manager.bot_config
+        self.max_width = bot_config.IMAGE_MAX_WIDTH
+        self.max_height = bot_config.IMAGE_MAX_HEIGHT
+        self.output_format = bot_config.IMAGE_OUTPUT_FORMAT.upper()
+        self.quality = bot_config.IMAGE_QUALITY
+        self.default_detail = bot_config.IMAGE_DETAIL
+        self.detail_per_model = bot_config.IMAGE_DETAIL_PER_MODEL or {}
+        if self.output_format not in SUPPORTED_FORMATS:
+            self.logger.warning(f"Unsupported IMAGE_OUTPUT_FORMAT '{self.output_format}', falling back to JPEG")
+            self.output_format = "JPEG"
+        self.cache = AsyncTTLCache(max_size=bot_config.IMAGE_CACHE_MAX_SIZE, ttl=bot_config.IMAGE_CACHE_TTL)
+
+    async def prepare_base64(self, image_bytes: bytes) -> str:
+        """Return the processed image as a base64 string, ready to be sent to a vision model."""
+        content_hash = hashlib.sha256(image_bytes).hexdigest()
+        return await self.cache.get_or_load(content_hash, lambda: self._process(image_bytes))
+
+    async def _process(self, image_bytes: bytes) -> str:
+        try:
+            processed = await self.global_manager.cpu_executor.run(
+                process_image_bytes, image_bytes, self.max_width, self.max_height, self.output_format, self.quality)
+            self.logger.debug(f"Image processed from {len(image_bytes)} to {len(processed)} bytes")
+        except Exception as e:
+            # Unreadable images are forwarded untouched, the model decides what to do with them
+            self.logger.warning(f"Image processing failed, sending the original image: {e}")
+            processed = image_bytes
+        return base64.b64encode(processed).decode('utf-8')
+
+    def get_detail(self, model_name: Optional[str] = None) -> str:
+        """Detail level requested from the vision model, configurable per model name."""
+        return self.detail_per_model.get(model_name, self.default_detail)
+
+    @staticmethod
+    def to_data_url(base64_image: str) -> str:
+        mime_type = next((mime for prefix, mime in BASE64_MIME_PREFIXES.items() if base64_image.startswith(prefix)),
+                         "image/jpeg")
+        return f"data:{mime_type};base64,{base64_image}"
@@ -223,6 +223,24 @@ class PluginManager:
                         self.logger.error(f"An error occurred while initializing the plugin <{plugin.__class__.__name__}>: {str(e)}")
                         self.logger.error(traceback.format_exc())
 
+    async def startup_plugins(self):
+        for category, category_plugins in self.plugins.items():
+            for plugin_type, plugins in category_plugins.items():
+                for plugin in plugins:
+                    try:
+                        await plugin.startup()
+                    except Exception as e:
+                        self.logger.error(f"An error occurred while starting the plugin <{plugin.__class__.__name__}>: {str(e)}")
+
+    async def shutdown_plugins(self):
+        for category, category_plugins in self.plugins.items():
+            for plugin_type, plugins in category_plugins.items():
+                for plugin in plugins:
+                    try:
+                        await plugin.shutdown()
+                    except Exception as e:
+                        self.logger.error(f"An error occurred while shutting down the plugin <{plugin.__class__.__name__}>: {str(e)}")
+
     def intialize_routes(self, app):
         # Create a new APIRouter instance
         router = APIRouter()
@@ -247,6 +265,10 @@ class PluginManager:
                         # Add the route to the router
                     router.add_api_route(path, plugin_instance.handle_request, methods=[method])
 
+                    for extra_path, endpoint, extra_methods in getattr(plugin_instance, 'additional_routes', []):
+                        router.add_api_route(extra_path, endpoint, methods=[m.lower() for m in extra_methods])
+                        self.logger.info(f"Route [{extra_methods}] {extra_path} set up with the user interactions plugin <{plugin_instance.__class__.__name__}>")
+
                 # Include the router in the FastAPI application
                 app.include_router(router)
                 self.logger.info(f"Route [{methods}] {path} set up with the user interactions plugin <{plugin_instance.__class__.__name__}>")
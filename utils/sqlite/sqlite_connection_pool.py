@@ -0,0 +1,99 @@
+import asyncio
+import os
+import queue
+import sqlite3
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from typing import Any, Callable, Iterator, Optional
+
+
+class SQLiteConnectionPool:
+    """
+    Fixed-size pool of connections to a SQLite database in WAL mode, usable from any event loop.
+
+    sqlite3 calls block, so `run` executes them in a thread pool with one worker per connection: each
+    worker takes a connection for the duration of the call, and a connection is never used by two
+    threads at once. WAL mode lets readers proceed while a write is in progress; writers wait for each
+    other up to `busy_timeout` seconds.
+
+    Connections are in autocommit mode: each statement is its own transaction, and `transaction`
+    groups statements in a single write transaction.
+    """
+
+    def __init__(self, database_path: str, size: int = 4, busy_timeout: float = 30.0):
+        self.database_path = database_path
+        self.size = max(1, size)
+        self.busy_timeout = busy_timeout
+        self._connections: "queue.Queue[sqlite3.Connection]" = queue.Queue()
+        self._created = 0
+        self._lock = threading.Lock()
+        self._executor: Optional[ThreadPoolExecutor] = None
+
+    def _connect(self) -> sqlite3.Connection:
+        directory = os.path.dirname(os.path.abspath(self.database_path))
+        os.makedirs(directory, exist_ok=True)
+        connection = sqlite3.connect(
+            self.database_path, timeout=self.busy_timeout, isolation_level=None, check_same_thread=False)
+        connection.execute("PRAGMA journal_mode=WAL")
+        # With WAL, NORMAL only syncs at checkpoints: a power loss may lose the last commits but never corrupts
+        connection.execute("PRAGMA synchronous=NORMAL")
+        return connection
+
+    def _acquire(self) -> sqlite3.Connection:
+        try:
+            return self._connections.get_nowait()
+        except queue.Empty:
+            pass
+        with self._lock:
+            create = self._created < self.size
+            if create:
+                self._created += 1
+        if not create:
+            return self._connections.get()
+        try:
+            return self._connect()
+        except Exception:
+            with self._lock:
+                self._created -= 1
+            raise
+
+    def run_sync(self, function: Callable[..., Any], *args) -> Any:
+        """Call `function(connection, *args)` with a pooled connection, in the calling thread."""
+        connection = self._acquire()
+        try:
+            return function(connection, *args)
+        finally:
+            self._connections.put(connection)
+
+    async def run(self, function: Callable[..., Any], *args) -> Any:
+        """Call `function(connection, *args)` with a pooled connection, off the event loop."""
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(max_workers=self.size, thread_name_prefix="sqlite")
+        return await asyncio.get_running_loop().run_in_executor(self._executor, self.run_sync, function, *args)
+
+    @staticmethod
+    @contextmanager
+    def transaction(connection: sqlite3.Connection) -> Iterator[sqlite3.Connection]:
+        """
+        Write transaction taking the database write lock at its start (BEGIN IMMEDIATE), so a
+        read-modify-write inside it cannot interleave with another writer, from this process or another.
+        """
+        connection.execute("BEGIN IMMEDIATE")
+        try:
+            yield connection
+        except BaseException:
+            connection.execute("ROLLBACK")
+            raise
+        connection.execute("COMMIT")
+
+    def close(self):
+        if self._executor is not None:
+            self._executor.shutdown(wait=True)
+            self._executor = None
+        while True:
+            try:
+                self._connections.get_nowait().close()
+            except queue.Empty:
+                break
+        self._created = 0